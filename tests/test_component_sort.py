@@ -0,0 +1,65 @@
+"""
+Component listing order served from idx_components_listing
+"""
+
+import sqlite3
+
+from velocitycmdb.app.blueprints.components.routes import (COMPONENT_COLUMNS, COMPONENT_FROM,
+                                                           COMPONENT_SORT, _component_page,
+                                                           _component_sort_key)
+from velocitycmdb.app.utils.listing import keyset_condition, order_clause
+from velocitycmdb.db.initializer import initialize_databases
+
+
+def _assets_db(tmp_path) -> sqlite3.Connection:
+    success, message = initialize_databases(str(tmp_path))
+    assert success, message
+    conn = sqlite3.connect(str(tmp_path / 'assets.db'))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_page_query_reads_the_listing_index(tmp_path):
+    conn = _assets_db(tmp_path)
+    try:
+        condition, params = keyset_condition(COMPONENT_SORT, ['core-01', 'psu', '', 'PSU 1', 1])
+        for query, query_params in (
+                (f"SELECT {COMPONENT_COLUMNS} {COMPONENT_FROM}{order_clause(COMPONENT_SORT)} LIMIT 51", []),
+                (f"SELECT {COMPONENT_COLUMNS} {COMPONENT_FROM} WHERE {condition}"
+                 f"{order_clause(COMPONENT_SORT, reverse=True)} LIMIT 51", params)):
+            plan = ' | '.join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, query_params))
+            assert 'idx_components_listing' in plan, plan
+            assert 'TEMP B-TREE' not in plan, plan
+    finally:
+        conn.close()
+
+
+def test_cursor_pages_follow_device_names(tmp_path):
+    conn = _assets_db(tmp_path)
+    try:
+        # A component loaded before its device, then a rename
+        conn.execute("INSERT INTO components (device_id, name, type) VALUES (3, 'PSU 1', 'psu')")
+        for device_id, name in ((1, 'edge-01'), (2, 'core-01'), (3, 'access-01')):
+            conn.execute("INSERT INTO devices (id, name, normalized_name) VALUES (?, ?, ?)",
+                         (device_id, name, name))
+            for position, component_type in (('1', 'fan'), (None, 'psu'), ('2', None)):
+                conn.execute("INSERT INTO components (device_id, name, type, position) VALUES (?, ?, ?, ?)",
+                             (device_id, f'{component_type} {position}', component_type, position))
+        conn.execute("UPDATE devices SET name = 'zz-edge-01' WHERE id = 1")
+
+        cursor = conn.cursor()
+        pages, after = [], None
+        while True:
+            components, more = _component_page(cursor, [], [], 2, after=after)
+            pages.extend(components)
+            if not more:
+                break
+            after = _component_sort_key(components[-1])
+
+        expected = [dict(row) for row in conn.execute(
+            f"SELECT {COMPONENT_COLUMNS} {COMPONENT_FROM} "
+            "ORDER BY d.name, COALESCE(c.type, ''), COALESCE(c.position, ''), c.name, c.id")]
+        assert pages == expected
+        assert pages[-1]['device_name'] == 'zz-edge-01'
+    finally:
+        conn.close()
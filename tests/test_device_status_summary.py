@@ -0,0 +1,130 @@
+"""
+device_status_summary against the base tables it materializes
+
+Loaders write with INSERT OR IGNORE / INSERT OR REPLACE, whose conflict
+clause overrides the one in any trigger they fire. Every summary row has to
+match the counts and names computed directly from the base tables anyway.
+"""
+
+import sqlite3
+
+from velocitycmdb.db.initializer import initialize_databases
+
+EXACT_SQL = """
+    SELECT
+        d.id,
+        d.name,
+        d.normalized_name,
+        s.name,
+        v.name,
+        (SELECT COUNT(*) FROM device_captures_current dcc WHERE dcc.device_id = d.id),
+        (SELECT COUNT(DISTINCT dcc.capture_type) FROM device_captures_current dcc
+         WHERE dcc.device_id = d.id),
+        (SELECT MAX(fe.extraction_timestamp) FROM fingerprint_extractions fe
+         WHERE fe.device_id = d.id),
+        (SELECT MAX(fe.extraction_success) FROM fingerprint_extractions fe
+         WHERE fe.device_id = d.id)
+    FROM devices d
+    LEFT JOIN sites s ON d.site_code = s.code
+    LEFT JOIN vendors v ON d.vendor_id = v.id
+    ORDER BY d.id
+"""
+
+SUMMARY_SQL = """
+    SELECT id, name, normalized_name, site_name, vendor_name, current_captures,
+           capture_types, last_fingerprint, last_fingerprint_success
+    FROM device_status_summary
+    ORDER BY id
+"""
+
+
+def _assets_db(tmp_path) -> sqlite3.Connection:
+    success, message = initialize_databases(str(tmp_path))
+    assert success, message
+    return sqlite3.connect(str(tmp_path / 'assets.db'))
+
+
+def _assert_exact(conn: sqlite3.Connection):
+    assert conn.execute(SUMMARY_SQL).fetchall() == conn.execute(EXACT_SQL).fetchall()
+
+
+def _add_capture(conn, verb, device_id, capture_type):
+    conn.execute(f"""
+        {verb} INTO device_captures_current (device_id, capture_type, file_path, capture_timestamp)
+        VALUES (?, ?, ?, datetime('now'))
+    """, (device_id, capture_type, f'{capture_type}/{device_id}.txt'))
+
+
+def test_summary_matches_base_tables_under_conflict_clauses(tmp_path):
+    conn = _assets_db(tmp_path)
+    try:
+        conn.execute("INSERT INTO devices (id, name, normalized_name, site_code, vendor_id) "
+                     "VALUES (1, 'core-01', 'core-01', 'dc1', 1)")
+        conn.execute("INSERT INTO devices (id, name, normalized_name, site_code, vendor_id) "
+                     "VALUES (2, 'edge-01', 'edge-01', 'dc1', 1)")
+        _assert_exact(conn)
+
+        # Reference rows arriving after the devices that point at them
+        conn.execute("INSERT OR IGNORE INTO sites (code, name) VALUES ('dc1', 'Datacenter 1')")
+        conn.execute("INSERT OR IGNORE INTO vendors (id, name) VALUES (1, 'Cisco')")
+        _assert_exact(conn)
+        conn.execute("INSERT OR REPLACE INTO sites (code, name) VALUES ('dc1', 'Datacenter One')")
+        _assert_exact(conn)
+
+        # New captures under OR IGNORE, duplicates ignored and replaced
+        _add_capture(conn, 'INSERT OR IGNORE', 1, 'configs')
+        _add_capture(conn, 'INSERT OR IGNORE', 1, 'version')
+        _add_capture(conn, 'INSERT OR IGNORE', 1, 'configs')
+        _add_capture(conn, 'INSERT OR REPLACE', 1, 'version')
+        _add_capture(conn, 'INSERT OR REPLACE', 2, 'arp')
+        _assert_exact(conn)
+
+        for device_id, timestamp, success in ((1, '2026-01-01', 0), (1, '2026-02-01', 1), (2, '2026-01-15', 0)):
+            conn.execute("INSERT OR IGNORE INTO fingerprint_extractions "
+                         "(device_id, extraction_timestamp, extraction_success) VALUES (?, ?, ?)",
+                         (device_id, timestamp, success))
+        _assert_exact(conn)
+
+        # Re-importing a device under a new id replaces the old row by normalized_name
+        conn.execute("INSERT OR REPLACE INTO devices (id, name, normalized_name, site_code, vendor_id) "
+                     "VALUES (3, 'EDGE-01', 'edge-01', 'dc1', 1)")
+        conn.execute("DELETE FROM device_captures_current WHERE device_id = 2")
+        conn.execute("DELETE FROM fingerprint_extractions WHERE device_id = 2")
+        _assert_exact(conn)
+
+        conn.execute("DELETE FROM device_captures_current WHERE device_id = 1 AND capture_type = 'version'")
+        conn.execute("DELETE FROM sites WHERE code = 'dc1'")
+        _assert_exact(conn)
+    finally:
+        conn.close()
+
+
+def test_replace_triggers_are_migrated(tmp_path):
+    """A database maintained by the INSERT OR REPLACE triggers gets the current ones and a backfill"""
+    from velocitycmdb.db.device_status import ensure_device_status_summary
+
+    conn = _assets_db(tmp_path)
+    try:
+        conn.execute("INSERT INTO devices (id, name, normalized_name) VALUES (1, 'core-01', 'core-01')")
+        conn.execute("DROP TRIGGER tr_status_summary_capture_insert")
+        conn.execute("""
+            CREATE TRIGGER tr_status_summary_capture_insert
+            AFTER INSERT ON device_captures_current
+            BEGIN
+                INSERT OR REPLACE INTO device_status_summary (id, current_captures)
+                VALUES (NEW.device_id, 0);
+            END
+        """)
+        _add_capture(conn, 'INSERT OR IGNORE', 1, 'configs')
+        conn.commit()
+
+        ensure_device_status_summary(conn)
+
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND sql LIKE '%INSERT OR REPLACE INTO device_status_summary%'").fetchone()[0] == 0
+        _assert_exact(conn)
+        _add_capture(conn, 'INSERT OR IGNORE', 1, 'version')
+        _assert_exact(conn)
+    finally:
+        conn.close()
@@ -0,0 +1,67 @@
+"""
+fix_fts.py against a database holding compressed snapshot history
+
+Runs the script the way the maintenance "Rebuild FTS" job does, then deletes
+a compressed snapshot and checks capture_fts still agrees with
+capture_snapshots.
+"""
+
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import velocitycmdb
+from velocitycmdb.db.initializer import initialize_databases
+from velocitycmdb.services.capture_store import CaptureStore
+from velocitycmdb.services.script_env import script_env
+
+FIX_FTS = Path(velocitycmdb.__file__).resolve().parent / 'fix_fts.py'
+
+
+def _build_db(data_dir: Path) -> Path:
+    """assets.db with one device whose older config snapshot is compressed"""
+    success, message = initialize_databases(str(data_dir))
+    assert success, message
+    db_path = data_dir / 'assets.db'
+
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("INSERT INTO devices (id, name, normalized_name) VALUES (1, 'core-01', 'core-01')")
+    for snapshot_id, content in ((1, 'hostname core-01\nsnmp-server community oldsecret\n'),
+                                 (2, 'hostname core-01\nsnmp-server community newsecret\n')):
+        conn.execute("""
+            INSERT INTO capture_snapshots (id, device_id, capture_type, captured_at,
+                                           file_path, content, content_hash)
+            VALUES (?, 1, 'configs', datetime('now'), 'core-01.txt', ?, ?)
+        """, (snapshot_id, content, f'hash{snapshot_id}'))
+    conn.execute("""
+        INSERT INTO device_captures_current (device_id, capture_type, file_path,
+                                             capture_timestamp, latest_snapshot_id)
+        VALUES (1, 'configs', 'core-01.txt', datetime('now'), 2)
+    """)
+    CaptureStore(conn).compress_snapshot(1)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def test_delete_compressed_snapshot_after_rebuild(tmp_path):
+    db_path = _build_db(tmp_path)
+
+    result = subprocess.run([sys.executable, str(FIX_FTS), str(db_path)],
+                            capture_output=True, text=True, env=script_env())
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        assert conn.execute("SELECT compressed FROM capture_snapshots WHERE id = 1").fetchone()[0] == 1
+
+        conn.execute("DELETE FROM capture_snapshots WHERE id = 1")
+        conn.commit()
+
+        rowids = [row[0] for row in conn.execute(
+            "SELECT rowid FROM capture_fts WHERE capture_fts MATCH ?", ('"secret"',))]
+        assert rowids == [2]
+        conn.execute("INSERT INTO capture_fts(capture_fts, rank) VALUES ('integrity-check', 1)")
+    finally:
+        conn.close()
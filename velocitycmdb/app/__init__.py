@@ -84,6 +84,25 @@ def create_app(config_name='development'):
     app.config['USERS_DATABASE'] = os.path.join(data_dir, 'users.db')
     app.config['VELOCITYCMDB_DATA_DIR'] = data_dir
 
+    # Inventory pages read the materialized device status summary, search
+    # through the trigram indexes and sort components on a stored key; create
+    # and backfill them on databases initialized before they existed
+    if os.path.exists(app.config['DATABASE']):
+        try:
+            import sqlite3
+            from velocitycmdb.db.component_sort import ensure_component_sort
+            from velocitycmdb.db.device_status import ensure_device_status_summary
+            from velocitycmdb.db.search_index import ensure_search_indexes
+            conn = sqlite3.connect(app.config['DATABASE'])
+            try:
+                ensure_device_status_summary(conn)
+                ensure_search_indexes(conn)
+                ensure_component_sort(conn)
+            finally:
+                conn.close()
+        except Exception as e:
+            app.logger.warning(f"Could not prepare device listing tables: {e}")
+
     # Directory paths from config (with defaults)
     app.config['CAPTURE_DIR'] = expand_path(
         paths_config.get('capture_dir', os.path.join(data_dir, 'capture'))
@@ -207,6 +226,10 @@ def create_app(config_name='development'):
 
         return None
 
+    # Edits through the app move the data version cached responses are keyed on
+    from velocitycmdb.app.utils import response_cache
+    response_cache.init_app(app)
+
     # DEPRECATED: Legacy paths - keep for backwards compatibility
     app.config['SESSIONS_YAML'] = 'pcng/sessions.yaml'
 
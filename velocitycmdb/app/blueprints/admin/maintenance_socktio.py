@@ -9,12 +9,16 @@ Component inventory operations call db_loader_inventory.py CLI
 from flask import session
 from flask_socketio import emit
 from pathlib import Path
+import sqlite3
 import subprocess
 import threading
 import logging
 import re
 import sys
 
+from velocitycmdb.db.data_version import bump_data_version
+from velocitycmdb.services.script_env import script_env
+
 logger = logging.getLogger(__name__)
 
 # Consistent default for all data directory references
@@ -65,6 +69,16 @@ def register_maintenance_socketio_handlers(socketio, app):
             return False
         return True
 
+    def bump_version(config_key, scope):
+        """Move a database's data version after a job changed it, so cached pages refresh"""
+        db_path = app.config.get(config_key)
+        if not db_path or not Path(db_path).exists():
+            return
+        try:
+            bump_data_version(db_path, scope)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not bump data version of {db_path}: {e}")
+
     def progress_callback(update):
         """Standard progress callback for service operations"""
         emit('maintenance_progress', {
@@ -143,7 +157,8 @@ def register_maintenance_socketio_handlers(socketio, app):
                 stderr=subprocess.PIPE,  # Capture stderr separately
                 text=True,
                 bufsize=1,
-                cwd=str(script_path.parent)  # Run from script directory so it finds tfsm_templates.db
+                cwd=str(script_path.parent),  # Run from script directory so it finds tfsm_templates.db
+                env=script_env()
             )
 
             output_lines = []
@@ -186,6 +201,8 @@ def register_maintenance_socketio_handlers(socketio, app):
             process.wait()
 
             if process.returncode == 0:
+                if operation_name != 'inventory_analyze' and '--dry-run' not in args:
+                    bump_version('DATABASE', 'inventory')
                 socketio.emit('maintenance_complete', {
                     'success': True,
                     'operation': operation_name,
@@ -346,6 +363,7 @@ def register_maintenance_socketio_handlers(socketio, app):
             result = service.load_arp_data(progress_callback=progress_callback)
 
             if result.get('success'):
+                bump_version('ARP_DATABASE', 'arp')
                 emit('maintenance_complete', {
                     'success': True,
                     'operation': 'arp',
@@ -384,6 +402,7 @@ def register_maintenance_socketio_handlers(socketio, app):
             )
 
             if result.get('success'):
+                bump_version('DATABASE', 'captures')
                 emit('maintenance_complete', {
                     'success': True,
                     'operation': 'captures',
@@ -568,6 +587,10 @@ def register_maintenance_socketio_handlers(socketio, app):
             result = service.reset_database(confirm=True, progress_callback=progress_callback)
 
             if result.get('success'):
+                # The recreated databases have new ids; bumping also covers a
+                # reset that emptied them in place
+                bump_version('DATABASE', 'reset')
+                bump_version('ARP_DATABASE', 'reset')
                 emit('maintenance_reset_complete', {'success': True})
             else:
                 emit('maintenance_error', {'error': result.get('error', 'Reset failed')})
@@ -10,6 +10,9 @@ import sqlite3
 import re
 from functools import wraps
 
+from velocitycmdb.app.utils.response_cache import cached_response
+from velocitycmdb.db.mac_key import mac_key_range, mac_to_key
+
 # OUI Vendor Lookup - pip install mac-vendor-lookup
 try:
     from mac_vendor_lookup import MacLookup
@@ -77,29 +80,6 @@ def is_partial_mac(mac: str) -> bool:
     return 0 < len(clean) < 12
 
 
-def mac_to_search_pattern(mac: str) -> str:
-    """
-    Convert MAC input to SQL LIKE pattern for partial matching.
-    Handles partial MACs and OUI prefixes.
-    """
-    # Remove separators but keep the hex chars
-    clean = re.sub(r'[^a-fA-F0-9]', '', mac.strip()).lower()
-
-    if not clean:
-        return ""
-
-    # Build pattern with colons inserted
-    # For partial, we match the beginning
-    parts = [clean[i:i + 2] for i in range(0, len(clean), 2)]
-
-    # Handle odd-length input (partial last octet)
-    if len(clean) % 2 == 1:
-        parts[-1] = clean[-1]
-
-    pattern = ':'.join(parts)
-    return f"{pattern}%"
-
-
 # =============================================================================
 # OUI Vendor Lookup
 # =============================================================================
@@ -159,6 +139,7 @@ def search_page():
 
 
 @arp_bp.route('/api/stats')
+@cached_response('ARP_DATABASE')
 def api_stats():
     """Get database statistics"""
     try:
@@ -324,59 +305,55 @@ def api_search_mac(mac):
         db = get_db()
         cursor = db.cursor()
 
-        # Build query
-        if history:
-            base_query = """
-                SELECT 
-                    ae.id,
-                    d.hostname,
-                    d.device_type,
-                    d.vendor,
-                    d.site_code,
-                    c.context_name,
-                    c.context_type,
-                    ae.ip_address,
-                    ae.mac_address,
-                    ae.mac_address_raw,
-                    ae.interface_name,
-                    ae.entry_type,
-                    ae.age,
-                    ae.protocol,
-                    ae.capture_timestamp,
-                    ae.source_file,
-                    ae.is_current
-                FROM arp_entries ae
-                JOIN devices d ON ae.device_id = d.id
-                JOIN contexts c ON ae.context_id = c.id
-            """
-        else:
-            base_query = "SELECT * FROM v_current_arp"
+        # Query arp_entries directly so the mac_key filter uses
+        # idx_arp_entries_mac_key (exact = seek, partial/OUI = range scan)
+        base_query = """
+            SELECT 
+                ae.id,
+                d.hostname,
+                d.device_type,
+                d.vendor,
+                d.site_code,
+                c.context_name,
+                c.context_type,
+                ae.ip_address,
+                ae.mac_address,
+                ae.mac_address_raw,
+                ae.interface_name,
+                ae.entry_type,
+                ae.age,
+                ae.protocol,
+                ae.capture_timestamp,
+                ae.source_file,
+                ae.is_current
+            FROM arp_entries ae
+            JOIN devices d ON ae.device_id = d.id
+            JOIN contexts c ON ae.context_id = c.id
+        """
 
-        if exact and normalized:
-            # Exact match on normalized MAC
-            where_clause = "WHERE mac_address = ?"
-            params = [normalized]
+        if normalized and (exact or not is_partial):
+            # Exact match on the canonical key
+            where_clause = "WHERE ae.mac_key = ?"
+            params = [mac_to_key(normalized)]
             match_type = 'exact'
-        elif is_partial or not normalized:
-            # Partial/OUI search
-            pattern = mac_to_search_pattern(mac)
-            if not pattern:
+        else:
+            # Partial/OUI search as a key range
+            key_range = mac_key_range(mac)
+            if not key_range:
                 return jsonify({
                     'success': False,
                     'error': 'Invalid MAC address format'
                 }), 400
 
-            # Search both normalized and raw columns
-            where_clause = "WHERE mac_address LIKE ? OR mac_address_raw LIKE ?"
-            params = [pattern, f"%{mac.strip()}%"]
+            where_clause = "WHERE ae.mac_key >= ? AND ae.mac_key < ?"
+            params = list(key_range)
             match_type = 'partial'
-        else:
-            # Full MAC provided but not exact - still do exact on normalized
-            where_clause = "WHERE mac_address = ?"
-            params = [normalized]
-            match_type = 'exact'
 
-        query = f"{base_query} {where_clause} ORDER BY capture_timestamp DESC LIMIT 500"
+        if not history:
+            # Unary + keeps the planner on the mac_key index rather than is_current
+            where_clause += " AND +ae.is_current = 1"
+
+        query = f"{base_query} {where_clause} ORDER BY ae.capture_timestamp DESC LIMIT 500"
 
         cursor.execute(query, params)
         rows = cursor.fetchall()
@@ -568,12 +545,26 @@ def api_mac_history(mac):
         db = get_db()
         cursor = db.cursor()
 
-        # Use the mac history view
+        mac_key = mac_to_key(normalized)
+
+        # Same columns as v_mac_history, filtered on the indexed key
         cursor.execute("""
-            SELECT * FROM v_mac_history 
-            WHERE mac_address = ?
-            ORDER BY capture_timestamp DESC
-        """, [normalized])
+            SELECT
+                ae.mac_address,
+                ae.ip_address,
+                d.hostname,
+                c.context_name,
+                c.context_type,
+                ae.interface_name,
+                ae.capture_timestamp,
+                ae.entry_type,
+                COUNT(*) OVER () as total_occurrences
+            FROM arp_entries ae
+            JOIN devices d ON ae.device_id = d.id
+            JOIN contexts c ON ae.context_id = c.id
+            WHERE ae.mac_key = ?
+            ORDER BY ae.capture_timestamp DESC
+        """, [mac_key])
 
         rows = cursor.fetchall()
         history = [dict(row) for row in rows]
@@ -581,8 +572,8 @@ def api_mac_history(mac):
         # Summarize unique IPs seen
         cursor.execute("""
             SELECT DISTINCT ip_address FROM arp_entries 
-            WHERE mac_address = ?
-        """, [normalized])
+            WHERE mac_key = ?
+        """, [mac_key])
         unique_ips = [row[0] for row in cursor.fetchall()]
 
         # Summarize devices seen on
@@ -590,8 +581,8 @@ def api_mac_history(mac):
             SELECT DISTINCT d.hostname 
             FROM arp_entries ae
             JOIN devices d ON ae.device_id = d.id
-            WHERE ae.mac_address = ?
-        """, [normalized])
+            WHERE ae.mac_key = ?
+        """, [mac_key])
         devices_seen = [row[0] for row in cursor.fetchall()]
 
         return jsonify({
@@ -2,9 +2,12 @@
 import json
 import os
 
-from flask import render_template, request, jsonify, redirect, url_for, flash
+from flask import render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
 from . import assets_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.app.utils.listing import (csv_stream, decode_cursor, encode_cursor,
+                                             keyset_condition, order_clause, search_condition)
+from velocitycmdb.services.capture_store import CaptureStore
 import sqlite3
 import math
 import re
@@ -15,102 +18,155 @@ from ..notes.models import NoteAssociation
 
 # ========== EXISTING READ OPERATIONS ==========
 
+DEVICE_COLUMNS = """
+    id, name, normalized_name, site_name, site_code,
+    vendor_name, device_type_name, model, os_version,
+    management_ip, is_stack, stack_count, have_sn,
+    current_captures, capture_types,
+    last_fingerprint, last_fingerprint_success,
+    last_updated, role_name, is_infrastructure
+"""
+
+# Listing order; ends in id so every cursor names one row
+DEVICE_SORT = [("COALESCE(last_updated, '')", 'DESC'), ('name', 'ASC'), ('id', 'ASC')]
+
+
+def _device_filter_args():
+    return {
+        'search': request.args.get('search', '').strip(),
+        'vendor': request.args.get('vendor', ''),
+        'site': request.args.get('site', ''),
+        'role': request.args.get('role', ''),
+        'stack': request.args.get('stack', ''),
+    }
+
+
+def _device_filters(conn, filters):
+    """WHERE conditions and params for the device listing filters"""
+    conditions = []
+    params = []
+
+    if filters['search']:
+        condition, search_params = search_condition(
+            conn, filters['search'], 'device_search_fts', 'id',
+            ['name', 'normalized_name', 'management_ip', 'model'])
+        conditions.append(condition)
+        params.extend(search_params)
+
+    if filters['vendor']:
+        conditions.append("vendor_name = ?")
+        params.append(filters['vendor'])
+
+    if filters['site']:
+        conditions.append("site_code = ?")
+        params.append(filters['site'])
+
+    if filters['role']:
+        conditions.append("role_name = ?")
+        params.append(filters['role'])
+
+    if filters['stack'] == 'yes':
+        conditions.append("is_stack = 1")
+    elif filters['stack'] == 'no':
+        conditions.append("is_stack = 0")
+
+    return conditions, params
+
+
+def _device_sort_key(device):
+    return [device['last_updated'] or '', device['name'], device['id']]
+
+
+def _device_page(cursor, conditions, params, limit, after=None, before=None, offset=0):
+    """
+    One page of devices in listing order
+
+    With an `after` or `before` cursor the page is found by seeking on the
+    sort index (keyset); otherwise by OFFSET, used for jumps to a page number.
+
+    Returns:
+        (devices, more) - more is True when rows exist beyond the page in
+        the direction read
+    """
+    conditions = list(conditions)
+    params = list(params)
+    reverse = before is not None
+    key = before if reverse else after
+    if key is not None:
+        condition, key_params = keyset_condition(DEVICE_SORT, key, after=not reverse)
+        conditions.append(condition)
+        params.extend(key_params)
+
+    query = f"SELECT {DEVICE_COLUMNS} FROM device_status_summary"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += order_clause(DEVICE_SORT, reverse=reverse) + " LIMIT ?"
+    params.append(limit + 1)
+    if key is None and offset:
+        query += " OFFSET ?"
+        params.append(offset)
+
+    cursor.execute(query, params)
+    devices = [dict(row) for row in cursor.fetchall()]
+    more = len(devices) > limit
+    devices = devices[:limit]
+    if reverse:
+        devices.reverse()
+    return devices, more
+
+
 @assets_bp.route('/devices')
 def devices():
     """Device inventory listing with pagination and filtering"""
     # Get query parameters
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 25, type=int)
-    search = request.args.get('search', '').strip()
-    vendor_filter = request.args.get('vendor', '')
-    site_filter = request.args.get('site', '')
-    role_filter = request.args.get('role', '')
-    stack_filter = request.args.get('stack', '')
+    filters = _device_filter_args()
+    after = decode_cursor(request.args.get('after'), len(DEVICE_SORT))
+    before = decode_cursor(request.args.get('before'), len(DEVICE_SORT))
 
     # Ensure reasonable pagination limits
     per_page = min(max(per_page, 10), 100)
+    page = max(page, 1)
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-
-            # Base query using the v_device_status view
-            base_query = """
-                SELECT 
-                    id, name, normalized_name, site_name, site_code,
-                    vendor_name, device_type_name, model, os_version,
-                    management_ip, is_stack, stack_count, have_sn,
-                    current_captures, capture_types,
-                    last_fingerprint, last_fingerprint_success,
-                    last_updated, role_name, is_infrastructure
-                FROM v_device_status
-                WHERE 1=1
-            """
-
-            # Count query for pagination
-            count_query = """
-                SELECT COUNT(*) FROM v_device_status WHERE 1=1
-            """
-
-            # Build WHERE conditions
-            conditions = []
-            params = []
-
-            if search:
-                conditions.append("(name LIKE ? OR normalized_name LIKE ? OR management_ip LIKE ? OR model LIKE ?)")
-                search_param = f"%{search}%"
-                params.extend([search_param, search_param, search_param, search_param])
-
-            if vendor_filter:
-                conditions.append("vendor_name = ?")
-                params.append(vendor_filter)
-
-            if site_filter:
-                conditions.append("site_code = ?")
-                params.append(site_filter)
-
-            if role_filter:
-                conditions.append("role_name = ?")
-                params.append(role_filter)
-
-            if stack_filter == 'yes':
-                conditions.append("is_stack = 1")
-            elif stack_filter == 'no':
-                conditions.append("is_stack = 0")
-
-            # Apply conditions
-            if conditions:
-                where_clause = " AND " + " AND ".join(conditions)
-                base_query += where_clause
-                count_query += where_clause
+            conditions, params = _device_filters(conn, filters)
 
             # Get total count
+            count_query = "SELECT COUNT(*) FROM device_status_summary"
+            if conditions:
+                count_query += " WHERE " + " AND ".join(conditions)
             cursor.execute(count_query, params)
             total_devices = cursor.fetchone()[0]
 
             # Calculate pagination
             total_pages = math.ceil(total_devices / per_page)
-            offset = (page - 1) * per_page
-
-            # Add ordering and pagination
-            base_query += " ORDER BY last_updated DESC, name LIMIT ? OFFSET ?"
-            params.extend([per_page, offset])
 
-            # Execute main query
-            cursor.execute(base_query, params)
-            devices = [dict(row) for row in cursor.fetchall()]
+            # Prev/next links carry a cursor; page numbers still jump by OFFSET
+            if before is not None:
+                devices, more = _device_page(cursor, conditions, params, per_page, before=before)
+                has_prev, has_next = more, True
+            elif after is not None:
+                devices, more = _device_page(cursor, conditions, params, per_page, after=after)
+                has_prev, has_next = True, more
+            else:
+                devices, more = _device_page(cursor, conditions, params, per_page,
+                                             offset=(page - 1) * per_page)
+                has_prev, has_next = page > 1, more
 
             # Get filter options
             cursor.execute(
-                "SELECT DISTINCT vendor_name FROM v_device_status WHERE vendor_name IS NOT NULL ORDER BY vendor_name")
+                "SELECT DISTINCT vendor_name FROM device_status_summary WHERE vendor_name IS NOT NULL ORDER BY vendor_name")
             vendors = [row[0] for row in cursor.fetchall()]
 
             cursor.execute(
-                "SELECT DISTINCT site_code FROM v_device_status WHERE site_code IS NOT NULL ORDER BY site_code")
+                "SELECT DISTINCT site_code FROM device_status_summary WHERE site_code IS NOT NULL ORDER BY site_code")
             sites = [row[0] for row in cursor.fetchall()]
 
             cursor.execute(
-                "SELECT DISTINCT role_name FROM v_device_status WHERE role_name IS NOT NULL ORDER BY role_name")
+                "SELECT DISTINCT role_name FROM device_status_summary WHERE role_name IS NOT NULL ORDER BY role_name")
             roles = [row[0] for row in cursor.fetchall()]
 
             # Pagination info
@@ -119,10 +175,12 @@ def devices():
                 'per_page': per_page,
                 'total': total_devices,
                 'total_pages': total_pages,
-                'has_prev': page > 1,
-                'has_next': page < total_pages,
+                'has_prev': has_prev and bool(devices),
+                'has_next': has_next and bool(devices),
                 'prev_num': page - 1 if page > 1 else None,
-                'next_num': page + 1 if page < total_pages else None
+                'next_num': page + 1 if has_next else None,
+                'prev_cursor': encode_cursor(_device_sort_key(devices[0])) if devices else None,
+                'next_cursor': encode_cursor(_device_sort_key(devices[-1])) if devices else None,
             }
 
             return render_template('assets/devices.html',
@@ -131,13 +189,7 @@ def devices():
                                    vendors=vendors,
                                    sites=sites,
                                    roles=roles,
-                                   filters={
-                                       'search': search,
-                                       'vendor': vendor_filter,
-                                       'site': site_filter,
-                                       'role': role_filter,
-                                       'stack': stack_filter
-                                   })
+                                   filters=filters)
 
     except Exception as e:
         flash(f'Database error: {str(e)}', 'error')
@@ -148,6 +200,35 @@ def devices():
                                filters={})
 
 
+@assets_bp.route('/api/devices')
+def api_devices():
+    """
+    Device listing for API clients, paged by cursor
+
+    Query params: the /devices filters, limit (1-500, default 100) and
+    cursor (next_cursor from the previous response).
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    token = request.args.get('cursor')
+    after = decode_cursor(token, len(DEVICE_SORT))
+    if token and after is None:
+        return jsonify({'error': 'Invalid cursor'}), 400
+
+    try:
+        with get_db_connection() as conn:
+            conditions, params = _device_filters(conn, _device_filter_args())
+            devices, more = _device_page(conn.cursor(), conditions, params, limit, after=after)
+
+        return jsonify({
+            'items': devices,
+            'has_more': more,
+            'next_cursor': encode_cursor(_device_sort_key(devices[-1])) if more else None,
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @assets_bp.route('/devices/<int:device_id>')
 def device_detail(device_id):
     """Device detail page with full information"""
@@ -156,7 +237,7 @@ def device_detail(device_id):
             cursor = conn.cursor()
 
             # Get device details from view
-            cursor.execute("SELECT * FROM v_device_status WHERE id = ?", (device_id,))
+            cursor.execute("SELECT * FROM device_status_summary WHERE id = ?", (device_id,))
             device = cursor.fetchone()
 
             if not device:
@@ -488,6 +569,13 @@ def device_delete(device_id):
             # Delete current captures
             cursor.execute("DELETE FROM device_captures_current WHERE device_id = ?", (device_id,))
 
+            # Delete structured ARP/MAC/route rows parsed from its snapshots
+            for table in ('arp_table_entries', 'mac_table_entries', 'route_entries'):
+                try:
+                    cursor.execute(f"DELETE FROM {table} WHERE device_id = ?", (device_id,))
+                except sqlite3.OperationalError:
+                    pass  # Table not created yet on older databases
+
             # Delete fingerprint extractions
             cursor.execute("DELETE FROM fingerprint_extractions WHERE device_id = ?", (device_id,))
 
@@ -518,87 +606,26 @@ def device_delete(device_id):
 
 @assets_bp.route('/devices/export')
 def devices_export():
-    """Export devices to CSV with current filters"""
-    from flask import make_response
-    import io
-    import csv
-
-    # Get filter parameters (same as main devices route)
-    search = request.args.get('search', '').strip()
-    vendor_filter = request.args.get('vendor', '')
-    site_filter = request.args.get('site', '')
-    role_filter = request.args.get('role', '')
-    stack_filter = request.args.get('stack', '')
+    """Export devices to CSV with current filters, streamed as rows are read"""
+    filters = _device_filter_args()
 
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
+            conditions, params = _device_filters(conn, filters)
+    except Exception as e:
+        flash(f'Export error: {str(e)}', 'error')
+        return redirect(url_for('assets.devices'))
 
-            # Use same query logic as devices route
-            base_query = """
-                SELECT 
-                    name, normalized_name, site_code, site_name,
-                    vendor_name, device_type_name, model, os_version,
-                    management_ip, role_name, is_infrastructure,
-                    is_stack, stack_count, have_sn,
-                    current_captures, capture_types,
-                    last_fingerprint, last_fingerprint_success,
-                    last_updated
-                FROM v_device_status
-                WHERE 1=1
-            """
-
-            conditions = []
-            params = []
-
-            if search:
-                conditions.append("(name LIKE ? OR normalized_name LIKE ? OR management_ip LIKE ? OR model LIKE ?)")
-                search_param = f"%{search}%"
-                params.extend([search_param, search_param, search_param, search_param])
-
-            if vendor_filter:
-                conditions.append("vendor_name = ?")
-                params.append(vendor_filter)
-
-            if site_filter:
-                conditions.append("site_code = ?")
-                params.append(site_filter)
-
-            if role_filter:
-                conditions.append("role_name = ?")
-                params.append(role_filter)
-
-            if stack_filter == 'yes':
-                conditions.append("is_stack = 1")
-            elif stack_filter == 'no':
-                conditions.append("is_stack = 0")
+    query = f"SELECT {DEVICE_COLUMNS} FROM device_status_summary"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += order_clause(DEVICE_SORT)
 
-            if conditions:
-                base_query += " AND " + " AND ".join(conditions)
-
-            base_query += " ORDER BY last_updated DESC, name"
-
-            cursor.execute(base_query, params)
-            devices = [dict(row) for row in cursor.fetchall()]
-
-            # Create CSV in memory
-            output = io.StringIO()
-            writer = csv.writer(output)
-
-            # Write header
-            writer.writerow([
-                'Name', 'Normalized Name', 'Site Code', 'Site Name',
-                'Vendor', 'Device Type', 'Model', 'OS Version',
-                'Management IP', 'Role', 'Is Infrastructure',
-                'Is Stack', 'Stack Count', 'Has Serials',
-                'Current Captures', 'Capture Types',
-                'Last Fingerprint', 'Fingerprint Success',
-                'Last Updated'
-            ])
-
-            # Write device rows
-            for device in devices:
-                writer.writerow([
+    def rows():
+        # Own connection: the request's work is done before the body streams
+        with get_db_connection() as conn:
+            for device in conn.execute(query, params):
+                yield [
                     device['name'],
                     device['normalized_name'],
                     device['site_code'] or '',
@@ -618,36 +645,38 @@ def devices_export():
                     device['last_fingerprint'] or '',
                     'Yes' if device['last_fingerprint_success'] else 'No',
                     device['last_updated'] or ''
-                ])
-
-            # Create response
-            output.seek(0)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-            # Build filename based on filters
-            filename_parts = ['devices']
-            if search:
-                filename_parts.append(f'search_{search[:20]}')
-            if vendor_filter:
-                filename_parts.append(vendor_filter)
-            if site_filter:
-                filename_parts.append(site_filter)
-            if role_filter:
-                filename_parts.append(role_filter)
-            if stack_filter:
-                filename_parts.append(f'stack_{stack_filter}')
-
-            filename = f"{'_'.join(filename_parts)}_{timestamp}.csv"
-
-            response = make_response(output.getvalue())
-            response.headers['Content-Type'] = 'text/csv'
-            response.headers['Content-Disposition'] = f'attachment; filename={filename}'
-
-            return response
+                ]
 
-    except Exception as e:
-        flash(f'Export error: {str(e)}', 'error')
-        return redirect(url_for('assets.devices'))
+    header = [
+        'Name', 'Normalized Name', 'Site Code', 'Site Name',
+        'Vendor', 'Device Type', 'Model', 'OS Version',
+        'Management IP', 'Role', 'Is Infrastructure',
+        'Is Stack', 'Stack Count', 'Has Serials',
+        'Current Captures', 'Capture Types',
+        'Last Fingerprint', 'Fingerprint Success',
+        'Last Updated'
+    ]
+
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    # Build filename based on filters
+    filename_parts = ['devices']
+    if filters['search']:
+        filename_parts.append(f"search_{filters['search'][:20]}")
+    if filters['vendor']:
+        filename_parts.append(filters['vendor'])
+    if filters['site']:
+        filename_parts.append(filters['site'])
+    if filters['role']:
+        filename_parts.append(filters['role'])
+    if filters['stack']:
+        filename_parts.append(f"stack_{filters['stack']}")
+
+    filename = f"{'_'.join(filename_parts)}_{timestamp}.csv"
+
+    response = Response(stream_with_context(csv_stream(header, rows())), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
 
 
 @assets_bp.route('/api/devices/stats')
@@ -663,7 +692,7 @@ def api_device_stats():
                        SUM(CASE WHEN is_stack = 1 THEN 1 ELSE 0 END) as stacks,
                        SUM(CASE WHEN have_sn = 1 THEN 1 ELSE 0 END) as with_serials,
                        SUM(current_captures) as total_captures
-                FROM v_device_status 
+                FROM device_status_summary 
                 WHERE vendor_name IS NOT NULL
                 GROUP BY vendor_name 
                 ORDER BY count DESC
@@ -675,7 +704,7 @@ def api_device_stats():
                 SELECT site_code, site_name, COUNT(*) as count,
                        SUM(CASE WHEN is_stack = 1 THEN 1 ELSE 0 END) as stacks,
                        COUNT(DISTINCT vendor_name) as vendor_count
-                FROM v_device_status 
+                FROM device_status_summary 
                 WHERE site_code IS NOT NULL
                 GROUP BY site_code, site_name 
                 ORDER BY count DESC
@@ -756,23 +785,15 @@ def api_device_capture_content(device_id, capture_type):
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            # Try to get from snapshots first (new method)
-            cursor.execute("""
-                SELECT cs.content, cs.file_path, cs.file_size, cs.captured_at
-                FROM capture_snapshots cs
-                WHERE cs.device_id = ? AND cs.capture_type = ?
-                ORDER BY cs.captured_at DESC
-                LIMIT 1
-            """, (device_id, capture_type))
-
-            snapshot = cursor.fetchone()
+            # Try to get from snapshots first (latest snapshot pointer)
+            snapshot = CaptureStore(conn).latest_snapshot(device_id, capture_type)
 
             if snapshot:
                 # Found in snapshots - return directly from database
-                content = snapshot[0]
-                file_path = snapshot[1]
-                file_size = snapshot[2]
-                capture_timestamp = snapshot[3]
+                content = snapshot['content']
+                file_path = snapshot['file_path']
+                file_size = snapshot['file_size']
+                capture_timestamp = snapshot['captured_at']
 
                 return jsonify({
                     'content': content,
@@ -2,6 +2,8 @@
 from flask import render_template, request, jsonify, current_app
 from . import capture_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.services.capture_search import CaptureSearchEngine
+from velocitycmdb.services.capture_store import CaptureStore
 import re
 import os
 
@@ -38,90 +40,24 @@ def api_search():
     capture_types = data.get('capture_types', [])
     devices = data.get('devices', [])
     limit = data.get('limit', 100)
+    per_device = data.get('per_device', 5)
 
     # Only reject completely empty queries
     if query is None or query == '':
         return jsonify({'error': 'Search query is required'}), 400
 
-    results = []
-
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-
-        # Build filter conditions
-        conditions = ['cs.content LIKE ?']
-        params = [f'%{query}%']  # Exact string search - what you type is what we search
-
-        if capture_types:
-            placeholders = ','.join('?' * len(capture_types))
-            conditions.append(f"cs.capture_type IN ({placeholders})")
-            params.extend(capture_types)
-
-        if devices:
-            placeholders = ','.join('?' * len(devices))
-            conditions.append(f"cs.device_id IN ({placeholders})")
-            params.extend(devices)
-
-        where_clause = " AND ".join(conditions)
-        params.append(limit)
-
         try:
-            # Simple LIKE search - exact string matching
-            cursor.execute(f"""
-                SELECT 
-                    cs.id as snapshot_id,
-                    cs.device_id,
-                    cs.capture_type,
-                    cs.captured_at,
-                    cs.file_path,
-                    cs.content,
-                    d.name as device_name,
-                    d.management_ip,
-                    s.name as site_name
-                FROM capture_snapshots cs
-                JOIN devices d ON cs.device_id = d.id
-                LEFT JOIN sites s ON d.site_code = s.code
-                WHERE {where_clause}
-                ORDER BY cs.captured_at DESC
-                LIMIT ?
-            """, params)
-
-            # Process results - find matching lines with context
-            for row in cursor.fetchall():
-                content = row['content']
-                lines = content.split('\n')
-                matching_lines = []
-
-                # Find lines that contain the exact search string
-                for i, line in enumerate(lines, 1):
-                    if query in line:  # Simple string contains check - case sensitive
-                        # Get context: 2 lines before, 2 lines after
-                        start = max(0, i - 3)
-                        end = min(len(lines), i + 3)
-                        context = lines[start:end]
-
-                        matching_lines.append({
-                            'line_number': i,
-                            'line': line.strip(),
-                            'context': context
-                        })
-
-                        # Limit to 15 matches per file
-                        if len(matching_lines) >= 15:
-                            break
-
-                # Only include if we found matches
-                if matching_lines:
-                    results.append({
-                        'device_id': row['device_id'],
-                        'device_name': row['device_name'],
-                        'management_ip': row['management_ip'],
-                        'site_name': row['site_name'],
-                        'capture_type': row['capture_type'],
-                        'file_path': row['file_path'],
-                        'captured_at': row['captured_at'],
-                        'matches': matching_lines
-                    })
+            # Index lookup for candidates, exact (case sensitive) match on their lines
+            engine = CaptureSearchEngine(conn)
+            results = engine.search_lines(
+                query,
+                capture_types=capture_types,
+                device_ids=devices,
+                limit=limit,
+                per_device=per_device,
+                max_matches=15  # Limit to 15 matches per file
+            )
 
         except Exception as e:
             current_app.logger.error(f"Search error: {e}")
@@ -133,7 +69,8 @@ def api_search():
     return jsonify({
         'results': results,
         'total_matches': len(results),
-        'query': query
+        'query': query,
+        'indexed': engine.indexed
     })
 
 
@@ -153,80 +90,58 @@ def api_capture_types():
 
 @capture_bp.route('/api/view', methods=['POST'])
 def api_view_capture():
-    """API endpoint to view full capture content"""
+    """
+    API endpoint to view full capture content
+
+    With line_number and context, only the lines around line_number are
+    returned (read through the line index); first_line gives their offset.
+    """
     data = request.get_json()
     snapshot_id = data.get('snapshot_id')
     device_id = data.get('device_id')
     capture_type = data.get('capture_type')
     line_number = data.get('line_number')
     search_query = data.get('search_query')
+    context = data.get('context')
+
+    if not snapshot_id and not (device_id and capture_type):
+        return jsonify({'error': 'Provide snapshot_id OR device_id+capture_type'}), 400
 
     with get_db_connection() as conn:
-        cursor = conn.cursor()
+        store = CaptureStore(conn)
+        windowed = bool(line_number and context)
 
         if snapshot_id:
-            cursor.execute("""
-                SELECT cs.content, cs.file_path, cs.file_size, cs.captured_at,
-                       d.name as device_name, d.management_ip, s.name as site_name
-                FROM capture_snapshots cs
-                JOIN devices d ON cs.device_id = d.id
-                LEFT JOIN sites s ON d.site_code = s.code
-                WHERE cs.id = ?
-            """, (snapshot_id,))
-
-            capture = cursor.fetchone()
-
-            if capture:
-                response = {
-                    'content': capture['content'],
-                    'file_path': capture['file_path'],
-                    'file_size': capture['file_size'],
-                    'capture_timestamp': capture['captured_at'],
-                    'device_name': capture['device_name'],
-                    'management_ip': capture['management_ip'],
-                    'site_name': capture['site_name']
-                }
-
-                if line_number:
-                    response['line_number'] = line_number
-                if search_query:
-                    response['search_query'] = search_query
-
-                return jsonify(response)
-
-        elif device_id and capture_type:
-            cursor.execute("""
-                SELECT cs.content, cs.file_path, cs.file_size, cs.captured_at,
-                       d.name as device_name, d.management_ip, s.name as site_name
-                FROM capture_snapshots cs
-                JOIN devices d ON cs.device_id = d.id
-                LEFT JOIN sites s ON d.site_code = s.code
-                WHERE cs.device_id = ? AND cs.capture_type = ?
-                ORDER BY cs.captured_at DESC
-                LIMIT 1
-            """, (device_id, capture_type))
-
-            capture = cursor.fetchone()
-
-            if capture:
-                response = {
-                    'content': capture['content'],
-                    'file_path': capture['file_path'],
-                    'file_size': capture['file_size'],
-                    'capture_timestamp': capture['captured_at'],
-                    'device_name': capture['device_name'],
-                    'management_ip': capture['management_ip'],
-                    'site_name': capture['site_name']
-                }
-
-                if line_number:
-                    response['line_number'] = line_number
-                if search_query:
-                    response['search_query'] = search_query
-
-                return jsonify(response)
-
-        return jsonify({'error': 'Provide snapshot_id OR device_id+capture_type'}), 400
+            capture = store.snapshot(snapshot_id, with_content=not windowed)
+        else:
+            capture = store.latest_snapshot(device_id, capture_type, with_content=not windowed)
+
+        if capture:
+            response = {
+                'file_path': capture['file_path'],
+                'file_size': capture['file_size'],
+                'capture_timestamp': capture['captured_at'],
+                'device_name': capture['device_name'],
+                'management_ip': capture['management_ip'],
+                'site_name': capture['site_name']
+            }
+
+            if windowed:
+                window = store.line_window(capture['id'], int(line_number), int(context))
+                response['content'] = '\n'.join(window['lines'])
+                response['first_line'] = window['first_line']
+                response['total_lines'] = window['total_lines']
+            else:
+                response['content'] = capture['content']
+
+            if line_number:
+                response['line_number'] = line_number
+            if search_query:
+                response['search_query'] = search_query
+
+            return jsonify(response)
+
+    return jsonify({'error': 'Capture not found'}), 404
 
 
 @capture_bp.route('/api/devices')
@@ -8,6 +8,7 @@ import os
 
 from velocitycmdb.app.blueprints.changes import changes_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.app.utils.response_cache import cached_response, skip_response_cache
 
 
 def get_data_dir():
@@ -16,6 +17,8 @@ def get_data_dir():
 
 
 @changes_bp.route('/')
+# The window is relative to now, so entries also age out
+@cached_response('DATABASE', max_age=60)
 def index():
     """Recent changes dashboard"""
     hours = request.args.get('hours', 24, type=int)
@@ -96,6 +99,7 @@ def index():
 
     except Exception as e:
         traceback.print_exc()
+        skip_response_cache()
 
     return render_template('changes/index.html',
                            changes=changes,
@@ -126,7 +126,9 @@ def start_collection():
         },
         "options": {
             "max_workers": 12,
-            "auto_load_db": true
+            "auto_load_db": true,
+            "device_sessions": false,
+            "site_concurrency": null
         }
     }
 
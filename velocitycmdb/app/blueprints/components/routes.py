@@ -1,185 +1,260 @@
 # app/blueprints/components/routes.py
-from flask import render_template, request, jsonify, redirect, url_for, flash, make_response
+from flask import render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
 from . import components_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.app.utils.response_cache import cached_query, cached_response
+from velocitycmdb.app.utils.listing import (csv_stream, decode_cursor, encode_cursor,
+                                             keyset_condition, order_clause, search_condition)
 import math
 from collections import defaultdict
-import csv
-from io import StringIO
 from datetime import datetime
 
 
 # ========== READ OPERATIONS ==========
 
+COMPONENT_COLUMNS = """
+    c.id, c.name, c.description, c.serial, c.position,
+    c.type, c.subtype, c.have_sn, c.extraction_confidence,
+    c.extraction_source,
+    d.id as device_id, d.name as device_name,
+    v.name as vendor_name, d.model as device_model, d.site_code
+"""
+
+COMPONENT_FROM = """
+    FROM components c
+    JOIN devices d ON c.device_id = d.id
+    LEFT JOIN vendors v ON d.vendor_id = v.id
+"""
+
+# Listing order; ends in c.id so every cursor names one row. These are the
+# expressions of idx_components_listing (db/component_sort.py), so pages are
+# read off that index instead of sorting components joined to devices
+COMPONENT_SORT = [
+    ('c.device_sort_name', 'ASC'),
+    ("COALESCE(c.type, '')", 'ASC'),
+    ("COALESCE(c.position, '')", 'ASC'),
+    ('c.name', 'ASC'),
+    ('c.id', 'ASC'),
+]
+
+
+def _component_filter_args():
+    return {
+        'search': request.args.get('search', '').strip(),
+        'type': request.args.get('type', ''),
+        'vendor': request.args.get('vendor', ''),
+        'device': request.args.get('device', ''),
+        'has_serial': request.args.get('has_serial', ''),
+    }
+
+
+def _component_filters(conn, filters):
+    """WHERE conditions and params for the component listing filters"""
+    conditions = []
+    params = []
+
+    if filters['search']:
+        component_match, component_params = search_condition(
+            conn, filters['search'], 'component_search_fts', 'c.id',
+            ['c.name', 'c.description', 'c.serial'])
+        device_match, device_params = search_condition(
+            conn, filters['search'], 'device_search_fts', 'c.device_id',
+            ['d.name'], fts_columns=['name'])
+        conditions.append(f"({component_match} OR {device_match})")
+        params.extend(component_params + device_params)
+
+    if filters['type']:
+        conditions.append("c.type = ?")
+        params.append(filters['type'])
+
+    if filters['vendor']:
+        conditions.append("v.name = ?")
+        params.append(filters['vendor'])
+
+    if filters['device']:
+        conditions.append("d.id = ?")
+        params.append(int(filters['device']))
+
+    if filters['has_serial'] == 'yes':
+        conditions.append("c.have_sn = 1")
+    elif filters['has_serial'] == 'no':
+        conditions.append("c.have_sn = 0")
+
+    return conditions, params
+
+
+def _component_sort_key(component):
+    # c.device_sort_name holds the joined device's name
+    return [component['device_name'], component['type'] or '',
+            component['position'] or '', component['name'], component['id']]
+
+
+def _component_page(cursor, conditions, params, limit, after=None, before=None, offset=0):
+    """
+    One page of components in listing order, by cursor (keyset) when
+    `after` or `before` is given, otherwise by OFFSET
+
+    Returns:
+        (components, more) - more is True when rows exist beyond the page
+        in the direction read
+    """
+    conditions = list(conditions)
+    params = list(params)
+    reverse = before is not None
+    key = before if reverse else after
+    if key is not None:
+        condition, key_params = keyset_condition(COMPONENT_SORT, key, after=not reverse)
+        conditions.append(condition)
+        params.extend(key_params)
+
+    query = f"SELECT {COMPONENT_COLUMNS} {COMPONENT_FROM}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += order_clause(COMPONENT_SORT, reverse=reverse) + " LIMIT ?"
+    params.append(limit + 1)
+    if key is None and offset:
+        query += " OFFSET ?"
+        params.append(offset)
+
+    cursor.execute(query, params)
+    components = [dict(row) for row in cursor.fetchall()]
+    more = len(components) > limit
+    components = components[:limit]
+    if reverse:
+        components.reverse()
+    return components, more
+
+
+def _component_overview(cursor):
+    """Statistics panels and filter choices of the component index (whole table)"""
+    cursor.execute("""
+        SELECT 
+            COUNT(*) as total,
+            COUNT(CASE WHEN have_sn = 1 THEN 1 END) as with_serials,
+            COUNT(DISTINCT device_id) as unique_devices,
+            type
+        FROM components
+        GROUP BY type
+        ORDER BY total DESC
+    """)
+    type_stats = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT 
+            v.name as vendor,
+            COUNT(c.id) as count
+        FROM components c
+        JOIN devices d ON c.device_id = d.id
+        LEFT JOIN vendors v ON d.vendor_id = v.id
+        WHERE v.name IS NOT NULL
+        GROUP BY v.name
+        ORDER BY count DESC
+    """)
+    vendor_stats = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT DISTINCT type FROM components 
+        WHERE type IS NOT NULL 
+        ORDER BY type
+    """)
+    types = [row[0] for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT DISTINCT v.name 
+        FROM vendors v
+        JOIN devices d ON d.vendor_id = v.id
+        JOIN components c ON c.device_id = d.id
+        ORDER BY v.name
+    """)
+    vendors = [row[0] for row in cursor.fetchall()]
+
+    # Get devices that have components for filter dropdown
+    cursor.execute("""
+        SELECT DISTINCT d.id, d.name
+        FROM devices d
+        JOIN components c ON c.device_id = d.id
+        ORDER BY d.name
+    """)
+    devices = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT 
+            COUNT(*) as total,
+            COUNT(CASE WHEN have_sn = 1 THEN 1 END) as with_serials,
+            COUNT(DISTINCT device_id) as unique_devices
+        FROM components
+    """)
+    overall_stats = dict(cursor.fetchone())
+
+    return {
+        'type_stats': type_stats,
+        'vendor_stats': vendor_stats,
+        'overall_stats': overall_stats,
+        'types': types,
+        'vendors': vendors,
+        'devices': devices,
+    }
+
+
 @components_bp.route('/')
 def index():
     """Component inventory overview with filtering and statistics"""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
-    search = request.args.get('search', '').strip()
-    type_filter = request.args.get('type', '')
-    vendor_filter = request.args.get('vendor', '')
-    device_filter = request.args.get('device', '')
-    has_serial = request.args.get('has_serial', '')
+    filters = _component_filter_args()
+    after = decode_cursor(request.args.get('after'), len(COMPONENT_SORT))
+    before = decode_cursor(request.args.get('before'), len(COMPONENT_SORT))
 
     per_page = min(max(per_page, 10), 200)
+    page = max(page, 1)
 
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
+            conditions, params = _component_filters(conn, filters)
 
-            base_query = """
-                SELECT 
-                    c.id, c.name, c.description, c.serial, c.position,
-                    c.type, c.subtype, c.have_sn, c.extraction_confidence,
-                    c.extraction_source,
-                    d.id as device_id, d.name as device_name,
-                    v.name as vendor_name, d.model as device_model
-                FROM components c
-                JOIN devices d ON c.device_id = d.id
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE 1=1
-            """
-
-            count_query = """
-                SELECT COUNT(*) FROM components c
-                JOIN devices d ON c.device_id = d.id
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE 1=1
-            """
-
-            conditions = []
-            params = []
-
-            if search:
-                conditions.append("""
-                    (c.name LIKE ? OR c.description LIKE ? OR 
-                     c.serial LIKE ? OR d.name LIKE ?)
-                """)
-                search_param = f"%{search}%"
-                params.extend([search_param] * 4)
-
-            if type_filter:
-                conditions.append("c.type = ?")
-                params.append(type_filter)
-
-            if vendor_filter:
-                conditions.append("v.name = ?")
-                params.append(vendor_filter)
-
-            if device_filter:
-                conditions.append("d.id = ?")
-                params.append(int(device_filter))
-
-            if has_serial == 'yes':
-                conditions.append("c.have_sn = 1")
-            elif has_serial == 'no':
-                conditions.append("c.have_sn = 0")
-
+            count_query = f"SELECT COUNT(*) {COMPONENT_FROM}"
             if conditions:
-                where_clause = " AND " + " AND ".join(conditions)
-                base_query += where_clause
-                count_query += where_clause
-
-            cursor.execute(count_query, params)
-            total_components = cursor.fetchone()[0]
+                count_query += " WHERE " + " AND ".join(conditions)
+            total_components = cached_query(
+                ('components.count', tuple(conditions), tuple(params)),
+                lambda: cursor.execute(count_query, params).fetchone()[0], 'DATABASE')
 
             total_pages = math.ceil(total_components / per_page)
-            offset = (page - 1) * per_page
-
-            base_query += " ORDER BY d.name, c.type, c.position, c.name LIMIT ? OFFSET ?"
-            params.extend([per_page, offset])
-
-            cursor.execute(base_query, params)
-            components = [dict(row) for row in cursor.fetchall()]
-
-            # Get statistics
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    COUNT(CASE WHEN have_sn = 1 THEN 1 END) as with_serials,
-                    COUNT(DISTINCT device_id) as unique_devices,
-                    type
-                FROM components
-                GROUP BY type
-                ORDER BY total DESC
-            """)
-            type_stats = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("""
-                SELECT 
-                    v.name as vendor,
-                    COUNT(c.id) as count
-                FROM components c
-                JOIN devices d ON c.device_id = d.id
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE v.name IS NOT NULL
-                GROUP BY v.name
-                ORDER BY count DESC
-            """)
-            vendor_stats = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("""
-                SELECT DISTINCT type FROM components 
-                WHERE type IS NOT NULL 
-                ORDER BY type
-            """)
-            types = [row[0] for row in cursor.fetchall()]
 
-            cursor.execute("""
-                SELECT DISTINCT v.name 
-                FROM vendors v
-                JOIN devices d ON d.vendor_id = v.id
-                JOIN components c ON c.device_id = d.id
-                ORDER BY v.name
-            """)
-            vendors = [row[0] for row in cursor.fetchall()]
+            # Prev/next links carry a cursor; page numbers still jump by OFFSET
+            if before is not None:
+                components, more = _component_page(cursor, conditions, params, per_page, before=before)
+                has_prev, has_next = more, True
+            elif after is not None:
+                components, more = _component_page(cursor, conditions, params, per_page, after=after)
+                has_prev, has_next = True, more
+            else:
+                components, more = _component_page(cursor, conditions, params, per_page,
+                                                    offset=(page - 1) * per_page)
+                has_prev, has_next = page > 1, more
 
-            # Get devices that have components for filter dropdown
-            cursor.execute("""
-                SELECT DISTINCT d.id, d.name
-                FROM devices d
-                JOIN components c ON c.device_id = d.id
-                ORDER BY d.name
-            """)
-            devices = [dict(row) for row in cursor.fetchall()]
-
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as total,
-                    COUNT(CASE WHEN have_sn = 1 THEN 1 END) as with_serials,
-                    COUNT(DISTINCT device_id) as unique_devices
-                FROM components
-            """)
-            overall_stats = dict(cursor.fetchone())
+            # Whole-table statistics, reused until the data changes
+            overview = cached_query('components.overview', lambda: _component_overview(cursor), 'DATABASE')
 
             pagination = {
                 'page': page,
                 'per_page': per_page,
                 'total': total_components,
                 'total_pages': total_pages,
-                'has_prev': page > 1,
-                'has_next': page < total_pages,
+                'has_prev': has_prev and bool(components),
+                'has_next': has_next and bool(components),
                 'prev_num': page - 1 if page > 1 else None,
-                'next_num': page + 1 if page < total_pages else None
+                'next_num': page + 1 if has_next else None,
+                'prev_cursor': encode_cursor(_component_sort_key(components[0])) if components else None,
+                'next_cursor': encode_cursor(_component_sort_key(components[-1])) if components else None,
             }
 
             return render_template('components/index.html',
                                    components=components,
                                    pagination=pagination,
-                                   type_stats=type_stats,
-                                   vendor_stats=vendor_stats,
-                                   overall_stats=overall_stats,
-                                   types=types,
-                                   vendors=vendors,
-                                   devices=devices,
-                                   filters={
-                                       'search': search,
-                                       'type': type_filter,
-                                       'vendor': vendor_filter,
-                                       'device': device_filter,
-                                       'has_serial': has_serial
-                                   })
+                                   filters=filters,
+                                   **overview)
 
     except Exception as e:
         return render_template('components/index.html',
@@ -195,6 +270,36 @@ def index():
                                error=str(e))
 
 
+@components_bp.route('/api/list')
+def api_list():
+    """
+    Component listing for API clients, paged by cursor
+
+    Query params: the index filters, limit (1-500, default 100) and cursor
+    (next_cursor from the previous response).
+    """
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    token = request.args.get('cursor')
+    after = decode_cursor(token, len(COMPONENT_SORT))
+    if token and after is None:
+        return jsonify({'status': 'error', 'message': 'Invalid cursor'}), 400
+
+    try:
+        with get_db_connection() as conn:
+            conditions, params = _component_filters(conn, _component_filter_args())
+            components, more = _component_page(conn.cursor(), conditions, params, limit, after=after)
+
+        return jsonify({
+            'status': 'success',
+            'items': components,
+            'has_more': more,
+            'next_cursor': encode_cursor(_component_sort_key(components[-1])) if more else None,
+        })
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+
 @components_bp.route('/<int:component_id>')
 def detail(component_id):
     """Component detail view"""
@@ -255,8 +360,9 @@ def search():
         with get_db_connection() as conn:
             cursor = conn.cursor()
 
-            search_param = f"%{query}%"
-            cursor.execute("""
+            match, params = search_condition(conn, query, 'component_search_fts', 'c.id',
+                                             ['c.name', 'c.description', 'c.serial'])
+            cursor.execute(f"""
                 SELECT 
                     c.id, c.name, c.description, c.serial, c.type,
                     d.id as device_id, d.name as device_name,
@@ -264,13 +370,10 @@ def search():
                 FROM components c
                 JOIN devices d ON c.device_id = d.id
                 LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE 
-                    c.name LIKE ? OR 
-                    c.description LIKE ? OR 
-                    c.serial LIKE ?
+                WHERE {match}
                 ORDER BY d.name, c.name
                 LIMIT 50
-            """, (search_param, search_param, search_param))
+            """, params)
 
             results = [dict(row) for row in cursor.fetchall()]
 
@@ -281,6 +384,7 @@ def search():
 
 
 @components_bp.route('/api/stats')
+@cached_response('DATABASE')
 def api_stats():
     """Component statistics API"""
     try:
@@ -412,106 +516,49 @@ def api_by_serial(serial_number):
 
 @components_bp.route('/export')
 def export_csv():
-    """Export filtered components to CSV"""
-    search = request.args.get('search', '').strip()
-    type_filter = request.args.get('type', '')
-    vendor_filter = request.args.get('vendor', '')
-    device_filter = request.args.get('device', '')
-    has_serial = request.args.get('has_serial', '')
-
+    """Export filtered components to CSV, streamed as rows are read"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            base_query = """
-                SELECT 
-                    c.name, c.description, c.serial, c.position,
-                    c.type, c.subtype, c.have_sn, c.extraction_confidence,
-                    c.extraction_source,
-                    d.name as device_name, d.model as device_model,
-                    d.site_code, v.name as vendor_name
-                FROM components c
-                JOIN devices d ON c.device_id = d.id
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE 1=1
-            """
-
-            conditions = []
-            params = []
-
-            if search:
-                conditions.append("""
-                    (c.name LIKE ? OR c.description LIKE ? OR 
-                     c.serial LIKE ? OR d.name LIKE ?)
-                """)
-                search_param = f"%{search}%"
-                params.extend([search_param] * 4)
-
-            if type_filter:
-                conditions.append("c.type = ?")
-                params.append(type_filter)
-
-            if vendor_filter:
-                conditions.append("v.name = ?")
-                params.append(vendor_filter)
-
-            if device_filter:
-                conditions.append("d.id = ?")
-                params.append(int(device_filter))
-
-            if has_serial == 'yes':
-                conditions.append("c.have_sn = 1")
-            elif has_serial == 'no':
-                conditions.append("c.have_sn = 0")
-
-            if conditions:
-                where_clause = " AND " + " AND ".join(conditions)
-                base_query += where_clause
-
-            base_query += " ORDER BY d.name, c.type, c.position, c.name"
-
-            cursor.execute(base_query, params)
-            components = cursor.fetchall()
-
-            si = StringIO()
-            writer = csv.writer(si)
-
-            writer.writerow([
-                'Component Name', 'Description', 'Serial Number', 'Position',
-                'Type', 'Subtype', 'Has Serial', 'Extraction Confidence',
-                'Extraction Source', 'Device Name', 'Device Model', 'Site', 'Vendor'
-            ])
-
-            for comp in components:
-                writer.writerow([
-                    comp[0] or '',
-                    comp[1] or '',
-                    comp[2] or '',
-                    comp[3] or '',
-                    comp[4] or '',
-                    comp[5] or '',
-                    'Yes' if comp[6] else 'No',
-                    f"{comp[7] * 100:.1f}%" if comp[7] else '',
-                    comp[8] or '',
-                    comp[9] or '',
-                    comp[10] or '',
-                    comp[11] or '',
-                    comp[12] or ''
-                ])
-
-            output = si.getvalue()
-            si.close()
-
-            response = make_response(output)
-            response.headers['Content-Type'] = 'text/csv'
-            response.headers['Content-Disposition'] = 'attachment; filename=components_export.csv'
-
-            return response
-
+            conditions, params = _component_filters(conn, _component_filter_args())
     except Exception as e:
         flash(f'Export failed: {str(e)}', 'error')
         return redirect(url_for('components.index'))
 
+    query = f"SELECT {COMPONENT_COLUMNS} {COMPONENT_FROM}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += order_clause(COMPONENT_SORT)
+
+    def rows():
+        # Own connection: the request's work is done before the body streams
+        with get_db_connection() as conn:
+            for comp in conn.execute(query, params):
+                yield [
+                    comp['name'] or '',
+                    comp['description'] or '',
+                    comp['serial'] or '',
+                    comp['position'] or '',
+                    comp['type'] or '',
+                    comp['subtype'] or '',
+                    'Yes' if comp['have_sn'] else 'No',
+                    f"{comp['extraction_confidence'] * 100:.1f}%" if comp['extraction_confidence'] else '',
+                    comp['extraction_source'] or '',
+                    comp['device_name'] or '',
+                    comp['device_model'] or '',
+                    comp['site_code'] or '',
+                    comp['vendor_name'] or ''
+                ]
+
+    header = [
+        'Component Name', 'Description', 'Serial Number', 'Position',
+        'Type', 'Subtype', 'Has Serial', 'Extraction Confidence',
+        'Extraction Source', 'Device Name', 'Device Model', 'Site', 'Vendor'
+    ]
+
+    response = Response(stream_with_context(csv_stream(header, rows())), mimetype='text/csv')
+    response.headers['Content-Disposition'] = 'attachment; filename=components_export.csv'
+    return response
+
 
 # ========== CREATE OPERATIONS ==========
 
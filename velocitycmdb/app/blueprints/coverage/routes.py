@@ -11,95 +11,42 @@ class DatabaseCoverageReporter:
     def __init__(self):
         self.capture_types = []
         self.device_status = {}
+        self.matrix = None
 
-    def get_db_connection(self):
-        """Get database connection"""
-        from velocitycmdb.app.utils.database import get_db_connection
-        return get_db_connection()
+    def get_matrix(self):
+        """Shared coverage matrix for the app's assets.db (rebuilt after capture loads)"""
+        if self.matrix is None:
+            from velocitycmdb.services.coverage_matrix import CoverageMatrix
+            self.matrix = CoverageMatrix.for_database(current_app.config.get('DATABASE', 'assets.db'))
+        return self.matrix
 
     def discover_capture_types(self):
-        """Discover available capture types from capture_snapshots table"""
-        with self.get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            # Get distinct capture types from capture_snapshots
-            cursor.execute("""
-                SELECT DISTINCT capture_type 
-                FROM capture_snapshots 
-                ORDER BY capture_type
-            """)
-
-            self.capture_types = [row['capture_type'] for row in cursor.fetchall()]
-
+        """Discover capture types that devices currently have captures of"""
+        self.capture_types = list(self.get_matrix().capture_types)
         return self.capture_types
 
     def analyze_devices(self):
-        """Analyze device capture coverage from database"""
-        with self.get_db_connection() as conn:
-            cursor = conn.cursor()
-
-            # Get all devices that have at least one fingerprint
-            cursor.execute("""
-                SELECT DISTINCT
-                    d.id,
-                    d.name,
-                    d.normalized_name,
-                    d.site_code,
-                    s.name as site_name,
-                    v.name as vendor_name,
-                    d.model
-                FROM devices d
-                LEFT JOIN sites s ON d.site_code = s.code
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                WHERE EXISTS (
-                    SELECT 1 FROM capture_snapshots cs 
-                    WHERE cs.device_id = d.id
-                )
-                ORDER BY d.name
-            """)
-
-            devices = cursor.fetchall()
-
-            current_app.logger.info(f"Found {len(devices)} devices with fingerprints")
-
-            # For each device, check captures
-            for device in devices:
-                device_id = device['id']
-                device_name = device['name']
-
-                # Initialize device info
-                device_info = {
-                    'device_id': device_id,
-                    'folder': device['site_name'] or 'Unknown',
-                    'host': '',  # Not stored in DB currently
-                    'vendor': device['vendor_name'] or 'Unknown',
-                    'model': device['model'] or 'Unknown',
-                    'fingerprint': True,
-                    'captures': {},
-                    'total_captures': 0,
-                    'missing_captures': 0
-                }
-
-                # Check each capture type in capture_snapshots
-                for capture_type in self.capture_types:
-                    cursor.execute("""
-                        SELECT COUNT(*) as count 
-                        FROM capture_snapshots 
-                        WHERE device_id = ? AND capture_type = ?
-                    """, (device_id, capture_type))
-
-                    result = cursor.fetchone()
-                    has_capture = result['count'] > 0
-
-                    device_info['captures'][capture_type] = has_capture
-                    if has_capture:
-                        device_info['total_captures'] += 1
-                    else:
-                        device_info['missing_captures'] += 1
-
-                self.device_status[device_name] = device_info
-
-            current_app.logger.info(f"Analyzed {len(self.device_status)} devices")
+        """Analyze device capture coverage from the cached coverage matrix"""
+        matrix = self.get_matrix()
+        type_count = len(self.capture_types)
+
+        current_app.logger.info(f"Found {len(matrix.devices)} devices with captures")
+
+        for device in matrix.devices:
+            total = matrix.capture_count(device['id'])
+            self.device_status[device['name']] = {
+                'device_id': device['id'],
+                'folder': device['site_name'] or 'Unknown',
+                'host': '',  # Not stored in DB currently
+                'vendor': device['vendor_name'] or 'Unknown',
+                'model': device['model'] or 'Unknown',
+                'fingerprint': True,
+                'captures': matrix.captures(device['id']),
+                'total_captures': total,
+                'missing_captures': type_count - total
+            }
+
+        current_app.logger.info(f"Analyzed {len(self.device_status)} devices")
 
     def get_summary_stats(self):
         """Generate summary statistics"""
@@ -117,9 +64,10 @@ class DatabaseCoverageReporter:
             }
 
         # Calculate capture statistics
+        type_counts = self.get_matrix().type_counts
         capture_stats = {}
         for capture_type in self.capture_types:
-            count = sum(1 for d in self.device_status.values() if d['captures'].get(capture_type, False))
+            count = type_counts.get(capture_type, 0)
             capture_stats[capture_type] = {
                 'count': count,
                 'total': total_devices,
@@ -166,16 +114,22 @@ class DatabaseCoverageReporter:
         # Convert to sorted list
         coverage_data['vendors'] = sorted(list(vendors_set))
 
+        # Devices per vendor, and per vendor with each capture type, in one pass
+        vendor_totals = defaultdict(int)
+        vendor_success = defaultdict(lambda: defaultdict(int))
+        for device_info in self.device_status.values():
+            vendor = device_info['vendor'] or 'Unknown'
+            vendor_totals[vendor] += 1
+            for capture_type, has_capture in device_info['captures'].items():
+                if has_capture:
+                    vendor_success[capture_type][vendor] += 1
+
         # Analyze coverage by capture type
         for capture_type in self.capture_types:
-            vendor_stats = defaultdict(lambda: {'success': 0, 'total': 0})
-
-            for device_info in self.device_status.values():
-                vendor = device_info['vendor'] or 'Unknown'
-                vendor_stats[vendor]['total'] += 1
-
-                if device_info['captures'].get(capture_type, False):
-                    vendor_stats[vendor]['success'] += 1
+            vendor_stats = {
+                vendor: {'success': vendor_success[capture_type][vendor], 'total': total}
+                for vendor, total in vendor_totals.items()
+            }
 
             # Initialize the capture type entry
             coverage_data['by_capture'][capture_type] = {
@@ -277,6 +231,9 @@ def device_detail(device_name):
 def refresh_data():
     """API endpoint to trigger a fresh analysis"""
     try:
+        from velocitycmdb.services.coverage_matrix import CoverageMatrix
+        CoverageMatrix.invalidate(current_app.config.get('DATABASE', 'assets.db'))
+
         reporter = DatabaseCoverageReporter()
         reporter.discover_capture_types()
         reporter.analyze_devices()
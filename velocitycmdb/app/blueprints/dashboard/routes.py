@@ -2,10 +2,12 @@
 from flask import render_template, jsonify
 from . import dashboard_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.app.utils.response_cache import cached_response, skip_response_cache
 import sqlite3
 
 
 @dashboard_bp.route('/')
+@cached_response('DATABASE')
 def index():
     """Main dashboard with network overview"""
     try:
@@ -24,7 +26,7 @@ def index():
             stats['device_count'] = cursor.fetchone()[0]
 
             # Stack count
-            cursor.execute('SELECT COUNT(*) FROM devices WHERE is_stack = 1')
+            cursor.execute('SELECT COUNT(*) FROM device_status_summary WHERE is_stack = 1')
             stats['stack_count'] = cursor.fetchone()[0]
 
             # Component count (if table exists)
@@ -58,10 +60,9 @@ def index():
 
             # Recent devices
             cursor.execute('''
-                SELECT d.id, d.name, d.site_code, v.name as vendor, d.model, d.timestamp
-                FROM devices d
-                LEFT JOIN vendors v ON d.vendor_id = v.id
-                ORDER BY d.timestamp DESC
+                SELECT id, name, site_code, vendor_name, model, last_updated
+                FROM device_status_summary
+                ORDER BY COALESCE(last_updated, '') DESC, name, id
                 LIMIT 10
             ''')
             stats['recent_devices'] = [dict(zip(['id', 'name', 'site_code', 'vendor', 'model', 'timestamp'], row))
@@ -106,6 +107,7 @@ def index():
 
     except Exception as e:
         print(f"Dashboard error: {e}")
+        skip_response_cache()
         # Return empty stats on error
         empty_stats = {
             'site_count': 0, 'device_count': 0, 'stack_count': 0, 'component_count': 0,
@@ -115,6 +117,7 @@ def index():
 
 
 @dashboard_bp.route('/api/stats')
+@cached_response('DATABASE')
 def api_stats():
     """API endpoint for dashboard statistics"""
     try:
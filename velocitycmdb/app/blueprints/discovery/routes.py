@@ -18,6 +18,10 @@ DEFAULT_DATA_DIR = '~/.velocitycmdb/data'
 # Create blueprint
 discovery_bp = Blueprint('discovery', __name__, url_prefix='/discovery')
 
+# Running fingerprint jobs: fingerprint_job_id -> FingerprintOrchestrator
+_fingerprint_jobs = {}
+_fingerprint_jobs_lock = threading.Lock()
+
 
 def get_data_dir():
     """Get data directory with consistent default"""
@@ -394,14 +398,19 @@ def start_fingerprinting(job_id):
         if not socketio:
             return jsonify({'error': 'SocketIO not available'}), 500
 
+        # Registered before the task starts, so a cancel sent right away is not lost
+        orchestrator = FingerprintOrchestrator(data_dir=data_dir)
+        with _fingerprint_jobs_lock:
+            _fingerprint_jobs[fingerprint_job_id] = orchestrator
+
         # Use SocketIO background task (properly passes app context)
         socketio.start_background_task(
             target=run_fingerprinting_task,
             app=current_app._get_current_object(),
+            orchestrator=orchestrator,
             fingerprint_job_id=fingerprint_job_id,
             discovery_job_id=job_id,
             sessions_file=sessions_file,
-            data_dir=data_dir,
             username=username,
             password=password,
             ssh_key_path=ssh_key_path
@@ -417,8 +426,8 @@ def start_fingerprinting(job_id):
         return jsonify({'error': str(e)}), 500
 
 
-def run_fingerprinting_task(app, fingerprint_job_id, discovery_job_id, sessions_file,
-                           data_dir, username, password, ssh_key_path=None):
+def run_fingerprinting_task(app, orchestrator, fingerprint_job_id, discovery_job_id, sessions_file,
+                           username, password, ssh_key_path=None):
     """
     Background task to run fingerprinting
     Called by SocketIO background thread
@@ -427,8 +436,6 @@ def run_fingerprinting_task(app, fingerprint_job_id, discovery_job_id, sessions_
     """
     # Push application context for this thread
     with app.app_context():
-        from velocitycmdb.services.fingerprint import FingerprintOrchestrator
-
         # Get SocketIO from app extensions
         socketio = app.extensions['socketio']
 
@@ -442,9 +449,7 @@ def run_fingerprinting_task(app, fingerprint_job_id, discovery_job_id, sessions_
         try:
             logger.info(f"Starting fingerprinting job: {fingerprint_job_id}")
             logger.info(f"Sessions file: {sessions_file}")
-            logger.info(f"Data directory: {data_dir}")
-
-            orchestrator = FingerprintOrchestrator(data_dir=data_dir)
+            logger.info(f"Data directory: {orchestrator.data_dir}")
 
             result = orchestrator.fingerprint_inventory(
                 sessions_file=sessions_file,
@@ -461,6 +466,7 @@ def run_fingerprinting_task(app, fingerprint_job_id, discovery_job_id, sessions_
                 'success': result['success'],
                 'fingerprinted': result['fingerprinted'],
                 'failed': result['failed'],
+                'cancelled': result['cancelled'],
                 'failed_devices': result['failed_devices'],
                 'loaded_to_db': result['loaded_to_db'],
                 'db_load_failed': result['db_load_failed'],
@@ -484,6 +490,29 @@ def run_fingerprinting_task(app, fingerprint_job_id, discovery_job_id, sessions_
                 'error': str(e)
             })
 
+        finally:
+            with _fingerprint_jobs_lock:
+                _fingerprint_jobs.pop(fingerprint_job_id, None)
+
+
+@discovery_bp.route('/fingerprint/cancel/<fingerprint_job_id>', methods=['POST'])
+def cancel_fingerprinting(fingerprint_job_id):
+    """
+    Cancel a running fingerprinting job
+
+    Devices not yet started are skipped and live SSH sessions are closed;
+    fingerprint_complete then reports cancelled: true.
+    """
+    with _fingerprint_jobs_lock:
+        orchestrator = _fingerprint_jobs.get(fingerprint_job_id)
+
+    if orchestrator is None:
+        return jsonify({'error': 'Fingerprint job not running'}), 404
+
+    orchestrator.cancel()
+    logger.info(f"Cancel requested for fingerprint job {fingerprint_job_id}")
+    return jsonify({'job_id': fingerprint_job_id, 'cancelling': True})
+
 
 @discovery_bp.route('/fingerprint/status/<fingerprint_job_id>', methods=['GET'])
 def get_fingerprint_status(fingerprint_job_id):
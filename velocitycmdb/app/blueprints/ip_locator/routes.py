@@ -4,7 +4,7 @@ Find where IPs live in the network
 """
 
 import traceback
-from flask import render_template, request, jsonify, current_app
+from flask import render_template, request, jsonify, current_app, Response, stream_with_context
 from pathlib import Path
 
 from . import ip_locator_bp
@@ -121,18 +121,58 @@ def api_bulk_locate():
         service = get_locator_service()
         results = []
         
-        for ip in ips:
-            ip = ip.strip()
-            if ip:
-                result = service.locate_ip(ip)
-                results.append({
-                    'ip_address': result.ip_address,
-                    'summary': result.summary,
-                    'access_port': result.access_port,
-                    'found': bool(result.arp_entries or result.mac_entries)
-                })
+        ips = [str(ip).strip() for ip in ips if str(ip).strip()]
+        for result in service.locate_many(ips):
+            results.append({
+                'ip_address': result.ip_address,
+                'summary': result.summary,
+                'access_port': result.access_port,
+                'found': bool(result.arp_entries or result.mac_entries)
+            })
         
         return jsonify({'results': results})
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+
+
+@ip_locator_bp.route('/api/bulk/stream', methods=['POST'])
+def api_bulk_locate_stream():
+    """
+    Streaming bulk IP location for large lists (incident / firewall audits).
+
+    Input (either):
+        JSON body: { "ips": ["10.1.1.1", ...] }
+        multipart upload: file=<one IP per line, or a JSON array>
+
+    Query params:
+        format: ndjson (default) or csv
+
+    NDJSON records carry seq/total so clients can show progress; the total
+    is also sent in the X-Total-Count header.
+    """
+    from velocitycmdb.services.ip_locator import read_ip_list
+
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    try:
+        if 'file' in request.files:
+            ips = read_ip_list(request.files['file'].read().decode('utf-8', errors='ignore'))
+        else:
+            data = request.get_json(silent=True) or {}
+            ips = data.get('ips')
+            if not isinstance(ips, list):
+                return jsonify({'error': 'List of IPs required (JSON "ips" or file upload)'}), 400
+            ips = [str(ip).strip() for ip in ips if str(ip).strip()]
+    except ValueError as e:
+        return jsonify({'error': f'Could not read IP list: {e}'}), 400
+
+    service = get_locator_service()
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(service.stream_bulk(ips, fmt)), mimetype=mimetype)
+    response.headers['X-Total-Count'] = str(len(ips))
+    if fmt == 'csv':
+        response.headers['Content-Disposition'] = 'attachment; filename=ip_locate.csv'
+    return response
@@ -2,6 +2,7 @@
 from flask import render_template, request, jsonify, make_response
 from . import osversions_bp
 from velocitycmdb.app.utils.database import get_db_connection
+from velocitycmdb.app.utils.response_cache import cached_response, skip_response_cache
 import csv
 from io import StringIO, BytesIO
 from openpyxl import Workbook
@@ -10,6 +11,7 @@ from openpyxl.utils import get_column_letter
 
 
 @osversions_bp.route('/')
+@cached_response('DATABASE')
 def index():
     """OS Version Dashboard - Using existing device data only"""
     try:
@@ -114,6 +116,7 @@ def index():
         print(f"ERROR: {str(e)}")
         import traceback
         traceback.print_exc()
+        skip_response_cache()
         return render_template('osversions/index.html',
                                error=str(e),
                                version_distribution=[],
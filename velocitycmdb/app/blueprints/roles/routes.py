@@ -171,29 +171,24 @@ def detail(role_id):
         # Get devices - query devices table directly with joins
         devices = conn.execute('''
             SELECT 
-                d.id,
-                d.name,
-                d.normalized_name,
-                s.name as site_name,
-                s.code as site_code,
-                v.name as vendor_name,
-                d.model,
-                d.os_version,
-                d.management_ip,
-                d.is_stack,
-                d.stack_count,
-                COUNT(dcc.id) as current_captures,
-                COUNT(DISTINCT dcc.capture_type) as capture_types,
-                MAX(fe.extraction_timestamp) as last_fingerprint,
-                MAX(fe.extraction_success) as last_fingerprint_success
-            FROM devices d
-            LEFT JOIN sites s ON d.site_code = s.code
-            LEFT JOIN vendors v ON d.vendor_id = v.id
-            LEFT JOIN device_captures_current dcc ON d.id = dcc.device_id
-            LEFT JOIN fingerprint_extractions fe ON d.id = fe.device_id
-            WHERE d.role_id = ?
-            GROUP BY d.id
-            ORDER BY d.name
+                id,
+                name,
+                normalized_name,
+                site_name,
+                site_code,
+                vendor_name,
+                model,
+                os_version,
+                management_ip,
+                is_stack,
+                stack_count,
+                current_captures,
+                capture_types,
+                last_fingerprint,
+                last_fingerprint_success
+            FROM device_status_summary
+            WHERE id IN (SELECT id FROM devices WHERE role_id = ?)
+            ORDER BY name
         ''', (role_id,)).fetchall()
 
     # Add device_count to role dict for template
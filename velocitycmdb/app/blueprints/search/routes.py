@@ -6,6 +6,8 @@ from typing import Dict, List, Any
 import ipaddress
 
 from . import search_bp
+from velocitycmdb.db.mac_key import mac_key_range, mac_to_key
+from velocitycmdb.services.capture_search import CaptureSearchEngine
 
 
 def get_db_connection(db_name='assets.db'):
@@ -27,6 +29,23 @@ def get_db_connection(db_name='assets.db'):
     conn.row_factory = sqlite3.Row
     return conn
 
+def mac_search_terms(query: str) -> List[str]:
+    """A full MAC in every notation captures use; anything else as typed"""
+    key = mac_to_key(query)
+    if key is None:
+        return [query]
+
+    digits = f'{key:012x}'
+    pairs = [digits[i:i + 2] for i in range(0, 12, 2)]
+    return [
+        query,
+        ':'.join(pairs),
+        '-'.join(pairs),
+        '.'.join(digits[i:i + 4] for i in range(0, 12, 4)),
+        digits,
+    ]
+
+
 def deduplicate_by_id(items: List[Dict]) -> List[Dict]:
     """Remove duplicate items based on their 'id' field"""
     seen = set()
@@ -105,13 +124,15 @@ class UniversalSearch:
             """, (query,))
             ip_count = arp_cursor.fetchone()[0]
 
-            # Check for MAC (normalized)
-            normalized_mac = query.replace(':', '').replace('-', '').replace('.', '').upper()
-            arp_cursor.execute("""
-                SELECT COUNT(*) FROM arp_entries
-                WHERE REPLACE(REPLACE(REPLACE(mac_address, ':', ''), '-', ''), '.', '') = ?
-            """, (normalized_mac,))
-            mac_count = arp_cursor.fetchone()[0]
+            # Check for MAC (canonical key, answered from the index alone)
+            mac_count = 0
+            mac_key = mac_to_key(query)
+            if mac_key is not None:
+                arp_cursor.execute("""
+                    SELECT COUNT(*) FROM arp_entries
+                    WHERE mac_key = ?
+                """, (mac_key,))
+                mac_count = arp_cursor.fetchone()[0]
 
             probe_results['arp_entries'] = ip_count + mac_count
             arp_conn.close()
@@ -167,17 +188,10 @@ class UniversalSearch:
             pass
 
         # Search in capture content (configs, routing tables, etc.)
-        # Use DISTINCT to avoid duplicates at DB level
-        cursor.execute("""
-            SELECT DISTINCT cs.id, cs.*, d.name as device_name, d.management_ip
-            FROM capture_snapshots cs
-            JOIN devices d ON cs.device_id = d.id
-            WHERE cs.content LIKE ?
-            ORDER BY cs.captured_at DESC
-            LIMIT 20
-        """, (f'%{query}%',))
-
-        results['config_mentions'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
+        # Whole address only, so 10.1.1.1 does not also find 10.1.1.10
+        results['config_mentions'] = CaptureSearchEngine(conn).find_snapshots(
+            query, limit=20, whole_token=True
+        )
 
         conn.close()
         return results
@@ -191,44 +205,36 @@ class UniversalSearch:
             'config_mentions': []
         }
 
-        # Normalize MAC address for search
-        normalized_mac = query.replace(':', '').replace('-', '').replace('.', '').upper()
+        # Full MAC is a single key, a partial MAC/OUI is a key range
+        key_range = mac_key_range(query)
 
         # Search ARP database
         try:
-            arp_conn = get_db_connection('arp_cat.db')
-            arp_cursor = arp_conn.cursor()
-
-            arp_cursor.execute("""
-                SELECT ae.*, d.hostname, d.vendor, c.context_name
-                FROM arp_entries ae
-                JOIN devices d ON ae.device_id = d.id
-                JOIN contexts c ON ae.context_id = c.id
-                WHERE REPLACE(REPLACE(REPLACE(ae.mac_address, ':', ''), '-', ''), '.', '') = ?
-                ORDER BY ae.capture_timestamp DESC
-                LIMIT 100
-            """, (normalized_mac,))
-
-            results['arp_entries'] = [dict(row) for row in arp_cursor.fetchall()]
-            arp_conn.close()
+            if key_range:
+                arp_conn = get_db_connection('arp_cat.db')
+                arp_cursor = arp_conn.cursor()
+
+                arp_cursor.execute("""
+                    SELECT ae.*, d.hostname, d.vendor, c.context_name
+                    FROM arp_entries ae
+                    JOIN devices d ON ae.device_id = d.id
+                    JOIN contexts c ON ae.context_id = c.id
+                    WHERE ae.mac_key >= ? AND ae.mac_key < ?
+                    ORDER BY ae.capture_timestamp DESC
+                    LIMIT 100
+                """, key_range)
+
+                results['arp_entries'] = [dict(row) for row in arp_cursor.fetchall()]
+                arp_conn.close()
         except Exception as e:
             print(f"ARP MAC search error: {e}")
             pass
 
         # Search in captures (MAC tables, etc.)
         conn = get_db_connection('assets.db')
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT DISTINCT cs.id, cs.*, d.name as device_name
-            FROM capture_snapshots cs
-            JOIN devices d ON cs.device_id = d.id
-            WHERE cs.capture_type IN ('mac', 'cdp', 'lldp')
-            AND cs.content LIKE ?
-            LIMIT 20
-        """, (f'%{query}%',))
-
-        results['config_mentions'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
+        results['config_mentions'] = CaptureSearchEngine(conn).find_snapshots(
+            mac_search_terms(query), capture_types=['mac', 'cdp', 'lldp'], limit=20
+        )
         conn.close()
 
         return results
@@ -316,17 +322,7 @@ class UniversalSearch:
         results['devices'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
 
         # Search in capture content where this device name appears
-        cursor.execute("""
-            SELECT DISTINCT cs.id, cs.*, d.name as device_name, d.management_ip,
-                   d.id as device_id
-            FROM capture_snapshots cs
-            JOIN devices d ON cs.device_id = d.id
-            WHERE cs.content LIKE ? COLLATE NOCASE
-            ORDER BY cs.captured_at DESC
-            LIMIT 50
-        """, (f'%{query}%',))
-
-        results['captures'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
+        results['captures'] = CaptureSearchEngine(conn).find_snapshots(query, limit=50)
 
         conn.close()
 
@@ -400,30 +396,8 @@ class UniversalSearch:
 
         results['components'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
 
-        # Search in capture FTS
-        try:
-            cursor.execute("""
-                SELECT DISTINCT cs.id, cs.*, d.name as device_name
-                FROM capture_snapshots cs
-                JOIN devices d ON cs.device_id = d.id
-                WHERE cs.id IN (
-                    SELECT rowid FROM capture_fts WHERE content MATCH ?
-                )
-                LIMIT 20
-            """, (query,))
-
-            results['captures'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
-        except:
-            # Fallback to LIKE if FTS fails
-            cursor.execute("""
-                SELECT DISTINCT cs.id, cs.*, d.name as device_name
-                FROM capture_snapshots cs
-                JOIN devices d ON cs.device_id = d.id
-                WHERE cs.content LIKE ?
-                LIMIT 20
-            """, (f'%{query}%',))
-
-            results['captures'] = deduplicate_by_id([dict(row) for row in cursor.fetchall()])
+        # Search in capture FTS (falls back to a verified LIKE scan when not indexed)
+        results['captures'] = CaptureSearchEngine(conn).find_snapshots(query, limit=20)
 
         # Search notes
         try:
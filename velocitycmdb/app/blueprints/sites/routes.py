@@ -24,7 +24,7 @@ def detail(code):
             return redirect(url_for('sites.index'))
 
         devices = conn.execute('''
-            SELECT * FROM v_device_status 
+            SELECT * FROM device_status_summary
             WHERE site_code = ?
             ORDER BY name
         ''', (code,)).fetchall()
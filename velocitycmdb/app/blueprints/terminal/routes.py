@@ -16,6 +16,7 @@ from velocitycmdb.app.utils.database import get_db_connection
 import paramiko
 import threading
 import queue
+import select
 import time
 import io
 import os
@@ -346,17 +347,20 @@ class SSHSession:
                     self.output_queue.put(None)  # Sentinel for disconnect
                     break
 
-                if self.channel.recv_ready():
-                    data = self.channel.recv(4096)
-                    if data:
-                        self.output_queue.put(data.decode('utf-8', errors='ignore'))
-                    else:
-                        # Empty recv = EOF (remote closed)
-                        self.running = False
-                        self.output_queue.put(None)  # Sentinel for disconnect
-                        break
+                # Block until the channel has data; the timeout only bounds
+                # how long a close() takes to be noticed
+                readable, _, _ = select.select([self.channel], [], [], 0.5)
+                if not readable:
+                    continue
+
+                data = self.channel.recv(32768)
+                if data:
+                    self.output_queue.put(data.decode('utf-8', errors='ignore'))
                 else:
-                    time.sleep(0.01)
+                    # Empty recv = EOF (remote closed)
+                    self.running = False
+                    self.output_queue.put(None)  # Sentinel for disconnect
+                    break
             except Exception:
                 self.running = False
                 self.output_queue.put(None)  # Sentinel for disconnect
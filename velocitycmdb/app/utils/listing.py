@@ -0,0 +1,109 @@
+# app/utils/listing.py
+"""
+Helpers for large listings: keyset (cursor) pagination, indexed substring
+search and streamed CSV exports.
+
+Keyset pagination continues from the sort key of the last row shown, so the
+database seeks to the next page instead of counting past OFFSET rows. A sort
+is a list of (sql_expression, 'ASC' | 'DESC') ending in a unique column.
+"""
+import base64
+import csv
+import io
+import json
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+# Minimum term length the trigram index can answer
+TRIGRAM_MIN_LENGTH = 3
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Opaque cursor for a row's sort key values"""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[list]:
+    """Sort key values from a cursor, or None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def order_clause(sort: List[Tuple[str, str]], reverse: bool = False) -> str:
+    """ORDER BY for the sort, or for the sort read backwards"""
+    flip = {'ASC': 'DESC', 'DESC': 'ASC'}
+    return ' ORDER BY ' + ', '.join(
+        f"{expression} {flip[direction] if reverse else direction}" for expression, direction in sort)
+
+
+def keyset_condition(sort: List[Tuple[str, str]], values: Sequence,
+                     after: bool = True) -> Tuple[str, list]:
+    """
+    WHERE condition for rows strictly after (or before) the given sort key
+
+    The leading column's bound is repeated on its own so SQLite can start
+    an index range scan there.
+    """
+    clauses = []
+    params = []
+    for i, (expression, direction) in enumerate(sort):
+        op = '>' if (direction == 'ASC') == after else '<'
+        terms = [f"{prior} = ?" for prior, _ in sort[:i]] + [f"{expression} {op} ?"]
+        clauses.append('(' + ' AND '.join(terms) + ')')
+        params.extend(list(values[:i]) + [values[i]])
+
+    first, direction = sort[0]
+    bound = '>=' if (direction == 'ASC') == after else '<='
+    return f"({first} {bound} ? AND ({' OR '.join(clauses)}))", [values[0]] + params
+
+
+def has_search_index(conn, fts_table: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (fts_table,)).fetchone()
+    return row is not None
+
+
+def search_condition(conn, term: str, fts_table: str, rowid_expression: str,
+                     like_columns: Sequence[str],
+                     fts_columns: Optional[Sequence[str]] = None) -> Tuple[str, list]:
+    """
+    Substring match of `term` over the indexed columns
+
+    Uses the trigram index when it exists and the term is long enough,
+    otherwise LIKE '%term%' on like_columns (same matches, full scan).
+    fts_columns limits the index match to those columns.
+    """
+    if len(term) >= TRIGRAM_MIN_LENGTH and has_search_index(conn, fts_table):
+        phrase = '"' + term.replace('"', '""') + '"'
+        if fts_columns:
+            phrase = '{' + ' '.join(fts_columns) + '} : ' + phrase
+        return (f"{rowid_expression} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)",
+                [phrase])
+
+    pattern = f"%{term}%"
+    return '(' + ' OR '.join(f"{column} LIKE ?" for column in like_columns) + ')', \
+        [pattern] * len(like_columns)
+
+
+def csv_stream(header: Sequence, rows: Iterable[Sequence], chunk_rows: int = 500):
+    """CSV text in chunks of chunk_rows rows, written as `rows` yields them"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
@@ -0,0 +1,177 @@
+# app/utils/response_cache.py
+"""
+Server-side cache for read-only dashboard pages and stats APIs.
+
+A cached view is keyed by endpoint, view arguments, query string and the
+signed-in user, and stamped with the data version and id of the databases it
+reads (see velocitycmdb.db.data_version). Loaders, maintenance jobs and
+data-editing requests bump that version, and a recreated database has a new
+id, so an entry is served until the data behind it changes;
+polling clients then cost one small SELECT per request instead of the
+view's aggregates. Responses carry a content ETag and a matching
+If-None-Match gets 304 Not Modified.
+
+Usage:
+    @bp.route('/api/stats')
+    @cached_response('DATABASE')
+    def api_stats(): ...
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, g, make_response, request, session
+
+from velocitycmdb.db.data_version import bump_data_version, get_data_token
+
+
+class ResponseCache:
+    """Thread-safe LRU of rendered responses"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0}
+
+    def get(self, key, version, max_age: Optional[float] = None):
+        """Entry for key if it was built at this data version (and within max_age)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['version'] != version or \
+                    (max_age is not None and time.monotonic() - entry['created'] > max_age):
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def put(self, key, version, body: bytes, status: int, mimetype: str):
+        return self._store(key, {
+            'version': version,
+            'body': body,
+            'status': status,
+            'mimetype': mimetype,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'created': time.monotonic(),
+        })
+
+    def put_value(self, key, version, value):
+        """Store a computed value (not a response) under key"""
+        return self._store(key, {'version': version, 'value': value, 'created': time.monotonic()})
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+# Aggregates shared by many distinct responses (listing totals, stats panels)
+query_cache = ResponseCache()
+
+
+def skip_response_cache():
+    """Keep this request's response out of the cache (e.g. a page rendered from an error)"""
+    g.skip_response_cache = True
+
+
+def init_app(app):
+    """Bump the assets data version after requests that edit data"""
+
+    @app.after_request
+    def bump_after_edit(response):
+        if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and response.status_code < 400:
+            db_path = app.config.get('DATABASE')
+            if db_path and os.path.exists(db_path):
+                try:
+                    bump_data_version(db_path, 'web')
+                except sqlite3.Error as e:
+                    app.logger.warning(f"Could not bump data version: {e}")
+        return response
+
+
+def current_data_version(*config_keys):
+    """(database id, data version) of each database named by app config keys"""
+    return tuple(get_data_token(current_app.config.get(key, '')) for key in config_keys)
+
+
+def cached_query(key, compute, *config_keys):
+    """
+    compute() for key, reused until the data version of the databases named
+    by config_keys moves. For counts and stats a view runs on every page of
+    a listing, where caching the whole response would still recompute them
+    for each page, filter and cursor.
+    """
+    version = current_data_version(*config_keys)
+    entry = query_cache.get(key, version)
+    if entry is None:
+        entry = query_cache.put_value(key, version, compute())
+    return entry['value']
+
+
+def _respond(entry):
+    if request.if_none_match.contains(entry['etag']):
+        response_cache.stats['not_modified'] += 1
+        response = make_response('', 304)
+    else:
+        response = make_response(entry['body'], entry['status'])
+        response.mimetype = entry['mimetype']
+    response.set_etag(entry['etag'])
+    # Per-user pages: browsers revalidate every time, shared caches never store
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_response(*config_keys, max_age: Optional[float] = None):
+    """
+    Cache a GET view's 200 responses until the data version of the
+    databases named by config_keys (e.g. 'DATABASE', 'ARP_DATABASE') moves.
+
+    Args:
+        config_keys: App config keys of the database paths the view reads
+        max_age: Also rebuild entries older than this many seconds, for views
+            whose output depends on the clock (e.g. "last 24 hours")
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Pending flash messages render into the page; never cache those
+            if request.method != 'GET' or session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            version = current_data_version(*config_keys)
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                session.get('username'),
+                session.get('is_admin'),
+            )
+
+            entry = response_cache.get(key, version, max_age)
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or g.get('skip_response_cache'):
+                    return response
+                entry = response_cache.put(key, version, response.get_data(),
+                                           response.status_code, response.mimetype)
+            return _respond(entry)
+
+        return wrapper
+
+    return decorator
@@ -494,22 +494,13 @@ class ArpCaptureLoader:
                 )
 
                 # Add ARP entries
-                for entry in arp_entries:
-                    try:
-                        arp_util.add_arp_entry(
-                            device_id, context_id,
-                            entry['ip_address'],
-                            entry['mac_address'],
-                            interface_name=entry.get('interface_name'),
-                            entry_type=entry.get('entry_type', 'dynamic'),
-                            age=entry.get('age'),
-                            capture_timestamp=capture_timestamp,
-                            source_file=file_path,
-                            source_command='show arp'
-                        )
-                        entries_loaded += 1
-                    except Exception as e:
-                        logger.warning(f"Error adding ARP entry {entry}: {e}")
+                result = arp_util.add_arp_entries(
+                    device_id, context_id, arp_entries,
+                    capture_timestamp=capture_timestamp,
+                    source_file=file_path,
+                    source_command='show arp'
+                )
+                entries_loaded = result['inserted']
 
         except Exception as e:
             logger.error(f"Error storing ARP data for {file_path}: {e}")
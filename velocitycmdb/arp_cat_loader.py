@@ -18,6 +18,9 @@ import ipaddress
 
 # Import our ARP Cat utility
 from arp_cat_util import ArpCatUtil, get_parser
+from tfsm_pool import ParsePool, ParseJob, iter_filter_results
+
+from velocitycmdb.db.data_version import bump_data_version
 
 # Import TextFSM engine if available
 try:
@@ -41,6 +44,9 @@ logger = logging.getLogger(__name__)
 class ArpCaptureLoader:
     """Loads ARP captures from assets.db and processes them into arp_cat.db"""
 
+    # Stop trying further filters once a template scores above this
+    HIGH_CONFIDENCE_SCORE = 70
+
     def __init__(self, assets_db_path: str = "assets.db",
                  arp_cat_db_path: str = "arp_cat.db",
                  textfsm_db_path: str = "Anguis/tfsm_templates.db",
@@ -288,70 +294,9 @@ class ArpCaptureLoader:
             filter_attempts = self._create_vendor_filter(vendor, device_type)
             logger.info(f"Trying TextFSM filters for vendor '{vendor}': {filter_attempts}")
 
-            best_result = None
-            best_score = 0
-
-            for i, filter_string in enumerate(filter_attempts, 1):
-                logger.debug(f"Attempt {i}/{len(filter_attempts)}: Testing filter '{filter_string}'")
-
-                try:
-                    # Handle different return formats from tfsm_fire
-                    result = self.textfsm_engine.find_best_template(cleaned_content, filter_string)
-                    logger.debug(f"  Raw result type: {type(result)}")
-                    logger.debug(f"  Raw result length: {len(result) if hasattr(result, '__len__') else 'N/A'}")
-
-                    if len(result) == 4:
-                        template, parsed_data, score, template_content = result
-                    elif len(result) == 3:
-                        template, parsed_data, score = result
-                        template_content = None
-                    else:
-                        logger.debug(f"  Unexpected result format: {len(result)} items")
-                        continue
-
-                    # Safety check for None score
-                    if score is None:
-                        logger.debug(f"  Template '{template}' returned None score, skipping")
-                        continue
-
-                    logger.debug(f"  Template found: '{template}' with score {score}")
-                    logger.debug(f"  Parsed {len(parsed_data) if parsed_data else 0} records")
-
-                    # Debug the parsed data structure
-                    if parsed_data and len(parsed_data) > 0:
-                        sample_record = parsed_data[0]
-                        if isinstance(sample_record, dict):
-                            logger.debug(f"  Sample record fields: {list(sample_record.keys())}")
-                            logger.debug(f"  Sample record: {sample_record}")
-
-                    if score > best_score and parsed_data:
-                        best_score = score
-                        best_result = {
-                            'template_name': template,
-                            'score': score,
-                            'parsed_data': parsed_data,
-                            'filter_used': filter_string,
-                            'template_content': template_content
-                        }
-
-                        logger.info(f"  ✓ NEW BEST MATCH: {template} (score: {score}, records: {len(parsed_data)})")
-
-                        # High confidence match - stop searching
-                        if score > 70:
-                            logger.info(f"  High confidence match (>70) - stopping search")
-                            break
-
-                except Exception as e:
-                    logger.debug(f"  Filter '{filter_string}' failed: {e}")
-                    continue
-
-            if best_result and best_result.get('score', 0) > 2:
-                logger.info(f"FINAL RESULT: Template '{best_result['template_name']}' " +
-                            f"(score: {best_result['score']}, filter: '{best_result['filter_used']}')")
-                return best_result
-            else:
-                logger.warning(
-                    f"No suitable TextFSM template found (best score: {best_result.get('score', 0) if best_result else 0})")
+            filter_results = iter_filter_results(self.textfsm_engine, cleaned_content,
+                                                 filter_attempts, platform=vendor)
+            return self._select_textfsm_result(filter_results)
 
         except Exception as e:
             logger.error(f"TextFSM parsing failed: {e}")
@@ -360,6 +305,61 @@ class ArpCaptureLoader:
 
         return None
 
+    def _select_textfsm_result(self, filter_results) -> Optional[Dict]:
+        """
+        Pick the best result from (filter, template, parsed_data, score) tuples.
+
+        filter_results may be a lazy iterator (serial mode) or a list computed
+        by a parse worker; either way the search stops at the first
+        high-confidence match.
+        """
+        best_result = None
+        best_score = 0
+
+        for i, (filter_string, template, parsed_data, score) in enumerate(filter_results, 1):
+            logger.debug(f"Attempt {i}: filter '{filter_string}'")
+
+            # Safety check for None score
+            if score is None:
+                logger.debug(f"  Template '{template}' returned None score, skipping")
+                continue
+
+            logger.debug(f"  Template found: '{template}' with score {score}")
+            logger.debug(f"  Parsed {len(parsed_data) if parsed_data else 0} records")
+
+            # Debug the parsed data structure
+            if parsed_data and len(parsed_data) > 0:
+                sample_record = parsed_data[0]
+                if isinstance(sample_record, dict):
+                    logger.debug(f"  Sample record fields: {list(sample_record.keys())}")
+                    logger.debug(f"  Sample record: {sample_record}")
+
+            if score > best_score and parsed_data:
+                best_score = score
+                best_result = {
+                    'template_name': template,
+                    'score': score,
+                    'parsed_data': parsed_data,
+                    'filter_used': filter_string,
+                    'template_content': None
+                }
+
+                logger.info(f"  ✓ NEW BEST MATCH: {template} (score: {score}, records: {len(parsed_data)})")
+
+                # High confidence match - stop searching
+                if score > self.HIGH_CONFIDENCE_SCORE:
+                    logger.info(f"  High confidence match (>{self.HIGH_CONFIDENCE_SCORE}) - stopping search")
+                    break
+
+        if best_result and best_result.get('score', 0) > 2:
+            logger.info(f"FINAL RESULT: Template '{best_result['template_name']}' " +
+                        f"(score: {best_result['score']}, filter: '{best_result['filter_used']}')")
+            return best_result
+
+        logger.warning(
+            f"No suitable TextFSM template found (best score: {best_result.get('score', 0) if best_result else 0})")
+        return None
+
     def _normalize_mac_address(self, mac: str) -> str:
         """Normalize MAC address to standard format"""
         if not mac:
@@ -538,8 +538,8 @@ class ArpCaptureLoader:
             logger.error(f"Error querying assets database: {e}")
             return []
 
-    def load_arp_capture(self, capture: Dict) -> int:
-        """Load a single ARP capture into arp_cat.db"""
+    def _read_capture(self, capture: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """Resolve a capture's file path and read it; returns (file_path, content) or (None, None)"""
         file_path = capture.get('file_path')
 
         # Handle relative paths - try multiple locations
@@ -573,7 +573,7 @@ class ArpCaptureLoader:
 
         if not file_path or not os.path.exists(file_path):
             logger.warning(f"ARP file not found: {capture.get('file_path')}")
-            return 0
+            return None, None
 
         logger.info(f"Processing ARP capture: {file_path}")
 
@@ -583,12 +583,31 @@ class ArpCaptureLoader:
                 content = f.read()
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
-            return 0
+            return None, None
 
         if not content.strip():
             logger.warning(f"Empty ARP file: {file_path}")
+            return None, None
+
+        return file_path, content
+
+    def load_arp_capture(self, capture: Dict) -> int:
+        """Load a single ARP capture into arp_cat.db"""
+        file_path, content = self._read_capture(capture)
+        if content is None:
+            return 0
+
+        if not self.textfsm_engine:
+            logger.error("TextFSM engine not available")
             return 0
 
+        textfsm_result = self._parse_arp_with_textfsm(
+            content, capture.get('vendor_name', ''), capture.get('device_type_name', '')
+        )
+        return self._store_parsed_capture(capture, file_path, textfsm_result)
+
+    def _store_parsed_capture(self, capture: Dict, file_path: str, textfsm_result: Optional[Dict]) -> int:
+        """Extract ARP entries from a TextFSM result and write them to arp_cat.db"""
         # Extract device and context information
         device_info = {
             'hostname': capture.get('device_name', capture.get('device_normalized_name', 'unknown')),
@@ -600,22 +619,13 @@ class ArpCaptureLoader:
         }
 
         # Parse ARP entries using TextFSM only
-        arp_entries = []
         vendor = capture.get('vendor_name', '')
 
-        if self.textfsm_engine:
-            textfsm_result = self._parse_arp_with_textfsm(
-                content, vendor, capture.get('device_type_name', '')
-            )
-
-            if textfsm_result:
-                arp_entries = self._extract_arp_entries_from_textfsm(textfsm_result)
-                logger.info(f"TextFSM extracted {len(arp_entries)} ARP entries from {file_path}")
-            else:
-                logger.warning(f"TextFSM found no matching templates for {file_path} (vendor: {vendor})")
-                return 0
+        if textfsm_result:
+            arp_entries = self._extract_arp_entries_from_textfsm(textfsm_result)
+            logger.info(f"TextFSM extracted {len(arp_entries)} ARP entries from {file_path}")
         else:
-            logger.error("TextFSM engine not available")
+            logger.warning(f"TextFSM found no matching templates for {file_path} (vendor: {vendor})")
             return 0
 
         if not arp_entries:
@@ -643,31 +653,21 @@ class ArpCaptureLoader:
                     context_id = arp_util.get_or_create_context(device_id, **context_info)
                     capture_timestamp = self._normalize_timestamp(capture.get('capture_timestamp'))
 
-                    # Check for existing snapshot and handle duplicates
-                    snapshot_id = self._get_or_replace_snapshot(
+                    # Record (or replace) the snapshot; entries are keyed by device/context
+                    self._get_or_replace_snapshot(
                         arp_util, device_id, context_id, capture_timestamp,
                         source_file=file_path,
                         source_command='show arp',
                         processing_status='processed'
                     )
 
-                    entries_loaded = 0
-                    for entry in entries:
-                        try:
-                            arp_util.add_arp_entry(
-                                device_id, context_id,
-                                entry['ip_address'],
-                                entry['mac_address'],
-                                interface_name=entry.get('interface_name'),
-                                entry_type=entry.get('entry_type', 'dynamic'),
-                                age=entry.get('age'),
-                                capture_timestamp=capture_timestamp,
-                                source_file=file_path,
-                                source_command='show arp'
-                            )
-                            entries_loaded += 1
-                        except Exception as e:
-                            logger.warning(f"Error adding ARP entry {entry}: {e}")
+                    result = arp_util.add_arp_entries(
+                        device_id, context_id, entries,
+                        capture_timestamp=capture_timestamp,
+                        source_file=file_path,
+                        source_command='show arp'
+                    )
+                    entries_loaded = result['inserted']
 
                     total_entries_loaded += entries_loaded
                     logger.info(f"Loaded {entries_loaded} entries for context '{context_name}'")
@@ -679,6 +679,68 @@ class ArpCaptureLoader:
         logger.info(f"Total loaded {total_entries_loaded} ARP entries from {file_path}")
         return total_entries_loaded
 
+    def _load_captures_parallel(self, captures: List[Dict], stats: Dict[str, int], workers: int):
+        """Parse captures in a worker pool; results are stored here, in capture order"""
+        filter_sets = {}
+
+        def parse_jobs():
+            for capture in captures:
+                file_path, content = self._read_capture(capture)
+                job = None
+                if content is not None:
+                    vendor = capture.get('vendor_name', '')
+                    cleaned_content = self._preprocess_cli_output(content, vendor)
+                    if cleaned_content.strip():
+                        filters = self._create_vendor_filter(vendor, capture.get('device_type_name', ''))
+                        job = ParseJob(cleaned_content, filters, platform=vendor,
+                                       stop_score=self.HIGH_CONFIDENCE_SCORE)
+                    else:
+                        logger.warning("Content is empty after preprocessing")
+                yield (capture, file_path, content), job
+
+        for capture in captures:
+            vendor = capture.get('vendor_name', '')
+            if vendor not in filter_sets:
+                filter_sets[vendor] = self._create_vendor_filter(vendor, capture.get('device_type_name', ''))
+        warm_filters = [f for filters in filter_sets.values() for f in filters]
+
+        with ParsePool(self.textfsm_engine.db_path, workers=workers, warm_filters=warm_filters) as pool:
+            for i, ((capture, file_path, content), filter_results) in enumerate(pool.imap(parse_jobs()), 1):
+                self._log_capture_header(i, len(captures), capture)
+                try:
+                    if content is None:
+                        entries_count = 0
+                    else:
+                        textfsm_result = self._select_textfsm_result(filter_results or [])
+                        entries_count = self._store_parsed_capture(capture, file_path, textfsm_result)
+                    self._record_capture_result(stats, entries_count)
+                except Exception as e:
+                    self._record_capture_error(stats, e)
+
+    def _log_capture_header(self, index: int, total: int, capture: Dict):
+        logger.info(f"\n--- Processing {index}/{total}: {capture.get('device_name')} ---")
+        logger.info(f"File: {capture.get('file_path')}")
+        logger.info(f"Vendor: {capture.get('vendor_name')}")
+        logger.info(f"Device Type: {capture.get('device_type_name')}")
+
+    def _record_capture_result(self, stats: Dict[str, int], entries_count: Optional[int]):
+        if entries_count is None:
+            entries_count = 0
+
+        if entries_count > 0:
+            stats['files_processed'] += 1
+            stats['total_entries'] += entries_count
+            logger.info(f"✓ SUCCESS: Loaded {entries_count} entries")
+        else:
+            stats['files_skipped'] += 1
+            logger.warning(f"✗ SKIPPED: No entries loaded")
+
+    def _record_capture_error(self, stats: Dict[str, int], error: Exception):
+        logger.error(f"✗ ERROR: {error}")
+        stats['errors'] += 1
+        import traceback
+        logger.debug(traceback.format_exc())
+
     def _group_entries_by_context(self, arp_entries: List[Dict], vendor: str) -> Dict[str, List[Dict]]:
         """Group ARP entries by VRF/context"""
         context_groups = {}
@@ -766,7 +828,8 @@ class ArpCaptureLoader:
             # Update the snapshot metadata
             cursor.execute('''
                 UPDATE arp_snapshots 
-                SET source_file = ?, source_command = ?, processing_status = ?
+                SET source_file = ?, source_command = ?, processing_status = ?,
+                    total_entries = 0
                 WHERE id = ?
             ''', (kwargs.get('source_file'), kwargs.get('source_command'),
                   kwargs.get('processing_status'), snapshot_id))
@@ -779,8 +842,17 @@ class ArpCaptureLoader:
                 device_id, context_id, capture_timestamp, **kwargs
             )
 
-    def load_all_captures(self, max_files: int = None, device_filter: str = None) -> Dict[str, int]:
-        """Load all ARP captures from assets database"""
+    def load_all_captures(self, max_files: int = None, device_filter: str = None,
+                          workers: int = 1) -> Dict[str, int]:
+        """
+        Load all ARP captures from assets database
+
+        Args:
+            max_files: Maximum captures to process
+            device_filter: Partial device name filter
+            workers: TextFSM parse worker processes; 1 parses inline. Database
+                writes always happen in this process.
+        """
         captures = self.get_arp_captures(device_filter=device_filter)
 
         if max_files:
@@ -797,32 +869,22 @@ class ArpCaptureLoader:
                     (f" (max {max_files})" if max_files else "") +
                     (f" (filtered by '{device_filter}')" if device_filter else ""))
 
-        for i, capture in enumerate(captures, 1):
-            logger.info(f"\n--- Processing {i}/{len(captures)}: {capture.get('device_name')} ---")
-            logger.info(f"File: {capture.get('file_path')}")
-            logger.info(f"Vendor: {capture.get('vendor_name')}")
-            logger.info(f"Device Type: {capture.get('device_type_name')}")
-
-            try:
-                entries_count = self.load_arp_capture(capture)
-
-                if entries_count is None:
-                    entries_count = 0
-
-                if entries_count > 0:
-                    stats['files_processed'] += 1
-                    stats['total_entries'] += entries_count
-                    logger.info(f"✓ SUCCESS: Loaded {entries_count} entries")
-                else:
-                    stats['files_skipped'] += 1
-                    logger.warning(f"✗ SKIPPED: No entries loaded")
-            except Exception as e:
-                logger.error(f"✗ ERROR: {e}")
-                stats['errors'] += 1
-                import traceback
-                logger.debug(traceback.format_exc())
+        if workers and workers > 1 and self.textfsm_engine:
+            self._load_captures_parallel(captures, stats, workers)
+        else:
+            for i, capture in enumerate(captures, 1):
+                self._log_capture_header(i, len(captures), capture)
+                try:
+                    self._record_capture_result(stats, self.load_arp_capture(capture))
+                except Exception as e:
+                    self._record_capture_error(stats, e)
 
         logger.info(f"\nProcessing complete: {stats}")
+        # Cached ARP statistics are keyed on the data version
+        if stats['files_processed']:
+            bump_data_version(self.arp_cat_db_path, 'arp')
+        if self.textfsm_engine and hasattr(self.textfsm_engine, 'cache_stats'):
+            logger.info(f"TextFSM template cache: {self.textfsm_engine.cache_stats()}")
         return stats
 
 
@@ -837,6 +899,8 @@ def main():
     parser.add_argument("--captures-dir", help="Base directory for capture files")
     parser.add_argument("--max-files", type=int, help="Maximum files to process")
     parser.add_argument("--device-filter", help="Filter by device name (partial match)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="TextFSM parse worker processes (default: 1, parse inline)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
     parser.add_argument("--debug", action="store_true", help="Debug level logging")
 
@@ -854,7 +918,8 @@ def main():
         captures_dir=args.captures_dir
     )
 
-    stats = loader.load_all_captures(max_files=args.max_files, device_filter=args.device_filter)
+    stats = loader.load_all_captures(max_files=args.max_files, device_filter=args.device_filter,
+                                     workers=args.workers)
 
     print(f"\nARP Capture Loading Complete:")
     print(f"  Files processed: {stats['files_processed']}")
@@ -99,6 +99,7 @@ def reset_arp_cat_db(db_path: str = "arp_cat.db"):
             context_id INTEGER NOT NULL,
             ip_address TEXT NOT NULL,
             mac_address TEXT NOT NULL,
+            mac_key INTEGER,
             mac_address_raw TEXT NOT NULL,
             interface_name TEXT,
             entry_type TEXT,
@@ -123,6 +124,7 @@ def reset_arp_cat_db(db_path: str = "arp_cat.db"):
         "CREATE INDEX idx_arp_entries_mac ON arp_entries(mac_address)",
         "CREATE INDEX idx_arp_entries_ip ON arp_entries(ip_address)",
         "CREATE INDEX idx_arp_entries_mac_ip ON arp_entries(mac_address, ip_address)",
+        "CREATE INDEX idx_arp_entries_mac_key ON arp_entries(mac_key, is_current, capture_timestamp)",
         "CREATE INDEX idx_arp_entries_timestamp ON arp_entries(capture_timestamp)",
         "CREATE INDEX idx_arp_entries_current ON arp_entries(is_current)"
     ]
@@ -159,13 +161,7 @@ def reset_arp_cat_db(db_path: str = "arp_cat.db"):
         FOR EACH ROW
         BEGIN
             UPDATE arp_snapshots
-            SET total_entries = (
-                SELECT COUNT(*)
-                FROM arp_entries
-                WHERE device_id = NEW.device_id
-                AND context_id = NEW.context_id
-                AND capture_timestamp = NEW.capture_timestamp
-            )
+            SET total_entries = COALESCE(total_entries, 0) + 1
             WHERE device_id = NEW.device_id
             AND context_id = NEW.context_id
             AND capture_timestamp = NEW.capture_timestamp;
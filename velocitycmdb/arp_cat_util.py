@@ -10,11 +10,14 @@ import sqlite3
 import re
 import logging
 import os
+import time
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Union
+from typing import Dict, List, Tuple, Union
 from pathlib import Path
 import ipaddress
 
+from velocitycmdb.db.mac_key import mac_to_key, migrate_arp_mac_key
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -49,6 +52,9 @@ class ArpCatUtil:
 
             if not cursor.fetchone():
                 self._create_schema()
+            else:
+                self._upgrade_snapshot_count_trigger()
+                self._ensure_mac_key_column()
 
         except sqlite3.Error as e:
             logger.error(f"Database initialization error: {e}")
@@ -62,6 +68,42 @@ class ArpCatUtil:
         # Execute the schema SQL from the previous artifact
         pass
 
+    def _upgrade_snapshot_count_trigger(self):
+        """
+        Replace the old COUNT(*)-per-row snapshot trigger with an incremental one.
+
+        The original trigger recounted every entry of the snapshot on each
+        insert, which makes large ARP tables quadratic to load.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT sql FROM sqlite_master
+            WHERE type='trigger' AND name='tr_update_snapshot_count'
+        """)
+        row = cursor.fetchone()
+        if not row or 'COUNT(*)' not in (row[0] or ''):
+            return
+
+        logger.info("Upgrading tr_update_snapshot_count to incremental form")
+        cursor.execute("DROP TRIGGER tr_update_snapshot_count")
+        cursor.execute("""
+            CREATE TRIGGER tr_update_snapshot_count
+            AFTER INSERT ON arp_entries
+            FOR EACH ROW
+            BEGIN
+                UPDATE arp_snapshots
+                SET total_entries = COALESCE(total_entries, 0) + 1
+                WHERE device_id = NEW.device_id
+                AND context_id = NEW.context_id
+                AND capture_timestamp = NEW.capture_timestamp;
+            END
+        """)
+        self.conn.commit()
+
+    def _ensure_mac_key_column(self):
+        """Add and backfill arp_entries.mac_key on databases created before it existed (once)"""
+        migrate_arp_mac_key(self.conn)
+
     def normalize_mac_address(self, mac: str) -> str:
         """
         Normalize MAC address to standard format (lowercase, colon-separated).
@@ -227,6 +269,7 @@ class ArpCatUtil:
 
         # Normalize MAC address
         mac_normalized = self.normalize_mac_address(mac_address)
+        mac_key = mac_to_key(mac_normalized)
 
         cursor = self.conn.cursor()
 
@@ -240,15 +283,16 @@ class ArpCatUtil:
         # Insert new entry
         cursor.execute("""
             INSERT INTO arp_entries (
-                device_id, context_id, ip_address, mac_address, mac_address_raw,
-                interface_name, entry_type, age, protocol, capture_timestamp,
-                source_file, source_command, is_current
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                device_id, context_id, ip_address, mac_address, mac_key,
+                mac_address_raw, interface_name, entry_type, age, protocol,
+                capture_timestamp, source_file, source_command, is_current
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
         """, (
             device_id,
             context_id,
             ip_address,
             mac_normalized,
+            mac_key,
             mac_address,  # Keep original format
             kwargs.get('interface_name'),
             kwargs.get('entry_type', 'dynamic'),
@@ -262,6 +306,105 @@ class ArpCatUtil:
         self.conn.commit()
         return cursor.lastrowid
 
+    def add_arp_entries(self, device_id: int, context_id: int, entries: List[Dict],
+                        capture_timestamp: str = None, source_file: str = None,
+                        source_command: str = None) -> Dict:
+        """
+        Bulk-load one capture's ARP entries for a device/context.
+
+        Previous entries for the device/context are marked not current with a
+        single statement, then all rows are inserted with executemany in one
+        transaction. Rows with an invalid IP or MAC are skipped, not fatal.
+
+        Args:
+            device_id: Device ID
+            context_id: Context ID
+            entries: Dicts with ip_address and mac_address, plus optional
+                mac_address_raw, interface_name, entry_type, age, protocol
+            capture_timestamp: Capture time shared by all rows
+            source_file: Source capture file
+            source_command: Command that produced the capture
+
+        Returns:
+            Dict with inserted, skipped, seconds and rows_per_second
+        """
+        if not capture_timestamp:
+            capture_timestamp = datetime.now().isoformat()
+
+        started = time.perf_counter()
+        rows = []
+        skipped = 0
+
+        for entry in entries:
+            ip_address = entry.get('ip_address')
+            mac_address = entry.get('mac_address')
+            try:
+                if not self.validate_ip_address(ip_address):
+                    raise ValueError(f"Invalid IP address: {ip_address}")
+                mac_normalized = self.normalize_mac_address(mac_address)
+                mac_key = mac_to_key(mac_normalized)
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Skipping ARP entry {entry}: {e}")
+                skipped += 1
+                continue
+
+            rows.append((
+                device_id,
+                context_id,
+                ip_address,
+                mac_normalized,
+                mac_key,
+                entry.get('mac_address_raw') or mac_address,  # Keep original format
+                entry.get('interface_name'),
+                entry.get('entry_type') or 'dynamic',
+                entry.get('age'),
+                entry.get('protocol') or 'IPv4',
+                capture_timestamp,
+                source_file,
+                source_command
+            ))
+
+        with self.conn:
+            cursor = self.conn.cursor()
+
+            # One set-based flip per device/context instead of one UPDATE per IP
+            cursor.execute("""
+                UPDATE arp_entries
+                SET is_current = 0
+                WHERE device_id = ? AND context_id = ? AND is_current = 1
+            """, (device_id, context_id))
+
+            cursor.executemany("""
+                INSERT INTO arp_entries (
+                    device_id, context_id, ip_address, mac_address, mac_key,
+                    mac_address_raw, interface_name, entry_type, age, protocol,
+                    capture_timestamp, source_file, source_command, is_current
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+            """, rows)
+
+            # Snapshot count is exact even if the snapshot was re-imported
+            cursor.execute("""
+                UPDATE arp_snapshots
+                SET total_entries = (
+                    SELECT COUNT(*) FROM arp_entries
+                    WHERE device_id = ? AND context_id = ? AND capture_timestamp = ?
+                )
+                WHERE device_id = ? AND context_id = ? AND capture_timestamp = ?
+            """, (device_id, context_id, capture_timestamp,
+                  device_id, context_id, capture_timestamp))
+
+        seconds = time.perf_counter() - started
+        rows_per_second = len(rows) / seconds if seconds > 0 else float(len(rows))
+        logger.info(f"Inserted {len(rows)} ARP entries ({skipped} skipped) "
+                    f"in {seconds:.3f}s ({rows_per_second:,.0f} rows/s)")
+
+        return {
+            'inserted': len(rows),
+            'skipped': skipped,
+            'seconds': seconds,
+            'rows_per_second': rows_per_second
+        }
+
     def create_snapshot(self, device_id: int, context_id: int,
                         capture_timestamp: str = None, **kwargs) -> int:
         """
@@ -300,26 +443,56 @@ class ArpCatUtil:
 
     def search_mac(self, mac_address: str, history: bool = False) -> List[Dict]:
         """Search for MAC address across all entries."""
-        try:
-            normalized_mac = self.normalize_mac_address(mac_address)
-        except ValueError as e:
-            logger.error(f"Invalid MAC address for search: {e}")
+        mac_key = mac_to_key(mac_address)
+        if mac_key is None:
+            logger.error(f"Invalid MAC address for search: {mac_address}")
             return []
 
         cursor = self.conn.cursor()
 
+        # Query arp_entries directly so the lookup is a seek on idx_arp_entries_mac_key
         if history:
             cursor.execute("""
-                SELECT * FROM v_mac_history 
-                WHERE mac_address = ?
-                ORDER BY capture_timestamp DESC
-            """, (normalized_mac,))
+                SELECT
+                    ae.mac_address,
+                    ae.ip_address,
+                    d.hostname,
+                    c.context_name,
+                    c.context_type,
+                    ae.interface_name,
+                    ae.capture_timestamp,
+                    ae.entry_type,
+                    COUNT(*) OVER () as total_occurrences
+                FROM arp_entries ae
+                JOIN devices d ON ae.device_id = d.id
+                JOIN contexts c ON ae.context_id = c.id
+                WHERE ae.mac_key = ?
+                ORDER BY ae.capture_timestamp DESC
+            """, (mac_key,))
         else:
             cursor.execute("""
-                SELECT * FROM v_current_arp 
-                WHERE mac_address = ?
-                ORDER BY capture_timestamp DESC
-            """, (normalized_mac,))
+                SELECT
+                    ae.id,
+                    d.hostname,
+                    d.device_type,
+                    d.vendor,
+                    c.context_name,
+                    c.context_type,
+                    ae.ip_address,
+                    ae.mac_address,
+                    ae.mac_address_raw,
+                    ae.interface_name,
+                    ae.entry_type,
+                    ae.age,
+                    ae.protocol,
+                    ae.capture_timestamp,
+                    ae.source_file
+                FROM arp_entries ae
+                JOIN devices d ON ae.device_id = d.id
+                JOIN contexts c ON ae.context_id = c.id
+                WHERE ae.mac_key = ? AND ae.is_current = 1
+                ORDER BY ae.capture_timestamp DESC
+            """, (mac_key,))
 
         columns = [desc[0] for desc in cursor.description]
         return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: change detection before and after services/change_detection.py
+
+Times the CaptureLoader path this module replaced (ten re.match calls per
+line, difflib.unified_diff, then two more scans of the diff text for counts
+and severity) against ChangeDetector.compare() on consecutive snapshots from
+assets.db, and on a synthetic large config to show how each scales.
+"""
+
+import argparse
+import difflib
+import random
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+from velocitycmdb.services.capture_store import CaptureStore
+from velocitycmdb.services.change_detection import CHANGE_TRACKED_TYPES, ChangeDetector
+
+DB_PATH = Path.home() / '.velocitycmdb/data/assets.db'
+
+
+class LegacyChangePath:
+    """CaptureLoader's change detection as it was, kept as the baseline"""
+
+    CHANGE_TRACKED_TYPES = CHANGE_TRACKED_TYPES
+
+    def compare(self, old_content: str, new_content: str, capture_type: str):
+        diff_content = self.generate_diff(old_content, new_content, capture_type)
+        if not diff_content.strip():
+            return diff_content, 0, 0, None
+        return (diff_content, diff_content.count('\n+'), diff_content.count('\n-'),
+                self.classify_severity(capture_type, diff_content))
+
+    def normalize_config_for_diff(self, content: str, capture_type: str) -> str:
+        """Remove noise/dynamic content before generating diffs"""
+        if capture_type not in self.CHANGE_TRACKED_TYPES:
+            return content
+
+        # Generic noise patterns - timestamps and dynamic banners
+        noise_patterns = [
+            r'^Last login:.*$',
+            r'^! Last configuration change at.*$',
+            r'^Building configuration.*$',
+            r'^Current configuration : \d+ bytes$',
+            r'^! NVRAM config last updated.*$',
+            r'^\s*!\s*Time:.*$',
+            r'^.*ntp clock-period.*$',  # NTP drift compensation
+            r'^.*Your previous successful login.*$',
+            r'^.*was on \d{4}-\d{2}-\d{2}.*$',
+            r'^.*from \d+\.\d+\.\d+\.\d+.*$',
+        ]
+
+        lines = []
+        for line in content.splitlines():
+            # Skip lines matching noise patterns
+            if any(re.match(pattern, line.strip()) for pattern in noise_patterns):
+                continue
+            lines.append(line)
+
+        # Clean excessive whitespace
+        result = '\n'.join(lines)
+        result = re.sub(r'\n\s*\n\s*\n', '\n\n', result)
+        return result.strip()
+
+    def generate_diff(self, old_content: str, new_content: str, capture_type: str = 'configs') -> str:
+        """Generate unified diff between two text contents, filtering noise"""
+        # Normalize before diffing
+        old_normalized = self.normalize_config_for_diff(old_content, capture_type)
+        new_normalized = self.normalize_config_for_diff(new_content, capture_type)
+
+        old_lines = old_normalized.splitlines(keepends=True)
+        new_lines = new_normalized.splitlines(keepends=True)
+
+        diff = difflib.unified_diff(
+            old_lines,
+            new_lines,
+            fromfile='previous',
+            tofile='current',
+            lineterm=''
+        )
+
+        return ''.join(diff)
+
+    def classify_severity(self, capture_type: str, diff_content: str) -> str:
+        """Classify change severity based on capture type and diff size"""
+        lines_added = diff_content.count('\n+')
+        lines_removed = diff_content.count('\n-')
+        total_changes = lines_added + lines_removed
+
+        # Critical: large config changes
+        if capture_type == 'configs' and total_changes > 50:
+            return 'critical'
+
+        # Version changes: check if it's just uptime/memory stats
+        if capture_type == 'version':
+            if self._is_uptime_only_change(diff_content):
+                return 'minor'
+            # Actual version/firmware changes are still critical
+            return 'critical'
+
+        # Moderate: any config change
+        if capture_type == 'configs' and total_changes > 0:
+            return 'moderate'
+
+        # Moderate: inventory changes (hardware swap)
+        if capture_type == 'inventory' and total_changes > 5:
+            return 'moderate'
+
+        return 'minor'
+
+    def _is_uptime_only_change(self, diff_content: str) -> bool:
+        """Check if version diff only contains uptime/memory/timestamp changes"""
+        significant_changes = []
+
+        for line in diff_content.splitlines():
+            # Skip diff metadata
+            if line.startswith(('---', '+++', '@@', ' ')):
+                continue
+
+            # Check for actual change lines
+            if line.startswith(('+', '-')):
+                # Ignore lines that are just dynamic stats
+                lower_line = line.lower()
+                if any(keyword in lower_line for keyword in
+                       ['uptime:', 'uptime ', 'free memory:', 'total memory:',
+                        'last reboot', 'system time:', 'current time:', 'processor load']):
+                    continue
+
+                # This is a significant change
+                significant_changes.append(line)
+
+        # If no significant changes found, it's uptime-only
+        return len(significant_changes) == 0
+
+
+def snapshot_pairs(db_path: Path, capture_types, limit: int):
+    """(capture_type, old, new) for consecutive snapshots of the same device, newest first"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        placeholders = ','.join('?' * len(capture_types))
+        rows = conn.execute(f"""
+            SELECT cs.capture_type, cs.id,
+                   (SELECT MAX(prev.id) FROM capture_snapshots prev
+                    WHERE prev.device_id = cs.device_id
+                    AND prev.capture_type = cs.capture_type
+                    AND prev.id < cs.id) as previous_id
+            FROM capture_snapshots cs
+            WHERE cs.capture_type IN ({placeholders})
+            ORDER BY cs.id DESC
+        """, list(capture_types)).fetchall()
+        rows = [row for row in rows if row[2] is not None][:limit]
+
+        store = CaptureStore(conn)
+        texts = store.contents({i for row in rows for i in row[1:]})
+        return [(capture_type, texts.get(previous_id) or '', texts.get(snapshot_id) or '')
+                for capture_type, snapshot_id, previous_id in rows]
+    finally:
+        conn.close()
+
+
+def synthetic_pair(lines: int, edits: int, seed: int = 7):
+    """A config of roughly `lines` lines and a copy with `edits` scattered changes"""
+    rng = random.Random(seed)
+    config = ['Building configuration...', 'Current configuration : 123456 bytes', '!']
+    interface = 0
+    while len(config) < lines:
+        interface += 1
+        config.extend([
+            f'interface GigabitEthernet1/0/{interface}',
+            f' description access port {interface}',
+            ' switchport mode access',
+            f' switchport access vlan {rng.randint(2, 4000)}',
+            ' spanning-tree portfast',
+            '!',
+        ])
+    changed = list(config)
+    for _ in range(edits):
+        position = rng.randrange(3, len(changed))
+        if rng.random() < 0.5:
+            changed[position] = f' switchport access vlan {rng.randint(2, 4000)}'
+        else:
+            changed.insert(position, f' description moved {rng.randint(1, 99999)}')
+    changed[1] = 'Current configuration : 123999 bytes'
+    return 'configs', '\n'.join(config), '\n'.join(changed)
+
+
+def run(name, compare, pairs, repeat):
+    best = None
+    results = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [compare(old, new, capture_type) for capture_type, old, new in pairs]
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<10} {best * 1000:10.1f} ms  ({best / len(pairs) * 1000:.2f} ms/pair)")
+    return best, results
+
+
+def benchmark(title, pairs, repeat):
+    if not pairs:
+        print(f"\n{title}: no snapshot pairs")
+        return
+
+    legacy = LegacyChangePath()
+    detector = ChangeDetector()
+    size = sum(len(old) + len(new) for _, old, new in pairs)
+    print(f"\n{title}: {len(pairs)} pairs, {size / 1024 / 1024:.1f} MB of text, best of {repeat}")
+
+    legacy_time, legacy_results = run('legacy', legacy.compare, pairs, repeat)
+    new_time, new_results = run('detector', detector.compare, pairs, repeat)
+    print(f"  speedup    {legacy_time / new_time:10.1f}x")
+
+    # Both paths must agree on whether something changed and how severe it is
+    changed = severity = 0
+    for (diff, _, _, legacy_severity), summary in zip(legacy_results, new_results):
+        if bool(diff.strip()) != summary.changed:
+            changed += 1
+        elif summary.changed and legacy_severity != summary.severity:
+            severity += 1
+    print(f"  disagreements: {changed} changed/unchanged, {severity} severity")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark change detection against the previous implementation')
+    parser.add_argument('--db-path', type=Path, default=DB_PATH,
+                        help=f'assets.db to take snapshot pairs from (default: {DB_PATH})')
+    parser.add_argument('--capture-types', default=','.join(sorted(CHANGE_TRACKED_TYPES)),
+                        help='Comma-separated capture types to compare')
+    parser.add_argument('--pairs', type=int, default=200, help='Snapshot pairs to compare (default: 200)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per path; the best is reported')
+    parser.add_argument('--synthetic-lines', type=int, default=100000,
+                        help='Size of the synthetic config (0 to skip)')
+    parser.add_argument('--synthetic-edits', type=int, default=20,
+                        help='Changes made to the synthetic config')
+    args = parser.parse_args()
+
+    if args.db_path.exists():
+        capture_types = [t.strip() for t in args.capture_types.split(',') if t.strip()]
+        benchmark(f"Snapshots from {args.db_path}",
+                  snapshot_pairs(args.db_path, capture_types, args.pairs), args.repeat)
+    else:
+        print(f"{args.db_path} not found; synthetic benchmark only")
+
+    if args.synthetic_lines:
+        benchmark(f"Synthetic {args.synthetic_lines}-line config, {args.synthetic_edits} edits",
+                  [synthetic_pair(args.synthetic_lines, args.synthetic_edits)], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
-"""
-Database initialization and management
-"""
-from .initializer import DatabaseInitializer
-from .checker import DatabaseChecker
-
-__all__ = ['DatabaseInitializer', 'DatabaseChecker']
\ No newline at end of file
+"""
+Database initialization and management
+"""
+from .initializer import DatabaseInitializer
+from .checker import DatabaseChecker
+from .component_sort import ensure_component_sort
+from .device_status import ensure_device_status_summary, rebuild_device_status_summary
+from .search_index import ensure_search_indexes
+from .data_version import bump_data_version, ensure_data_version, get_data_token, get_data_version
+from .mac_key import mac_key_range, mac_to_key, migrate_arp_mac_key
+
+__all__ = ['DatabaseInitializer', 'DatabaseChecker', 'ensure_component_sort',
+           'ensure_device_status_summary', 'rebuild_device_status_summary',
+           'ensure_search_indexes', 'bump_data_version', 'ensure_data_version',
+           'get_data_token', 'get_data_version',
+           'mac_key_range', 'mac_to_key', 'migrate_arp_mac_key']
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Capture load manifest
+
+One row per capture file the capture loader has stored. A file whose size
+and mtime still match its row is skipped without being opened. Lives here
+rather than in pcng/db_load_capture.py so the database initializer can
+create the table without importing the loader script.
+"""
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS capture_load_manifest (
+        path TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        last_loaded_at TIMESTAMP NOT NULL
+    )
+"""
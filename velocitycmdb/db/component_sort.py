@@ -0,0 +1,74 @@
+"""
+Stored sort key for the component listing
+
+The listing orders by device name, then type, position and component name.
+Ordering on d.name across the join made SQLite scan every component and sort
+them in a temp B-tree for each page. components.device_sort_name holds a
+copy of the device's name, kept current by triggers, so one index on
+components serves the whole order and the keyset seek.
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Same expressions, same order as COMPONENT_SORT in the components blueprint
+COMPONENT_SORT_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_components_listing ON components("
+    "device_sort_name, COALESCE(type, ''), COALESCE(position, ''), name, id)"
+)
+
+DEVICE_NAME_SQL = "COALESCE((SELECT d.name FROM devices d WHERE d.id = components.device_id), '')"
+
+COMPONENT_SORT_TRIGGERS = [
+    f"""
+        CREATE TRIGGER IF NOT EXISTS tr_components_sort_insert
+        AFTER INSERT ON components
+        BEGIN
+            UPDATE components SET device_sort_name = {DEVICE_NAME_SQL} WHERE id = NEW.id;
+        END
+    """,
+    f"""
+        CREATE TRIGGER IF NOT EXISTS tr_components_sort_move
+        AFTER UPDATE OF device_id ON components
+        BEGIN
+            UPDATE components SET device_sort_name = {DEVICE_NAME_SQL} WHERE id = NEW.id;
+        END
+    """,
+    # Components may be loaded before their device row (or it is re-imported)
+    """
+        CREATE TRIGGER IF NOT EXISTS tr_components_sort_device_insert
+        AFTER INSERT ON devices
+        BEGIN
+            UPDATE components SET device_sort_name = NEW.name WHERE device_id = NEW.id;
+        END
+    """,
+    """
+        CREATE TRIGGER IF NOT EXISTS tr_components_sort_device_rename
+        AFTER UPDATE OF name ON devices
+        BEGIN
+            UPDATE components SET device_sort_name = NEW.name WHERE device_id = NEW.id;
+        END
+    """,
+]
+
+
+def ensure_component_sort(conn: sqlite3.Connection):
+    """
+    Add components.device_sort_name with its index and triggers, filling
+    it in on databases created before the column existed
+    """
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(components)")]
+    if not columns:
+        return
+
+    if 'device_sort_name' not in columns:
+        cursor.execute("ALTER TABLE components ADD COLUMN device_sort_name TEXT NOT NULL DEFAULT ''")
+        cursor.execute(f"UPDATE components SET device_sort_name = {DEVICE_NAME_SQL}")
+        logger.info(f"Backfilled device_sort_name for {cursor.rowcount} components")
+
+    cursor.execute(COMPONENT_SORT_INDEX)
+    for trigger in COMPONENT_SORT_TRIGGERS:
+        cursor.execute(trigger)
+    conn.commit()
@@ -0,0 +1,110 @@
+"""
+Data version counters
+
+Each database (assets.db, arp_cat.db) carries a data_version table with one
+monotonically increasing counter per writer: the capture, fingerprint,
+inventory and ARP loaders bump theirs once a load has committed, and the web
+app bumps 'web' after a request that edits data. Readers that cache derived
+results (the dashboard response cache) compare the database's total version
+instead of re-running their aggregates.
+
+data_version_origin holds a random id given to the database when its
+version tables are created. A database that is deleted and recreated (reset)
+starts its counters at 0 again, so cache keys pair the id with the version.
+"""
+import sqlite3
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+DATA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS data_version (
+        scope TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT
+    )
+"""
+
+DATA_ORIGIN_TABLE = """
+    CREATE TABLE IF NOT EXISTS data_version_origin (
+        database_id TEXT NOT NULL,
+        created_at TEXT
+    )
+"""
+
+
+def ensure_data_version(conn: sqlite3.Connection):
+    """Create the version tables and give the database its id (once); does not commit"""
+    conn.execute(DATA_VERSION_TABLE)
+    conn.execute(DATA_ORIGIN_TABLE)
+    if conn.execute("SELECT 1 FROM data_version_origin").fetchone() is None:
+        conn.execute("INSERT INTO data_version_origin (database_id, created_at) VALUES (?, datetime('now'))",
+                     (uuid.uuid4().hex,))
+
+
+def bump_data_version(db: Union[str, sqlite3.Connection], scope: str) -> int:
+    """
+    Advance the counter for `scope` and commit
+
+    Args:
+        db: Database path, or an open connection (its pending work is
+            committed along with the bump)
+        scope: Writer name, e.g. 'captures', 'fingerprints', 'inventory', 'arp'
+
+    Returns:
+        The database's new total version
+    """
+    conn = sqlite3.connect(db) if isinstance(db, str) else db
+    try:
+        ensure_data_version(conn)
+        conn.execute("""
+            INSERT INTO data_version (scope, version, updated_at)
+            VALUES (?, 1, datetime('now'))
+            ON CONFLICT(scope) DO UPDATE SET
+                version = version + 1,
+                updated_at = excluded.updated_at
+        """, (scope,))
+        conn.commit()
+        return conn.execute("SELECT SUM(version) FROM data_version").fetchone()[0]
+    finally:
+        if isinstance(db, str):
+            conn.close()
+
+
+def get_data_version(db: Union[str, sqlite3.Connection]) -> int:
+    """Total of the database's counters; 0 before anything has bumped one"""
+    return _read(db, _read_version, 0)
+
+
+def get_data_token(db: Union[str, sqlite3.Connection]) -> Tuple[Optional[str], int]:
+    """(database id, total version): changes with every bump and when the database is recreated"""
+    return _read(db, lambda conn: (_read_database_id(conn), _read_version(conn)), (None, 0))
+
+
+def _read(db, reader, missing):
+    if not isinstance(db, str):
+        return reader(db)
+    try:
+        # Read-only so a missing database is not created
+        conn = sqlite3.connect(Path(db).resolve().as_uri() + '?mode=ro', uri=True)
+    except sqlite3.OperationalError:
+        return missing
+    try:
+        return reader(conn)
+    finally:
+        conn.close()
+
+
+def _read_version(conn: sqlite3.Connection) -> int:
+    try:
+        return conn.execute("SELECT COALESCE(SUM(version), 0) FROM data_version").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+
+def _read_database_id(conn: sqlite3.Connection) -> Optional[str]:
+    try:
+        row = conn.execute("SELECT database_id FROM data_version_origin LIMIT 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
@@ -0,0 +1,245 @@
+"""
+Materialized device status summary
+
+device_status_summary holds one row per device with the columns of the
+v_device_status view (names, capture counts, latest fingerprint). Triggers on
+devices, device_captures_current, fingerprint_extractions and the reference
+tables keep it current, so every loader and web edit maintains it without
+code changes. Readers get an indexed table instead of re-aggregating
+captures x fingerprint history on each page load.
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLUMNS = (
+    'id', 'name', 'normalized_name', 'site_name', 'site_code', 'vendor_name',
+    'device_type_name', 'netmiko_driver', 'napalm_driver', 'transport',
+    'role_name', 'is_infrastructure', 'model', 'os_version', 'management_ip',
+    'is_stack', 'stack_count', 'have_sn', 'current_captures', 'capture_types',
+    'last_fingerprint', 'last_fingerprint_success', 'last_updated',
+)
+
+SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS device_status_summary (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        normalized_name TEXT,
+        site_name TEXT,
+        site_code TEXT,
+        vendor_name TEXT,
+        device_type_name TEXT,
+        netmiko_driver TEXT,
+        napalm_driver TEXT,
+        transport TEXT,
+        role_name TEXT,
+        is_infrastructure BOOLEAN,
+        model TEXT,
+        os_version TEXT,
+        management_ip TEXT,
+        is_stack BOOLEAN,
+        stack_count INTEGER,
+        have_sn BOOLEAN,
+        current_captures INTEGER NOT NULL DEFAULT 0,
+        capture_types INTEGER NOT NULL DEFAULT 0,
+        last_fingerprint TEXT,
+        last_fingerprint_success BOOLEAN,
+        last_updated TEXT
+    )
+"""
+
+SUMMARY_INDEXES = [
+    # Listing sort key (keyset pagination seeks on it); NULL timestamps sort last
+    "DROP INDEX IF EXISTS idx_status_summary_updated",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_order "
+    "ON device_status_summary(COALESCE(last_updated, '') DESC, name, id)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_name ON device_status_summary(name)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_normalized ON device_status_summary(normalized_name)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_site ON device_status_summary(site_code, name)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_vendor ON device_status_summary(vendor_name, name)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_role ON device_status_summary(role_name, name)",
+    "CREATE INDEX IF NOT EXISTS idx_status_summary_stack ON device_status_summary(is_stack)",
+]
+
+
+def summary_insert_sql(where: str) -> str:
+    """
+    Plain INSERT of the summary rows for the devices matching `where`
+    (a condition on devices d). Counts come from per-device index lookups,
+    so the cost does not grow with other devices' history.
+    """
+    return f"""
+        INSERT INTO device_status_summary ({', '.join(SUMMARY_COLUMNS)})
+        SELECT
+            d.id,
+            d.name,
+            d.normalized_name,
+            s.name,
+            s.code,
+            v.name,
+            dt.name,
+            dt.netmiko_driver,
+            dt.napalm_driver,
+            dt.transport,
+            dr.name,
+            dr.is_infrastructure,
+            d.model,
+            d.os_version,
+            d.management_ip,
+            d.is_stack,
+            d.stack_count,
+            d.have_sn,
+            (SELECT COUNT(*) FROM device_captures_current dcc WHERE dcc.device_id = d.id),
+            (SELECT COUNT(DISTINCT dcc.capture_type) FROM device_captures_current dcc
+             WHERE dcc.device_id = d.id),
+            (SELECT MAX(fe.extraction_timestamp) FROM fingerprint_extractions fe
+             WHERE fe.device_id = d.id),
+            (SELECT MAX(fe.extraction_success) FROM fingerprint_extractions fe
+             WHERE fe.device_id = d.id),
+            d.timestamp
+        FROM devices d
+        LEFT JOIN sites s ON d.site_code = s.code
+        LEFT JOIN vendors v ON d.vendor_id = v.id
+        LEFT JOIN device_types dt ON d.device_type_id = dt.id
+        LEFT JOIN device_roles dr ON d.role_id = dr.id
+        WHERE {where};
+    """
+
+
+def summary_refresh_sql(where: str) -> str:
+    """
+    Trigger body recomputing the summary rows for the devices matching `where`
+
+    Deletes then inserts rather than INSERT OR REPLACE: a conflict clause on
+    the statement that fired the trigger (a loader's INSERT OR IGNORE)
+    overrides the one inside the trigger, which would silently keep the
+    stale row.
+    """
+    return f"""
+        DELETE FROM device_status_summary
+        WHERE id IN (SELECT d.id FROM devices d WHERE {where});
+    """ + summary_insert_sql(where)
+
+
+def _trigger(name: str, event: str, body: str) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS {name}
+        {event}
+        BEGIN
+            {body}
+        END
+    """
+
+
+SUMMARY_TRIGGERS = [
+    # Devices
+    # An INSERT OR REPLACE that displaced another id with the same
+    # normalized_name deletes that device without firing the delete trigger
+    _trigger('tr_status_summary_device_insert', 'AFTER INSERT ON devices',
+             "DELETE FROM device_status_summary "
+             "WHERE normalized_name = NEW.normalized_name AND id != NEW.id;"
+             + summary_refresh_sql('d.id = NEW.id')),
+    _trigger('tr_status_summary_device_update', 'AFTER UPDATE ON devices',
+             "DELETE FROM device_status_summary WHERE id = OLD.id AND OLD.id != NEW.id;"
+             + summary_refresh_sql('d.id = NEW.id')),
+    _trigger('tr_status_summary_device_delete', 'AFTER DELETE ON devices',
+             "DELETE FROM device_status_summary WHERE id = OLD.id;"),
+
+    # Current captures
+    _trigger('tr_status_summary_capture_insert', 'AFTER INSERT ON device_captures_current',
+             summary_refresh_sql('d.id = NEW.device_id')),
+    _trigger('tr_status_summary_capture_update',
+             'AFTER UPDATE OF device_id, capture_type ON device_captures_current',
+             summary_refresh_sql('d.id IN (OLD.device_id, NEW.device_id)')),
+    _trigger('tr_status_summary_capture_delete', 'AFTER DELETE ON device_captures_current',
+             summary_refresh_sql('d.id = OLD.device_id')),
+
+    # Fingerprint history: a new run only moves the maxima, no history scan
+    _trigger('tr_status_summary_fingerprint_insert', 'AFTER INSERT ON fingerprint_extractions', """
+            UPDATE device_status_summary SET
+                last_fingerprint = CASE
+                    WHEN last_fingerprint IS NULL OR NEW.extraction_timestamp > last_fingerprint
+                    THEN NEW.extraction_timestamp ELSE last_fingerprint END,
+                last_fingerprint_success = CASE
+                    WHEN last_fingerprint_success IS NULL OR NEW.extraction_success > last_fingerprint_success
+                    THEN NEW.extraction_success ELSE last_fingerprint_success END
+            WHERE id = NEW.device_id;
+    """),
+    _trigger('tr_status_summary_fingerprint_delete', 'AFTER DELETE ON fingerprint_extractions',
+             summary_refresh_sql('d.id = OLD.device_id')),
+
+    # Reference names copied into the summary. Devices may reference a site
+    # code or id before its row exists (or after it is gone), so inserts and
+    # deletes refresh the devices pointing at it as well as updates
+    _trigger('tr_status_summary_site_insert', 'AFTER INSERT ON sites',
+             summary_refresh_sql('d.site_code = NEW.code')),
+    _trigger('tr_status_summary_site_update', 'AFTER UPDATE ON sites',
+             summary_refresh_sql('d.site_code IN (OLD.code, NEW.code)')),
+    _trigger('tr_status_summary_site_delete', 'AFTER DELETE ON sites',
+             summary_refresh_sql('d.site_code = OLD.code')),
+    _trigger('tr_status_summary_vendor_insert', 'AFTER INSERT ON vendors',
+             summary_refresh_sql('d.vendor_id = NEW.id')),
+    _trigger('tr_status_summary_vendor_update', 'AFTER UPDATE ON vendors',
+             summary_refresh_sql('d.vendor_id = NEW.id')),
+    _trigger('tr_status_summary_vendor_delete', 'AFTER DELETE ON vendors',
+             summary_refresh_sql('d.vendor_id = OLD.id')),
+    _trigger('tr_status_summary_device_type_insert', 'AFTER INSERT ON device_types',
+             summary_refresh_sql('d.device_type_id = NEW.id')),
+    _trigger('tr_status_summary_device_type_update', 'AFTER UPDATE ON device_types',
+             summary_refresh_sql('d.device_type_id = NEW.id')),
+    _trigger('tr_status_summary_device_type_delete', 'AFTER DELETE ON device_types',
+             summary_refresh_sql('d.device_type_id = OLD.id')),
+    _trigger('tr_status_summary_role_insert', 'AFTER INSERT ON device_roles',
+             summary_refresh_sql('d.role_id = NEW.id')),
+    _trigger('tr_status_summary_role_update', 'AFTER UPDATE ON device_roles',
+             summary_refresh_sql('d.role_id = NEW.id')),
+    _trigger('tr_status_summary_role_delete', 'AFTER DELETE ON device_roles',
+             summary_refresh_sql('d.role_id = OLD.id')),
+]
+
+
+def rebuild_device_status_summary(conn: sqlite3.Connection) -> int:
+    """Recompute every summary row from the base tables; returns the row count"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM device_status_summary")
+    cursor.execute(summary_insert_sql('1 = 1'))
+    count = cursor.execute("SELECT COUNT(*) FROM device_status_summary").fetchone()[0]
+    conn.commit()
+    return count
+
+
+def ensure_device_status_summary(conn: sqlite3.Connection):
+    """
+    Create the summary table, its indexes and maintenance triggers, and
+    backfill it when it does not cover the devices table (new table, or a
+    database written before the triggers existed) or was maintained without
+    the reference insert/delete triggers (names may be stale) or by the
+    INSERT OR REPLACE triggers (rows written under INSERT OR IGNORE may be stale)
+    """
+    cursor = conn.cursor()
+    stale_names = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'tr_status_summary_site_update'"
+    ).fetchone() is not None and cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'tr_status_summary_site_insert'"
+    ).fetchone() is None
+
+    replace_triggers = [row[0] for row in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'tr_status_summary_%' "
+        "AND sql LIKE '%INSERT OR REPLACE INTO device_status_summary%'")]
+    if replace_triggers:
+        for (name,) in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND name LIKE 'tr_status_summary_%'").fetchall():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    cursor.execute(SUMMARY_TABLE)
+    for statement in SUMMARY_INDEXES + SUMMARY_TRIGGERS:
+        cursor.execute(statement)
+    conn.commit()
+
+    devices = cursor.execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+    summarized = cursor.execute("SELECT COUNT(*) FROM device_status_summary").fetchone()[0]
+    if devices != summarized or stale_names or replace_triggers:
+        count = rebuild_device_status_summary(conn)
+        logger.info(f"Backfilled device_status_summary for {count} devices")
@@ -7,6 +7,13 @@ import logging
 from pathlib import Path
 from datetime import datetime
 
+from .capture_manifest import MANIFEST_SCHEMA
+from .component_sort import ensure_component_sort
+from .data_version import ensure_data_version
+from .device_status import ensure_device_status_summary
+from .mac_key import migrate_arp_mac_key
+from .search_index import ensure_search_indexes
+
 logger = logging.getLogger(__name__)
 
 
@@ -256,6 +263,7 @@ class DatabaseInitializer:
                 subtype TEXT,
                 extraction_source TEXT,
                 extraction_confidence REAL,
+                device_sort_name TEXT NOT NULL DEFAULT '',
                 FOREIGN KEY (device_id) REFERENCES devices(id)
             )
         """)
@@ -275,7 +283,9 @@ class DatabaseInitializer:
                 capture_timestamp TEXT NOT NULL,
                 extraction_success BOOLEAN DEFAULT 1,
                 command_used TEXT,
+                latest_snapshot_id INTEGER,
                 FOREIGN KEY (device_id) REFERENCES devices(id),
+                FOREIGN KEY (latest_snapshot_id) REFERENCES capture_snapshots(id),
                 UNIQUE(device_id, capture_type)
             )
         """)
@@ -291,6 +301,7 @@ class DatabaseInitializer:
                 file_size INTEGER,
                 content TEXT NOT NULL,
                 content_hash TEXT NOT NULL,
+                compressed INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (device_id) REFERENCES devices(id)
             )
         """)
@@ -314,6 +325,26 @@ class DatabaseInitializer:
             )
         """)
 
+        # Capture blobs, line index and latest pointer trigger come from
+        # CaptureStore.ensure_schema below, once capture_fts exists
+
+        # Capture load manifest (lets the loader skip files unchanged since the last run)
+        cursor.execute(MANIFEST_SCHEMA)
+
+        # Per-device collection latency (adaptive timeouts and ordering)
+        from velocitycmdb.pcng.collection_scheduler import LATENCY_SCHEMA
+        for statement in LATENCY_SCHEMA:
+            cursor.execute(statement)
+
+        # ================================================================
+        # STRUCTURED ARP / MAC / ROUTE ENTRIES (IP locator)
+        # Parsed from the latest arp, mac and routes snapshot per device
+        # ================================================================
+
+        # Tables and indexes are defined once, in services/ip_locator.py
+        from velocitycmdb.services.ip_locator import IPLocatorService
+        IPLocatorService.ensure_structured_schema(conn)
+
         # ================================================================
         # FINGERPRINT EXTRACTIONS
         # ================================================================
@@ -410,13 +441,30 @@ class DatabaseInitializer:
         # FULL TEXT SEARCH - Capture Content
         # ================================================================
 
-        cursor.execute("""
-            CREATE VIRTUAL TABLE IF NOT EXISTS capture_fts USING fts5(
-                content,
-                content=capture_snapshots,
-                content_rowid=id
-            )
-        """)
+        # Trigram tokens make any 3+ character substring (IPs, MACs, interface
+        # names) an index lookup; older SQLite builds fall back to word tokens
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS capture_fts USING fts5(
+                    content,
+                    content=capture_snapshots,
+                    content_rowid=id,
+                    tokenize='trigram'
+                )
+            """)
+        except sqlite3.OperationalError:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS capture_fts USING fts5(
+                    content,
+                    content=capture_snapshots,
+                    content_rowid=id
+                )
+            """)
+
+        # Capture storage: latest pointer, line index, blobs, capture_fts
+        # triggers and the blob text index (also migrates older databases)
+        from velocitycmdb.services.capture_store import CaptureStore
+        CaptureStore.ensure_schema(conn)
 
         # ================================================================
         # INDEXES
@@ -597,37 +645,6 @@ class DatabaseInitializer:
             END
         """)
 
-        # ================================================================
-        # TRIGGERS - Capture snapshots FTS sync
-        # ================================================================
-
-        cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS capture_fts_insert 
-            AFTER INSERT ON capture_snapshots 
-            BEGIN
-                INSERT INTO capture_fts(rowid, content)
-                VALUES (new.id, new.content);
-            END
-        """)
-
-        cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS capture_fts_delete 
-            AFTER DELETE ON capture_snapshots 
-            BEGIN
-                DELETE FROM capture_fts WHERE rowid = old.id;
-            END
-        """)
-
-        cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS capture_fts_update 
-            AFTER UPDATE ON capture_snapshots 
-            BEGIN
-                UPDATE capture_fts 
-                SET content = new.content 
-                WHERE rowid = new.id;
-            END
-        """)
-
         # ================================================================
         # VIEWS
         # ================================================================
@@ -768,6 +785,18 @@ class DatabaseInitializer:
             ORDER BY dcc.capture_timestamp DESC
         """)
 
+        # Materialized v_device_status, kept current by triggers
+        ensure_device_status_summary(conn)
+
+        # Trigram indexes for substring search in the listings
+        ensure_search_indexes(conn)
+
+        # Component listing order served from one index on components
+        ensure_component_sort(conn)
+
+        # A new database gets a new id, so cached responses of a removed one never match
+        ensure_data_version(conn)
+
         conn.commit()
         conn.close()
         logger.info(f"✓ Assets database schema complete: {self.assets_db}")
@@ -832,6 +861,7 @@ class DatabaseInitializer:
                 context_id INTEGER NOT NULL,
                 ip_address TEXT NOT NULL,
                 mac_address TEXT NOT NULL,
+                mac_key INTEGER,
                 mac_address_raw TEXT NOT NULL,
                 interface_name TEXT,
                 entry_type TEXT,
@@ -846,6 +876,9 @@ class DatabaseInitializer:
             )
         """)
 
+        # Existing databases predate mac_key - add and backfill it (once)
+        migrate_arp_mac_key(conn)
+
         # ================================================================
         # ARP SNAPSHOTS TABLE
         # ================================================================
@@ -913,6 +946,7 @@ class DatabaseInitializer:
             "CREATE INDEX IF NOT EXISTS idx_arp_entries_ip ON arp_entries(ip_address)",
             "CREATE INDEX IF NOT EXISTS idx_arp_entries_mac ON arp_entries(mac_address)",
             "CREATE INDEX IF NOT EXISTS idx_arp_entries_mac_ip ON arp_entries(mac_address, ip_address)",
+            "CREATE INDEX IF NOT EXISTS idx_arp_entries_mac_key ON arp_entries(mac_key, is_current, capture_timestamp)",
             "CREATE INDEX IF NOT EXISTS idx_arp_entries_timestamp ON arp_entries(capture_timestamp)",
             "CREATE INDEX IF NOT EXISTS idx_arp_entries_current ON arp_entries(is_current)",
 
@@ -968,13 +1002,7 @@ class DatabaseInitializer:
             FOR EACH ROW
             BEGIN
                 UPDATE arp_snapshots
-                SET total_entries = (
-                    SELECT COUNT(*)
-                    FROM arp_entries
-                    WHERE device_id = NEW.device_id
-                    AND context_id = NEW.context_id
-                    AND capture_timestamp = NEW.capture_timestamp
-                )
+                SET total_entries = COALESCE(total_entries, 0) + 1
                 WHERE device_id = NEW.device_id
                 AND context_id = NEW.context_id
                 AND capture_timestamp = NEW.capture_timestamp;
@@ -1048,6 +1076,8 @@ class DatabaseInitializer:
             ORDER BY ae.mac_address, ae.capture_timestamp DESC
         """)
 
+        ensure_data_version(conn)
+
         conn.commit()
         conn.close()
         logger.info(f"✓ ARP database schema complete: {self.arp_db}")
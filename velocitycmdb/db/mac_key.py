@@ -0,0 +1,87 @@
+"""
+MAC address keys
+
+arp_entries.mac_key (and the structured mac_table_entries.mac_key) hold a MAC
+as its 48-bit integer, so exact lookups are index seeks and OUI/prefix
+searches are index range scans. mac_to_key is the one conversion every
+writer and reader uses.
+
+migrate_arp_mac_key adds and backfills arp_entries.mac_key once per
+arp_cat.db; the database's PRAGMA user_version records that it has run.
+"""
+import logging
+import re
+import sqlite3
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# arp_cat.db user_version once arp_entries.mac_key is populated
+ARP_MAC_KEY_VERSION = 1
+
+_NOT_HEX = re.compile(r'[^a-fA-F0-9]')
+
+
+def mac_to_key(mac: Optional[str]) -> Optional[int]:
+    """
+    MAC address in any common format -> 48-bit integer key
+
+    Returns None for anything that is not 12 hex digits once separators are
+    removed. Also registered as a SQLite function for the backfill.
+    """
+    if not mac:
+        return None
+    clean = _NOT_HEX.sub('', mac)
+    if len(clean) != 12:
+        return None
+    return int(clean, 16)
+
+
+def mac_key_range(mac: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Full or partial MAC input -> half-open mac_key range (low, high)
+
+    A partial MAC or OUI prefix matches every key starting with those hex
+    digits, e.g. '00:1b:21' -> (0x001b21000000, 0x001b22000000), which SQLite
+    answers with a range scan on idx_arp_entries_mac_key.
+    Returns None if there are no hex characters or more than 12.
+    """
+    clean = _NOT_HEX.sub('', mac or '')
+    if not clean or len(clean) > 12:
+        return None
+
+    shift = 4 * (12 - len(clean))
+    prefix = int(clean, 16)
+    return prefix << shift, (prefix + 1) << shift
+
+
+def migrate_arp_mac_key(conn: sqlite3.Connection) -> bool:
+    """
+    Add, backfill and index arp_entries.mac_key on an arp_cat.db that has not
+    had this migration yet; commits.
+
+    Returns:
+        True if the migration ran now
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= ARP_MAC_KEY_VERSION:
+        return False
+
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(arp_entries)")]
+    if not columns:
+        return False
+
+    if 'mac_key' not in columns:
+        logger.info("Adding mac_key column to arp_entries")
+        conn.execute("ALTER TABLE arp_entries ADD COLUMN mac_key INTEGER")
+
+    conn.create_function('mac_to_key', 1, mac_to_key, deterministic=True)
+    cursor = conn.execute("UPDATE arp_entries SET mac_key = mac_to_key(mac_address) WHERE mac_key IS NULL")
+    if cursor.rowcount > 0:
+        logger.info(f"Backfilled mac_key for {cursor.rowcount} ARP entries")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_arp_entries_mac_key
+        ON arp_entries(mac_key, is_current, capture_timestamp)
+    """)
+    conn.execute(f"PRAGMA user_version = {ARP_MAC_KEY_VERSION}")
+    conn.commit()
+    return True
@@ -0,0 +1,73 @@
+"""
+Substring search indexes for device and component listings
+
+The inventory filters match anywhere in a name, IP, model or serial
+(LIKE '%term%'), which no B-tree index can serve. These FTS5 tables use the
+trigram tokenizer, so a substring of three or more characters is an index
+lookup. They are external-content tables over devices and components, kept
+current by triggers, and hold only the index.
+
+SQLite builds without the trigram tokenizer (before 3.34) skip the indexes;
+listing code falls back to LIKE when a table is missing.
+"""
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# FTS table -> (content table, indexed columns)
+SEARCH_INDEXES = {
+    'device_search_fts': ('devices', ('name', 'normalized_name', 'management_ip', 'model')),
+    'component_search_fts': ('components', ('name', 'description', 'serial')),
+}
+
+
+def _triggers(fts: str, table: str, columns) -> list:
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    delete = f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values});"
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {cols} ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def ensure_search_indexes(conn: sqlite3.Connection) -> bool:
+    """
+    Create the trigram search tables and triggers, building any new table
+    from its content table
+
+    Returns:
+        False when this SQLite has no trigram tokenizer
+    """
+    cursor = conn.cursor()
+    existing = {row[0] for row in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    for fts, (table, columns) in SEARCH_INDEXES.items():
+        if table not in existing:
+            continue
+        if fts not in existing:
+            try:
+                cursor.execute(f"""
+                    CREATE VIRTUAL TABLE {fts} USING fts5(
+                        {', '.join(columns)},
+                        content={table},
+                        content_rowid=id,
+                        tokenize='trigram'
+                    )
+                """)
+            except sqlite3.OperationalError as e:
+                logger.info(f"Trigram search index unavailable, listings use LIKE: {e}")
+                return False
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            logger.info(f"Built {fts} over {table}")
+        for trigger in _triggers(fts, table, columns):
+            cursor.execute(trigger)
+
+    conn.commit()
+    return True
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Move superseded capture snapshots into compressed, deduplicated blobs
+Reports the assets.db size before and after
+
+The latest snapshot of every device/capture type stays inline. Everything
+older is zlib-compressed into capture_blobs (one blob per distinct
+content_hash) and remains searchable through capture_fts.
+"""
+
+import argparse
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from velocitycmdb.services.capture_store import CaptureStore
+
+DB_PATH = Path.home() / '.velocitycmdb/data/assets.db'
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def database_size(db_path):
+    """Size on disk, including a WAL file that has not been checkpointed yet"""
+    wal = Path(str(db_path) + '-wal')
+    return db_path.stat().st_size + (wal.stat().st_size if wal.exists() else 0)
+
+
+def storage_report(conn):
+    """Inline vs compressed snapshot counts and stored bytes"""
+    inline = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0)
+        FROM capture_snapshots WHERE compressed = 0
+    """).fetchone()
+    compressed = conn.execute("SELECT COUNT(*) FROM capture_snapshots WHERE compressed = 1").fetchone()[0]
+    blobs = conn.execute("""
+        SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0)
+        FROM capture_blobs
+    """).fetchone()
+    return {
+        'inline_snapshots': inline[0],
+        'inline_bytes': inline[1],
+        'compressed_snapshots': compressed,
+        'blobs': blobs[0],
+        'blob_raw_bytes': blobs[1],
+        'blob_bytes': blobs[2],
+    }
+
+
+def print_report(title, db_size, report):
+    print(f"\n=== {title} ===")
+    print(f"Database size:        {format_size(db_size)}")
+    print(f"Inline snapshots:     {report['inline_snapshots']} ({format_size(report['inline_bytes'])})")
+    print(f"Compressed snapshots: {report['compressed_snapshots']} "
+          f"in {report['blobs']} blobs ({format_size(report['blob_bytes'])} "
+          f"for {format_size(report['blob_raw_bytes'])} of text)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compress superseded capture snapshots into capture_blobs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Compress history and shrink the database file
+  python db_compress_snapshots.py
+
+  # Another database, leaving the file size alone (no VACUUM)
+  python db_compress_snapshots.py --db-path /data/assets.db --no-vacuum
+        """
+    )
+    parser.add_argument('--db-path', type=Path, default=DB_PATH,
+                        help=f'Path to assets.db (default: {DB_PATH})')
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help='Snapshots compressed per transaction (default: 200)')
+    parser.add_argument('--no-vacuum', action='store_true',
+                        help='Skip VACUUM (freed pages are reused but the file does not shrink)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Verbose logging')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not args.db_path.exists():
+        print(f"Error: Database not found: {args.db_path}")
+        return 1
+
+    conn = sqlite3.connect(str(args.db_path))
+    try:
+        CaptureStore.ensure_schema(conn)
+        conn.commit()
+
+        size_before = database_size(args.db_path)
+        print_report('Before', size_before, storage_report(conn))
+
+        started = time.perf_counter()
+        store = CaptureStore(conn)
+        totals = store.compress_history(args.batch_size)
+        pruned = store.prune_blobs()
+        conn.commit()
+
+        print(f"\nCompressed {totals['snapshots']} snapshots "
+              f"({format_size(totals['raw_bytes'])} -> {format_size(totals['stored_bytes'])} new blob data)")
+        if pruned:
+            print(f"Removed {pruned} unreferenced blobs")
+
+        if not args.no_vacuum:
+            print("Running VACUUM...")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("VACUUM")
+
+        size_after = database_size(args.db_path)
+        print_report('After', size_after, storage_report(conn))
+
+        saved = size_before - size_after
+        percent = (saved / size_before * 100) if size_before else 0
+        print(f"\nSaved {format_size(max(saved, 0))} ({percent:.1f}%) "
+              f"in {time.perf_counter() - started:.1f}s")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -7,6 +7,8 @@ Run this after adding the FTS triggers to populate the index with existing data
 import sqlite3
 import sys
 
+from velocitycmdb.services.capture_search import rebuild_capture_fts
+
 
 def rebuild_fts(db_path='assets.db'):
     """Rebuild the capture_fts index from existing capture_snapshots"""
@@ -32,17 +34,11 @@ def rebuild_fts(db_path='assets.db'):
 
     # Rebuild
     print("\n=== Rebuilding FTS Index ===")
-    print("Clearing existing FTS data...")
-    cursor.execute("DELETE FROM capture_fts")
-
+    # Inline snapshots into capture_fts, compressed history into capture_blob_fts
     print("Indexing snapshots...")
-    cursor.execute("""
-        INSERT INTO capture_fts(rowid, content)
-        SELECT id, content FROM capture_snapshots
-    """)
-
-    indexed = cursor.rowcount
-    conn.commit()
+    tokenizer = rebuild_capture_fts(conn)
+    indexed = snapshot_count
+    print(f"Tokenizer: {tokenizer}")
 
     # Verify
     print("\n=== After Rebuild ===")
@@ -17,6 +17,8 @@ from datetime import datetime
 import logging
 import click
 
+from velocitycmdb.db.data_version import bump_data_version
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -678,7 +680,8 @@ class FingerprintLoader:
                 # Record fingerprint extraction
                 self.record_fingerprint_extraction(conn, device_id, fingerprint_path, device_info)
 
-                conn.commit()
+                # Commits, and moves the data version cached responses key on
+                bump_data_version(conn, 'fingerprints')
                 return True
 
         except Exception as e:
@@ -35,6 +35,10 @@ try:
 except ImportError:
     TEXTFSM_AVAILABLE = False
 
+from tfsm_pool import ParsePool, ParseJob, iter_filter_results
+
+from velocitycmdb.db.data_version import bump_data_version
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -295,22 +299,23 @@ class InventoryLoader:
             return None
 
         filter_attempts = self._create_vendor_filter(vendor)
+        filter_results = iter_filter_results(self.textfsm_engine, content, filter_attempts, platform=vendor)
+        return self._select_inventory_result(filter_results)
+
+    def _select_inventory_result(self, filter_results) -> Optional[Dict]:
+        """
+        Pick the best usable result from (filter, template, parsed_data, score) tuples.
+
+        filter_results may be a lazy iterator (serial mode) or a list from a
+        parse worker.
+        """
         best_result = None
         best_score = 0
         fallback_result = None  # Keep a fallback in case best result is garbage
 
-        for filter_string in filter_attempts:
+        for filter_string, template, parsed_data, score in filter_results:
+            template_content = None
             try:
-                result = self.textfsm_engine.find_best_template(content, filter_string)
-
-                if len(result) == 4:
-                    template, parsed_data, score, template_content = result
-                elif len(result) == 3:
-                    template, parsed_data, score = result
-                    template_content = None
-                else:
-                    continue
-
                 if score > best_score and parsed_data:
                     # Check if this is a garbage PART/TYPE/VERSION parse
                     if parsed_data and 'PART' in parsed_data[0]:
@@ -620,7 +625,8 @@ class InventoryLoader:
                 ))
                 count += 1
 
-            conn.commit()
+            # Commits, and moves the data version cached responses key on
+            bump_data_version(conn, 'inventory')
             conn.close()
             return count
 
@@ -643,7 +649,7 @@ class InventoryLoader:
                 return 0
 
             cursor.execute("DELETE FROM components")
-            conn.commit()
+            bump_data_version(conn, 'inventory')
 
             cursor.execute("SELECT COUNT(*) FROM components")
             remaining = cursor.fetchone()[0]
@@ -790,26 +796,44 @@ class InventoryLoader:
             logger.error(f"Database error: {e}")
             return []
 
-    def load_inventory_capture(self, capture: Dict) -> int:
-        """Load a single inventory capture"""
+    def _read_capture(self, capture: Dict) -> Optional[str]:
+        """Read an inventory capture file; None if missing, unreadable or empty"""
         file_path = capture.get('file_path')
         device_name = capture.get('device_name')
 
         if not file_path or not os.path.exists(file_path):
             logger.warning(f"File not found for {device_name}: {file_path}")
-            return 0
+            return None
 
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
         except Exception as e:
             logger.error(f"Error reading file for {device_name}: {e}")
-            return 0
+            return None
 
         if not content.strip():
             logger.warning(f"Empty file for {device_name}")
+            return None
+
+        return content
+
+    def load_inventory_capture(self, capture: Dict) -> int:
+        """Load a single inventory capture"""
+        content = self._read_capture(capture)
+        if content is None:
             return 0
 
+        textfsm_result = self._parse_inventory_with_textfsm(
+            content,
+            capture.get('vendor_name', ''),
+            capture.get('device_type_name', '')
+        )
+        return self._store_parsed_capture(capture, textfsm_result)
+
+    def _store_parsed_capture(self, capture: Dict, textfsm_result: Optional[Dict]) -> int:
+        """Extract components from a TextFSM result and store them"""
+        device_name = capture.get('device_name')
         device_info = {
             'device_id': capture.get('device_id'),
             'hostname': device_name,
@@ -818,12 +842,6 @@ class InventoryLoader:
             'site_code': capture.get('site_code')
         }
 
-        textfsm_result = self._parse_inventory_with_textfsm(
-            content,
-            capture.get('vendor_name', ''),
-            capture.get('device_type_name', '')
-        )
-
         if not textfsm_result:
             logger.warning(f"TextFSM parsing failed for {device_name}")
             return 0
@@ -836,8 +854,14 @@ class InventoryLoader:
 
         return self._store_components(device_info['device_id'], components)
 
-    def load_all_captures(self, max_files: int = None, device_filter: str = None) -> Dict[str, int]:
-        """Load all inventory captures from database"""
+    def load_all_captures(self, max_files: int = None, device_filter: str = None,
+                          workers: int = 1) -> Dict[str, int]:
+        """
+        Load all inventory captures from database
+
+        With workers > 1, TextFSM parsing runs in a process pool while
+        components are still stored from this process, in capture order.
+        """
         captures = self.get_inventory_captures(device_filter=device_filter)
 
         if max_files:
@@ -857,10 +881,22 @@ class InventoryLoader:
         else:
             logger.info("Filtering mode: Storing all components (--ignore-sn enabled)")
 
-        for i, capture in enumerate(captures, 1):
+        parallel = bool(workers and workers > 1 and self.textfsm_engine)
+        if parallel:
+            results = self._iter_parallel_results(captures, workers)
+        else:
+            results = ((capture, None) for capture in captures)
+
+        for capture, filter_results in results:
             device_name = capture.get('device_name')
             try:
-                count = self.load_inventory_capture(capture)
+                if not parallel:
+                    count = self.load_inventory_capture(capture)
+                elif filter_results is None:
+                    # Unreadable/empty file, already logged by _read_capture
+                    count = 0
+                else:
+                    count = self._store_parsed_capture(capture, self._select_inventory_result(filter_results))
                 if count > 0:
                     stats['files_processed'] += 1
                     stats['total_components'] += count
@@ -876,6 +912,24 @@ class InventoryLoader:
         self._log_summary(stats)
         return stats
 
+    def _iter_parallel_results(self, captures: List[Dict], workers: int):
+        """Yield (capture, filter_results) in order, parsing in a worker pool"""
+        def parse_jobs():
+            for capture in captures:
+                content = self._read_capture(capture)
+                job = None
+                if content is not None:
+                    vendor = capture.get('vendor_name', '')
+                    job = ParseJob(content, self._create_vendor_filter(vendor), platform=vendor)
+                yield capture, job
+
+        warm_filters = []
+        for vendor in {capture.get('vendor_name', '') for capture in captures}:
+            warm_filters.extend(self._create_vendor_filter(vendor))
+
+        with ParsePool(self.textfsm_db_path, workers=workers, warm_filters=warm_filters) as pool:
+            yield from pool.imap(parse_jobs())
+
     def _log_summary(self, stats: Dict):
         """Log processing summary"""
         logger.info(f"\n{'=' * 70}")
@@ -883,6 +937,8 @@ class InventoryLoader:
         logger.info(f"Files processed: {stats['files_processed']}")
         logger.info(f"Files failed: {stats['files_failed']}")
         logger.info(f"Total components: {stats['total_components']}")
+        if self.textfsm_engine and hasattr(self.textfsm_engine, 'cache_stats'):
+            logger.info(f"TextFSM template cache: {self.textfsm_engine.cache_stats()}")
 
         if stats.get('failed_devices'):
             logger.info(f"\nFailed devices ({len(stats['failed_devices'])}):")
@@ -1288,7 +1344,8 @@ def cmd_load(args):
         else:
             stats = loader.load_all_captures(
                 max_files=args.max_files,
-                device_filter=args.device_filter
+                device_filter=args.device_filter,
+                workers=args.workers
             )
 
         # Reclassify if requested
@@ -1461,6 +1518,8 @@ Examples:
                              help="Path to TextFSM templates database (auto-discovered if not specified)")
     load_parser.add_argument("--from-directory", help="Load from directory (bypass capture database)")
     load_parser.add_argument("--max-files", type=int, help="Maximum files to process")
+    load_parser.add_argument("--workers", type=int, default=1,
+                             help="TextFSM parse worker processes (default: 1, parse inline)")
     load_parser.add_argument("--device-filter", help="Filter devices by name pattern")
     load_parser.add_argument("--ignore-sn", action="store_true",
                              help="Import all components regardless of serial number")
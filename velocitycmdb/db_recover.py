@@ -7,6 +7,8 @@ Drops and recreates capture_fts and note_fts tables with their triggers
 import sqlite3
 import sys
 
+from velocitycmdb.services.capture_search import rebuild_capture_fts
+
 
 def force_rebuild_fts(db_path='assets.db'):
     """Forcibly rebuild all FTS tables"""
@@ -108,65 +110,11 @@ def force_rebuild_fts(db_path='assets.db'):
         print(f"\nFound {snapshot_count} snapshots to index")
 
         if snapshot_count > 0:
-            # Drop triggers first
-            print("\nDropping FTS triggers...")
-            cursor.execute("DROP TRIGGER IF EXISTS capture_fts_insert")
-            cursor.execute("DROP TRIGGER IF EXISTS capture_fts_update")
-            cursor.execute("DROP TRIGGER IF EXISTS capture_fts_delete")
-            print("✓ Triggers dropped")
-
-            # Drop FTS table
-            print("Dropping FTS table...")
-            cursor.execute("DROP TABLE IF EXISTS capture_fts")
-            print("✓ FTS table dropped")
-
-            print("\nRecreating FTS table...")
-            cursor.execute("""
-                CREATE VIRTUAL TABLE capture_fts USING fts5(
-                    content,
-                    content=capture_snapshots,
-                    content_rowid=id
-                )
-            """)
-            print("✓ FTS table created")
-
-            print("\nRecreating FTS triggers...")
-            cursor.execute("""
-                CREATE TRIGGER capture_fts_insert 
-                AFTER INSERT ON capture_snapshots 
-                BEGIN
-                    INSERT INTO capture_fts(rowid, content)
-                    VALUES (new.id, new.content);
-                END
-            """)
-            print("✓ Insert trigger created")
-
-            cursor.execute("""
-                CREATE TRIGGER capture_fts_update 
-                AFTER UPDATE ON capture_snapshots 
-                BEGIN
-                    UPDATE capture_fts 
-                    SET content = new.content 
-                    WHERE rowid = new.id;
-                END
-            """)
-            print("✓ Update trigger created")
-
-            cursor.execute("""
-                CREATE TRIGGER capture_fts_delete 
-                AFTER DELETE ON capture_snapshots 
-                BEGIN
-                    DELETE FROM capture_fts WHERE rowid = old.id;
-                END
-            """)
-            print("✓ Delete trigger created")
-
-            print("\nPopulating FTS index...")
-            cursor.execute("""
-                INSERT INTO capture_fts(rowid, content)
-                SELECT id, content FROM capture_snapshots
-            """)
-            print(f"✓ Indexed {snapshot_count} snapshots")
+            # Same table, triggers and blob index the loaders maintain; compressed
+            # history is indexed by its decompressed text in capture_blob_fts
+            print("\nRecreating FTS table, triggers and blob index...")
+            tokenizer = rebuild_capture_fts(conn)
+            print(f"✓ Indexed {snapshot_count} snapshots ({tokenizer})")
 
             # Verify
             cursor.execute("SELECT COUNT(*) FROM capture_fts")
@@ -9,6 +9,8 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from velocitycmdb.services.capture_search import rebuild_capture_fts
+
 
 def force_rebuild_fts(db_path='assets.db'):
     """Forcibly rebuild all FTS tables"""
@@ -125,74 +127,19 @@ def force_rebuild_fts(db_path='assets.db'):
             print(f"\nFound {snapshot_count} snapshots to index")
 
             if snapshot_count > 0:
-                # Drop triggers first
-                print("\nDropping FTS triggers...")
-                cursor.execute("DROP TRIGGER IF EXISTS capture_fts_insert")
-                cursor.execute("DROP TRIGGER IF EXISTS capture_fts_update")
-                cursor.execute("DROP TRIGGER IF EXISTS capture_fts_delete")
-                print("[OK] Triggers dropped")
-
-                # Drop FTS table
-                print("Dropping FTS table...")
-                cursor.execute("DROP TABLE IF EXISTS capture_fts")
-                print("[OK] FTS table dropped")
-
-                print("\nRecreating FTS table...")
-                print("Tokenizer: unicode61 (default, best compatibility)")
-                cursor.execute("""
-                    CREATE VIRTUAL TABLE capture_fts USING fts5(
-                        content,
-                        content=capture_snapshots,
-                        content_rowid=id
-                    )
-                """)
-                print("[OK] FTS table created")
-
-                print("\nRecreating FTS triggers...")
-                cursor.execute("""
-                    CREATE TRIGGER capture_fts_insert 
-                    AFTER INSERT ON capture_snapshots 
-                    BEGIN
-                        INSERT INTO capture_fts(rowid, content)
-                        VALUES (new.id, new.content);
-                    END
-                """)
-                print("[OK] Insert trigger created")
-
-                cursor.execute("""
-                    CREATE TRIGGER capture_fts_update 
-                    AFTER UPDATE ON capture_snapshots 
-                    BEGIN
-                        UPDATE capture_fts 
-                        SET content = new.content 
-                        WHERE rowid = new.id;
-                    END
-                """)
-                print("[OK] Update trigger created")
-
-                cursor.execute("""
-                    CREATE TRIGGER capture_fts_delete 
-                    AFTER DELETE ON capture_snapshots 
-                    BEGIN
-                        DELETE FROM capture_fts WHERE rowid = old.id;
-                    END
-                """)
-                print("[OK] Delete trigger created")
-
-                print("\nPopulating FTS index...")
-                cursor.execute("""
-                    INSERT INTO capture_fts(rowid, content)
-                    SELECT id, content FROM capture_snapshots
-                """)
+                # Same schema and triggers the loaders and CaptureStore maintain:
+                # inline snapshots in capture_fts, compressed history in capture_blob_fts
+                print("\nRecreating FTS table, triggers and index...")
+                tokenizer = rebuild_capture_fts(conn)
+                if tokenizer == 'trigram':
+                    print("Tokenizer: trigram (substring, IP and MAC search)")
+                else:
+                    print(f"Tokenizer: {tokenizer} (SQLite {sqlite3.sqlite_version} has no trigram tokenizer)")
                 print(f"[OK] Indexed {snapshot_count} snapshots")
 
                 # Verify
-                cursor.execute("SELECT COUNT(*) FROM capture_fts")
-                fts_count = cursor.fetchone()[0]
-                if snapshot_count == fts_count:
-                    print(f"[SUCCESS] capture_fts rebuilt successfully")
-                else:
-                    print(f"[WARNING] Count mismatch: {snapshot_count} vs {fts_count}")
+                cursor.execute("INSERT INTO capture_fts(capture_fts, rank) VALUES ('integrity-check', 1)")
+                print(f"[SUCCESS] capture_fts rebuilt successfully")
             else:
                 print("No snapshots to index - skipping")
 
@@ -15,6 +15,8 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 from datetime import datetime
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 # Import the migration analyzer
 try:
     from juniper_peer_report import JuniperToAristaMigration
@@ -87,22 +89,12 @@ class BatchBGPMigrationAnalyzer:
 
     def get_device_config(self, device_id: int) -> str:
         """Get device configuration from capture_snapshots"""
-        query = """
-            SELECT content
-            FROM capture_snapshots
-            WHERE device_id = ?
-            AND capture_type = 'configs'
-            ORDER BY captured_at DESC
-            LIMIT 1
-        """
-
-        cursor = self.conn.cursor()
-        cursor.execute(query, (device_id,))
-        row = cursor.fetchone()
-
-        if row:
-            return row['content']
-        return None
+        # The newest snapshot may be compressed history (after a delete); CaptureStore decompresses it
+        store = CaptureStore(self.conn)
+        snapshot_id = store.latest_snapshot_id(device_id, 'configs')
+        if snapshot_id is None:
+            return None
+        return store.content(snapshot_id)
 
     def extract_bgp_peers_from_config(self, config: str) -> List[str]:
         """Extract all BGP neighbor IPs from Juniper config"""
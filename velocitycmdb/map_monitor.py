@@ -46,9 +46,10 @@ except ImportError:
 try:
     from svg_monitor import (
         create_status_overlay, load_config, test_port_connectivity,
-        modify_svg_with_status, test_multiple_ports
+        modify_svg_with_status
     )
     from svg_parser import parse_svg_network_map, NAMESPACES
+    from reachability_probe import ReachabilityProber, raise_fd_limit
 except ImportError as e:
     print(f"Error importing required modules: {e}")
     print("Make sure svg_monitor.py and svg_parser.py are in the same directory.")
@@ -262,12 +263,17 @@ def run_monitoring_cycle(
 
         logger.info(f"Found {parsed_data['totalDevices']} devices in the SVG")
 
+        # Set timeout in config
+        config["monitoring"] = config.get("monitoring", {})
+        config["monitoring"]["timeout"] = timeout
+
+        # One prober per cycle: the status checks below reuse the overlay's probes
+        prober = None
+        if not no_test and not test_mode:
+            prober = ReachabilityProber.from_config(config, timeout)
+
         # Create the status overlay
         try:
-            # Set timeout in config
-            config["monitoring"] = config.get("monitoring", {})
-            config["monitoring"]["timeout"] = timeout
-
             status_counts = create_status_overlay(
                 input_path,
                 parsed_data,
@@ -277,11 +283,14 @@ def run_monitoring_cycle(
                 timeout,
                 simulate_failures,
                 test_mode,
-                False  # Don't save JSON in create_status_overlay, we'll do it here
+                False,  # Don't save JSON in create_status_overlay, we'll do it here
+                prober
             )
         except Exception as e:
             logger.error(f"Error creating status overlay: {e}")
             logger.debug(traceback.format_exc())
+            if prober is not None:
+                prober.close()
             return {}
 
         # Save JSON file if requested
@@ -298,8 +307,6 @@ def run_monitoring_cycle(
 
                 # Get monitoring settings
                 monitor_ports = config.get("monitor_ports", [22, 80])
-                connection_timeout = config.get("monitoring", {}).get("timeout", timeout)
-                parallel_checks = config.get("monitoring", {}).get("parallel_checks", True)
 
                 # Get exclude lists from config
                 excluded_ips = set(config["exclude_lists"]["ip"])
@@ -337,11 +344,8 @@ def run_monitoring_cycle(
                             })
                             continue
 
-                        # Actually test connectivity
-                        logger.info(f"  Testing {ip} ({name}) on ports {monitor_ports}...")
-                        is_up, open_ports = test_multiple_ports(
-                            ip, monitor_ports, connection_timeout, parallel_checks
-                        )
+                        # Result from the overlay's probe (probed now if not on the map)
+                        is_up, open_ports = prober.probe(ip)
                         status = "up" if is_up else "down"
 
                         # Add to status checks
@@ -400,6 +404,9 @@ def run_monitoring_cycle(
                 logger.error(f"Error saving JSON data: {e}")
                 logger.debug(traceback.format_exc())
 
+        if prober is not None:
+            prober.close()
+
         # Log status summary
         logger.info("Status Summary:")
         logger.info(f"  Devices UP (green): {status_counts['up']}")
@@ -523,6 +530,9 @@ def main():
         # Load configuration
         config = load_config(args.config)
 
+        # Room for the probe sockets (the open-file limit is process-wide, so set it once here)
+        raise_fd_limit(ReachabilityProber.concurrency_from_config(config))
+
         # Process simulate failures argument
         simulate_failures = args.sim_failures.split(',') if args.sim_failures else None
 
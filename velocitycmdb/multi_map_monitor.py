@@ -47,6 +47,7 @@ try:
         modify_svg_with_status, test_multiple_ports
     )
     from svg_parser import parse_svg_network_map, NAMESPACES
+    from reachability_probe import ReachabilityProber, raise_fd_limit
 except ImportError as e:
     print(f"Error importing required modules: {e}")
     print("Make sure svg_monitor.py and svg_parser.py are in the same directory.")
@@ -117,11 +118,17 @@ def process_single_map(
         no_test: bool,
         test_mode: bool,
         simulate_failures: Optional[List[str]],
-        logger: logging.Logger
+        logger: logging.Logger,
+        parsed_data: Optional[Dict[str, Any]] = None,
+        prober: Optional[ReachabilityProber] = None
 ) -> Dict[str, Any]:
     """
     Process a single SVG map file.
 
+    Args:
+        parsed_data: Map already parsed by the cycle (parsed here if None)
+        prober: The cycle's shared prober
+
     Returns:
         Dict with status counts and metadata
     """
@@ -146,7 +153,8 @@ def process_single_map(
             config["monitor_ports"] = ports
 
         # Parse the SVG
-        parsed_data = parse_svg_network_map(str(input_path), config["thresholds"]["proximity"])
+        if parsed_data is None:
+            parsed_data = parse_svg_network_map(str(input_path), config["thresholds"]["proximity"])
 
         if not parsed_data:
             result["error"] = "Failed to parse SVG"
@@ -170,7 +178,8 @@ def process_single_map(
             timeout,
             simulate_failures,
             test_mode,
-            False  # save_json - we'll handle this separately
+            False,  # save_json - we'll handle this separately
+            prober
         )
 
         result["status_counts"] = status_counts
@@ -233,43 +242,84 @@ def run_monitoring_cycle(
 
     results = []
 
-    if parallel and len(svg_files) > 1:
-        # Process maps in parallel
-        logger.info(f"Processing {len(svg_files)} maps in parallel...")
-        with ThreadPoolExecutor(max_workers=min(4, len(svg_files))) as executor:
-            futures = {
-                executor.submit(
-                    process_single_map,
+    # Parse every map, then probe all of their devices in one batch so the
+    # cycle costs one connect timeout and shared devices are probed once
+    if ports:
+        config["monitor_ports"] = ports
+    config["monitoring"] = config.get("monitoring", {})
+    config["monitoring"]["timeout"] = timeout
+
+    parsed_maps = {}
+    for svg_file in svg_files:
+        try:
+            parsed_maps[svg_file] = parse_svg_network_map(str(svg_file), config["thresholds"]["proximity"])
+        except Exception as e:
+            logger.debug(f"  [{svg_file.stem}] Parse failed, retrying during processing: {e}")
+
+    prober = None
+    if not no_test and not test_mode:
+        prober = ReachabilityProber.from_config(config, timeout)
+        excluded_ips = set(config["exclude_lists"]["ip"])
+        excluded_names = set(config["exclude_lists"]["name"])
+        probe_ips = [
+            device["deviceInfo"]["ip"]
+            for parsed_data in parsed_maps.values() if parsed_data
+            for device in parsed_data["devices"]
+            if device["deviceInfo"].get("ip")
+            and device["deviceInfo"]["ip"] not in excluded_ips
+            and device["deviceInfo"].get("name") not in excluded_names
+            and not (simulate_failures and device["deviceInfo"]["ip"] in simulate_failures)
+        ]
+        probe_start = time.time()
+        prober.probe_many(probe_ips)
+        logger.info(f"Probed {prober.stats['probed']} unique devices "
+                    f"({len(probe_ips)} map nodes) in {time.time() - probe_start:.2f}s")
+
+    try:
+        if parallel and len(svg_files) > 1:
+            # Process maps in parallel
+            logger.info(f"Processing {len(svg_files)} maps in parallel...")
+            with ThreadPoolExecutor(max_workers=min(4, len(svg_files))) as executor:
+                futures = {
+                    executor.submit(
+                        process_single_map,
+                        svg_file,
+                        output_dir,
+                        config.copy(),  # Copy config to avoid thread issues
+                        timeout,
+                        ports,
+                        no_test,
+                        test_mode,
+                        simulate_failures,
+                        logger,
+                        parsed_maps.get(svg_file),
+                        prober
+                    ): svg_file for svg_file in svg_files
+                }
+
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+        else:
+            # Process maps sequentially
+            for svg_file in svg_files:
+                result = process_single_map(
                     svg_file,
                     output_dir,
-                    config.copy(),  # Copy config to avoid thread issues
+                    config,
                     timeout,
                     ports,
                     no_test,
                     test_mode,
                     simulate_failures,
-                    logger
-                ): svg_file for svg_file in svg_files
-            }
-
-            for future in as_completed(futures):
-                result = future.result()
+                    logger,
+                    parsed_maps.get(svg_file),
+                    prober
+                )
                 results.append(result)
-    else:
-        # Process maps sequentially
-        for svg_file in svg_files:
-            result = process_single_map(
-                svg_file,
-                output_dir,
-                config,
-                timeout,
-                ports,
-                no_test,
-                test_mode,
-                simulate_failures,
-                logger
-            )
-            results.append(result)
+    finally:
+        if prober is not None:
+            prober.close()
 
     # Generate summary
     cycle_end = datetime.datetime.now()
@@ -428,6 +478,9 @@ Examples:
         # Load configuration
         config = load_config(args.config)
 
+        # Room for the probe sockets (the open-file limit is process-wide, so set it once here)
+        raise_fd_limit(ReachabilityProber.concurrency_from_config(config))
+
         # Main loop
         cycle_count = 0
         consecutive_failures = 0
@@ -17,6 +17,8 @@ import logging
 import click
 import json
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -222,7 +224,6 @@ class OSPFReportGenerator:
                     cs.device_id,
                     cs.capture_type,
                     cs.captured_at,
-                    cs.content,
                     cs.file_path,
                     d.name as device_name,
                     d.normalized_name,
@@ -260,7 +261,13 @@ class OSPFReportGenerator:
             query += " ORDER BY d.site_code, d.name"
 
             cursor.execute(query, params)
-            return [dict(row) for row in cursor.fetchall()]
+            captures = [dict(row) for row in cursor.fetchall()]
+
+            # Text through CaptureStore, which decompresses history snapshots
+            texts = CaptureStore(conn).contents(capture['snapshot_id'] for capture in captures)
+            for capture in captures:
+                capture['content'] = texts.get(capture['snapshot_id']) or ''
+            return captures
 
     def normalize_vendor(self, vendor_name: str) -> str:
         """Normalize vendor name for template matching"""
@@ -15,8 +15,14 @@ from pathlib import Path
 from datetime import datetime
 import re
 import concurrent.futures
+import time
 from threading import Lock
 
+try:
+    from velocitycmdb.pcng.collection_scheduler import CollectionScheduler, LatencyHistory
+except ImportError:
+    from collection_scheduler import CollectionScheduler, LatencyHistory
+
 CREDENTIAL_MAP = {}
 
 
@@ -154,8 +160,15 @@ class BatchExecutor:
         self.credential_manager = CredentialManager(use_keys, ssh_key_path)
 
     def execute_batch(self, devices: List[Dict], commands: str, output_subdir: str,
-                      max_workers: int = 5, dry_run: bool = False) -> Dict[str, Any]:
-        """Execute commands against all devices in parallel"""
+                      max_workers: int = 5, dry_run: bool = False,
+                      scheduler: Optional[CollectionScheduler] = None) -> Dict[str, Any]:
+        """
+        Execute commands against all devices in parallel
+
+        With a scheduler, devices start longest-expected-first, each gets a
+        timeout from its latency history, transient failures are retried at
+        the end with backoff, and the summary carries the critical path.
+        """
 
         if not self.credential_manager.validate_credentials(devices):
             return {"error": "Credential validation failed"}
@@ -185,10 +198,35 @@ class BatchExecutor:
         print("-" * 60)
 
         start_time = datetime.now()
+        if scheduler:
+            scheduler.load([device['display_name'] for device in devices])
+            devices = scheduler.order(devices, key=lambda device: device['display_name'])
+
+        self._run_devices(devices, commands, output_dir, max_workers, scheduler)
+
+        if scheduler:
+            self._retry_transient(devices, commands, output_dir, max_workers, scheduler)
+            scheduler.flush()
+
+        end_time = datetime.now()
+        execution_summary = self._generate_summary(start_time, end_time)
+
+        if scheduler:
+            execution_summary['critical_path'] = scheduler.critical_path()
+            self._print_critical_path(execution_summary['critical_path'])
+
+        return execution_summary
+
+    def _run_devices(self, devices: List[Dict], commands: str, output_dir: Path, max_workers: int,
+                     scheduler: Optional[CollectionScheduler] = None, attempt: int = 1):
+        """Run one pass over devices, appending to execution_results"""
+        def timeout_for(device):
+            return scheduler.timeout_for(device['display_name'], attempt) if scheduler else 600
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_device = {
-                executor.submit(self._execute_single_device, device, commands, output_dir): device
+                executor.submit(self._execute_single_device, device, commands, output_dir,
+                                timeout_for(device), scheduler, attempt): device
                 for device in devices
             }
 
@@ -214,10 +252,39 @@ class BatchExecutor:
                         self.execution_results.append(error_result)
                     print(f"[ERROR] {device['display_name']} - Exception: {exc}")
 
-        end_time = datetime.now()
-        execution_summary = self._generate_summary(start_time, end_time)
-
-        return execution_summary
+    def _retry_transient(self, devices: List[Dict], commands: str, output_dir: Path, max_workers: int,
+                         scheduler: CollectionScheduler):
+        """Retry transient failures with backoff; a retry's result replaces the failed one"""
+        by_name = {device['display_name']: device for device in devices}
+
+        for attempt in range(2, scheduler.max_retries + 2):
+            retry = [by_name[result['device']] for result in self.execution_results
+                     if not result['success'] and result['device'] in by_name
+                     and scheduler.is_transient(result.get('message'))]
+            if not retry:
+                return
+
+            delay = scheduler.retry_delay(attempt)
+            print(f"\nRetry round {attempt - 1}/{scheduler.max_retries}: "
+                  f"{len(retry)} devices in {delay:.0f}s")
+            time.sleep(delay)
+
+            retry_names = {device['display_name'] for device in retry}
+            with self.results_lock:
+                self.execution_results = [result for result in self.execution_results
+                                          if result['device'] not in retry_names]
+            self._run_devices(retry, commands, output_dir, max_workers, scheduler, attempt)
+
+    @staticmethod
+    def _print_critical_path(critical_path: Dict[str, Any]):
+        if not critical_path['devices']:
+            return
+        print(f"\nCritical path ({critical_path['makespan']:.1f}s, "
+              f"lane busy {critical_path['busy']:.1f}s):")
+        for run in critical_path['devices']:
+            status = "ok" if run['success'] else "failed"
+            print(f"  +{run['start']:.1f}s {run['device']} {run['duration']:.1f}s "
+                  f"[{status}, attempt {run['attempt']}]")
 
     def _extract_error_message(self, stdout: str, stderr: str) -> str:
         """
@@ -281,8 +348,20 @@ class BatchExecutor:
         # Last resort: return first line of cleaned output
         first_line = cleaned_output.strip().split('\n')[0]
         return first_line[:100] if first_line else "Unknown error"
-    def _execute_single_device(self, device: Dict, commands: str, output_dir: Path) -> Dict[str, Any]:
+    def _execute_single_device(self, device: Dict, commands: str, output_dir: Path,
+                               timeout: float = 600, scheduler: Optional[CollectionScheduler] = None,
+                               attempt: int = 1) -> Dict[str, Any]:
         """Execute spn.py command against a single device - FIXED VERSION"""
+        result = self._run_spn(device, commands, output_dir, timeout, scheduler, attempt)
+        if scheduler:
+            started = time.time() - result.get('execution_time', 0)
+            scheduler.record(result['device'], started, time.time(), result['success'],
+                             result.get('message'), attempt=attempt)
+        return result
+
+    def _run_spn(self, device: Dict, commands: str, output_dir: Path, timeout: float,
+                 scheduler: Optional[CollectionScheduler], attempt: int) -> Dict[str, Any]:
+        """Run spn.py for one device and classify the outcome"""
         device_name = device['display_name']
         host = device['host']
         port = device.get('port', '22')
@@ -319,6 +398,10 @@ class BatchExecutor:
             # '--invoke-shell'
         ]
 
+        if scheduler:
+            cmd_args.extend(['--expect-prompt-timeout',
+                             str(scheduler.expect_prompt_timeout_for(device_name, attempt))])
+
         # if self.use_keys and self.ssh_key_path:
         #     cmd_args.extend(['--ssh-key', self.ssh_key_path])
 
@@ -347,7 +430,7 @@ class BatchExecutor:
                 cmd_args,
                 capture_output=True,
                 text=True,
-                timeout=600,
+                timeout=timeout,
                 env=env
             )
 
@@ -390,8 +473,8 @@ class BatchExecutor:
                 'host': host,
                 'cred_id': cred_id,
                 'success': False,
-                'message': 'Command timed out (600s)',
-                'execution_time': 600
+                'message': f'Command timed out ({timeout:.0f}s)',
+                'execution_time': timeout
             }
         except Exception as e:
             return {
@@ -483,6 +566,12 @@ Examples:
     parser.add_argument('--dry-run', action='store_true', help='Show what would be executed')
     parser.add_argument('--save-summary', help='Save execution summary to JSON file')
     parser.add_argument('--list-devices', action='store_true', help='Just list matching devices')
+    parser.add_argument('--history-db',
+                        help='assets.db with device latency history (longest-first order, p95 timeouts)')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='End-of-run retry rounds for transient failures (default: 0)')
+    parser.add_argument('--retry-backoff', type=float, default=5.0,
+                        help='Seconds before the first retry round, doubling each round (default: 5)')
 
     args = parser.parse_args()
     ssh_user = os.getenv("SSH_USER")
@@ -524,12 +613,23 @@ Examples:
         ssh_key_path=args.ssh_key
     )
 
+    scheduler = None
+    if args.history_db or args.retries:
+        scheduler = CollectionScheduler(
+            LatencyHistory(args.history_db) if args.history_db else None,
+            args.output,
+            default_timeout=600,
+            max_retries=args.retries,
+            retry_backoff=args.retry_backoff
+        )
+
     summary = executor.execute_batch(
         devices=matched_devices,
         commands=args.commands,
         output_subdir=args.output,
         max_workers=args.max_workers,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        scheduler=scheduler
     )
 
     if args.save_summary and not args.dry_run:
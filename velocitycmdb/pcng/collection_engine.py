@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+In-Process Collection Engine
+Drives DeviceSession collection from a bounded thread pool
+
+The job-batch chain starts an interpreter per device per job
+(run_jobs_batch -> batch_spn -> spn.py). The engine runs every device's
+session as a task in the calling process instead:
+
+- a global connection cap bounds open SSH sessions,
+- a per-site limit keeps one site's devices from saturating its links
+  (or its TACACS server), and sites are served round-robin so a large site
+  does not starve the others,
+- progress is reported as the same device_start / device_complete / summary
+  events run_jobs_batch.py prints as JSON lines.
+
+paramiko releases the GIL while it waits on the socket, so threads are
+enough to keep hundreds of sessions in flight.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import yaml
+
+from velocitycmdb.pcng.collection_scheduler import CollectionScheduler
+from velocitycmdb.pcng.device_session import (DeviceSession, SessionPlan, device_platform,
+                                              session_credentials)
+
+logger = logging.getLogger(__name__)
+
+
+def load_session_devices(session_file: str) -> List[Dict]:
+    """Devices from a sessions.yaml (folder_name/sessions groups or a flat list)"""
+    with open(session_file) as f:
+        data = yaml.safe_load(f) or []
+
+    devices = []
+    for item in data if isinstance(data, list) else [data]:
+        if isinstance(item, dict) and 'sessions' in item:
+            for device in item.get('sessions') or []:
+                devices.append({**device, 'folder_name': item.get('folder_name', '')})
+        elif isinstance(item, dict):
+            devices.append(item)
+    return devices
+
+
+def device_name(device: Dict) -> str:
+    return device.get('hostname') or device.get('display_name') or device.get('name') or 'unknown'
+
+
+def device_address(device: Dict) -> str:
+    return device.get('ip_address') or device.get('host') or device.get('ip') or ''
+
+
+def device_site(device: Dict) -> str:
+    """Site a sessions.yaml device belongs to (its folder, as db_to_sessions groups them)"""
+    return device.get('folder_name') or device.get('site') or device.get('site_code') or ''
+
+
+class CollectionEngine:
+    """
+    Collects devices in-process with a global connection cap and per-site limits
+
+    Usage:
+        engine = CollectionEngine(plans, capture_dir, max_connections=50, site_limit=8)
+        summary = engine.run(devices, on_event=print)
+    """
+
+    def __init__(self,
+                 plans: Dict[str, SessionPlan],
+                 capture_dir: Path,
+                 max_connections: int = 12,
+                 site_limit: int = None,
+                 site_limits: Dict[str, int] = None,
+                 credentials: Callable[[Dict], Dict] = session_credentials,
+                 timeout: int = 30,
+                 expect_prompt_timeout: int = 60000,
+                 inter_command_time: float = 0,
+                 log_dir: Path = None,
+                 scheduler: CollectionScheduler = None):
+        """
+        Args:
+            plans: Session plan per platform (see device_session.device_platform)
+            capture_dir: Base capture directory (<capture_dir>/<type>/<device>.txt)
+            max_connections: Global cap on concurrent SSH sessions
+            site_limit: Default cap on concurrent sessions per site (None = no limit)
+            site_limits: Per-site overrides of site_limit
+            credentials: Function(device) -> {'username', 'password', 'key_file'}
+            scheduler: Latency-aware ordering, prompt timeouts and retries
+                (capture_type 'session': one sample per device session)
+        """
+        self.plans = plans
+        self.capture_dir = Path(capture_dir)
+        self.max_connections = max(1, int(max_connections))
+        self.site_limit = site_limit
+        self.site_limits = site_limits or {}
+        self.credentials = credentials
+        self.timeout = timeout
+        self.expect_prompt_timeout = expect_prompt_timeout
+        self.inter_command_time = inter_command_time
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.scheduler = scheduler
+
+        self._lock = threading.Lock()
+        self._event_lock = threading.Lock()
+
+    def limit_for_site(self, site: str) -> int:
+        limit = self.site_limits.get(site, self.site_limit)
+        return max(1, int(limit)) if limit else self.max_connections
+
+    def run(self, devices: List[Dict], on_event: Callable[[Dict], None] = None) -> Dict:
+        """
+        Collect every device and return the run summary
+
+        on_event receives device_start / device_complete / summary events,
+        one at a time, from worker threads. With a scheduler, devices start
+        longest-expected-first within their site, transient failures get
+        end-of-run retries (a retry emits a fresh device_start/complete pair)
+        and the summary carries the critical path.
+        """
+        started = time.time()
+        if self.log_dir:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        def emit(event_type: str, **fields):
+            if on_event:
+                with self._event_lock:
+                    try:
+                        on_event({'type': event_type, 'timestamp': datetime.now().isoformat(), **fields})
+                    except Exception:
+                        logger.exception("Progress callback failed")
+
+        scheduler = self.scheduler
+        if scheduler:
+            scheduler.load([device_name(device) for device in devices], started=started)
+            devices = scheduler.order(devices, key=device_name)
+
+        outcomes = self._run_pass(devices, emit)
+
+        if scheduler:
+            for attempt in range(2, scheduler.max_retries + 2):
+                retry = [device for device in devices
+                         if not outcomes[id(device)]['success']
+                         and scheduler.is_transient(outcomes[id(device)]['message'])]
+                if not retry:
+                    break
+                delay = scheduler.retry_delay(attempt)
+                logger.info(f"Retry round {attempt - 1}/{scheduler.max_retries}: "
+                            f"{len(retry)} devices in {delay:.0f}s")
+                time.sleep(delay)
+                outcomes.update(self._run_pass(retry, emit, attempt))
+            scheduler.flush()
+
+        results = [outcomes[id(device)] for device in devices]
+        successful = sum(1 for result in results if result['success'])
+        summary = {
+            'total_jobs': len(results),
+            'successful_jobs': successful,
+            'failed_jobs': len(results) - successful,
+            'total_time': time.time() - started,
+            'ssh_sessions': sum(result['attempts'] for result in results),
+        }
+        if scheduler:
+            summary['critical_path'] = scheduler.critical_path()
+        emit('summary', **summary)
+        summary['results'] = results
+        return summary
+
+    def _run_pass(self, devices: List[Dict], emit: Callable, attempt: int = 1) -> Dict[int, Dict]:
+        """Collect devices under the global and per-site caps; results keyed by id(device)"""
+        outcomes = {}
+
+        # Per-site queues, served round-robin
+        pending = OrderedDict()
+        for device in devices:
+            pending.setdefault(device_site(device), deque()).append(device)
+
+        active = {site: 0 for site in pending}
+        state = {'running': 0, 'remaining': len(devices)}
+        finished = threading.Event()
+        if not devices:
+            finished.set()
+
+        def dispatch(pool: ThreadPoolExecutor):
+            # Caller holds self._lock
+            while state['running'] < self.max_connections:
+                site = next((site for site, queue in pending.items()
+                             if queue and active[site] < self.limit_for_site(site)), None)
+                if site is None:
+                    return
+                device = pending[site].popleft()
+                # Rotate so the next free slot goes to another site first
+                pending.move_to_end(site)
+                active[site] += 1
+                state['running'] += 1
+                pool.submit(task, pool, site, device)
+
+        def task(pool: ThreadPoolExecutor, site: str, device: Dict):
+            try:
+                outcomes[id(device)] = self._collect(device, site, emit, attempt)
+            finally:
+                with self._lock:
+                    active[site] -= 1
+                    state['running'] -= 1
+                    state['remaining'] -= 1
+                    if state['remaining'] == 0:
+                        finished.set()
+                    else:
+                        dispatch(pool)
+
+        with ThreadPoolExecutor(max_workers=self.max_connections,
+                                thread_name_prefix='collect') as pool:
+            with self._lock:
+                dispatch(pool)
+            finished.wait()
+
+        return outcomes
+
+    def _collect(self, device: Dict, site: str, emit: Callable, attempt: int = 1) -> Dict:
+        """Run one device's session, reporting start and completion"""
+        name, ip_address = device_name(device), device_address(device)
+        started = time.time()
+        connect_time = None
+        expect_prompt_timeout = self.expect_prompt_timeout
+        if self.scheduler:
+            expect_prompt_timeout = self.scheduler.expect_prompt_timeout_for(name, attempt)
+
+        emit('device_start', device_name=name, ip_address=ip_address, site=site)
+        try:
+            platform = device_platform(device)
+            if platform not in self.plans:
+                raise ValueError(f"No capture plan for vendor '{device.get('Vendor', '')}'")
+
+            credentials = self.credentials(device)
+            session = DeviceSession(device, self.plans[platform], self.capture_dir,
+                                    username=credentials['username'],
+                                    password=credentials.get('password'),
+                                    key_file=credentials.get('key_file'),
+                                    timeout=self.timeout,
+                                    expect_prompt_timeout=expect_prompt_timeout,
+                                    inter_command_time=self.inter_command_time,
+                                    log_dir=self.log_dir)
+            result = session.run()
+            success, message, connect_time = result.success, result.message, result.connect_time
+            captures = {capture.capture_type: capture.success for capture in result.captures}
+        except Exception as e:
+            logger.debug(f"{name}: collection failed", exc_info=True)
+            success, message, captures = False, str(e) or e.__class__.__name__, {}
+
+        finished = time.time()
+        duration = finished - started
+        if self.scheduler:
+            self.scheduler.record(name, started, finished, success, message,
+                                  connect_time=connect_time, attempt=attempt)
+        emit('device_complete', device_name=name, ip_address=ip_address, site=site,
+             success=success, message=message, captures=captures, duration=duration,
+             attempt=attempt)
+        return {'device': name, 'site': site, 'success': success, 'message': message,
+                'captures': captures, 'duration': duration, 'attempts': attempt}
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Collection Scheduler
+Latency-aware ordering, adaptive timeouts and retries for collection runs
+
+Every collected device leaves a latency sample (connect time, total time,
+outcome) in assets.db. The next run uses the recent history to:
+
+- start the devices expected to take longest first, so a slow WAN device
+  does not begin in the last slot and stretch the whole run,
+- size each device's timeout from its own p95 instead of one static value:
+  fast DC devices fail fast, slow ones are not cut off,
+- retry transient failures (timeouts, resets, banner errors) at the end of
+  the run with exponential backoff,
+- report the run's critical path: the worker lane that finished last and
+  the devices that kept it busy.
+
+Devices without enough history fall back to the job's static timeouts and
+are scheduled as if they were the slowest known device.
+"""
+
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from statistics import median
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LATENCY_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS device_collection_latency (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        device_name TEXT NOT NULL,
+        capture_type TEXT NOT NULL,
+        duration_ms REAL NOT NULL,
+        connect_ms REAL,
+        success INTEGER NOT NULL,
+        error TEXT,
+        attempt INTEGER NOT NULL DEFAULT 1,
+        recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_collection_latency_device "
+    "ON device_collection_latency(device_name, capture_type, id)",
+]
+
+# Failure messages worth another attempt later in the run
+TRANSIENT_ERROR_PATTERN = re.compile(
+    r'timed? ?out|timeout|reset by peer|connection reset|connection closed|'
+    r'broken pipe|eof|banner|temporarily|try again|no existing session|'
+    r'network is unreachable|no prompts',
+    re.IGNORECASE
+)
+
+# Failures another attempt will not fix
+PERMANENT_ERROR_PATTERN = re.compile(
+    r'authentication|permission denied|no capture plan|credential|no such file|'
+    r'not found|invalid',
+    re.IGNORECASE
+)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass
+class LatencySample:
+    device_name: str
+    capture_type: str
+    duration: float
+    success: bool
+    connect_time: Optional[float] = None
+    error: Optional[str] = None
+    attempt: int = 1
+
+
+@dataclass
+class DeviceEstimate:
+    """Expected run time of one device for one capture type, in seconds"""
+    device_name: str
+    samples: int
+    expected: float
+    p95: float
+
+
+class LatencyHistory:
+    """Per-device collection latency kept in assets.db"""
+
+    def __init__(self, db_path: str, window: int = 20):
+        """
+        Args:
+            db_path: Path to assets.db
+            window: Samples kept (and used) per device and capture type
+        """
+        self.db_path = str(db_path)
+        self.window = window
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        for statement in LATENCY_SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def estimates(self, capture_type: str, device_names: Iterable[str] = None) -> Dict[str, DeviceEstimate]:
+        """Estimates from the last `window` successful runs per device"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("""
+                SELECT device_name, duration_ms FROM (
+                    SELECT device_name, duration_ms,
+                           ROW_NUMBER() OVER (PARTITION BY device_name ORDER BY id DESC) AS rn
+                    FROM device_collection_latency
+                    WHERE capture_type = ? AND success = 1
+                ) WHERE rn <= ?
+            """, (capture_type, self.window)).fetchall()
+        finally:
+            conn.close()
+
+        wanted = set(device_names) if device_names is not None else None
+        durations = {}
+        for device_name, duration_ms in rows:
+            if wanted is None or device_name in wanted:
+                durations.setdefault(device_name, []).append(duration_ms / 1000)
+
+        return {
+            name: DeviceEstimate(name, len(values), median(values), percentile(values, 95))
+            for name, values in durations.items()
+        }
+
+    def record(self, samples: Iterable[LatencySample]):
+        """Store samples; each device/capture type keeps at most twice the window"""
+        rows = [
+            (sample.device_name, sample.capture_type, sample.duration * 1000,
+             sample.connect_time * 1000 if sample.connect_time is not None else None,
+             1 if sample.success else 0, (sample.error or '')[:500] or None, sample.attempt)
+            for sample in samples
+        ]
+        if not rows:
+            return
+
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                INSERT INTO device_collection_latency
+                    (device_name, capture_type, duration_ms, connect_ms, success, error, attempt)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.execute("""
+                DELETE FROM device_collection_latency WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, ROW_NUMBER() OVER (
+                            PARTITION BY device_name, capture_type ORDER BY id DESC) AS rn
+                        FROM device_collection_latency
+                    ) WHERE rn > ?
+                )
+            """, (self.window * 2,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class CollectionScheduler:
+    """
+    Orders devices, sizes timeouts and plans retries for one capture type
+
+    Usage:
+        scheduler = CollectionScheduler(LatencyHistory('assets.db'), 'configs',
+                                        default_timeout=60, max_retries=2)
+        scheduler.load(names)
+        for device in scheduler.order(devices, key=name_of):
+            timeout = scheduler.timeout_for(name_of(device))
+            ...
+            scheduler.record(name, started, time.time(), success, message)
+        scheduler.flush()
+        report = scheduler.critical_path()
+    """
+
+    def __init__(self,
+                 history: Optional[LatencyHistory],
+                 capture_type: str,
+                 default_timeout: float = 60,
+                 default_expect_prompt_timeout: int = 30000,
+                 timeout_multiplier: float = 2.0,
+                 timeout_margin: float = 10,
+                 min_timeout: float = 15,
+                 max_timeout: float = 900,
+                 min_samples: int = 3,
+                 max_retries: int = 0,
+                 retry_backoff: float = 5.0):
+        """
+        Args:
+            history: Latency store, or None to schedule without history
+            capture_type: History key (capture type / output directory)
+            default_timeout: Run timeout in seconds for devices without history
+            default_expect_prompt_timeout: Prompt timeout in ms without history
+            timeout_multiplier, timeout_margin: timeout = p95 * multiplier + margin
+            min_timeout, max_timeout: Bounds on adaptive timeouts in seconds
+            min_samples: Successful runs needed before history is trusted
+            max_retries: End-of-run retry rounds for transient failures
+            retry_backoff: Delay before the first retry round (doubles each round)
+        """
+        self.history = history
+        self.capture_type = capture_type
+        self.default_timeout = default_timeout
+        self.default_expect_prompt_timeout = default_expect_prompt_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.timeout_margin = timeout_margin
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self.estimates: Dict[str, DeviceEstimate] = {}
+        self.started = time.time()
+        self._samples: List[LatencySample] = []
+        self._timeline: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def load(self, device_names: Iterable[str] = None, started: float = None):
+        """
+        Load history for the devices about to run
+
+        Args:
+            started: Run start (epoch seconds) the critical path is measured
+                from; defaults to now
+        """
+        self.started = started or time.time()
+        if not self.history:
+            return
+        try:
+            self.estimates = self.history.estimates(self.capture_type, device_names)
+        except sqlite3.Error as e:
+            logger.warning(f"Latency history unavailable, using static timeouts: {e}")
+            self.estimates = {}
+
+    def _trusted(self, device_name: str) -> Optional[DeviceEstimate]:
+        estimate = self.estimates.get(device_name)
+        if estimate and estimate.samples >= self.min_samples:
+            return estimate
+        return None
+
+    def expected_duration(self, device_name: str) -> float:
+        estimate = self.estimates.get(device_name)
+        if estimate:
+            return estimate.expected
+        # Unknown devices go first, as if they were the slowest known device
+        return max((e.expected for e in self.estimates.values()), default=0.0) + 1
+
+    def order(self, devices: List, key: Callable = lambda device: device) -> List:
+        """Devices sorted longest-expected-first (stable for equal estimates)"""
+        return sorted(devices, key=lambda device: -self.expected_duration(key(device)))
+
+    def timeout_for(self, device_name: str, attempt: int = 1) -> float:
+        """Run timeout in seconds from the device's p95 (grows 50% per retry)"""
+        estimate = self._trusted(device_name)
+        if estimate:
+            timeout = estimate.p95 * self.timeout_multiplier + self.timeout_margin
+            timeout = min(self.max_timeout, max(self.min_timeout, timeout))
+        else:
+            timeout = self.default_timeout
+        return timeout * (1.5 ** (attempt - 1))
+
+    def expect_prompt_timeout_for(self, device_name: str, attempt: int = 1) -> int:
+        """Prompt wait in milliseconds; the command group runs inside the run timeout"""
+        if not self._trusted(device_name):
+            return int(self.default_expect_prompt_timeout * (1.5 ** (attempt - 1)))
+        return int(self.timeout_for(device_name, attempt) * 1000)
+
+    def is_transient(self, message: Optional[str]) -> bool:
+        if not message or PERMANENT_ERROR_PATTERN.search(message):
+            return False
+        return bool(TRANSIENT_ERROR_PATTERN.search(message))
+
+    def retry_delay(self, attempt: int) -> float:
+        """Backoff before retry round `attempt` (2 = first retry)"""
+        return self.retry_backoff * (2 ** max(0, attempt - 2))
+
+    def record(self, device_name: str, started: float, finished: float, success: bool,
+               message: str = None, connect_time: float = None, attempt: int = 1):
+        """Note one device run for history and the critical path"""
+        with self._lock:
+            self._samples.append(LatencySample(device_name, self.capture_type, finished - started,
+                                               success, connect_time,
+                                               None if success else message, attempt))
+            self._timeline.append({
+                'device': device_name,
+                'lane': threading.current_thread().name,
+                'start': started,
+                'end': finished,
+                'success': success,
+                'attempt': attempt,
+            })
+
+    def flush(self):
+        """Write recorded samples to the history store"""
+        with self._lock:
+            samples, self._samples = self._samples, []
+        if not self.history or not samples:
+            return
+        try:
+            self.history.record(samples)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not store latency history: {e}")
+
+    def critical_path(self) -> Dict:
+        """
+        The worker lane that finished last and the device runs on it
+
+        Times are seconds from load(). Idle time on the lane is queue wait
+        or retry backoff, not device time.
+        """
+        with self._lock:
+            timeline = list(self._timeline)
+        if not timeline:
+            return {'makespan': 0.0, 'lane': None, 'devices': [], 'busy': 0.0}
+
+        last = max(timeline, key=lambda run: run['end'])
+        lane = sorted((run for run in timeline if run['lane'] == last['lane']),
+                      key=lambda run: run['start'])
+        busy = sum(run['end'] - run['start'] for run in lane)
+        return {
+            'makespan': last['end'] - self.started,
+            'lane': last['lane'],
+            'busy': busy,
+            'devices': [{
+                'device': run['device'],
+                'start': run['start'] - self.started,
+                'duration': run['end'] - run['start'],
+                'success': run['success'],
+                'attempt': run['attempt'],
+            } for run in lane],
+        }
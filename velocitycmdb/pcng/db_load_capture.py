@@ -7,10 +7,16 @@ Only tracks CHANGES for critical types (configs, version, inventory)
 """
 
 import os
+import queue
 import sqlite3
 import re
 import hashlib
-import difflib
+import multiprocessing
+import threading
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
@@ -21,6 +27,166 @@ import click
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+from velocitycmdb.db.capture_manifest import MANIFEST_SCHEMA
+from velocitycmdb.db.data_version import bump_data_version
+from velocitycmdb.services.capture_store import CaptureStore, line_offsets
+from velocitycmdb.services.change_detection import CHANGE_TRACKED_TYPES, ChangeDetector, ChangeSummary
+from velocitycmdb.services.ip_locator import IPLocatorService, STRUCTURED_CAPTURE_TYPES
+
+
+@dataclass
+class LoadMetrics:
+    """Throughput and commit latency for one directory load"""
+    files: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    elapsed: float = 0.0
+    commits: int = 0
+    commit_seconds: float = 0.0
+    max_commit_seconds: float = 0.0
+
+    def record_commit(self, seconds: float):
+        self.commits += 1
+        self.commit_seconds += seconds
+        self.max_commit_seconds = max(self.max_commit_seconds, seconds)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def avg_commit_ms(self) -> float:
+        return self.commit_seconds / self.commits * 1000 if self.commits else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'files': self.files,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'files_per_sec': round(self.files_per_sec, 1),
+            'commits': self.commits,
+            'avg_commit_ms': round(self.avg_commit_ms, 2),
+            'max_commit_ms': round(self.max_commit_seconds * 1000, 2),
+        }
+
+
+@dataclass
+class PreparedCapture:
+    """
+    One capture file read, hashed and diffed against its previous snapshot.
+
+    Produced without writing anything, so it can be built in a worker
+    process and handed to the single writer.
+    """
+    file_path: Path
+    device_id: int
+    device_name: str
+    capture_type: str
+    stat: os.stat_result
+    content: str
+    content_hash: str
+    previous_id: Optional[int] = None
+    previous_hash: Optional[str] = None
+    change: Optional[ChangeSummary] = None
+    diff_path: Optional[str] = None  # Set when a worker already wrote the diff file
+    structured_rows: Optional[List[tuple]] = None  # Set when a worker already parsed arp/mac/routes
+    line_offsets: Optional[array] = None  # capture_line_index offsets of a new snapshot
+
+    @property
+    def unchanged(self) -> bool:
+        return self.previous_id is not None and self.previous_hash == self.content_hash
+
+
+def prepare_capture(conn: sqlite3.Connection, detector: ChangeDetector, file_path: Path,
+                    device_id: int, device_name: str, capture_type: str) -> PreparedCapture:
+    """Read a capture file and diff it against the device's latest snapshot (read-only)"""
+    # Stat before reading so the manifest never pairs a newer mtime with older content
+    stat = file_path.stat()
+    content = file_path.read_text(encoding='utf-8', errors='ignore')
+    prepared = PreparedCapture(file_path, device_id, device_name, capture_type, stat, content,
+                               hashlib.sha256(content.encode()).hexdigest())
+
+    # Previous snapshot through the latest pointer (content is read only for diffs)
+    store = CaptureStore(conn)
+    previous_id = store.latest_snapshot_id(device_id, capture_type)
+    if previous_id is not None:
+        row = conn.execute("SELECT id, content_hash, file_path FROM capture_snapshots WHERE id = ?",
+                           (previous_id,)).fetchone()
+        if row:
+            prepared.previous_id, prepared.previous_hash = row[0], row[1]
+            logger.debug(f"  Found previous snapshot: {row[2]}")
+
+    if (prepared.previous_id is not None and not prepared.unchanged
+            and capture_type in detector.tracked_types):
+        prepared.change = detector.compare(store.content(prepared.previous_id) or '', content, capture_type)
+    if not prepared.unchanged:
+        prepared.line_offsets = line_offsets(content)
+    return prepared
+
+
+def write_diff_file(data_dir: Path, diff_output_dir: Path, device_id: int, capture_type: str,
+                    timestamp: datetime, diff_content: str) -> str:
+    """
+    Save diff to file and return RELATIVE path (relative to data_dir)
+
+    This ensures the path stored in DB can be resolved by the web UI
+    using: data_dir / diff_path
+    """
+    # Create directory structure: {data_dir}/diffs/device_id/capture_type/
+    device_dir = diff_output_dir / str(device_id) / capture_type
+    device_dir.mkdir(parents=True, exist_ok=True)
+
+    # Filename with timestamp
+    filename = f"{timestamp.strftime('%Y%m%d_%H%M%S')}.diff"
+    diff_path = device_dir / filename
+
+    diff_path.write_text(diff_content)
+
+    # Return path RELATIVE to data_dir for DB storage
+    # This allows the web UI to resolve: data_dir / relative_path
+    try:
+        relative_path = diff_path.relative_to(data_dir)
+        logger.debug(f"  Diff saved: {diff_path} (stored as: {relative_path})")
+        return str(relative_path)
+    except ValueError:
+        # Fallback if somehow not relative to data_dir
+        logger.warning(f"  Diff path {diff_path} not relative to {data_dir}, storing absolute")
+        return str(diff_path)
+
+
+# Per-process state of pipeline workers (see CaptureLoader.load_captures_directory)
+_worker_state: Dict = {}
+
+
+def _init_pipeline_worker(db_path: str, tracked_types, data_dir: Path, diff_output_dir: Path,
+                          write_diffs: bool):
+    """Open a read-only connection per worker process; the writer holds the only writable one"""
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    parser = IPLocatorService(db_path)
+    _worker_state.update(conn=conn, detector=ChangeDetector(tracked_types), parser=parser,
+                         data_dir=data_dir, diff_output_dir=diff_output_dir, write_diffs=write_diffs)
+
+
+def _prepare_in_worker(file_path: Path, device_id: int, device_name: str,
+                       capture_type: str) -> PreparedCapture:
+    state = _worker_state
+    prepared = prepare_capture(state['conn'], state['detector'], file_path, device_id,
+                               device_name, capture_type)
+    if state['write_diffs'] and prepared.change is not None and prepared.change.changed:
+        prepared.diff_path = write_diff_file(state['data_dir'], state['diff_output_dir'], device_id,
+                                             capture_type, datetime.fromtimestamp(prepared.stat.st_mtime),
+                                             prepared.change.diff)
+    # Parse structured rows here so the writer only has to insert them
+    if state['parser'] and capture_type in STRUCTURED_CAPTURE_TYPES and not prepared.unchanged:
+        try:
+            prepared.structured_rows = state['parser'].parse_snapshot_rows(capture_type, prepared.content,
+                                                                           device_name, device_id)
+        except Exception as e:
+            logger.warning(f"  Could not parse {capture_type} rows for {device_name}: {e}")
+    return prepared
+
 
 class CaptureLoader:
     """Main loader class for processing network capture files"""
@@ -40,7 +206,7 @@ class CaptureLoader:
     ]
 
     # Capture types that get change tracking (all get stored as snapshots)
-    CHANGE_TRACKED_TYPES = {'configs', 'version', 'inventory'}
+    CHANGE_TRACKED_TYPES = CHANGE_TRACKED_TYPES
 
     def __init__(self, db_path: str, data_dir: Path, diff_subdir: str = 'diffs'):
         """
@@ -56,6 +222,15 @@ class CaptureLoader:
         self.diff_output_dir = self.data_dir / diff_subdir
         self.diff_output_dir.mkdir(parents=True, exist_ok=True)
         self.device_cache = {}  # Cache device IDs by normalized name
+        self.device_cache_complete = False  # True once every device has been preloaded
+
+        # Parses arp/mac/routes snapshots into the IP locator's structured tables
+        self.structured_index = IPLocatorService(db_path)
+
+        # Noise filtering, diff and severity for CHANGE_TRACKED_TYPES
+        self.change_detector = ChangeDetector(self.CHANGE_TRACKED_TYPES)
+
+        self._ensure_schema()
 
         logger.info(f"Data directory: {self.data_dir}")
         logger.info(f"Diff output directory: {self.diff_output_dir}")
@@ -67,11 +242,85 @@ class CaptureLoader:
         conn.row_factory = sqlite3.Row
         return conn
 
+    def get_batch_connection(self) -> sqlite3.Connection:
+        """
+        Long-lived connection for batched loading.
+
+        WAL lets the web UI keep reading while a batch is open, and the
+        connection runs in autocommit mode so the loader issues BEGIN/COMMIT
+        and per-file SAVEPOINTs itself.
+        """
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def preload_device_ids(self, conn: sqlite3.Connection) -> int:
+        """Cache every devices.normalized_name -> id so lookups never hit the database"""
+        cursor = conn.execute("SELECT normalized_name, id FROM devices WHERE normalized_name IS NOT NULL")
+        self.device_cache = {row['normalized_name']: row['id'] for row in cursor}
+        self.device_cache_complete = True
+        logger.info(f"Preloaded {len(self.device_cache)} device IDs")
+        return len(self.device_cache)
+
+    def _ensure_schema(self):
+        """Create the load manifest, snapshot pointer and line index on older databases"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(MANIFEST_SCHEMA)
+            CaptureStore.ensure_schema(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _manifest_key(file_path: Path) -> str:
+        return os.path.abspath(file_path)
+
+    def _load_manifest(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Manifest entries whose content is still stored, as path -> (size, mtime_ns).
+
+        Entries are only trusted while a snapshot with their hash exists, so
+        purging snapshots or deleting a device makes its files load again.
+        """
+        conn = self.get_db_connection()
+        try:
+            cursor = conn.execute("""
+                SELECT m.path, m.size, m.mtime_ns
+                FROM capture_load_manifest m
+                WHERE EXISTS (
+                    SELECT 1 FROM capture_snapshots cs
+                    WHERE cs.content_hash = m.content_hash
+                )
+            """)
+            return {row['path']: (row['size'], row['mtime_ns']) for row in cursor}
+        finally:
+            conn.close()
+
+    def _record_manifest(self, conn, file_path: Path, stat: os.stat_result, content_hash: str):
+        """Remember a loaded file; committed with the snapshot it produced"""
+        conn.execute("""
+            INSERT INTO capture_load_manifest (path, size, mtime_ns, content_hash, last_loaded_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                content_hash = excluded.content_hash,
+                last_loaded_at = excluded.last_loaded_at
+        """, (self._manifest_key(file_path), stat.st_size, stat.st_mtime_ns,
+              content_hash, datetime.now().isoformat()))
+
     def _update_current_capture(self, conn, device_id: int, capture_type: str,
-                                file_path: Path, file_size: int, capture_timestamp: datetime):
+                                file_path: Path, file_size: int, capture_timestamp: datetime,
+                                commit: bool = True):
         """
         Update device_captures_current table for dashboard visibility
         This method now takes a connection object instead of cursor for better transaction control
+        With commit=False the caller owns the transaction (batched loading)
         """
         cursor = conn.cursor()
         extraction_success = self.determine_extraction_success(file_path, capture_type)
@@ -111,102 +360,147 @@ class CaptureLoader:
                 logger.debug(f"  ✓ Inserted into device_captures_current: device_id={device_id}, type={capture_type}")
 
             # Commit immediately to ensure it's persisted
-            conn.commit()
+            if commit:
+                conn.commit()
 
         except Exception as e:
             logger.error(f"  ✗ Failed to update device_captures_current: {e}")
-            conn.rollback()
+            if commit:
+                conn.rollback()
             raise
 
     def load_capture_snapshot(self, file_path: Path, device_id: int, site_code: str,
-                              device_name: str, capture_type: str) -> bool:
+                              device_name: str, capture_type: str,
+                              conn: Optional[sqlite3.Connection] = None) -> bool:
         """
         Load capture as snapshot (always stores in DB)
         Only creates change records for CHANGE_TRACKED_TYPES
+
+        When conn is passed the caller owns the transaction: nothing is
+        committed, rolled back or closed here and errors are raised.
         """
-        conn = None
+        owns_conn = conn is None
         try:
-            # Read file content
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
-            content_hash = hashlib.sha256(content.encode()).hexdigest()
-            file_size, capture_timestamp = self.get_file_stats(file_path)
+            if owns_conn:
+                conn = self.get_db_connection()
+            prepared = prepare_capture(conn, self.change_detector, file_path, device_id,
+                                       device_name, capture_type)
+            self.write_capture(conn, prepared, commit=owns_conn)
+            if owns_conn:
+                conn.commit()
+            return True
 
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
+        except Exception as e:
+            logger.error(f"  Error loading snapshot {file_path}: {e}")
+            if not owns_conn:
+                raise
+            if conn:
+                conn.rollback()
+            return False
+        finally:
+            if owns_conn and conn:
+                conn.close()
 
-            # Get previous snapshot
-            cursor.execute("""
-                SELECT id, content, content_hash, file_path
-                FROM capture_snapshots 
-                WHERE device_id = ? AND capture_type = ?
-                ORDER BY captured_at DESC LIMIT 1
-            """, (device_id, capture_type))
+    def write_capture(self, conn: sqlite3.Connection, prepared: PreparedCapture, commit: bool = False):
+        """
+        Store a prepared capture: current capture, snapshot, change record,
+        structured rows and manifest. Only commits device_captures_current
+        early when commit=True; otherwise the caller owns the transaction.
+        """
+        p = prepared
+        device_id, capture_type, device_name = p.device_id, p.capture_type, p.device_name
+        capture_timestamp = datetime.fromtimestamp(p.stat.st_mtime)
+        cursor = conn.cursor()
+        store = CaptureStore(conn)
+
+        # ALWAYS update device_captures_current first (for dashboard)
+        self._update_current_capture(conn, device_id, capture_type,
+                                     p.file_path, p.stat.st_size, capture_timestamp,
+                                     commit=commit)
+
+        # Skip snapshot creation if unchanged
+        if p.unchanged:
+            logger.debug(f"  No change detected: {device_name} {capture_type} (current capture updated)")
+            # Backfill structured rows for snapshots stored before they existed
+            if (self.structured_index and capture_type in STRUCTURED_CAPTURE_TYPES and
+                    not self.structured_index.is_snapshot_indexed(conn, device_id, p.previous_id,
+                                                                  capture_type)):
+                self._index_structured(conn, device_id, p.previous_id, capture_type,
+                                       p.content, device_name)
+            # Same content as the stored snapshot, so index its lines if it predates the index
+            if store.line_count(p.previous_id) is None:
+                store.index_lines(p.previous_id, p.content)
+            store.set_latest(device_id, capture_type, p.previous_id)
+            self._record_manifest(conn, p.file_path, p.stat, p.content_hash)
+            return
 
-            previous = cursor.fetchone()
-            if previous:
-                logger.debug(f"  Found previous snapshot: {previous['file_path']}")
+        # Insert new snapshot (ALL types get stored)
+        cursor.execute("""
+            INSERT INTO capture_snapshots 
+            (device_id, capture_type, captured_at, file_path, file_size, content, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (device_id, capture_type, capture_timestamp.isoformat(),
+              str(p.file_path), p.stat.st_size, p.content, p.content_hash))
 
-            # ALWAYS update device_captures_current first (for dashboard)
-            self._update_current_capture(conn, device_id, capture_type,
-                                         file_path, file_size, capture_timestamp)
+        new_snapshot_id = cursor.lastrowid
+        logger.debug(f"  Created snapshot ID {new_snapshot_id}")
 
-            # Skip snapshot creation if unchanged
-            if previous and previous['content_hash'] == content_hash:
-                logger.debug(f"  No change detected: {device_name} {capture_type} (current capture updated)")
-                return True
+        store.index_lines(new_snapshot_id, p.content, p.line_offsets)
+        store.set_latest(device_id, capture_type, new_snapshot_id)
 
-            # Insert new snapshot (ALL types get stored)
-            cursor.execute("""
-                INSERT INTO capture_snapshots 
-                (device_id, capture_type, captured_at, file_path, file_size, content, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (device_id, capture_type, capture_timestamp.isoformat(),
-                  str(file_path), file_size, content, content_hash))
-
-            new_snapshot_id = cursor.lastrowid
-            logger.debug(f"  Created snapshot ID {new_snapshot_id}")
-
-            # Only create change records for tracked types
-            if capture_type in self.CHANGE_TRACKED_TYPES and previous:
-                diff_content = self.generate_diff(previous['content'], content, capture_type)
-
-                # Only create change record if diff is non-empty
-                if diff_content.strip():
-                    diff_path = self.save_diff_file(device_id, capture_type, capture_timestamp, diff_content)
-
-                    lines_added = diff_content.count('\n+')
-                    lines_removed = diff_content.count('\n-')
-                    severity = self.classify_severity(capture_type, diff_content)
-
-                    cursor.execute("""
-                        INSERT INTO capture_changes
-                        (device_id, capture_type, detected_at, previous_snapshot_id, 
-                         current_snapshot_id, lines_added, lines_removed, diff_path, severity)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (device_id, capture_type, datetime.now().isoformat(), previous['id'],
-                          new_snapshot_id, lines_added, lines_removed, diff_path, severity))
-
-                    logger.info(f"  CHANGE DETECTED: {device_name} {capture_type} "
-                                f"(+{lines_added}/-{lines_removed} lines, {severity})")
-                else:
-                    logger.debug(f"  No meaningful changes after normalization: {device_name} {capture_type}")
+        # Keep structured ARP/MAC/route rows in step with the latest snapshot
+        if self.structured_index and capture_type in STRUCTURED_CAPTURE_TYPES:
+            self._index_structured(conn, device_id, new_snapshot_id, capture_type,
+                                   p.content, device_name, p.structured_rows)
+
+        # Only create change records for tracked types
+        if p.change is not None:
+            # Only create change record if diff is non-empty
+            if p.change.changed:
+                diff_path = p.diff_path or self.save_diff_file(device_id, capture_type,
+                                                               capture_timestamp, p.change.diff)
+
+                lines_added = p.change.lines_added
+                lines_removed = p.change.lines_removed
+                severity = p.change.severity
+
+                cursor.execute("""
+                    INSERT INTO capture_changes
+                    (device_id, capture_type, detected_at, previous_snapshot_id, 
+                     current_snapshot_id, lines_added, lines_removed, diff_path, severity)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (device_id, capture_type, datetime.now().isoformat(), p.previous_id,
+                      new_snapshot_id, lines_added, lines_removed, diff_path, severity))
+
+                logger.info(f"  CHANGE DETECTED: {device_name} {capture_type} "
+                            f"(+{lines_added}/-{lines_removed} lines, {severity})")
             else:
-                if capture_type in self.CHANGE_TRACKED_TYPES:
-                    logger.info(f"  Initial snapshot: {device_name} {capture_type}")
-                else:
-                    logger.debug(f"  Stored snapshot (no change tracking): {device_name} {capture_type}")
+                logger.debug(f"  No meaningful changes after normalization: {device_name} {capture_type}")
+        else:
+            if capture_type in self.CHANGE_TRACKED_TYPES and p.previous_id is None:
+                logger.info(f"  Initial snapshot: {device_name} {capture_type}")
+            else:
+                logger.debug(f"  Stored snapshot (no change tracking): {device_name} {capture_type}")
 
-            conn.commit()
-            return True
+        # The superseded snapshot is history now; move it into capture_blobs
+        if p.previous_id is not None:
+            store.compress_snapshot(p.previous_id)
+
+        self._record_manifest(conn, p.file_path, p.stat, p.content_hash)
 
+    def _index_structured(self, conn, device_id: int, snapshot_id: int, capture_type: str,
+                          content: str, device_name: str, rows: List[tuple] = None):
+        """Parse a snapshot into the structured tables; failures never block the load"""
+        conn.execute("SAVEPOINT structured_index")
+        try:
+            rows = self.structured_index.index_snapshot(conn, device_id, snapshot_id, capture_type,
+                                                        content, device_name, rows)
+            logger.debug(f"  Indexed {rows} {capture_type} rows for {device_name}")
         except Exception as e:
-            logger.error(f"  Error loading snapshot {file_path}: {e}")
-            if conn:
-                conn.rollback()
-            return False
+            conn.execute("ROLLBACK TO structured_index")
+            logger.warning(f"  Could not index {capture_type} rows for {device_name}: {e}")
         finally:
-            if conn:
-                conn.close()
+            conn.execute("RELEASE structured_index")
 
     def extract_device_info_from_filename(self, file_path: Path) -> Optional[Tuple[str, str, str]]:
         """
@@ -270,6 +564,8 @@ class CaptureLoader:
         """Get device ID by normalized name (site_code parameter kept for compatibility but ignored)"""
         if device_name in self.device_cache:
             return self.device_cache[device_name]
+        if self.device_cache_complete:
+            return None
 
         cursor = conn.cursor()
 
@@ -322,137 +618,18 @@ class CaptureLoader:
         }
         return command_mapping.get(capture_type, f'show {capture_type}')
 
-    def normalize_config_for_diff(self, content: str, capture_type: str) -> str:
-        """Remove noise/dynamic content before generating diffs"""
-        if capture_type not in self.CHANGE_TRACKED_TYPES:
-            return content
-
-        # Generic noise patterns - timestamps and dynamic banners
-        noise_patterns = [
-            r'^Last login:.*$',
-            r'^! Last configuration change at.*$',
-            r'^Building configuration.*$',
-            r'^Current configuration : \d+ bytes$',
-            r'^! NVRAM config last updated.*$',
-            r'^\s*!\s*Time:.*$',
-            r'^.*ntp clock-period.*$',  # NTP drift compensation
-            r'^.*Your previous successful login.*$',
-            r'^.*was on \d{4}-\d{2}-\d{2}.*$',
-            r'^.*from \d+\.\d+\.\d+\.\d+.*$',
-        ]
-
-        lines = []
-        for line in content.splitlines():
-            # Skip lines matching noise patterns
-            if any(re.match(pattern, line.strip()) for pattern in noise_patterns):
-                continue
-            lines.append(line)
-
-        # Clean excessive whitespace
-        result = '\n'.join(lines)
-        result = re.sub(r'\n\s*\n\s*\n', '\n\n', result)
-        return result.strip()
-
-    def generate_diff(self, old_content: str, new_content: str, capture_type: str = 'configs') -> str:
-        """Generate unified diff between two text contents, filtering noise"""
-        # Normalize before diffing
-        old_normalized = self.normalize_config_for_diff(old_content, capture_type)
-        new_normalized = self.normalize_config_for_diff(new_content, capture_type)
-
-        old_lines = old_normalized.splitlines(keepends=True)
-        new_lines = new_normalized.splitlines(keepends=True)
-
-        diff = difflib.unified_diff(
-            old_lines,
-            new_lines,
-            fromfile='previous',
-            tofile='current',
-            lineterm=''
-        )
-
-        return ''.join(diff)
-
     def save_diff_file(self, device_id: int, capture_type: str, timestamp: datetime, diff_content: str) -> str:
-        """
-        Save diff to file and return RELATIVE path (relative to data_dir)
+        """Save diff under diff_output_dir and return its path relative to data_dir"""
+        return write_diff_file(self.data_dir, self.diff_output_dir, device_id, capture_type,
+                               timestamp, diff_content)
 
-        This ensures the path stored in DB can be resolved by the web UI
-        using: data_dir / diff_path
+    def load_capture_file(self, file_path: Path, conn: Optional[sqlite3.Connection] = None) -> bool:
         """
-        # Create directory structure: {data_dir}/diffs/device_id/capture_type/
-        device_dir = self.diff_output_dir / str(device_id) / capture_type
-        device_dir.mkdir(parents=True, exist_ok=True)
+        Load a single capture file into the database
 
-        # Filename with timestamp
-        filename = f"{timestamp.strftime('%Y%m%d_%H%M%S')}.diff"
-        diff_path = device_dir / filename
-
-        diff_path.write_text(diff_content)
-
-        # Return path RELATIVE to data_dir for DB storage
-        # This allows the web UI to resolve: data_dir / relative_path
-        try:
-            relative_path = diff_path.relative_to(self.data_dir)
-            logger.debug(f"  Diff saved: {diff_path} (stored as: {relative_path})")
-            return str(relative_path)
-        except ValueError:
-            # Fallback if somehow not relative to data_dir
-            logger.warning(f"  Diff path {diff_path} not relative to {self.data_dir}, storing absolute")
-            return str(diff_path)
-
-    def classify_severity(self, capture_type: str, diff_content: str) -> str:
-        """Classify change severity based on capture type and diff size"""
-        lines_added = diff_content.count('\n+')
-        lines_removed = diff_content.count('\n-')
-        total_changes = lines_added + lines_removed
-
-        # Critical: large config changes
-        if capture_type == 'configs' and total_changes > 50:
-            return 'critical'
-
-        # Version changes: check if it's just uptime/memory stats
-        if capture_type == 'version':
-            if self._is_uptime_only_change(diff_content):
-                return 'minor'
-            # Actual version/firmware changes are still critical
-            return 'critical'
-
-        # Moderate: any config change
-        if capture_type == 'configs' and total_changes > 0:
-            return 'moderate'
-
-        # Moderate: inventory changes (hardware swap)
-        if capture_type == 'inventory' and total_changes > 5:
-            return 'moderate'
-
-        return 'minor'
-
-    def _is_uptime_only_change(self, diff_content: str) -> bool:
-        """Check if version diff only contains uptime/memory/timestamp changes"""
-        significant_changes = []
-
-        for line in diff_content.splitlines():
-            # Skip diff metadata
-            if line.startswith(('---', '+++', '@@', ' ')):
-                continue
-
-            # Check for actual change lines
-            if line.startswith(('+', '-')):
-                # Ignore lines that are just dynamic stats
-                lower_line = line.lower()
-                if any(keyword in lower_line for keyword in
-                       ['uptime:', 'uptime ', 'free memory:', 'total memory:',
-                        'last reboot', 'system time:', 'current time:', 'processor load']):
-                    continue
-
-                # This is a significant change
-                significant_changes.append(line)
-
-        # If no significant changes found, it's uptime-only
-        return len(significant_changes) == 0
-
-    def load_capture_file(self, file_path: Path) -> bool:
-        """Load a single capture file into the database"""
+        With conn, the file is written inside the caller's open transaction
+        and a False return leaves partial writes for the caller to roll back.
+        """
         try:
             # Extract device and capture info from filename
             device_info = self.extract_device_info_from_filename(file_path)
@@ -463,9 +640,12 @@ class CaptureLoader:
             site_code, device_name, capture_type = device_info
 
             # Find device ID
-            conn = self.get_db_connection()
-            device_id = self.get_device_id_by_name(conn, device_name, site_code)
-            conn.close()
+            if conn is None:
+                lookup_conn = self.get_db_connection()
+                device_id = self.get_device_id_by_name(lookup_conn, device_name, site_code)
+                lookup_conn.close()
+            else:
+                device_id = self.get_device_id_by_name(conn, device_name, site_code)
 
             if not device_id:
                 logger.warning(f"Device not found for file: {file_path} "
@@ -476,7 +656,7 @@ class CaptureLoader:
 
             # ALL captures go through snapshot storage
             return self.load_capture_snapshot(file_path, device_id, site_code,
-                                              device_name, capture_type)
+                                              device_name, capture_type, conn=conn)
 
         except Exception as e:
             logger.error(f"Error loading {file_path}: {e}")
@@ -484,15 +664,36 @@ class CaptureLoader:
             logger.error(traceback.format_exc())
             return False
 
-    def load_captures_directory(self, captures_dir: Path, capture_types: List[str] = None) -> Dict[str, int]:
-        """Load capture files from directory structure"""
+    def load_captures_directory(self, captures_dir: Path, capture_types: List[str] = None,
+                                full: bool = False, batch_size: int = 0, workers: int = 0,
+                                parallel_diffs: bool = False, queue_size: int = 0) -> Dict[str, int]:
+        """
+        Load capture files from directory structure
+
+        Files whose size and mtime match the load manifest are skipped after a
+        stat(); full=True reloads everything regardless.
+
+        batch_size > 0 loads on a single WAL connection with the device map
+        preloaded, committing every batch_size files. Each file runs in its own
+        savepoint, so a bad file is rolled back without losing the batch.
+
+        workers > 0 pipelines the load: a process pool reads, hashes and diffs
+        files against read-only connections while one writer thread stores
+        the results in batches (batch_size, default 500). queue_size bounds
+        the files read ahead of the writer (default 4 per worker), and
+        parallel_diffs lets the workers write diff files themselves.
+        """
         results = {
             'success': 0,
             'failed': 0,
             'total': 0,
+            'skipped': 0,
+            'changed': 0,
+            'new': 0,
             'by_type': {},
             'changes_detected': 0,
-            'snapshots_created': 0
+            'snapshots_created': 0,
+            'metrics': {}
         }
 
         if not captures_dir.exists():
@@ -501,7 +702,7 @@ class CaptureLoader:
 
         types_to_process = capture_types or self.CAPTURE_TYPES
 
-        # Collect all files to process
+        # Collect all files to process as (capture_type, path)
         files_to_process = []
 
         for capture_type in types_to_process:
@@ -509,7 +710,7 @@ class CaptureLoader:
             if type_dir.exists() and type_dir.is_dir():
                 patterns = ['*.txt']
                 for pattern in patterns:
-                    files_to_process.extend(type_dir.glob(pattern))
+                    files_to_process.extend((capture_type, path) for path in type_dir.glob(pattern))
 
                 results['by_type'][capture_type] = 0
             else:
@@ -518,6 +719,10 @@ class CaptureLoader:
         results['total'] = len(files_to_process)
         logger.info(f"Found {results['total']} capture files to process")
 
+        manifest = self._load_manifest()
+        if full:
+            logger.info("Full load requested - ignoring load manifest")
+
         # Track changes before processing
         conn = self.get_db_connection()
         cursor = conn.cursor()
@@ -527,21 +732,35 @@ class CaptureLoader:
         snapshots_before = cursor.fetchone()[0]
         conn.close()
 
-        # Process files
-        for i, file_path in enumerate(files_to_process, 1):
-            if self.load_capture_file(file_path):
-                results['success'] += 1
-                device_info = self.extract_device_info_from_filename(file_path)
-                if device_info:
-                    capture_type = device_info[2]
-                    if capture_type in results['by_type']:
-                        results['by_type'][capture_type] += 1
+        # Files whose size and mtime still match the manifest are not opened
+        to_load = []
+        for capture_type, file_path in files_to_process:
+            known = manifest.get(self._manifest_key(file_path))
+            unchanged = False
+            if known is not None and not full:
+                try:
+                    stat = file_path.stat()
+                    unchanged = known == (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    pass
+            if unchanged:
+                results['skipped'] += 1
             else:
-                results['failed'] += 1
+                to_load.append((capture_type, file_path, known is not None))
+        if results['skipped']:
+            logger.info(f"Skipping {results['skipped']} files unchanged since the last load")
+
+        metrics = LoadMetrics()
+        if workers > 0 and to_load:
+            self._load_files_pipelined(to_load, results, metrics, workers, batch_size or 500,
+                                       parallel_diffs, queue_size or workers * 4)
+        else:
+            self._load_files_sequential(to_load, results, metrics, batch_size)
 
-            if i % 100 == 0 or i == results['total']:
-                logger.info(f"Processed {i}/{results['total']} files "
-                            f"({results['success']} success, {results['failed']} failed)")
+        metrics.finish()
+        results['metrics'] = metrics.as_dict()
+        logger.info(f"Loaded {metrics.files} files in {metrics.elapsed:.1f}s "
+                    f"({metrics.files_per_sec:.1f} files/sec)")
 
         # Count changes and snapshots
         conn = self.get_db_connection()
@@ -553,10 +772,198 @@ class CaptureLoader:
         cursor.execute("SELECT COUNT(*) FROM capture_snapshots")
         snapshots_after = cursor.fetchone()[0]
         results['snapshots_created'] = snapshots_after - snapshots_before
+
+        # Cached dashboard responses are keyed on the data version
+        if results['success']:
+            bump_data_version(conn, 'captures')
         conn.close()
 
         return results
 
+    def _record_result(self, results: Dict, capture_type: str, known: bool, loaded: bool):
+        if loaded:
+            results['changed' if known else 'new'] += 1
+            results['success'] += 1
+            results['by_type'][capture_type] += 1
+        else:
+            results['failed'] += 1
+
+        done = results['skipped'] + results['success'] + results['failed']
+        if done % 100 == 0 or done == results['total']:
+            logger.info(f"Processed {done}/{results['total']} files "
+                        f"({results['success']} success, {results['failed']} failed, "
+                        f"{results['skipped']} unchanged)")
+
+    def _load_files_sequential(self, to_load: List[Tuple[str, Path, bool]], results: Dict,
+                               metrics: LoadMetrics, batch_size: int):
+        batch_conn = None
+        pending = 0
+        if batch_size > 0:
+            batch_conn = self.get_batch_connection()
+            self.preload_device_ids(batch_conn)
+            logger.info(f"Batched loading: {batch_size} files per transaction")
+
+        try:
+            for capture_type, file_path, known in to_load:
+                if batch_conn is None:
+                    loaded = self.load_capture_file(file_path)
+                else:
+                    if pending == 0:
+                        batch_conn.execute("BEGIN")
+                    loaded = self._load_file_in_batch(batch_conn, file_path)
+                    pending += 1
+                    if pending >= batch_size:
+                        self._commit_batch(batch_conn, metrics)
+                        pending = 0
+
+                metrics.files += 1
+                self._record_result(results, capture_type, known, loaded)
+
+            if batch_conn is not None and pending:
+                self._commit_batch(batch_conn, metrics)
+                pending = 0
+        finally:
+            if batch_conn is not None:
+                if pending:
+                    batch_conn.execute("ROLLBACK")
+                batch_conn.close()
+
+    def _load_files_pipelined(self, to_load: List[Tuple[str, Path, bool]], results: Dict,
+                              metrics: LoadMetrics, workers: int, batch_size: int,
+                              parallel_diffs: bool, queue_size: int):
+        """
+        Read/diff in a process pool, write from one thread.
+
+        The main thread submits files in order and hands each future to a
+        bounded queue; the writer thread stores results in that order. A full
+        queue blocks submission, so at most queue_size files are held in
+        memory ahead of the writer. Diff files written by workers are kept
+        even if the writer later rolls the file back.
+        """
+        # Device ids are resolved up front; workers never look them up
+        conn = self.get_db_connection()
+        try:
+            self.preload_device_ids(conn)
+        finally:
+            conn.close()
+
+        logger.info(f"Pipelined loading: {workers} workers, {batch_size} files per transaction, "
+                    f"{queue_size} files queued ahead of the writer"
+                    f"{', diffs written by workers' if parallel_diffs else ''}")
+
+        handoff = queue.Queue(maxsize=queue_size)
+        writer_error = []
+        writer = threading.Thread(target=self._pipeline_writer, name='capture-writer',
+                                  args=(handoff, results, metrics, batch_size, writer_error))
+        writer.start()
+
+        try:
+            # spawn, not fork: forking while the writer thread holds locks can
+            # leave workers deadlocked
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_pipeline_worker,
+                                     initargs=(self.db_path, self.CHANGE_TRACKED_TYPES, self.data_dir,
+                                               self.diff_output_dir, parallel_diffs)) as pool:
+                for capture_type, file_path, known in to_load:
+                    if writer_error:
+                        break
+                    future = None
+                    device_info = self.extract_device_info_from_filename(file_path)
+                    if not device_info:
+                        logger.warning(f"Could not parse filename: {file_path}")
+                    else:
+                        site_code, device_name, _ = device_info
+                        device_id = self.get_device_id_by_name(None, device_name, site_code)
+                        if device_id:
+                            future = pool.submit(_prepare_in_worker, file_path, device_id,
+                                                 device_name, capture_type)
+                        else:
+                            logger.warning(f"Device not found for file: {file_path} "
+                                           f"(device: {device_name}, site: {site_code})")
+                    # None marks a file that failed before reaching a worker
+                    handoff.put((capture_type, file_path, known, future))
+        finally:
+            handoff.put(None)
+            writer.join()
+
+        if writer_error:
+            raise writer_error[0]
+
+    def _pipeline_writer(self, handoff: queue.Queue, results: Dict, metrics: LoadMetrics,
+                         batch_size: int, writer_error: List):
+        """Single writer: stores prepared captures in batches, one savepoint per file"""
+        conn = None
+        pending = 0
+        try:
+            conn = self.get_batch_connection()
+            while True:
+                item = handoff.get()
+                if item is None:
+                    break
+                capture_type, file_path, known, future = item
+
+                prepared = None
+                if future is not None:
+                    try:
+                        prepared = future.result()
+                    except Exception as e:
+                        logger.error(f"  Error reading {file_path}: {e}")
+
+                loaded = False
+                if prepared is not None:
+                    if pending == 0:
+                        conn.execute("BEGIN")
+                    pending += 1
+                    conn.execute("SAVEPOINT capture_file")
+                    try:
+                        self.write_capture(conn, prepared)
+                        loaded = True
+                    except Exception as e:
+                        logger.error(f"  Error loading snapshot {file_path}: {e}")
+                        conn.execute("ROLLBACK TO capture_file")
+                    finally:
+                        conn.execute("RELEASE capture_file")
+                    if pending >= batch_size:
+                        self._commit_batch(conn, metrics)
+                        pending = 0
+
+                metrics.files += 1
+                self._record_result(results, capture_type, known, loaded)
+
+            if pending:
+                self._commit_batch(conn, metrics)
+                pending = 0
+        except Exception as e:
+            logger.error(f"Capture writer stopped: {e}")
+            writer_error.append(e)
+            # Keep draining so the submitting thread never blocks on a full queue
+            while handoff.get() is not None:
+                pass
+        finally:
+            if conn is not None:
+                if pending:
+                    conn.execute("ROLLBACK")
+                conn.close()
+
+    def _load_file_in_batch(self, conn: sqlite3.Connection, file_path: Path) -> bool:
+        """Load one file inside the open batch, rolling back only its own writes on failure"""
+        conn.execute("SAVEPOINT capture_file")
+        loaded = False
+        try:
+            loaded = self.load_capture_file(file_path, conn)
+        finally:
+            if not loaded:
+                conn.execute("ROLLBACK TO capture_file")
+            conn.execute("RELEASE capture_file")
+        return loaded
+
+    def _commit_batch(self, conn: sqlite3.Connection, metrics: LoadMetrics):
+        started = time.perf_counter()
+        conn.execute("COMMIT")
+        elapsed = time.perf_counter() - started
+        metrics.record_commit(elapsed)
+        logger.debug(f"  Committed batch in {elapsed * 1000:.1f}ms")
+
     def get_recent_changes_summary(self, hours: int = 24) -> List[Dict]:
         """Get summary of recent changes"""
         cutoff = (datetime.now() - timedelta(hours=hours)).isoformat()
@@ -594,11 +1001,19 @@ class CaptureLoader:
               help='Subdirectory name for diffs within data-dir (default: diffs)')
 @click.option('--capture-types', help='Comma-separated list of capture types to process')
 @click.option('--single-file', help='Process a single capture file')
+@click.option('--full', is_flag=True, help='Reload every file, ignoring the load manifest')
+@click.option('--batch-size', default=0, type=int,
+              help='Files per transaction on one WAL connection (default: 0, one transaction per file)')
+@click.option('--workers', default=0, type=int,
+              help='Processes reading and diffing files ahead of a single writer (default: 0, sequential)')
+@click.option('--queue-size', default=0, type=int,
+              help='Files read ahead of the writer with --workers (default: 4 per worker)')
+@click.option('--parallel-diffs', is_flag=True, help='Let --workers write diff files themselves')
 @click.option('--show-changes', is_flag=True, help='Show recent changes after loading')
 @click.option('--changes-hours', default=24, help='Hours of change history to show (default: 24)')
 @click.option('--verbose', '-v', is_flag=True, help='Verbose logging')
 def main(data_dir, db_path, captures_dir, diff_subdir, capture_types, single_file,
-         show_changes, changes_hours, verbose):
+         full, batch_size, workers, queue_size, parallel_diffs, show_changes, changes_hours, verbose):
     """Load network capture files into the asset management database with change tracking"""
 
     if verbose:
@@ -630,6 +1045,7 @@ def main(data_dir, db_path, captures_dir, diff_subdir, capture_types, single_fil
         logger.info(f"Processing single file: {file_path}")
         success = loader.load_capture_file(file_path)
         if success:
+            bump_data_version(db_path, 'captures')
             logger.info("File processed successfully")
         else:
             logger.error("Failed to process file")
@@ -644,7 +1060,9 @@ def main(data_dir, db_path, captures_dir, diff_subdir, capture_types, single_fil
             types_list = [ct.strip() for ct in capture_types.split(',')]
             logger.info(f"Processing capture types: {types_list}")
 
-        results = loader.load_captures_directory(captures_path, types_list)
+        results = loader.load_captures_directory(captures_path, types_list, full=full,
+                                                 batch_size=batch_size, workers=workers,
+                                                 parallel_diffs=parallel_diffs, queue_size=queue_size)
 
         # Print summary to stdout (captured by subprocess)
         print("=" * 70)
@@ -655,8 +1073,18 @@ def main(data_dir, db_path, captures_dir, diff_subdir, capture_types, single_fil
         print(f"Failed: {results['failed']}")
         print(f"Snapshots created/updated: {results['snapshots_created']}")
         print(f"Changes detected: {results['changes_detected']}")
-        if results['total'] > 0:
-            print(f"Success rate: {results['success'] / results['total'] * 100:.1f}%")
+        print(f"Unchanged (skipped): {results['skipped']}")
+        print(f"Changed files: {results['changed']}")
+        print(f"New files: {results['new']}")
+        attempted = results['total'] - results['skipped']
+        if attempted > 0:
+            print(f"Success rate: {results['success'] / attempted * 100:.1f}%")
+        metrics = results['metrics']
+        if metrics:
+            print(f"Files/sec: {metrics['files_per_sec']}")
+            if metrics['commits']:
+                print(f"Commits: {metrics['commits']} (avg {metrics['avg_commit_ms']}ms, "
+                      f"max {metrics['max_commit_ms']}ms)")
 
         # Also log for file logs
         logger.info("=" * 70)
@@ -667,8 +1095,16 @@ def main(data_dir, db_path, captures_dir, diff_subdir, capture_types, single_fil
         logger.info(f"Failed: {results['failed']}")
         logger.info(f"Snapshots created/updated: {results['snapshots_created']}")
         logger.info(f"Changes detected: {results['changes_detected']}")
-        if results['total'] > 0:
-            logger.info(f"Success rate: {results['success'] / results['total'] * 100:.1f}%")
+        logger.info(f"Unchanged (skipped): {results['skipped']}")
+        logger.info(f"Changed files: {results['changed']}")
+        logger.info(f"New files: {results['new']}")
+        if attempted > 0:
+            logger.info(f"Success rate: {results['success'] / attempted * 100:.1f}%")
+        if metrics:
+            logger.info(f"Files/sec: {metrics['files_per_sec']}")
+            if metrics['commits']:
+                logger.info(f"Commits: {metrics['commits']} (avg {metrics['avg_commit_ms']}ms, "
+                            f"max {metrics['max_commit_ms']}ms)")
 
         logger.info("\nBy capture type:")
         for capture_type, count in sorted(results['by_type'].items()):
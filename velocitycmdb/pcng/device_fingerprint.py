@@ -747,6 +747,13 @@ class DeviceFingerprint:
                 self._ssh_client.disconnect()
                 self._is_connected = False
 
+    def abort(self):
+        """
+        Close the SSH session from another thread (deadline or cancel). A
+        fingerprint() in progress fails its next read and returns.
+        """
+        self._ssh_client.disconnect()
+
     def is_fingerprint_complete(self):
         # Remove this line: return True
 
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Device Session Collection
+One SSH session per device for every requested capture type
+
+The job-per-capture-type pipeline logs in to a device once per capture
+type. A DeviceSession logs in once: session setup commands (enable, paging
+off) run a single time, then each capture type's commands run in turn on the
+same shell and their output is written to capture/<output_dir>/<device>.txt,
+the layout db_load_capture.py reads.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from velocitycmdb.pcng.ssh_client import SSHClient, SSHClientOptions
+
+# Platforms the capture job files exist for
+PLATFORMS = ('arista', 'cisco-ios', 'cisco-nxos', 'juniper')
+
+# Command prefixes that change session state rather than capture output
+SETUP_COMMAND_PREFIXES = ('enable', 'terminal ', 'term ', 'set cli ', 'screen-length ', 'no page')
+
+
+def device_platform(device: Dict) -> Optional[str]:
+    """
+    Job platform for a sessions.yaml device entry
+
+    Returns:
+        One of PLATFORMS, or None when the vendor has no capture jobs
+    """
+    vendor = (device.get('Vendor') or device.get('vendor') or '').lower()
+    if 'arista' in vendor:
+        return 'arista'
+    if 'juniper' in vendor:
+        return 'juniper'
+    if 'cisco' in vendor:
+        details = ' '.join(str(device.get(key) or '') for key in
+                           ('DeviceType', 'device_type', 'Model', 'SoftwareVersion')).lower()
+        if 'nx-os' in details or 'nxos' in details or 'nexus' in details or 'n9k' in details:
+            return 'cisco-nxos'
+        return 'cisco-ios'
+    return None
+
+
+def split_commands(command_text: str) -> List[str]:
+    """Job command_text ('enable,terminal length 0,show run') as a list"""
+    return [command.strip() for command in command_text.split(',') if command.strip()]
+
+
+def is_setup_command(command: str) -> bool:
+    return command.lower().startswith(SETUP_COMMAND_PREFIXES)
+
+
+def output_echoes(output: str, command: str) -> bool:
+    """
+    Whether a command group's output starts with the echo of its first command
+
+    The terminal may wrap a long echo, so the first line only has to hold
+    the start of the command.
+    """
+    for line in output.replace('\r', '\n').split('\n'):
+        line = ' '.join(line.split())
+        if line:
+            command = ' '.join(command.split())
+            return command in line or (len(line) >= 10 and command.startswith(line))
+    return False
+
+
+@dataclass
+class CaptureCommand:
+    """Commands producing one capture type's output file"""
+    capture_type: str
+    output_dir: str
+    commands: List[str]
+
+
+@dataclass
+class SessionPlan:
+    """What to run on every device of one platform"""
+    platform: str
+    setup: List[str] = field(default_factory=list)
+    captures: List[CaptureCommand] = field(default_factory=list)
+
+    def add_capture(self, capture_type: str, output_dir: str, command_text: str):
+        """
+        Add a capture type from its job command_text. Leading setup commands
+        join the session setup (once per device); the rest is the capture.
+        """
+        commands = split_commands(command_text)
+        while commands and is_setup_command(commands[0]):
+            if commands[0] not in self.setup:
+                self.setup.append(commands[0])
+            commands.pop(0)
+        if commands:
+            self.captures.append(CaptureCommand(capture_type, output_dir, commands))
+
+    def to_dict(self) -> Dict:
+        return {
+            'platform': self.platform,
+            'setup': self.setup,
+            'captures': [capture.__dict__ for capture in self.captures],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SessionPlan':
+        return cls(data['platform'], list(data.get('setup', [])),
+                   [CaptureCommand(**capture) for capture in data.get('captures', [])])
+
+
+def save_session_plans(plans: Dict[str, SessionPlan], path: Path):
+    with open(path, 'w') as f:
+        json.dump({platform: plan.to_dict() for platform, plan in plans.items()}, f, indent=2)
+
+
+def load_session_plans(path: Path) -> Dict[str, SessionPlan]:
+    with open(path) as f:
+        return {platform: SessionPlan.from_dict(data) for platform, data in json.load(f).items()}
+
+
+@dataclass
+class CaptureResult:
+    capture_type: str
+    success: bool
+    output_file: Optional[str] = None
+    duration: float = 0.0
+    error: Optional[str] = None
+    # Per-command latency reported by SSHClient ({'command', 'latency_ms'})
+    command_timings: List[Dict] = field(default_factory=list)
+
+
+@dataclass
+class SessionResult:
+    device_name: str
+    host: str
+    success: bool
+    captures: List[CaptureResult] = field(default_factory=list)
+    connect_time: float = 0.0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        if self.error:
+            return self.error
+        failed = [capture.capture_type for capture in self.captures if not capture.success]
+        if failed:
+            return f"Failed captures: {', '.join(failed)}"
+        return f"Completed successfully ({len(self.captures)} captures, one session)"
+
+
+class DeviceSession:
+    """Runs a SessionPlan on one device over a single SSH login"""
+
+    def __init__(self, device: Dict, plan: SessionPlan, capture_dir: Path,
+                 username: str, password: str = None, key_file: str = None,
+                 timeout: int = 30, expect_prompt_timeout: int = 30000,
+                 inter_command_time: float = 0, log_dir: Path = None):
+        self.device = device
+        self.plan = plan
+        self.capture_dir = Path(capture_dir)
+        self.device_name = (device.get('hostname') or device.get('display_name') or
+                            device.get('name') or 'unknown')
+        self.host = device.get('ip_address') or device.get('host') or device.get('ip') or ''
+        self.port = int(device.get('port') or 22)
+
+        log_file = None
+        if log_dir:
+            log_file = str(Path(log_dir) / f"{self.host.replace(':', '_').replace('/', '_')}.log")
+
+        self.options = SSHClientOptions(
+            host=self.host,
+            port=self.port,
+            username=username,
+            password=password,
+            key_file=key_file,
+            timeout=timeout,
+            expect_prompt_timeout=expect_prompt_timeout,
+            inter_command_time=inter_command_time,
+            log_file=log_file,
+        )
+        # Output goes to the capture files, not the screen
+        self.options.output_callback = lambda text: None
+
+    def run(self, on_capture: Callable[[CaptureResult], None] = None) -> SessionResult:
+        """
+        Connect, run setup once, then every capture in plan order.
+
+        A capture that fails on a live session does not stop the others; a
+        dropped connection fails the remaining captures.
+        """
+        started = time.time()
+        result = SessionResult(self.device_name, self.host, success=False)
+        client = SSHClient(self.options)
+
+        try:
+            client.connect()
+            result.connect_time = time.time() - started
+
+            prompt = client.find_prompt()
+            if self.plan.setup:
+                # enable turns 'sw1>' into 'sw1#', so count the bare name here
+                client.set_expect_prompt(prompt.rstrip('#>$%') or prompt)
+                # One prompt per command; no trailing ',' (SSHClient sends an
+                # empty command as two newlines, i.e. two extra prompts)
+                output = client.execute_command(','.join(self.plan.setup),
+                                                prompt_count=len(self.plan.setup))
+                prompt = client.prompt_from_output(output) or prompt
+            client.set_expect_prompt(prompt)
+
+            for capture in self.plan.captures:
+                capture_result = self._run_capture(client, capture)
+                result.captures.append(capture_result)
+                if on_capture:
+                    on_capture(capture_result)
+
+            result.success = all(capture.success for capture in result.captures)
+        except Exception as e:
+            result.error = str(e) or e.__class__.__name__
+            done = {capture.capture_type for capture in result.captures}
+            result.captures.extend(CaptureResult(capture.capture_type, False, error=result.error)
+                                   for capture in self.plan.captures if capture.capture_type not in done)
+        finally:
+            client.disconnect()
+            result.duration = time.time() - started
+
+        return result
+
+    def _run_capture(self, client: SSHClient, capture: CaptureCommand) -> CaptureResult:
+        started = time.time()
+        # Stray output already buffered from the previous group must not open
+        # this capture; prompt counts are exact, so there is nothing to wait for
+        client.drain_output()
+        # Each command ends at exactly one prompt
+        output = client.execute_command(','.join(capture.commands),
+                                        prompt_count=len(capture.commands))
+
+        timings = list(client.last_command_timings)
+
+        if not output.strip():
+            return CaptureResult(capture.capture_type, False, duration=time.time() - started,
+                                 error='No output', command_timings=timings)
+
+        if not output_echoes(output, capture.commands[0]):
+            # Output is out of step with the commands; writing it would file
+            # another capture's output under this capture type
+            return CaptureResult(capture.capture_type, False, duration=time.time() - started,
+                                 error=f"Output does not start with '{capture.commands[0]}'",
+                                 command_timings=timings)
+
+        output_file = self.capture_dir / capture.output_dir / f"{self.device_name}.txt"
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        output_file.write_text(output.replace('\r\n', '\n').replace('\r', '\n'), encoding='utf-8')
+
+        return CaptureResult(capture.capture_type, True, str(output_file), time.time() - started,
+                             command_timings=timings)
+
+
+def session_credentials(device: Dict) -> Dict[str, Optional[str]]:
+    """
+    Credentials for a device from CRED_<credsid>_USER/PASS (falling back
+    to CRED_1_*) and PYSSH_KEY, as the job runners resolve them
+    """
+    cred_id = str(device.get('credsid') or '1')
+    return {
+        'username': os.getenv(f'CRED_{cred_id}_USER') or os.getenv('CRED_1_USER') or os.getenv('SSH_USER', ''),
+        'password': (os.getenv(f'CRED_{cred_id}_PASS') or os.getenv('CRED_1_PASS') or
+                     os.getenv('SSH_PASSWORD') or None),
+        'key_file': os.getenv('PYSSH_KEY') or None,
+    }
@@ -6,6 +6,8 @@ import sqlite3
 import sys
 from pathlib import Path
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 if len(sys.argv) < 2:
     print("Usage: python diagnose_database.py assets.db")
     sys.exit(1)
@@ -68,11 +70,9 @@ if lldp_count == 0:
 print(f"\n2. Checking LLDP content quality...")
 cursor.execute("""
     SELECT 
+        cs.id as snapshot_id,
         d.name as device_name,
-        cs.capture_type,
-        LENGTH(cs.content) as content_length,
-        SUBSTR(cs.content, 1, 300) as content_preview,
-        cs.content as full_content
+        cs.capture_type
     FROM capture_snapshots cs
     JOIN devices d ON cs.device_id = d.id
     WHERE cs.capture_type = 'lldp-detail'
@@ -80,11 +80,14 @@ cursor.execute("""
     LIMIT 3
 """)
 
+store = CaptureStore(conn)
 for idx, row in enumerate(cursor.fetchall(), 1):
+    # Older snapshots may be compressed; CaptureStore returns their text
+    content = store.content(row['snapshot_id']) or ''
     print(f"\n   Sample {idx}: {row['device_name']}")
-    print(f"   Content length: {row['content_length']} bytes")
+    print(f"   Content length: {len(content)} bytes")
 
-    content_preview = row['content_preview']
+    content_preview = content[:300]
 
     # Check for common error patterns
     has_error = False
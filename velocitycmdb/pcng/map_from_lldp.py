@@ -21,6 +21,8 @@ from typing import Dict, Optional, List, Set
 import unicodedata
 import argparse
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 # Import your tfsm_fire library
 try:
     from tfsm_fire import TextFSMAutoEngine
@@ -298,13 +300,12 @@ class LLDPTopologyBuilder:
 
         self._log(f"Loaded metadata for {len(self.device_info)} devices")
 
-    def get_lldp_snapshots(self) -> List[sqlite3.Row]:
+    def get_lldp_snapshots(self) -> List[Dict]:
         """Retrieve all LLDP detail snapshots"""
         query = """
             SELECT 
                 cs.id as snapshot_id,
                 cs.device_id,
-                cs.content,
                 d.name as device_name,
                 v.name as vendor_name
             FROM capture_snapshots cs
@@ -316,7 +317,13 @@ class LLDPTopologyBuilder:
 
         cursor = self.conn.cursor()
         cursor.execute(query)
-        return cursor.fetchall()
+        snapshots = [dict(row) for row in cursor.fetchall()]
+
+        # Text through CaptureStore, which decompresses history snapshots
+        texts = CaptureStore(self.conn).contents(s['snapshot_id'] for s in snapshots)
+        for snapshot in snapshots:
+            snapshot['content'] = texts.get(snapshot['snapshot_id'])
+        return snapshots
 
     def parse_lldp_content(self, content: str) -> Optional[List[Dict]]:
         """Parse LLDP content using tfsm_fire"""
@@ -23,6 +23,8 @@ from collections import deque
 import unicodedata
 import argparse
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 # Import your tfsm_fire library
 try:
     from tfsm_fire import TextFSMAutoEngine
@@ -328,24 +330,18 @@ class LLDPTopologyMapper:
         if device_id in self.lldp_cache:
             return self.lldp_cache[device_id]
 
-        query = """
-            SELECT content
-            FROM capture_snapshots
-            WHERE device_id = ? AND capture_type = 'lldp-detail'
-            ORDER BY captured_at DESC
-            LIMIT 1
-        """
-
-        cursor = self.conn.cursor()
-        cursor.execute(query, (device_id,))
-        row = cursor.fetchone()
+        # Latest snapshot through the loader-maintained pointer; CaptureStore
+        # decompresses it if the pointer fell back to a compressed snapshot
+        store = CaptureStore(self.conn)
+        snapshot_id = store.latest_snapshot_id(device_id, 'lldp-detail')
+        content = store.content(snapshot_id) if snapshot_id is not None else None
 
-        if not row or not row['content']:
+        if not content:
             self.lldp_cache[device_id] = None
             return None
 
         # Parse LLDP content
-        parsed = self.parse_lldp_content(row['content'])
+        parsed = self.parse_lldp_content(content)
         self.lldp_cache[device_id] = parsed
         return parsed
 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Device Session Runner
+Collects every requested capture type from each device over ONE SSH session
+
+Replaces the job-per-capture-type fan-out of run_jobs_batch.py (one spn.py
+login per device per capture type) for collection runs. Emits the same JSON
+progress lines (device_start, device_complete, summary) so
+CollectionOrchestrator can stream either runner. The devices themselves are
+run by collection_engine.CollectionEngine, which the orchestrator also
+drives in-process.
+"""
+
+import argparse
+import json
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+from velocitycmdb.pcng.collection_engine import CollectionEngine, load_session_devices
+from velocitycmdb.pcng.collection_scheduler import CollectionScheduler, LatencyHistory
+from velocitycmdb.pcng.device_session import load_session_plans
+
+
+class ProgressEmitter:
+    """JSON progress lines on the real stdout; SSHClient chatter goes to stderr"""
+
+    def __init__(self, json_mode: bool, stream=None):
+        self.json_mode = json_mode
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()
+
+    def on_event(self, event: Dict):
+        """CollectionEngine event callback"""
+        fields = {key: value for key, value in event.items() if key not in ('type', 'timestamp')}
+        self.emit(event['type'], **fields)
+
+    def emit(self, message_type: str, **kwargs):
+        if self.json_mode:
+            line = json.dumps({"type": message_type, "timestamp": datetime.now().isoformat(), **kwargs})
+        else:
+            details = ' '.join(f"{key}={value}" for key, value in kwargs.items())
+            line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message_type} {details}"
+        with self.lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Collect all capture types per device over a single SSH session",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Credentials come from CRED_<credsid>_USER / CRED_<credsid>_PASS (or PYSSH_KEY).
+
+Examples:
+  python -m velocitycmdb.pcng.run_device_sessions sessions.yaml --plan session_plan.json --output-base capture
+        """
+    )
+    parser.add_argument('session_file', help='sessions.yaml with the devices to collect')
+    parser.add_argument('--plan', required=True,
+                        help='Session plan JSON (platform -> setup and capture commands)')
+    parser.add_argument('--output-base', default='capture',
+                        help='Base capture directory; files go to <base>/<type>/<device>.txt')
+    parser.add_argument('--max-workers', '-w', type=int, default=12,
+                        help='Global cap on concurrent SSH sessions (default: 12)')
+    parser.add_argument('--site-limit', type=int, default=None,
+                        help='Concurrent SSH sessions per site (default: no per-site limit)')
+    parser.add_argument('--timeout', type=int, default=30, help='SSH connect timeout in seconds')
+    parser.add_argument('--expect-prompt-timeout', type=int, default=60000,
+                        help='Per-capture prompt timeout in milliseconds (default: 60000)')
+    parser.add_argument('--inter-command-time', type=float, default=0,
+                        help='Delay between commands within a capture in seconds (default: 0)')
+    parser.add_argument('--log-dir', default='logs', help='Per-device SSH log directory')
+    parser.add_argument('--history-db',
+                        help='assets.db with device latency history (longest-first order, p95 timeouts)')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='End-of-run retry rounds for transient failures (default: 0)')
+    parser.add_argument('--json-progress', action='store_true', help='Output progress as JSON lines')
+    args = parser.parse_args()
+
+    progress = ProgressEmitter(args.json_progress, sys.stdout)
+    # SSHClient prints as it works; keep that off the progress stream
+    sys.stdout = sys.stderr
+
+    plans = load_session_plans(Path(args.plan))
+    devices = load_session_devices(args.session_file)
+    if not devices:
+        progress.emit("summary", total_jobs=0, successful_jobs=0, failed_jobs=0, total_time=0)
+        print(f"No devices in {args.session_file}")
+        return 1
+
+    engine = CollectionEngine(plans, Path(args.output_base),
+                              max_connections=args.max_workers,
+                              site_limit=args.site_limit,
+                              timeout=args.timeout,
+                              expect_prompt_timeout=args.expect_prompt_timeout,
+                              inter_command_time=args.inter_command_time,
+                              log_dir=Path(args.log_dir),
+                              scheduler=CollectionScheduler(
+                                  LatencyHistory(args.history_db) if args.history_db else None,
+                                  'session',
+                                  default_expect_prompt_timeout=args.expect_prompt_timeout,
+                                  max_retries=args.retries))
+    summary = engine.run(devices, on_event=progress.on_event)
+    return 0 if summary['failed_jobs'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,11 @@ from typing import Dict, List, Any, Optional
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    from velocitycmdb.pcng.collection_scheduler import CollectionScheduler, LatencyHistory
+except ImportError:
+    from collection_scheduler import CollectionScheduler, LatencyHistory
+
 
 class ProgressTracker:
     """Tracks job execution progress and calculates ETAs (thread-safe)"""
@@ -201,8 +206,23 @@ class JobExecutor:
 
         return env_vars
 
-    def execute_job(self, job_config: Dict[str, Any], job_name: str) -> Dict[str, Any]:
-        """Execute a single job configuration with CONCURRENT device execution"""
+    @staticmethod
+    def device_hostname(device: Dict[str, Any]) -> str:
+        return (device.get('hostname') or device.get('display_name') or
+                device.get('name') or 'unknown')
+
+    def execute_job(self, job_config: Dict[str, Any], job_name: str,
+                    scheduler: Optional[CollectionScheduler] = None,
+                    only_devices: Optional[set] = None, attempt: int = 1) -> Dict[str, Any]:
+        """
+        Execute a single job configuration with CONCURRENT device execution
+
+        Args:
+            scheduler: Orders devices longest-expected-first, sets per-device
+                timeouts from latency history and records this run
+            only_devices: Hostnames to run (retry rounds); None runs all
+            attempt: Attempt number passed to the scheduler (1 = first run)
+        """
         start_time = time.time()
 
         try:
@@ -265,8 +285,18 @@ class JobExecutor:
             if not session_data:
                 raise ValueError("No devices found in session file matching filters")
 
+            if only_devices is not None:
+                session_data = [device for device in session_data
+                                if self.device_hostname(device) in only_devices]
+
             self.log(f"Loaded {len(session_data)} devices from session")
 
+            if scheduler:
+                session_data = scheduler.order(session_data, key=self.device_hostname)
+                self.log(f"Device order (longest expected first): "
+                         f"{', '.join(self.device_hostname(device) for device in session_data[:10])}"
+                         f"{' ...' if len(session_data) > 10 else ''}", "DEBUG")
+
             # Get credential environment variables
             cred_env_vars = self.get_credential_env_vars(job_config)
 
@@ -285,9 +315,14 @@ class JobExecutor:
                         commands=commands_str,
                         output_file=output_file,
                         prompt_count=prompt_count,
-                        timeout=timeout,
-                        expect_prompt_timeout=expect_prompt_timeout,
-                        cred_env_vars=cred_env_vars
+                        timeout=(scheduler.timeout_for(self.device_hostname(device), attempt)
+                                 if scheduler else timeout),
+                        expect_prompt_timeout=(
+                            scheduler.expect_prompt_timeout_for(self.device_hostname(device), attempt)
+                            if scheduler else expect_prompt_timeout),
+                        cred_env_vars=cred_env_vars,
+                        scheduler=scheduler,
+                        attempt=attempt
                     ): device
                     for device in session_data
                 }
@@ -295,8 +330,7 @@ class JobExecutor:
                 # Collect results as they complete
                 for future in as_completed(futures):
                     device = futures[future]
-                    hostname = (device.get('hostname') or device.get('display_name') or
-                                device.get('name') or 'unknown')
+                    hostname = self.device_hostname(device)
                     try:
                         device_result = future.result()
                         device_results.append(device_result)
@@ -433,12 +467,14 @@ class JobExecutor:
 
     def _execute_on_device(self, device: Dict[str, Any], commands: str, output_file: str,
                            prompt_count: int, timeout: int, expect_prompt_timeout: int,
-                           cred_env_vars: Dict[str, str]) -> Dict[str, Any]:
+                           cred_env_vars: Dict[str, str],
+                           scheduler: Optional[CollectionScheduler] = None,
+                           attempt: int = 1) -> Dict[str, Any]:
         """Execute commands on a single device"""
-        hostname = (device.get('hostname') or device.get('display_name') or
-                    device.get('name') or 'unknown')
+        hostname = self.device_hostname(device)
         ip_address = (device.get('ip_address') or device.get('host') or
                       device.get('ip') or '')
+        device_start = time.time()
 
         try:
             # Emit device start event
@@ -459,9 +495,13 @@ class JobExecutor:
                 '--host', ip_address,
                 '-c', commands,
                 '--prompt-count', str(prompt_count),
-                '--timeout', str(timeout),
+                '--timeout', str(int(timeout)),
             ]
 
+            if scheduler:
+                # Adaptive prompt wait; without a scheduler spn.py keeps its default
+                cmd_parts.extend(['--expect-prompt-timeout', str(int(expect_prompt_timeout))])
+
             if 'CRED_1_USER' in cred_env_vars:
                 cmd_parts.extend(['-u', cred_env_vars['CRED_1_USER']])
 
@@ -493,6 +533,9 @@ class JobExecutor:
             )
 
             success = result.returncode == 0
+            message = "Completed successfully" if success else (result.stderr or result.stdout or "Failed")
+            if scheduler:
+                scheduler.record(hostname, device_start, time.time(), success, message, attempt=attempt)
 
             if result.stderr:
                 self.log(f"  STDERR: {result.stderr}", "DEBUG")
@@ -508,7 +551,7 @@ class JobExecutor:
                     "device_name": hostname,
                     "ip_address": ip_address,
                     "success": success,
-                    "message": "Completed successfully" if success else (result.stderr or result.stdout or "Failed")
+                    "message": message
                 }
                 with self.log_lock:
                     print(json.dumps(device_complete_msg), flush=True)
@@ -525,10 +568,14 @@ class JobExecutor:
                 'ip_address': ip_address,
                 'stdout': result.stdout,
                 'stderr': result.stderr,
-                'returncode': result.returncode
+                'returncode': result.returncode,
+                'message': message
             }
 
         except Exception as e:
+            if scheduler:
+                scheduler.record(hostname, device_start, time.time(), False, str(e), attempt=attempt)
+
             # Emit device failure event
             if self.json_mode:
                 device_complete_msg = {
@@ -566,9 +613,22 @@ class JobBatchRunner:
 
     def run_batch(self, job_list_file: str, continue_on_error: bool = True,
                   max_retries: int = 0, jobs_folder: Optional[str] = None,
-                  max_workers: int = 5) -> Dict[str, Any]:
-        """Run a batch of jobs from a job list file with concurrent execution"""
+                  max_workers: int = 5, history_db: Optional[str] = None,
+                  device_retries: int = 0, retry_backoff: float = 5.0) -> Dict[str, Any]:
+        """
+        Run a batch of jobs from a job list file with concurrent execution
+
+        Args:
+            max_retries: Whole-job retries when any device fails
+            history_db: assets.db holding device latency history; enables
+                longest-first ordering and per-device timeouts from p95
+            device_retries: End-of-run retry rounds for devices that failed
+                with a transient error (timeout, reset), with backoff
+            retry_backoff: Seconds before the first retry round (doubles)
+        """
         start_time = time.time()
+        history = LatencyHistory(history_db) if history_db else None
+        schedulers = {}
 
         # Load job files
         job_files = self._load_job_list(job_list_file, jobs_folder)
@@ -613,13 +673,20 @@ class JobBatchRunner:
                     failed_jobs += 1
                 return None
 
+            scheduler = None
+            if history or device_retries:
+                scheduler = self._job_scheduler(job_config, job_name, history, device_retries, retry_backoff)
+                scheduler.load(started=start_time)
+                with results_lock:
+                    schedulers[job_name] = (scheduler, job_config)
+
             # Execute job with retries
             job_result = None
             for attempt in range(max_retries + 1):
                 if attempt > 0:
                     self.log(f"Retry attempt {attempt}/{max_retries} for {job_name}")
 
-                job_result = self.executor.execute_job(job_config, job_name)
+                job_result = self.executor.execute_job(job_config, job_name, scheduler)
 
                 if job_result['success']:
                     break
@@ -669,6 +736,17 @@ class JobBatchRunner:
                     with results_lock:
                         failed_jobs += 1
 
+        # Retry transient device failures now that every slot is free
+        if device_retries and schedulers:
+            successful_jobs, failed_jobs = self._retry_transient_devices(
+                results, schedulers, device_retries, successful_jobs, failed_jobs)
+
+        critical_path = None
+        if schedulers:
+            for scheduler, _ in schedulers.values():
+                scheduler.flush()
+            critical_path = self._critical_path(schedulers)
+
         # Generate summary
         total_time = time.time() - start_time
 
@@ -680,6 +758,11 @@ class JobBatchRunner:
         self.log(f"Failed: {failed_jobs}")
         self.log(f"Total execution time: {total_time:.1f}s")
         self.log(f"Average time per job: {total_time / len(job_files):.1f}s")
+        if critical_path and critical_path['devices']:
+            self.log(f"Critical path ({critical_path['job']}, {critical_path['makespan']:.1f}s, "
+                     f"lane busy {critical_path['busy']:.1f}s): " +
+                     " -> ".join(f"{run['device']} {run['duration']:.1f}s"
+                                 for run in critical_path['devices']))
 
         # Emit final summary in JSON mode
         if self.json_mode:
@@ -689,6 +772,7 @@ class JobBatchRunner:
                 "successful_jobs": successful_jobs,
                 "failed_jobs": failed_jobs,
                 "total_time": total_time,
+                "critical_path": critical_path,
                 "timestamp": datetime.now().isoformat()
             }
             print(json.dumps(summary), flush=True)
@@ -699,9 +783,86 @@ class JobBatchRunner:
             'successful_jobs': successful_jobs,
             'failed_jobs': failed_jobs,
             'total_time': total_time,
+            'critical_path': critical_path,
             'job_results': results
         }
 
+    @staticmethod
+    def _job_scheduler(job_config: Dict[str, Any], job_name: str, history: Optional[LatencyHistory],
+                       device_retries: int, retry_backoff: float) -> CollectionScheduler:
+        """Scheduler keyed by the job's capture type (its output directory)"""
+        execution_config = job_config.get('execution', {})
+        output_directory = job_config.get('commands', {}).get('output_directory', '')
+        capture_type = os.path.basename(os.path.normpath(output_directory)) if output_directory else job_name
+        return CollectionScheduler(
+            history,
+            capture_type,
+            default_timeout=execution_config.get('timeout', 60),
+            default_expect_prompt_timeout=execution_config.get('expect_prompt_timeout', 30000),
+            max_retries=device_retries,
+            retry_backoff=retry_backoff
+        )
+
+    def _retry_transient_devices(self, results: List[Dict[str, Any]], schedulers: Dict[str, Any],
+                                 device_retries: int, successful_jobs: int, failed_jobs: int):
+        """Re-run devices that failed transiently, merging outcomes into the job results"""
+        by_job = {result.get('job_name'): result for result in results if result.get('device_results')}
+
+        for attempt in range(2, device_retries + 2):
+            pending = {}
+            for job_name, job_result in by_job.items():
+                scheduler = schedulers.get(job_name, (None, None))[0]
+                if not scheduler:
+                    continue
+                retry = {r.get('hostname') or r.get('device') for r in job_result['device_results']
+                         if not r.get('success') and
+                         scheduler.is_transient(r.get('message') or r.get('error'))}
+                if retry:
+                    pending[job_name] = retry
+
+            if not pending:
+                break
+
+            scheduler = schedulers[next(iter(pending))][0]
+            delay = scheduler.retry_delay(attempt)
+            self.log(f"Retry round {attempt - 1}/{device_retries}: "
+                     f"{sum(len(names) for names in pending.values())} devices in {delay:.0f}s")
+            time.sleep(delay)
+
+            for job_name, hostnames in pending.items():
+                scheduler, job_config = schedulers[job_name]
+                retry_result = self.executor.execute_job(job_config, job_name, scheduler,
+                                                         only_devices=hostnames, attempt=attempt)
+                job_result = by_job[job_name]
+                was_success = job_result['success']
+
+                retried = {r.get('hostname') or r.get('device'): r
+                           for r in retry_result.get('device_results', [])}
+                job_result['device_results'] = [retried.get(r.get('hostname') or r.get('device'), r)
+                                                for r in job_result['device_results']]
+                job_result['successful_devices'] = sum(1 for r in job_result['device_results']
+                                                       if r.get('success'))
+                job_result['failed_devices'] = (len(job_result['device_results']) -
+                                                job_result['successful_devices'])
+                job_result['success'] = job_result['failed_devices'] == 0
+
+                if job_result['success'] and not was_success:
+                    successful_jobs += 1
+                    failed_jobs -= 1
+                    self.log(f"{job_name} recovered after retry")
+
+        return successful_jobs, failed_jobs
+
+    @staticmethod
+    def _critical_path(schedulers: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Critical path of the job whose last device finished last"""
+        paths = []
+        for job_name, (scheduler, _) in schedulers.items():
+            path = scheduler.critical_path()
+            if path['devices']:
+                paths.append({'job': job_name, **path})
+        return max(paths, key=lambda path: path['makespan']) if paths else None
+
     def _load_job_list(self, job_list_file: str, jobs_folder: Optional[str]) -> List[str]:
         """Load job file list from file"""
         job_files = []
@@ -783,6 +944,25 @@ def main():
         help='Maximum number of concurrent workers (default: 5)'
     )
 
+    parser.add_argument(
+        '--history-db',
+        help='assets.db with device latency history (longest-first order, p95 timeouts)'
+    )
+
+    parser.add_argument(
+        '--device-retries',
+        type=int,
+        default=0,
+        help='End-of-run retry rounds for transient device failures (default: 0)'
+    )
+
+    parser.add_argument(
+        '--retry-backoff',
+        type=float,
+        default=5.0,
+        help='Seconds before the first device retry round, doubling each round (default: 5)'
+    )
+
     args = parser.parse_args()
 
     # Validate arguments
@@ -799,7 +979,10 @@ def main():
             continue_on_error=not args.stop_on_error,
             max_retries=args.retries,
             jobs_folder=args.jobs_folder,
-            max_workers=args.max_workers
+            max_workers=args.max_workers,
+            history_db=args.history_db,
+            device_retries=args.device_retries,
+            retry_backoff=args.retry_backoff
         )
 
         return 0 if result['success'] else 1
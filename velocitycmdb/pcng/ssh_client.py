@@ -9,6 +9,7 @@ import time
 import re
 import logging
 import os
+import select
 import paramiko
 from io import StringIO
 from datetime import datetime
@@ -33,6 +34,45 @@ def filter_ansi_sequences(text):
     return re.sub(ansi_pattern, '', text)
 
 
+class PromptMatcher:
+    """
+    Streaming prompt counter
+
+    Counts occurrences of the expect prompt as output arrives, scanning only
+    the new chunk plus a prompt-length overlap with the previous one, so a
+    prompt split across two recv() calls is still found and large outputs
+    are not rescanned. Counts match str.count() over the whole stream.
+    """
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.count = 0
+        self._tail = ""
+        # Characters at the start of _tail already inside a counted match
+        self._consumed = 0
+
+    def feed(self, text):
+        """Add output; returns the number of prompts it completed"""
+        if not self.prompt or not text:
+            return 0
+
+        window = self._tail + text
+        found = 0
+        end = 0
+        position = window.find(self.prompt, self._consumed)
+        while position != -1:
+            found += 1
+            end = position + len(self.prompt)
+            position = window.find(self.prompt, end)
+
+        keep = min(len(self.prompt) - 1, len(window))
+        tail_start = len(window) - keep
+        self._tail = window[tail_start:] if keep else ""
+        self._consumed = max(0, end - tail_start) if found else max(0, self._consumed - (len(window) - keep))
+        self.count += found
+        return found
+
+
 class SSHClientOptions:
     """SSH Client Options - Password Authentication Only, Invoke Shell Only"""
 
@@ -240,6 +280,9 @@ class SSHClient:
         self._prompt_detected = False
         self._pkey = None  # Will hold loaded paramiko key object
 
+        # Per-command timings of the last execute_command call
+        self.last_command_timings = []
+
         # Validate required options
         if not options.host:
             raise ValueError("Host is required")
@@ -350,8 +393,12 @@ class SSHClient:
                          f"Make sure it's a valid RSA, ECDSA, or Ed25519 key. "
                          f"Last error: {str(last_exception)}")
 
-    def _recv_filtered(self, size=4096):
-        """Receive data from shell with ANSI filtering applied immediately"""
+    def _recv_filtered(self, size=4096, raise_errors=False):
+        """
+        Receive data from shell with ANSI filtering applied immediately
+
+        Read errors are logged and return "" unless raise_errors is set.
+        """
         if not self._shell or not self._shell.recv_ready():
             return ""
 
@@ -365,9 +412,60 @@ class SSHClient:
 
             return filtered_data
         except Exception as e:
+            if raise_errors:
+                raise
             self._log_with_timestamp(f"Error reading from shell: {str(e)}")
             return ""
 
+    def _wait_readable(self, timeout):
+        """
+        Block until the shell has data (or is closed) for up to timeout seconds
+
+        Uses select() on the channel instead of a sleep loop, so output is
+        picked up as soon as it arrives and an idle wait costs no CPU.
+        """
+        if not self._shell:
+            return False
+        if self._shell.recv_ready() or self._shell.closed:
+            return True
+        try:
+            readable, _, _ = select.select([self._shell], [], [], max(0.0, timeout))
+            return bool(readable)
+        except (OSError, ValueError, TypeError):
+            # Channel without a usable fileno: fall back to a short sleep
+            time.sleep(min(0.01, max(0.0, timeout)))
+            return self._shell.recv_ready()
+
+    def drain_output(self, quiet_time=0.0, max_time=10.0):
+        """
+        Read and discard output until the shell has been silent for quiet_time
+        seconds (or max_time has passed)
+
+        Run before a command group that shares the shell with earlier ones, so
+        late output from those (an extra prompt, a trailing banner) is not read
+        as the start of the next group's output. The default quiet_time of 0
+        discards only what is already buffered and never waits.
+
+        Returns:
+            str: The discarded output
+        """
+        if not self._shell:
+            return ""
+
+        drained = StringIO()
+        deadline = time.time() + max_time
+        while time.time() < deadline:
+            if not self._wait_readable(min(quiet_time, deadline - time.time())):
+                break
+            if not self._shell.recv_ready():
+                break
+            drained.write(self._recv_filtered(65536))
+
+        text = drained.getvalue()
+        if text:
+            self._log_with_timestamp("Drained {} characters of pending output".format(len(text)))
+        return text
+
     def _log_with_timestamp(self, message, always_print=False):
         """Helper method to log with timestamp"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
@@ -409,7 +507,7 @@ class SSHClient:
                     buffer += filtered_data
                     self._output_buffer.write(filtered_data)
             else:
-                time.sleep(0.1)
+                self._wait_readable(min(0.1, max(0.0, start_time + 3 - time.time())))
 
         # Extract prompt from filtered buffer
         prompt = self._extract_clean_prompt(buffer)
@@ -438,7 +536,7 @@ class SSHClient:
                         if prompt:
                             self._log_with_timestamp(f"Detected prompt: '{prompt}'", True)
                             return prompt
-                    time.sleep(0.1)
+                    self._wait_readable(min(0.1, max(0.0, start_time + timeout - time.time())))
 
             if buffer:
                 prompt = self._extract_clean_prompt(buffer)
@@ -450,6 +548,15 @@ class SSHClient:
         self._log_with_timestamp("Could not detect prompt, using default '#'")
         return '#'
 
+    def prompt_from_output(self, output):
+        """
+        Prompt the device is showing at the end of command output
+
+        Reads the last prompt-like line instead of sending a newline, so it is
+        free to call after commands that change the prompt (e.g. enable).
+        """
+        return self._extract_clean_prompt(filter_ansi_sequences(output))
+
     def _extract_clean_prompt(self, buffer):
         """
         Extract a clean prompt from buffer, handling cases where the prompt is repeated.
@@ -564,8 +671,16 @@ class SSHClient:
                 self._output_buffer.write(filtered_data)
                 self._options.output_callback(filtered_data)
 
-    def execute_command(self, command):
-        """Execute command on the remote device - INVOKE_SHELL ONLY"""
+    def execute_command(self, command, prompt_count=None):
+        """
+        Execute command on the remote device - INVOKE_SHELL ONLY
+
+        Args:
+            command (str): Comma-separated commands
+            prompt_count (int): Prompts to wait for on this call only (default:
+                options.prompt_count). Lets one session run several command
+                groups that each expect a different number of prompts.
+        """
         if not self._ssh_client or not self._ssh_client.get_transport() or not self._ssh_client.get_transport().is_active():
             raise RuntimeError("SSH client is not connected")
 
@@ -579,7 +694,13 @@ class SSHClient:
 
         # ALWAYS use shell mode
         commands = command.split(',')
-        result = self._execute_shell_commands(commands)
+        default_prompt_count = self._options.prompt_count
+        if prompt_count is not None:
+            self._options.prompt_count = prompt_count
+        try:
+            result = self._execute_shell_commands(commands)
+        finally:
+            self._options.prompt_count = default_prompt_count
 
         # Wait between commands if specified
         if self._options.inter_command_time > 0:
@@ -667,6 +788,7 @@ class SSHClient:
         # Clear buffer and reset prompt detection flag
         self._output_buffer = StringIO()
         self._prompt_detected = False
+        self.last_command_timings = []
 
         try:
             # Only process commands if there are meaningful commands to send
@@ -696,44 +818,60 @@ class SSHClient:
                 # PROMPT COUNTING WITH ANSI FILTERING
                 if self._options.expect_prompt:
                     expected_prompts = self._options.prompt_count
+                    matcher = PromptMatcher(self._options.expect_prompt)
                     found_prompts = 0
-                    accumulated_buffer = ""
 
                     self._log_with_timestamp("Monitoring for EXACTLY {} occurrences of: '{}'".format(
                         expected_prompts, self._options.expect_prompt))
 
                     timeout_ms = self._options.expect_prompt_timeout
                     timeout_time = time.time() + timeout_ms / 1000
+                    sent_time = time.time()
+                    prompt_times = []
+
+                    while found_prompts < expected_prompts:
+                        remaining = timeout_time - time.time()
+                        if remaining <= 0:
+                            break
+                        if not self._wait_readable(remaining):
+                            continue
+                        if not self._shell.recv_ready() and (self._shell.closed or self._shell.eof_received):
+                            self._log_with_timestamp("Channel closed while waiting for prompts", True)
+                            break
+
+                        try:
+                            # Use the filtered receive method; a failed read ends the wait
+                            filtered_data = self._recv_filtered(65536, raise_errors=True)
+                            if filtered_data:
+                                self._output_buffer.write(filtered_data)
+                                self._options.output_callback(filtered_data)
+
+                                # Count prompts in the new data only
+                                new_prompts = matcher.feed(filtered_data)
+                                if new_prompts:
+                                    now = time.time()
+                                    prompt_times.extend([now] * new_prompts)
+                                    found_prompts = matcher.count
+                                    self._log_with_timestamp(
+                                        "PROMPT DETECTED: {}/{}".format(found_prompts, expected_prompts))
 
-                    while found_prompts < expected_prompts and time.time() < timeout_time:
-                        if self._shell.recv_ready():
-                            try:
-                                # Use the filtered receive method
-                                filtered_data = self._recv_filtered()
-                                if filtered_data:
-                                    accumulated_buffer += filtered_data
-                                    self._output_buffer.write(filtered_data)
-                                    self._options.output_callback(filtered_data)
-
-                                    # Count prompts in filtered buffer
-                                    current_count = accumulated_buffer.count(self._options.expect_prompt)
-
-                                    if current_count > found_prompts:
-                                        found_prompts = current_count
+                                    if found_prompts >= expected_prompts:
                                         self._log_with_timestamp(
-                                            "PROMPT DETECTED: {}/{}".format(found_prompts, expected_prompts))
-
-                                        if found_prompts >= expected_prompts:
-                                            self._log_with_timestamp(
-                                                "TARGET REACHED: {} prompts detected. STOPPING NOW.".format(
-                                                    found_prompts))
-                                            break
-
-                            except Exception as e:
-                                self._log_with_timestamp("Error reading output: {}".format(str(e)))
-                                continue
-                        else:
-                            time.sleep(0.01)
+                                            "TARGET REACHED: {} prompts detected. STOPPING NOW.".format(
+                                                found_prompts))
+                                        break
+
+                        except Exception as e:
+                            # Retrying a broken channel would spin until the deadline
+                            state = "closed" if self._shell.closed or self._shell.eof_received else "open"
+                            self._log_with_timestamp(
+                                "Error reading output (channel {}): {}".format(state, str(e)), True)
+                            break
+
+                    self.last_command_timings = self._command_timings(commands, sent_time, prompt_times)
+                    for timing in self.last_command_timings:
+                        self._log_with_timestamp("Command latency: '{}' {:.1f}ms".format(
+                            timing['command'], timing['latency_ms']))
 
                     # Final status
                     if found_prompts >= expected_prompts:
@@ -772,6 +910,25 @@ class SSHClient:
 
         return self._output_buffer.getvalue()
 
+    @staticmethod
+    def _command_timings(commands, sent_time, prompt_times):
+        """
+        Latency per command from prompt arrival times
+
+        Commands are sent back to back, so command i is done when prompt i
+        arrives; its latency is the gap since the previous prompt (or since
+        the commands were sent, for the first).
+        """
+        timings = []
+        previous = sent_time
+        for command, prompt_time in zip(commands, prompt_times):
+            timings.append({
+                'command': command.strip() or '<newline>',
+                'latency_ms': (prompt_time - previous) * 1000,
+            })
+            previous = prompt_time
+        return timings
+
     def set_expect_prompt(self, prompt_string):
         """Set the expected prompt string"""
         if prompt_string:
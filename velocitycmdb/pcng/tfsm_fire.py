@@ -2,7 +2,11 @@ import sqlite3
 import textfsm
 from typing import Dict, List, Tuple, Optional
 import io
+import os
+import re
 import time
+import hashlib
+from collections import OrderedDict
 import click
 from multiprocessing import Process, Queue
 import multiprocessing
@@ -43,16 +47,284 @@ class ThreadSafeConnection:
             delattr(self._local, 'connection')
 
 
+_SIGNATURE_DIGITS = re.compile(r'\d+')
+
+
+def output_signature(device_output: str, header_lines: int = 2) -> str:
+    """
+    Structural fingerprint of command output for the winning-template cache.
+
+    Uses the first few non-blank lines (usually table headers or banners)
+    with digits masked and whitespace collapsed, so the same command from the
+    same platform maps to the same signature regardless of the data rows.
+    """
+    header = []
+    for line in device_output.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        header.append(' '.join(_SIGNATURE_DIGITS.sub('#', line).split()))
+        if len(header) >= header_lines:
+            break
+    return hashlib.sha1('\n'.join(header).encode('utf-8', errors='ignore')).hexdigest()
+
+
+class _CompiledTemplate:
+    """A compiled TextFSM template plus the lock that serializes its use"""
+
+    __slots__ = ('fsm', 'error', 'lock')
+
+    def __init__(self, fsm: Optional[textfsm.TextFSM], error: Optional[str] = None):
+        self.fsm = fsm
+        self.error = error
+        self.lock = threading.Lock()
+
+
+class TemplateRegistry:
+    """
+    Process-wide, in-memory view of a tfsm_templates.db file.
+
+    The templates table is read once per process (and again only when the
+    DB file changes on disk). Compiled TextFSM objects are cached keyed by
+    (template id, content hash), and filter strings are resolved against an
+    in-memory term index with the same semantics as the old LIKE queries.
+    """
+
+    _registries: Dict[str, 'TemplateRegistry'] = {}
+    _registries_lock = threading.Lock()
+
+    WINNER_CACHE_SIZE = 4096
+
+    @classmethod
+    def for_path(cls, db_path: str) -> 'TemplateRegistry':
+        """Return the shared registry for db_path, creating it on first use"""
+        key = os.path.abspath(db_path)
+        with cls._registries_lock:
+            registry = cls._registries.get(key)
+            if registry is None:
+                registry = cls(key)
+                cls._registries[key] = registry
+            return registry
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._signature = None
+        self._templates: List[Dict] = []
+        self._commands: List[str] = []
+        self._term_index: Dict[str, frozenset] = {}
+        self._filter_cache: Dict[Optional[str], List[Dict]] = {}
+        self._compiled: Dict[Tuple[int, str], _CompiledTemplate] = {}
+        # cache key -> {'template': template row, 'score': score it won with}
+        self._winners: 'OrderedDict[Tuple, Dict]' = OrderedDict()
+        self.stats = {
+            'loads': 0, 'compiles': 0, 'compile_hits': 0,
+            'winner_hits': 0, 'winner_misses': 0, 'winner_rejects': 0,
+        }
+
+    def _file_signature(self) -> Tuple:
+        """Cheap change detector for the DB file (and its WAL, if any)"""
+        signature = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _ensure_loaded(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature != self._signature:
+                self._load(signature)
+
+    def _load(self, signature: Tuple):
+        """(Re)read the templates table and drop stale compiled entries"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM templates").fetchall()
+        finally:
+            conn.close()
+
+        templates = []
+        for row in rows:
+            template = dict(row)
+            content = template.get('textfsm_content') or ''
+            template['content_hash'] = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            templates.append(template)
+
+        live_keys = {(t.get('id'), t['content_hash']) for t in templates}
+        self._compiled = {k: v for k, v in self._compiled.items() if k in live_keys}
+        self._templates = templates
+        self._commands = [(t.get('cli_command') or '').lower() for t in templates]
+        self._term_index = {}
+        self._filter_cache = {}
+        self._winners.clear()
+        self._signature = signature
+        self.stats['loads'] += 1
+
+    @staticmethod
+    def filter_terms(filter_string: Optional[str]) -> List[str]:
+        """Split a filter string into the terms used for matching cli_command"""
+        if not filter_string:
+            return []
+        terms = filter_string.replace('-', '_').split('_')
+        return [term.lower() for term in terms if term and len(term) > 2]
+
+    def _positions_for_term(self, term: str) -> frozenset:
+        positions = self._term_index.get(term)
+        if positions is None:
+            positions = frozenset(i for i, cmd in enumerate(self._commands) if term in cmd)
+            self._term_index[term] = positions
+        return positions
+
+    def get_templates(self, filter_string: Optional[str] = None) -> List[Dict]:
+        """
+        Return templates whose cli_command contains every filter term.
+
+        Matches the old ``cli_command LIKE '%term%'`` behaviour (case-insensitive
+        substring, terms of 3+ characters) and preserves table order.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            cached = self._filter_cache.get(filter_string)
+            if cached is not None:
+                return cached
+
+            terms = self.filter_terms(filter_string)
+            if terms:
+                positions = None
+                for term in terms:
+                    term_positions = self._positions_for_term(term)
+                    positions = term_positions if positions is None else positions & term_positions
+                    if not positions:
+                        break
+                result = [self._templates[i] for i in sorted(positions)]
+            else:
+                result = list(self._templates)
+
+            self._filter_cache[filter_string] = result
+            return result
+
+    def _get_compiled(self, template: Dict) -> _CompiledTemplate:
+        key = (template.get('id'), template['content_hash'])
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            self.stats['compile_hits'] += 1
+            return compiled
+
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                try:
+                    fsm = textfsm.TextFSM(io.StringIO(template['textfsm_content']))
+                    compiled = _CompiledTemplate(fsm)
+                except Exception as e:
+                    compiled = _CompiledTemplate(None, str(e))
+                self._compiled[key] = compiled
+                self.stats['compiles'] += 1
+            return compiled
+
+    def parse(self, template: Dict, device_output: str) -> List[Dict]:
+        """Parse device_output with a cached compiled template"""
+        compiled = self._get_compiled(template)
+        if compiled.fsm is None:
+            raise ValueError(f"Template failed to compile: {compiled.error}")
+
+        # TextFSM objects carry parse state, so each one is used by one thread at a time
+        with compiled.lock:
+            compiled.fsm.Reset()
+            parsed = compiled.fsm.ParseText(device_output)
+            header = compiled.fsm.header
+            return [dict(zip(header, row)) for row in parsed]
+
+    def get_winner(self, key: Tuple) -> Optional[Dict]:
+        """Return {'template', 'score'} of the last winner for this cache key, if any"""
+        self._ensure_loaded()
+        with self._lock:
+            winner = self._winners.get(key)
+            if winner is not None:
+                self._winners.move_to_end(key)
+            return winner
+
+    def remember_winner(self, key: Tuple, template: Dict, score: float):
+        """Record the winning template and its score for a cache key (LRU bounded)"""
+        with self._lock:
+            self._winners[key] = {'template': template, 'score': score}
+            self._winners.move_to_end(key)
+            while len(self._winners) > self.WINNER_CACHE_SIZE:
+                self._winners.popitem(last=False)
+
+    def forget_winner(self, key: Tuple):
+        with self._lock:
+            self._winners.pop(key, None)
+
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def warm(self, filter_string: Optional[str] = None) -> int:
+        """Compile every template matching filter_string ahead of time"""
+        templates = self.get_templates(filter_string)
+        for template in templates:
+            self._get_compiled(template)
+        return len(templates)
+
+
 class TextFSMAutoEngine:
-    def __init__(self, db_path: str, verbose: bool = False):
+    # A cached winner is accepted without the exhaustive search when it scores
+    # at least this fraction of the score it won with. Scores run 0-30 and one
+    # parsed record already earns 10, so a fixed floor would accept templates
+    # that only partly parse the output.
+    WINNER_SCORE_RATIO = 0.9
+
+    def __init__(self, db_path: str, verbose: bool = False, use_winner_cache: bool = True):
         self.db_path = db_path
         self.verbose = verbose
+        self.use_winner_cache = use_winner_cache
         self.connection_manager = ThreadSafeConnection(db_path, verbose)
+        self.registry = TemplateRegistry.for_path(db_path)
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Template compile and winning-template cache counters for this DB"""
+        stats = dict(self.registry.stats)
+        lookups = stats['winner_hits'] + stats['winner_misses'] + stats['winner_rejects']
+        stats['winner_hit_rate'] = (stats['winner_hits'] / lookups) if lookups else 0.0
+        return stats
+
+    def _try_cached_winner(self, cache_key: Tuple, device_output: str) -> Optional[Tuple[str, List[Dict], float]]:
+        """Parse with the remembered winner; None means fall back to the full search"""
+        winner = self.registry.get_winner(cache_key)
+        if winner is None:
+            self.registry.count('winner_misses')
+            return None
+        template = winner['template']
+
+        try:
+            parsed_dicts = self.registry.parse(template, device_output)
+            score = self._calculate_template_score(parsed_dicts, template, device_output)
+        except Exception:
+            score = 0.0
+
+        if score > 0 and score >= winner['score'] * self.WINNER_SCORE_RATIO:
+            self.registry.count('winner_hits')
+            if self.verbose:
+                click.echo(f"Cached winner {template['cli_command']} accepted "
+                           f"(score={score:.2f}, won with {winner['score']:.2f})")
+            return template['cli_command'], parsed_dicts, score
+
+        self.registry.count('winner_rejects')
+        self.registry.forget_winner(cache_key)
+        return None
 
     def _calculate_template_score(
             self,
             parsed_data: List[Dict],
-            template: sqlite3.Row,
+            template: Dict,
             raw_output: str
     ) -> float:
         # Previous scoring logic remains the same
@@ -71,49 +343,66 @@ class TextFSMAutoEngine:
         # Rest of your scoring logic remains unchanged...
         return score
 
-    def find_best_template(self, device_output: str, filter_string: Optional[str] = None) -> Tuple[
+    def find_best_template(self, device_output: str, filter_string: Optional[str] = None,
+                           platform: Optional[str] = None) -> Tuple[
         Optional[str], Optional[List[Dict]], float]:
 
 
-        """Try filtered templates against the output and return the best match."""
+        """
+        Try filtered templates against the output and return the best match.
+
+        The template that won last time for the same filter, platform and
+        output signature is tried first; the exhaustive search only runs when
+        there is no cached winner or it scores well below the score it won with
+        (WINNER_SCORE_RATIO).
+        """
+        cache_key = None
+        if self.use_winner_cache:
+            cache_key = (filter_string, (platform or '').lower(), output_signature(device_output))
+            cached = self._try_cached_winner(cache_key, device_output)
+            if cached is not None:
+                return cached
+
         best_template = None
+        best_template_row = None
         best_parsed_output = None
         best_score = 0
 
-        # Get filtered templates using thread-safe connection
-        with self.connection_manager.get_connection() as conn:
-            templates = self.get_filtered_templates(conn, filter_string)
-            total_templates = len(templates)
+        # Filtered templates come from the process-wide registry (no DB round trip)
+        templates = self.registry.get_templates(filter_string)
+        total_templates = len(templates)
 
+        if self.verbose:
+            click.echo(f"Found {total_templates} matching templates for filter: {filter_string}")
+
+        # Try each template
+        for idx, template in enumerate(templates, 1):
             if self.verbose:
-                click.echo(f"Found {total_templates} matching templates for filter: {filter_string}")
+                percentage = (idx / total_templates) * 100
+                click.echo(f"\nTemplate {idx}/{total_templates} ({percentage:.1f}%): {template['cli_command']}")
 
-            # Try each template
-            for idx, template in enumerate(templates, 1):
-                if self.verbose:
-                    percentage = (idx / total_templates) * 100
-                    click.echo(f"\nTemplate {idx}/{total_templates} ({percentage:.1f}%): {template['cli_command']}")
+            try:
+                parsed_dicts = self.registry.parse(template, device_output)
+                score = self._calculate_template_score(parsed_dicts, template, device_output)
 
-                try:
-                    textfsm_template = textfsm.TextFSM(io.StringIO(template['textfsm_content']))
-                    parsed = textfsm_template.ParseText(device_output)
-                    parsed_dicts = [dict(zip(textfsm_template.header, row)) for row in parsed]
-                    score = self._calculate_template_score(parsed_dicts, template, device_output)
+                if self.verbose:
+                    click.echo(f" -> Score={score:.2f}, Records={len(parsed_dicts)}")
 
+                if score > best_score:
+                    best_score = score
+                    best_template = template['cli_command']
+                    best_template_row = template
+                    best_parsed_output = parsed_dicts
                     if self.verbose:
-                        click.echo(f" -> Score={score:.2f}, Records={len(parsed_dicts)}")
+                        click.echo(click.style("  New best match!", fg='green'))
 
-                    if score > best_score:
-                        best_score = score
-                        best_template = template['cli_command']
-                        best_parsed_output = parsed_dicts
-                        if self.verbose:
-                            click.echo(click.style("  New best match!", fg='green'))
+            except Exception as e:
+                if self.verbose:
+                    click.echo(f" -> Failed to parse: {str(e)}")
+                continue
 
-                except Exception as e:
-                    if self.verbose:
-                        click.echo(f" -> Failed to parse: {str(e)}")
-                    continue
+        if cache_key is not None and best_template_row is not None and best_score > 0:
+            self.registry.remember_winner(cache_key, best_template_row, best_score)
 
         return best_template, best_parsed_output, best_score
 
@@ -15,6 +15,8 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 from datetime import datetime
 
+from velocitycmdb.services.capture_store import CaptureStore
+
 # Import your tfsm_fire library
 try:
     from tfsm_fire import TextFSMAutoEngine
@@ -65,7 +67,7 @@ class LLDPParsingValidator:
 
         print(f"{prefix} {message}", flush=True)
 
-    def get_lldp_snapshots(self, vendor_filter: str = None) -> List[sqlite3.Row]:
+    def get_lldp_snapshots(self, vendor_filter: str = None) -> List[Dict]:
         """
         Retrieve LLDP detail snapshots from database
 
@@ -81,7 +83,6 @@ class LLDPParsingValidator:
                 cs.device_id,
                 cs.capture_type,
                 cs.captured_at,
-                cs.content,
                 cs.content_hash,
                 d.name as device_name,
                 d.normalized_name,
@@ -103,9 +104,15 @@ class LLDPParsingValidator:
 
         cursor = self.assets_conn.cursor()
         cursor.execute(query, params)
-        return cursor.fetchall()
+        snapshots = [dict(row) for row in cursor.fetchall()]
+
+        # Text through CaptureStore, which decompresses history snapshots
+        texts = CaptureStore(self.assets_conn).contents(s['snapshot_id'] for s in snapshots)
+        for snapshot in snapshots:
+            snapshot['content'] = texts.get(snapshot['snapshot_id'])
+        return snapshots
 
-    def validate_snapshot(self, snapshot: sqlite3.Row) -> Dict:
+    def validate_snapshot(self, snapshot: Dict) -> Dict:
         """
         Validate parsing for a single LLDP detail snapshot
 
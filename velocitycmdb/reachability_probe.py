@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Reachability Probe Engine
+
+Shared asyncio engine behind the map monitors' device checks. Every device's
+TCP connects run concurrently on one event loop instead of a thread pool per
+device, so a monitoring cycle takes about one connect timeout no matter how
+many nodes the maps hold:
+
+- thousands of non-blocking TCP connects in flight, bounded by a global
+  concurrency cap (kept under the process file descriptor limit, which a
+  monitor raises once at startup with raise_fd_limit()),
+- optional rate limiting of connection attempts per second,
+- a per-cycle result cache keyed by IP, so a device drawn on several maps is
+  probed once and concurrent requests for the same IP share one probe,
+- ICMP fallback over an unprivileged ICMP socket where the OS allows it
+  (Linux ping_group_range, macOS), otherwise the system ping command run as
+  an async subprocess.
+
+Results have the same shape as svg_monitor.test_multiple_ports:
+(is_up, open_ports), with ['icmp'] when only ping answered.
+
+Usage:
+    raise_fd_limit(ReachabilityProber.concurrency_from_config(config))  # startup
+    prober = ReachabilityProber.from_config(config)
+    results = prober.probe_many(['10.0.0.1', '10.0.0.2'])
+    is_up, open_ports = prober.probe('10.0.0.1')   # cached
+    prober.new_cycle()                              # next cycle probes again
+    prober.close()
+"""
+
+import asyncio
+import itertools
+import os
+import platform
+import socket
+import struct
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+ProbeResult = Tuple[bool, List[Union[int, str]]]
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+# File descriptors left for everything that is not a probe socket
+FD_RESERVE = 64
+
+_icmp_sequence = itertools.count(1)
+
+
+def raise_fd_limit(wanted: int) -> int:
+    """
+    Raise the soft open-file limit so `wanted` probe sockets fit (up to the
+    hard limit). The limit is process-wide: call this from a monitor's
+    startup, not from library code running inside another application.
+
+    Returns:
+        Number of sockets the engine may keep open at once
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows: no RLIMIT_NOFILE, the proactor loop has no select() cap
+        return wanted
+
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        needed = wanted + FD_RESERVE
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+    except (ValueError, OSError):
+        pass
+    return _socket_budget(wanted)
+
+
+def _socket_budget(wanted: int) -> int:
+    """`wanted` capped to what the current open-file limit leaves for probe sockets"""
+    try:
+        import resource
+    except ImportError:
+        return wanted
+
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ValueError, OSError):
+        soft = 1024
+    if soft == resource.RLIM_INFINITY:
+        return wanted
+    return max(1, min(wanted, soft - FD_RESERVE))
+
+
+def icmp_socket_available() -> bool:
+    """True when this process may open an unprivileged ICMP (ping) socket"""
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+    except (OSError, AttributeError):
+        return False
+    sock.close()
+    return True
+
+
+def _icmp_checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _echo_request(identifier: int, sequence: int) -> bytes:
+    payload = b'velocitycmdb-probe'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _icmp_checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+class RateLimiter:
+    """Spaces connection attempts to at most `rate` per second (0 = unlimited)"""
+
+    def __init__(self, rate: float = 0):
+        self.rate = rate
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class ReachabilityProber:
+    """
+    Probes device IPs on one background event loop with a per-cycle cache
+
+    Thread-safe: map worker threads may call probe_many() at the same time;
+    the probes all run on the engine's loop and an IP requested by several
+    callers is probed once.
+    """
+
+    def __init__(self,
+                 ports: List[int],
+                 timeout: float = 2.0,
+                 ping_fallback: bool = True,
+                 max_concurrency: int = 4096,
+                 rate_limit: float = 0,
+                 icmp_method: str = 'auto'):
+        """
+        Args:
+            ports: TCP ports to try on every device (any open port = up)
+            timeout: Connect (and ping) timeout in seconds
+            ping_fallback: Try ICMP when no TCP port answers
+            max_concurrency: Cap on sockets in flight across all devices,
+                lowered to fit the open-file limit (see raise_fd_limit)
+            rate_limit: Connection attempts per second (0 = unlimited)
+            icmp_method: 'auto' (unprivileged socket if permitted, else the
+                ping command), 'socket' or 'command'
+        """
+        self.ports = list(ports) or [22]
+        self.timeout = float(timeout)
+        self.ping_fallback = ping_fallback
+        self.max_concurrency = _socket_budget(max(1, int(max_concurrency)))
+        self.rate_limit = rate_limit or 0
+        if icmp_method == 'auto':
+            icmp_method = 'socket' if icmp_socket_available() else 'command'
+        self.icmp_method = icmp_method
+
+        self.stats = {'probed': 0, 'cache_hits': 0}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Loop-thread state only
+        self._cache: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._limiter = RateLimiter(self.rate_limit)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], timeout: Optional[float] = None) -> 'ReachabilityProber':
+        """Prober from a monitor config (monitor_ports and the monitoring section)"""
+        monitoring = config.get("monitoring", {})
+        return cls(
+            ports=config.get("monitor_ports", [22, 80]),
+            timeout=monitoring.get("timeout", timeout if timeout is not None else 2.0),
+            ping_fallback=monitoring.get("ping_fallback", True),
+            max_concurrency=cls.concurrency_from_config(config),
+            rate_limit=monitoring.get("rate_limit", 0),
+            icmp_method=monitoring.get("icmp_method", "auto"),
+        )
+
+    @staticmethod
+    def concurrency_from_config(config: Dict[str, Any]) -> int:
+        """Sockets in flight a monitor config asks for"""
+        monitoring = config.get("monitoring", {})
+        if not monitoring.get("parallel_checks", True):
+            return 1
+        return int(monitoring.get("max_concurrency", 4096))
+
+    # ------------------------------------------------------------------
+    # Public, callable from any thread
+    # ------------------------------------------------------------------
+
+    def probe_many(self, ips: Iterable[str]) -> Dict[str, ProbeResult]:
+        """
+        Probe every IP concurrently (cached IPs are not probed again)
+
+        Returns:
+            Dictionary of ip -> (is_up, open_ports)
+        """
+        unique = list(dict.fromkeys(ip for ip in ips if ip))
+        if not unique:
+            return {}
+        return self._call(self._gather(unique))
+
+    def probe(self, ip: str) -> ProbeResult:
+        return self.probe_many([ip]).get(ip, (False, []))
+
+    def cached(self, ip: str) -> Optional[ProbeResult]:
+        """Result from this cycle, or None if the IP has not finished probing"""
+        task = self._cache.get(ip)
+        if task is not None and task.done() and not task.cancelled():
+            return task.result()
+        return None
+
+    def new_cycle(self):
+        """
+        Forget this cycle's finished results so the next probe_many() tests
+        again. Probes still running stay shared: another thread's
+        probe_many() may be waiting on them.
+        """
+        if self._loop is not None:
+            self._call(self._clear())
+
+    def close(self):
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def __enter__(self) -> 'ReachabilityProber':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Event loop plumbing
+    # ------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='reachability-probe', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def _call(self, coro):
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _clear(self):
+        self._cache = {ip: task for ip, task in self._cache.items() if not task.done()}
+
+    async def _gather(self, ips: List[str]) -> Dict[str, ProbeResult]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        tasks = []
+        for ip in ips:
+            task = self._cache.get(ip)
+            if task is None:
+                task = asyncio.ensure_future(self._probe_ip(ip))
+                self._cache[ip] = task
+                self.stats['probed'] += 1
+            else:
+                self.stats['cache_hits'] += 1
+            tasks.append(task)
+
+        # shield: a caller giving up must not cancel a probe others share
+        results = await asyncio.gather(*(asyncio.shield(task) for task in tasks))
+        return dict(zip(ips, results))
+
+    # ------------------------------------------------------------------
+    # Probes
+    # ------------------------------------------------------------------
+
+    async def _probe_ip(self, ip: str) -> ProbeResult:
+        checks = await asyncio.gather(*(self._tcp_connect(ip, port) for port in self.ports))
+        open_ports = [port for port, is_open in zip(self.ports, checks) if is_open]
+        if open_ports:
+            return True, open_ports
+
+        if self.ping_fallback and await self._ping(ip):
+            return True, ['icmp']
+        return False, []
+
+    async def _tcp_connect(self, ip: str, port: int) -> bool:
+        async with self._semaphore:
+            await self._limiter.acquire()
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+            except (asyncio.TimeoutError, OSError, ValueError):
+                return False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return True
+
+    async def _ping(self, ip: str) -> bool:
+        async with self._semaphore:
+            await self._limiter.acquire()
+            if self.icmp_method == 'socket' and ':' not in ip:
+                return await self._icmp_echo(ip)
+            return await self._ping_command(ip)
+
+    async def _icmp_echo(self, ip: str) -> bool:
+        """One echo request over an unprivileged ICMP socket"""
+        loop = asyncio.get_running_loop()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        except OSError:
+            return await self._ping_command(ip)
+
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, (ip, 0))
+            # The kernel rewrites the identifier and routes replies to this socket
+            await loop.sock_sendall(sock, _echo_request(os.getpid() & 0xffff,
+                                                        next(_icmp_sequence) & 0xffff))
+            deadline = loop.time() + self.timeout
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                reply = await asyncio.wait_for(loop.sock_recv(sock, 1024), remaining)
+                if reply and reply[0] == ICMP_ECHO_REPLY:
+                    return True
+        except (asyncio.TimeoutError, OSError):
+            return False
+        finally:
+            sock.close()
+
+    async def _ping_command(self, ip: str) -> bool:
+        """System ping as an async subprocess (same flags as svg_monitor.ping_host)"""
+        if platform.system().lower() == 'windows':
+            cmd = ['ping', '-n', '1', '-w', str(int(self.timeout * 1000)), ip]
+        else:
+            cmd = ['ping', '-c', '1', '-W', str(max(1, int(self.timeout))), ip]
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        except (OSError, NotImplementedError):
+            return False
+
+        try:
+            return await asyncio.wait_for(process.wait(), self.timeout + 1) == 0
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return False
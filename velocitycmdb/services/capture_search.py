@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Capture Search
+Substring search over stored capture snapshots, backed by capture_fts
+
+With a trigram-tokenized capture_fts any substring of three or more
+characters (IPs, MACs, interface names, config fragments) is answered from
+the index; only the candidate snapshots it returns are read and verified
+line by line. Shorter queries, and databases whose capture_fts still uses
+the word tokenizer, fall back to a LIKE scan with the same verification, so
+results are identical either way - only the speed differs.
+
+Rebuild the index with fix_fts.py to switch an existing database to trigrams.
+
+Compressed (historical) snapshots are found through capture_blob_fts, the
+index of blob text that CaptureStore keeps, and verified after decompression.
+Queries the trigram index cannot answer scan the blobs instead, decompressing
+each distinct blob once per query, so history is searched on either path.
+"""
+
+import html
+import logging
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .capture_store import CaptureStore, decompress_content
+
+logger = logging.getLogger(__name__)
+
+# Triggers keeping the trigram index over capture_snapshots (external
+# content) in sync. Deletes and updates use the FTS5 'delete' command, which
+# needs the old content - the only correct form for external content. The
+# index mirrors the inline content exactly: compressing a snapshot blanks its
+# content, and the update trigger drops the old text's entry with it.
+CAPTURE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS capture_fts_insert
+    AFTER INSERT ON capture_snapshots
+    BEGIN
+        INSERT INTO capture_fts(rowid, content)
+        VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS capture_fts_delete
+    AFTER DELETE ON capture_snapshots
+    BEGIN
+        INSERT INTO capture_fts(capture_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS capture_fts_update
+    AFTER UPDATE OF content ON capture_snapshots
+    BEGIN
+        INSERT INTO capture_fts(capture_fts, rowid, content)
+        VALUES ('delete', old.id, old.content);
+        INSERT INTO capture_fts(rowid, content)
+        VALUES (new.id, new.content);
+    END
+    """,
+]
+
+CAPTURE_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS capture_fts USING fts5(
+        content,
+        content=capture_snapshots,
+        content_rowid=id,
+        tokenize='trigram'
+    )
+    """,
+] + CAPTURE_FTS_TRIGGERS
+
+# Trigram MATCH needs at least this many characters per term
+MIN_TRIGRAM_TERM = 3
+
+# Markers placed by snippet(); replaced with <mark> after HTML-escaping
+_MARK_OPEN = '\x02'
+_MARK_CLOSE = '\x03'
+
+# Candidates whose content is read per round trip
+_FETCH_CHUNK = 64
+
+
+def capture_fts_tokenizer(conn: sqlite3.Connection) -> Optional[str]:
+    """'trigram', 'unicode61' (the FTS5 default) or None if capture_fts is missing"""
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'capture_fts'"
+    ).fetchone()
+    if not row or not row[0]:
+        return None
+    return 'trigram' if 'trigram' in row[0].lower() else 'unicode61'
+
+
+def trigram_supported(conn: sqlite3.Connection) -> bool:
+    """True if this SQLite build has the FTS5 trigram tokenizer (3.34+)"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp._trigram_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def rebuild_capture_fts(conn: sqlite3.Connection) -> str:
+    """
+    Recreate capture_fts (trigram when available) with its triggers and
+    re-index every snapshot, and the blob index for compressed ones.
+    Commits; returns the tokenizer now in use.
+    """
+    CaptureStore.ensure_schema(conn)
+    conn.execute("DROP TABLE IF EXISTS capture_blob_fts")
+    conn.execute("DROP TABLE IF EXISTS capture_blob_fts_map")
+    conn.execute("DROP TRIGGER IF EXISTS capture_fts_insert")
+    conn.execute("DROP TRIGGER IF EXISTS capture_fts_update")
+    conn.execute("DROP TRIGGER IF EXISTS capture_fts_delete")
+    conn.execute("DROP TABLE IF EXISTS capture_fts")
+
+    statements = list(CAPTURE_FTS_SCHEMA)
+    if not trigram_supported(conn):
+        logger.warning(f"SQLite {sqlite3.sqlite_version} has no trigram tokenizer; "
+                       f"capture search will use LIKE scans")
+        statements[0] = statements[0].replace(",\n        tokenize='trigram'", '')
+
+    for statement in statements:
+        conn.execute(statement)
+    conn.execute("INSERT INTO capture_fts(capture_fts) VALUES ('rebuild')")
+    # Compressed rows were indexed by their empty inline content; index the blobs
+    CaptureStore.ensure_search_index(conn)
+    conn.commit()
+    return capture_fts_tokenizer(conn)
+
+
+def render_marked(text: str) -> str:
+    """HTML-escape text and turn snippet markers into <mark> tags"""
+    return (html.escape(text)
+            .replace(_MARK_OPEN, '<mark>')
+            .replace(_MARK_CLOSE, '</mark>'))
+
+
+class CaptureSearchEngine:
+    """Finds capture snapshots and matching lines for one or more search terms"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Open connection to assets.db with row_factory = sqlite3.Row
+        """
+        self.conn = conn
+        self.store = CaptureStore(conn)
+        self.tokenizer = capture_fts_tokenizer(conn)
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def search_lines(self, query: str, capture_types: Sequence[str] = None,
+                     device_ids: Sequence[int] = None, limit: int = 100,
+                     per_device: Optional[int] = 5, max_matches: int = 15,
+                     context_lines: int = 2, case_sensitive: bool = True) -> List[Dict]:
+        """
+        Snapshots containing query, newest first, with their matching lines.
+
+        Args:
+            query: Exact string to find (not normalized or tokenized)
+            capture_types: Restrict to these capture types
+            device_ids: Restrict to these devices
+            limit: Maximum snapshots returned
+            per_device: Maximum snapshots per device (None for no bound)
+            max_matches: Matching lines kept per snapshot
+            context_lines: Lines of context either side of each match
+            case_sensitive: Match case exactly
+
+        Returns:
+            One dict per snapshot with device details, an HTML-safe snippet
+            and 'matches': [{line_number, line, context, highlighted}]
+        """
+        matcher = self._compile([query], case_sensitive)
+        results = []
+
+        for row, snippet in self._verified_rows([query], matcher, capture_types, device_ids,
+                                                limit, per_device, case_sensitive):
+            lines = row['content'].split('\n')
+            matching_lines = []
+
+            for i, line in enumerate(lines, 1):
+                if matcher.search(line):
+                    start = max(0, i - 1 - context_lines)
+                    end = min(len(lines), i + context_lines)
+                    matching_lines.append({
+                        'line_number': i,
+                        'line': line.strip(),
+                        'context': lines[start:end],
+                        'highlighted': self._highlight(line.strip(), matcher)
+                    })
+                    if len(matching_lines) >= max_matches:
+                        break
+
+            results.append({
+                'snapshot_id': row['snapshot_id'],
+                'device_id': row['device_id'],
+                'device_name': row['device_name'],
+                'management_ip': row['management_ip'],
+                'site_name': row['site_name'],
+                'capture_type': row['capture_type'],
+                'file_path': row['file_path'],
+                'captured_at': row['captured_at'],
+                'snippet': snippet,
+                'matches': matching_lines
+            })
+
+        return results
+
+    def find_snapshots(self, terms: Union[str, Sequence[str]], capture_types: Sequence[str] = None,
+                       device_ids: Sequence[int] = None, limit: int = 20,
+                       per_device: Optional[int] = 3, case_sensitive: bool = False,
+                       whole_token: bool = False) -> List[Dict]:
+        """
+        Snapshots containing any of terms, newest first, without their content.
+
+        Args:
+            terms: String or alternatives (e.g. one MAC in several notations)
+            whole_token: Reject matches embedded in a longer address or word,
+                so 10.1.1.1 does not match 10.1.1.10
+
+        Returns:
+            Dicts with id, device_id, capture_type, captured_at, file_path,
+            file_size, device_name, management_ip, site_name and snippet
+        """
+        if isinstance(terms, str):
+            terms = [terms]
+        terms = [t for t in dict.fromkeys(terms) if t]
+        if not terms:
+            return []
+
+        matcher = self._compile(terms, case_sensitive, whole_token)
+        results = []
+        for row, snippet in self._verified_rows(terms, matcher, capture_types, device_ids,
+                                                limit, per_device, case_sensitive):
+            results.append({
+                'id': row['snapshot_id'],
+                'device_id': row['device_id'],
+                'capture_type': row['capture_type'],
+                'captured_at': row['captured_at'],
+                'file_path': row['file_path'],
+                'file_size': row['file_size'],
+                'device_name': row['device_name'],
+                'management_ip': row['management_ip'],
+                'site_name': row['site_name'],
+                'snippet': snippet
+            })
+        return results
+
+    @property
+    def indexed(self) -> bool:
+        """True when substring queries are answered from the trigram index"""
+        return self.tokenizer == 'trigram'
+
+    # =========================================================================
+    # Candidate selection and verification
+    # =========================================================================
+
+    def _uses_index(self, terms: Sequence[str]) -> bool:
+        return self.indexed and all(len(t) >= MIN_TRIGRAM_TERM for t in terms)
+
+    @staticmethod
+    def _match_expression(terms: Sequence[str]) -> str:
+        """FTS5 query matching any term as a literal substring"""
+        return ' OR '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+    @staticmethod
+    def _like_pattern(term: str) -> str:
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f'%{escaped}%'
+
+    def _candidates(self, terms: Sequence[str], capture_types: Sequence[str] = None,
+                    device_ids: Sequence[int] = None,
+                    case_sensitive: bool = False) -> Iterator[Tuple[int, int]]:
+        """(snapshot_id, device_id) that may contain a term, newest first"""
+        filters = []
+        filter_params = []
+        if capture_types:
+            filters.append(f"cs.capture_type IN ({','.join('?' * len(capture_types))})")
+            filter_params.extend(capture_types)
+        if device_ids:
+            filters.append(f"cs.device_id IN ({','.join('?' * len(device_ids))})")
+            filter_params.extend(device_ids)
+
+        # Inline text only: compressed snapshots have empty content here and
+        # become candidates through their blobs below, never by default
+        conditions = []
+        params = []
+
+        if self._uses_index(terms):
+            source = "capture_fts f JOIN capture_snapshots cs ON cs.id = f.rowid"
+            conditions.append("capture_fts MATCH ?")
+            params.append(self._match_expression(terms))
+        else:
+            source = "capture_snapshots cs"
+            conditions.append('(' + ' OR '.join(["cs.content LIKE ? ESCAPE '\\'"] * len(terms)) + ')')
+            params.extend(self._like_pattern(t) for t in terms)
+
+        if case_sensitive:
+            # The index and LIKE both ignore case; instr() drops wrong-case
+            # candidates in SQLite before their content reaches Python
+            conditions.append('(' + ' OR '.join(['instr(cs.content, ?) > 0'] * len(terms)) + ')')
+            params.extend(terms)
+
+        query = f"""
+            SELECT cs.id, cs.device_id, cs.captured_at
+            FROM {source}
+            WHERE {' AND '.join(conditions + filters)}
+        """
+        params += filter_params
+
+        if self._uses_index(terms) and self.store.has_blob_index():
+            # History: blobs whose text matches, then the snapshots stored in them
+            query += f"""
+            UNION
+            SELECT cs.id, cs.device_id, cs.captured_at
+            FROM capture_blob_fts bf
+            JOIN capture_blob_fts_map m ON m.fts_id = bf.rowid
+            JOIN capture_snapshots cs ON cs.content_hash = m.content_hash AND cs.compressed = 1
+            WHERE {' AND '.join(['capture_blob_fts MATCH ?'] + filters)}
+            """
+            params += [self._match_expression(terms)] + filter_params
+        elif not self._uses_index(terms) and self.store.has_blob_storage():
+            # History without the index: test each blob's text once, then
+            # the snapshots stored in the blobs that contain a term
+            self._register_blob_matcher(terms, case_sensitive)
+            history = ['cs.compressed = 1',
+                       'cs.content_hash IN (SELECT content_hash FROM capture_blobs '
+                       'WHERE capture_blob_matches(codec, data))']
+            query += f"""
+            UNION
+            SELECT cs.id, cs.device_id, cs.captured_at
+            FROM capture_snapshots cs
+            WHERE {' AND '.join(history + filters)}
+            """
+            params += filter_params
+
+        cursor = self.conn.execute(query + " ORDER BY 3 DESC", params)
+        for row in cursor:
+            yield row[0], row[1]
+
+    def _register_blob_matcher(self, terms: Sequence[str], case_sensitive: bool):
+        """SQL capture_blob_matches(codec, data): decompressed text contains a term"""
+        if case_sensitive:
+            needles = list(terms)
+        else:
+            needles = [t.lower() for t in terms]
+
+        def matches(codec, data):
+            text = decompress_content(codec, data)
+            if not case_sensitive:
+                text = text.lower()
+            return any(needle in text for needle in needles)
+
+        self.conn.create_function('capture_blob_matches', 2, matches)
+
+    def _fetch(self, snapshot_ids: List[int], terms: Sequence[str]) -> Tuple[Dict[int, Dict], Dict[int, str]]:
+        """Content and device details for a chunk of candidates, plus FTS snippets"""
+        placeholders = ','.join('?' * len(snapshot_ids))
+        compressed = 'cs.compressed,' if self.store.has_blob_storage() else '0 as compressed,'
+        cursor = self.conn.execute(f"""
+            SELECT
+                cs.id as snapshot_id,
+                cs.device_id,
+                cs.capture_type,
+                cs.captured_at,
+                cs.file_path,
+                cs.file_size,
+                cs.content,
+                {compressed}
+                d.name as device_name,
+                d.management_ip,
+                s.name as site_name
+            FROM capture_snapshots cs
+            JOIN devices d ON cs.device_id = d.id
+            LEFT JOIN sites s ON d.site_code = s.code
+            WHERE cs.id IN ({placeholders})
+        """, snapshot_ids)
+        rows = {row['snapshot_id']: dict(row) for row in cursor}
+
+        texts = self.store.contents([i for i, row in rows.items() if row['compressed']])
+        for snapshot_id, content in texts.items():
+            rows[snapshot_id]['content'] = content
+
+        snippets = {}
+        if self._uses_index(terms) and rows:
+            cursor = self.conn.execute(f"""
+                SELECT rowid, snippet(capture_fts, 0, ?, ?, '…', 48)
+                FROM capture_fts
+                WHERE capture_fts MATCH ? AND rowid IN ({placeholders})
+            """, [_MARK_OPEN, _MARK_CLOSE, self._match_expression(terms)] + snapshot_ids)
+            # snippet() reads the inline text, which compressed rows do not have
+            snippets = {row[0]: render_marked(row[1]) for row in cursor
+                        if row[1] and row[0] not in texts}
+
+        return rows, snippets
+
+    def _verified_rows(self, terms: Sequence[str], matcher: re.Pattern,
+                       capture_types: Sequence[str], device_ids: Sequence[int],
+                       limit: int, per_device: Optional[int],
+                       case_sensitive: bool = False) -> Iterator[Tuple[Dict, str]]:
+        """
+        Walk candidates newest first, reading content a chunk at a time, and
+        yield (row, snippet) for those that really match until limit is hit.
+        """
+        per_device_counts: Dict[int, int] = {}
+        emitted = 0
+
+        def full(device_id):
+            return per_device is not None and per_device_counts.get(device_id, 0) >= per_device
+
+        chunk: List[int] = []
+        candidates = self._candidates(terms, capture_types, device_ids, case_sensitive)
+        exhausted = False
+
+        while emitted < limit and not exhausted:
+            chunk.clear()
+            for snapshot_id, device_id in candidates:
+                if not full(device_id):
+                    chunk.append(snapshot_id)
+                    if len(chunk) >= _FETCH_CHUNK:
+                        break
+            else:
+                exhausted = True
+
+            if not chunk:
+                break
+
+            rows, snippets = self._fetch(chunk, terms)
+            for snapshot_id in chunk:
+                row = rows.get(snapshot_id)
+                if row is None or full(row['device_id']):
+                    continue
+                if not matcher.search(row['content'] or ''):
+                    continue
+
+                snippet = snippets.get(snapshot_id) or self._fallback_snippet(row['content'], matcher)
+                per_device_counts[row['device_id']] = per_device_counts.get(row['device_id'], 0) + 1
+                emitted += 1
+                yield row, snippet
+                if emitted >= limit:
+                    return
+
+    # =========================================================================
+    # Matching helpers
+    # =========================================================================
+
+    @staticmethod
+    def _compile(terms: Iterable[str], case_sensitive: bool, whole_token: bool = False) -> re.Pattern:
+        alternatives = '|'.join(re.escape(t) for t in terms)
+        if whole_token:
+            # Not preceded or followed by more of an address/word
+            alternatives = rf'(?<![\w.:-])(?:{alternatives})(?![\w]|[.:-]\w)'
+        return re.compile(alternatives, 0 if case_sensitive else re.IGNORECASE)
+
+    @staticmethod
+    def _highlight(line: str, matcher: re.Pattern) -> str:
+        marked = matcher.sub(lambda m: _MARK_OPEN + m.group(0) + _MARK_CLOSE, line)
+        return render_marked(marked)
+
+    def _fallback_snippet(self, content: str, matcher: re.Pattern) -> str:
+        """Snippet from the first matching line when the index was not used"""
+        for line in content.split('\n'):
+            if matcher.search(line):
+                return self._highlight(line.strip()[:200], matcher)
+        return ''
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from pathlib import Path
+
+    if len(sys.argv) < 2:
+        print("Usage: python capture_search.py <query> [data_dir]")
+        print("       python capture_search.py --rebuild [data_dir]")
+        sys.exit(1)
+
+    data_dir = Path(sys.argv[2] if len(sys.argv) > 2 else '~/.velocitycmdb/data').expanduser()
+    conn = sqlite3.connect(str(data_dir / 'assets.db'))
+    conn.row_factory = sqlite3.Row
+
+    if sys.argv[1] == '--rebuild':
+        logging.basicConfig(level=logging.INFO)
+        started = time.perf_counter()
+        tokenizer = rebuild_capture_fts(conn)
+        print(f"Rebuilt capture_fts ({tokenizer}) in {time.perf_counter() - started:.1f}s")
+        sys.exit(0)
+
+    engine = CaptureSearchEngine(conn)
+    started = time.perf_counter()
+    results = engine.search_lines(sys.argv[1])
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        for match in result['matches']:
+            print(f"{result['device_name']} [{result['capture_type']}] {match['line_number']}: {match['line']}")
+    print(f"\n{len(results)} snapshots in {elapsed * 1000:.0f}ms "
+          f"({'trigram index' if engine.indexed else 'LIKE scan'})")
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+Capture Store
+Latest-snapshot pointers and line-offset indexes for capture_snapshots
+
+device_captures_current.latest_snapshot_id points at the newest snapshot of
+each device/capture type, so "latest arp for every device" is a primary key
+join instead of a GROUP BY over the whole snapshot history.
+
+capture_line_index keeps the character offset of every line start of a
+snapshot. Readers that want a few lines of a multi-MB config fetch just that
+slice with substr() rather than pulling and splitting the whole text.
+
+Superseded snapshots are moved into capture_blobs: zlib-compressed, keyed by
+content_hash so identical captures (a config that flaps back) share one blob.
+The latest snapshot of every device/capture type stays inline, so pointer
+reads, substr() line slices and existing SQL over cs.content see no change;
+history is read through content(), which decompresses when needed.
+
+capture_fts indexes exactly the inline content (empty for a compressed row),
+so it stays consistent with capture_snapshots. Blob text is indexed once per
+blob in the contentless capture_blob_fts, keyed through capture_blob_fts_map.
+"""
+
+import logging
+import sqlite3
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LINE_INDEX_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS capture_line_index (
+        snapshot_id INTEGER PRIMARY KEY,
+        line_count INTEGER NOT NULL,
+        offsets BLOB NOT NULL,
+        FOREIGN KEY (snapshot_id) REFERENCES capture_snapshots(id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_current_latest_snapshot ON device_captures_current(latest_snapshot_id)",
+    # Deletes elsewhere do not always enable foreign keys, so clean up
+    # explicitly; a deleted latest snapshot hands the pointer to the newest
+    # one left (NULL only when none is)
+    """
+    CREATE TRIGGER IF NOT EXISTS capture_snapshots_store_delete
+    AFTER DELETE ON capture_snapshots
+    BEGIN
+        DELETE FROM capture_line_index WHERE snapshot_id = old.id;
+        UPDATE device_captures_current SET latest_snapshot_id = (
+            SELECT MAX(cs.id) FROM capture_snapshots cs
+            WHERE cs.device_id = old.device_id AND cs.capture_type = old.capture_type
+        )
+        WHERE latest_snapshot_id = old.id;
+    END
+    """,
+]
+
+BLOB_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS capture_blobs (
+        content_hash TEXT PRIMARY KEY,
+        codec TEXT NOT NULL,
+        raw_size INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+    """,
+]
+
+BLOB_INDEX_SCHEMA = [
+    # Contentless: holds the trigrams of each blob's text, not the text itself
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS capture_blob_fts USING fts5(
+        content,
+        content='',
+        tokenize='trigram'
+    )
+    """,
+    # capture_blobs has no INTEGER PRIMARY KEY, so its rowids may change on
+    # VACUUM; the index is keyed by a rowid of its own
+    """
+    CREATE TABLE IF NOT EXISTS capture_blob_fts_map (
+        fts_id INTEGER PRIMARY KEY,
+        content_hash TEXT NOT NULL UNIQUE
+    )
+    """,
+]
+
+# zlib level for history: written once, read rarely
+BLOB_COMPRESSION_LEVEL = 9
+
+# Snapshot ids per query in contents() (well under SQLite's variable limit)
+_CONTENT_CHUNK = 500
+
+
+def compress_content(content: str) -> Tuple[str, bytes]:
+    """(codec, data) for a snapshot's text"""
+    return 'zlib', zlib.compress(content.encode('utf-8'), BLOB_COMPRESSION_LEVEL)
+
+
+def decompress_content(codec: str, data: bytes) -> str:
+    if codec == 'zlib':
+        return zlib.decompress(data).decode('utf-8')
+    raise ValueError(f"Unknown capture blob codec: {codec}")
+
+
+def line_offsets(content: str) -> array:
+    """Character offset of the start of every line ('\\n' separated)"""
+    offsets = array('I', [0])
+    find = content.find
+    position = find('\n')
+    while position != -1:
+        offsets.append(position + 1)
+        position = find('\n', position + 1)
+    return offsets
+
+
+def pack_offsets(offsets: array) -> bytes:
+    """Offsets as little-endian uint32, independent of the host byte order"""
+    if sys.byteorder == 'big':
+        offsets = array('I', offsets)
+        offsets.byteswap()
+    return offsets.tobytes()
+
+
+def unpack_offsets(blob: bytes) -> array:
+    offsets = array('I')
+    offsets.frombytes(blob)
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    return offsets
+
+
+def line_number_at(offsets: Sequence[int], position: int) -> int:
+    """1-based line number containing a character position"""
+    return bisect_right(offsets, position)
+
+
+class CaptureStore:
+    """Reads latest snapshots and line ranges through the pointer and line index"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Open connection to assets.db with row_factory = sqlite3.Row
+        """
+        self.conn = conn
+
+    # =========================================================================
+    # Schema and maintenance
+    # =========================================================================
+
+    @staticmethod
+    def ensure_schema(conn: sqlite3.Connection) -> bool:
+        """
+        Add latest_snapshot_id, capture_line_index and blob storage to an
+        existing database.
+
+        Returns:
+            True if the pointer column was added (and backfilled) just now
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(device_captures_current)")]
+        added = 'latest_snapshot_id' not in columns
+        if added:
+            logger.info("Adding latest_snapshot_id column to device_captures_current")
+            conn.execute("ALTER TABLE device_captures_current ADD COLUMN latest_snapshot_id INTEGER "
+                         "REFERENCES capture_snapshots(id)")
+
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+                           "AND name = 'capture_snapshots_store_delete'").fetchone()
+        if row and 'latest_snapshot_id = NULL' in row[0]:
+            # Earlier trigger cleared the pointer, hiding the device's older snapshots
+            conn.execute("DROP TRIGGER capture_snapshots_store_delete")
+
+        for statement in LINE_INDEX_SCHEMA + BLOB_SCHEMA:
+            conn.execute(statement)
+
+        snapshot_columns = [row[1] for row in conn.execute("PRAGMA table_info(capture_snapshots)")]
+        if 'compressed' not in snapshot_columns:
+            logger.info("Adding compressed column to capture_snapshots")
+            conn.execute("ALTER TABLE capture_snapshots ADD COLUMN compressed INTEGER NOT NULL DEFAULT 0")
+            CaptureStore._refresh_fts_triggers(conn)
+
+        CaptureStore.ensure_search_index(conn)
+
+        if added:
+            CaptureStore.backfill_latest_pointers(conn)
+        return added
+
+    @staticmethod
+    def ensure_search_index(conn: sqlite3.Connection):
+        """
+        Bring capture_fts and the blob index up to date on an existing database.
+
+        Earlier capture_fts triggers skipped compressed rows, leaving index
+        entries whose text capture_snapshots no longer holds (and entries for
+        deleted rows). Those databases get the current triggers and one
+        capture_fts rebuild. A trigram capture_fts also gets capture_blob_fts,
+        filled from the existing blobs.
+        """
+        from .capture_search import capture_fts_tokenizer
+
+        tokenizer = capture_fts_tokenizer(conn)
+        if tokenizer is None:
+            return
+
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' "
+                           "AND name = 'capture_fts_delete'").fetchone()
+        if row is None or 'compressed' in row[0]:
+            CaptureStore._refresh_fts_triggers(conn)
+            if conn.execute("SELECT 1 FROM capture_blobs LIMIT 1").fetchone():
+                logger.info("Rebuilding capture_fts from inline snapshot content")
+                conn.execute("INSERT INTO capture_fts(capture_fts) VALUES ('rebuild')")
+
+        if tokenizer == 'trigram' and not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'capture_blob_fts'").fetchone():
+            for statement in BLOB_INDEX_SCHEMA:
+                conn.execute(statement)
+            indexed = CaptureStore(conn).index_blobs()
+            logger.info(f"Indexed the text of {indexed} capture blobs")
+
+    @staticmethod
+    def _refresh_fts_triggers(conn: sqlite3.Connection):
+        """Replace the capture_fts triggers with the current ones"""
+        from .capture_search import CAPTURE_FTS_TRIGGERS
+
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'capture_fts'").fetchone():
+            return
+        for name in ('capture_fts_insert', 'capture_fts_update', 'capture_fts_delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for statement in CAPTURE_FTS_TRIGGERS:
+            conn.execute(statement)
+
+    @staticmethod
+    def backfill_latest_pointers(conn: sqlite3.Connection) -> int:
+        """Point every current capture at its newest snapshot (answered from the snapshot index)"""
+        cursor = conn.execute("""
+            UPDATE device_captures_current
+            SET latest_snapshot_id = (
+                SELECT MAX(cs.id) FROM capture_snapshots cs
+                WHERE cs.device_id = device_captures_current.device_id
+                AND cs.capture_type = device_captures_current.capture_type
+            )
+        """)
+        logger.info(f"Backfilled latest_snapshot_id for {cursor.rowcount} current captures")
+        return cursor.rowcount
+
+    def backfill_line_index(self, batch_size: int = 200) -> int:
+        """Index the lines of every latest snapshot that has no line index yet; commits per batch"""
+        indexed = 0
+        while True:
+            compressed = 'cs.compressed' if self.has_blob_storage() else '0'
+            rows = self.conn.execute(f"""
+                SELECT cs.id, cs.content, {compressed}
+                FROM device_captures_current dcc
+                JOIN capture_snapshots cs ON cs.id = dcc.latest_snapshot_id
+                LEFT JOIN capture_line_index li ON li.snapshot_id = cs.id
+                WHERE li.snapshot_id IS NULL
+                LIMIT ?
+            """, (batch_size,)).fetchall()
+            if not rows:
+                break
+
+            for row in rows:
+                # A latest snapshot is inline unless its successor was deleted
+                content = self.content(row[0]) if row[2] else row[1]
+                self.index_lines(row[0], content or '')
+            self.conn.commit()
+            indexed += len(rows)
+            logger.info(f"Indexed lines of {indexed} snapshots")
+        return indexed
+
+    # =========================================================================
+    # Writes (called by CaptureLoader inside its transaction)
+    # =========================================================================
+
+    def index_lines(self, snapshot_id: int, content: str, offsets: array = None) -> int:
+        """Store the line-offset index for a snapshot (offsets if already computed); returns its line count"""
+        if offsets is None:
+            offsets = line_offsets(content)
+        self.conn.execute("""
+            INSERT OR REPLACE INTO capture_line_index (snapshot_id, line_count, offsets)
+            VALUES (?, ?, ?)
+        """, (snapshot_id, len(offsets), pack_offsets(offsets)))
+        return len(offsets)
+
+    def set_latest(self, device_id: int, capture_type: str, snapshot_id: int):
+        """Move the device's current capture pointer to snapshot_id"""
+        self.conn.execute("""
+            UPDATE device_captures_current SET latest_snapshot_id = ?
+            WHERE device_id = ? AND capture_type = ?
+        """, (snapshot_id, device_id, capture_type))
+
+    def compress_snapshot(self, snapshot_id: int) -> Optional[Tuple[int, int]]:
+        """
+        Move a superseded snapshot's content into capture_blobs.
+
+        Blanking the inline content drops its capture_fts entry (update
+        trigger); a new blob's text goes into capture_blob_fts, so the
+        snapshot stays searchable. Never call this for a snapshot a
+        latest_snapshot_id still points at.
+
+        Returns:
+            (raw bytes, stored bytes) or None if already compressed; stored
+            is 0 when an identical blob already existed
+        """
+        row = self.conn.execute("""
+            SELECT content, content_hash FROM capture_snapshots
+            WHERE id = ? AND compressed = 0
+        """, (snapshot_id,)).fetchone()
+        if not row:
+            return None
+
+        content, content_hash = row[0] or '', row[1]
+        raw = len(content.encode('utf-8'))
+        codec, data = compress_content(content)
+        cursor = self.conn.execute("""
+            INSERT OR IGNORE INTO capture_blobs (content_hash, codec, raw_size, data)
+            VALUES (?, ?, ?, ?)
+        """, (content_hash, codec, raw, data))
+        if cursor.rowcount:
+            self._index_blob(content_hash, content)
+        self.conn.execute("UPDATE capture_snapshots SET content = '', compressed = 1 WHERE id = ?",
+                          (snapshot_id,))
+        return raw, len(data) if cursor.rowcount else 0
+
+    def _index_blob(self, content_hash: str, content: str):
+        if not self.has_blob_index():
+            return
+        cursor = self.conn.execute("INSERT OR IGNORE INTO capture_blob_fts_map (content_hash) VALUES (?)",
+                                   (content_hash,))
+        if cursor.rowcount:
+            self.conn.execute("INSERT INTO capture_blob_fts(rowid, content) VALUES (?, ?)",
+                              (cursor.lastrowid, content))
+
+    def index_blobs(self, batch_size: int = 64) -> int:
+        """Add every blob missing from capture_blob_fts; returns the number indexed"""
+        indexed = 0
+        while True:
+            rows = self.conn.execute("""
+                SELECT b.content_hash, b.codec, b.data FROM capture_blobs b
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM capture_blob_fts_map m WHERE m.content_hash = b.content_hash
+                )
+                LIMIT ?
+            """, (batch_size,)).fetchall()
+            if not rows:
+                return indexed
+            for content_hash, codec, data in rows:
+                self._index_blob(content_hash, decompress_content(codec, data))
+            indexed += len(rows)
+
+    def compress_history(self, batch_size: int = 200) -> Dict[str, int]:
+        """
+        Compress every snapshot that is not the latest of its device/capture
+        type; commits per batch.
+
+        Returns:
+            Counts of snapshots compressed and raw/stored bytes
+        """
+        totals = {'snapshots': 0, 'raw_bytes': 0, 'stored_bytes': 0}
+        while True:
+            ids = [row[0] for row in self.conn.execute("""
+                SELECT cs.id FROM capture_snapshots cs
+                WHERE cs.compressed = 0
+                AND NOT EXISTS (
+                    SELECT 1 FROM device_captures_current dcc
+                    WHERE dcc.latest_snapshot_id = cs.id
+                )
+                AND cs.id != (
+                    SELECT MAX(id) FROM capture_snapshots newest
+                    WHERE newest.device_id = cs.device_id
+                    AND newest.capture_type = cs.capture_type
+                )
+                LIMIT ?
+            """, (batch_size,))]
+            if not ids:
+                break
+
+            for snapshot_id in ids:
+                raw, stored = self.compress_snapshot(snapshot_id)
+                totals['raw_bytes'] += raw
+                totals['stored_bytes'] += stored
+            self.conn.commit()
+            totals['snapshots'] += len(ids)
+            logger.info(f"Compressed {totals['snapshots']} snapshots")
+        return totals
+
+    def prune_blobs(self) -> int:
+        """Delete blobs no compressed snapshot refers to any more, with their index entries"""
+        if self.has_blob_index():
+            # A contentless index can only drop an entry given its original text
+            rows = self.conn.execute("""
+                SELECT m.fts_id, b.codec, b.data
+                FROM capture_blob_fts_map m
+                JOIN capture_blobs b ON b.content_hash = m.content_hash
+                WHERE m.content_hash NOT IN (
+                    SELECT content_hash FROM capture_snapshots WHERE compressed = 1
+                )
+            """).fetchall()
+            for fts_id, codec, data in rows:
+                self.conn.execute("INSERT INTO capture_blob_fts(capture_blob_fts, rowid, content) "
+                                  "VALUES ('delete', ?, ?)", (fts_id, decompress_content(codec, data)))
+                self.conn.execute("DELETE FROM capture_blob_fts_map WHERE fts_id = ?", (fts_id,))
+
+        cursor = self.conn.execute("""
+            DELETE FROM capture_blobs
+            WHERE content_hash NOT IN (
+                SELECT content_hash FROM capture_snapshots WHERE compressed = 1
+            )
+        """)
+        return cursor.rowcount
+
+    # =========================================================================
+    # Reads
+    # =========================================================================
+
+    def content(self, snapshot_id: int) -> Optional[str]:
+        """Text of any snapshot, inline or compressed"""
+        return self.contents([snapshot_id]).get(snapshot_id)
+
+    def contents(self, snapshot_ids: Iterable[int]) -> Dict[int, str]:
+        """snapshot id -> text for several snapshots, one query per chunk of ids"""
+        snapshot_ids = list(snapshot_ids)
+        if len(snapshot_ids) > _CONTENT_CHUNK:
+            texts = {}
+            for start in range(0, len(snapshot_ids), _CONTENT_CHUNK):
+                texts.update(self.contents(snapshot_ids[start:start + _CONTENT_CHUNK]))
+            return texts
+        if not snapshot_ids:
+            return {}
+        placeholders = ','.join('?' * len(snapshot_ids))
+        if not self.has_blob_storage():
+            return dict(self.conn.execute(
+                f"SELECT id, content FROM capture_snapshots WHERE id IN ({placeholders})", snapshot_ids
+            ).fetchall())
+
+        rows = self.conn.execute(f"""
+            SELECT cs.id, cs.compressed, cs.content, b.codec, b.data
+            FROM capture_snapshots cs
+            LEFT JOIN capture_blobs b ON cs.compressed = 1 AND b.content_hash = cs.content_hash
+            WHERE cs.id IN ({placeholders})
+        """, snapshot_ids).fetchall()
+        return {row[0]: self._text(row[1], row[2], row[3], row[4]) for row in rows}
+
+    @staticmethod
+    def _text(compressed: int, content: Optional[str], codec: Optional[str],
+              data: Optional[bytes]) -> Optional[str]:
+        if not compressed:
+            return content
+        if data is None:
+            logger.error("Compressed snapshot has no blob in capture_blobs")
+            return None
+        return decompress_content(codec, data)
+
+    def has_blob_index(self) -> bool:
+        """True when blob text is indexed in capture_blob_fts"""
+        if not hasattr(self, '_blob_index'):
+            self._blob_index = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'capture_blob_fts'").fetchone() is not None
+        return self._blob_index
+
+    def has_blob_storage(self) -> bool:
+        """False until ensure_schema() has added the compressed column"""
+        if not hasattr(self, '_blobs'):
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(capture_snapshots)")]
+            self._blobs = 'compressed' in columns
+        return self._blobs
+
+    def _with_content(self, rows: List[sqlite3.Row]) -> List[Dict]:
+        """Rows as dicts whose content is decompressed where needed"""
+        resolved = []
+        for row in rows:
+            item = dict(row)
+            compressed = item.pop('compressed', 0)
+            codec = item.pop('blob_codec', None)
+            data = item.pop('blob_data', None)
+            item['content'] = self._text(compressed, item['content'], codec, data)
+            resolved.append(item)
+        return resolved
+
+    def _content_sql(self, with_content: bool) -> Tuple[str, str]:
+        """Select list and join for a snapshot's text (cs.content on unmigrated databases)"""
+        if not with_content:
+            return '', ''
+        if not self.has_blob_storage():
+            return 'cs.content,', ''
+        return ('cs.content, cs.compressed, b.codec as blob_codec, b.data as blob_data,',
+                'LEFT JOIN capture_blobs b ON cs.compressed = 1 AND b.content_hash = cs.content_hash')
+
+    def latest_snapshot_id(self, device_id: int, capture_type: str) -> Optional[int]:
+        try:
+            row = self.conn.execute("""
+                SELECT latest_snapshot_id FROM device_captures_current
+                WHERE device_id = ? AND capture_type = ?
+            """, (device_id, capture_type)).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row and row[0] is not None:
+            return row[0]
+
+        # Pointer not set yet (capture loaded before it existed)
+        row = self.conn.execute("""
+            SELECT id FROM capture_snapshots
+            WHERE device_id = ? AND capture_type = ?
+            ORDER BY captured_at DESC LIMIT 1
+        """, (device_id, capture_type)).fetchone()
+        return row[0] if row else None
+
+    def latest_snapshot(self, device_id: int, capture_type: str,
+                        with_content: bool = True) -> Optional[sqlite3.Row]:
+        """Newest snapshot of one device/capture type with device and site names"""
+        snapshot_id = self.latest_snapshot_id(device_id, capture_type)
+        if snapshot_id is None:
+            return None
+        return self.snapshot(snapshot_id, with_content)
+
+    def snapshot(self, snapshot_id: int, with_content: bool = True) -> Optional[Dict]:
+        content, blob_join = self._content_sql(with_content)
+        row = self.conn.execute(f"""
+            SELECT cs.id, cs.device_id, cs.capture_type, cs.captured_at, cs.file_path,
+                   cs.file_size, cs.content_hash, {content}
+                   d.name as device_name, d.management_ip, s.name as site_name
+            FROM capture_snapshots cs
+            JOIN devices d ON cs.device_id = d.id
+            LEFT JOIN sites s ON d.site_code = s.code
+            {blob_join}
+            WHERE cs.id = ?
+        """, (snapshot_id,)).fetchone()
+        if row is None or not with_content:
+            return row
+        return self._with_content([row])[0]
+
+    def latest_snapshots(self, capture_type: str, device_ids: Sequence[int] = None,
+                         with_content: bool = True) -> List[Dict]:
+        """
+        Newest snapshot of a capture type for every device (or the given devices).
+
+        Rows have id, device_id, device_name, captured_at, file_path and, by
+        default, content.
+        """
+        content, blob_join = self._content_sql(with_content)
+        device_filter = ''
+        params: List = [capture_type]
+        if device_ids:
+            device_filter = f"AND dcc.device_id IN ({','.join('?' * len(device_ids))})"
+            params.extend(device_ids)
+
+        try:
+            rows = self.conn.execute(f"""
+                SELECT cs.id, cs.device_id, cs.captured_at, cs.file_path, {content}
+                       d.name as device_name
+                FROM device_captures_current dcc
+                JOIN capture_snapshots cs ON cs.id = dcc.latest_snapshot_id
+                JOIN devices d ON cs.device_id = d.id
+                {blob_join}
+                WHERE dcc.capture_type = ? {device_filter}
+            """, params).fetchall()
+        except sqlite3.OperationalError:
+            # Database not migrated yet (no latest_snapshot_id column)
+            device_filter = device_filter.replace('dcc.device_id', 'device_id')
+            rows = self.conn.execute(f"""
+                SELECT cs.id, cs.device_id, cs.captured_at, cs.file_path, {content}
+                       d.name as device_name
+                FROM capture_snapshots cs
+                JOIN devices d ON cs.device_id = d.id
+                {blob_join}
+                WHERE cs.id IN (
+                    SELECT MAX(id) FROM capture_snapshots
+                    WHERE capture_type = ? {device_filter}
+                    GROUP BY device_id
+                )
+            """, params).fetchall()
+        return self._with_content(rows) if with_content and self.has_blob_storage() else rows
+
+    def line_index(self, snapshot_id: int) -> Optional[array]:
+        try:
+            row = self.conn.execute(
+                "SELECT offsets FROM capture_line_index WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return unpack_offsets(row[0]) if row else None
+
+    def line_count(self, snapshot_id: int) -> Optional[int]:
+        try:
+            row = self.conn.execute(
+                "SELECT line_count FROM capture_line_index WHERE snapshot_id = ?", (snapshot_id,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def get_lines(self, snapshot_id: int, first: int, last: int) -> List[str]:
+        """
+        Lines first..last (1-based, inclusive) of a snapshot.
+
+        With a line index only that slice of an inline snapshot leaves
+        SQLite; compressed snapshots, and those without an index, are read
+        whole and split.
+        """
+        first = max(1, first)
+        offsets = self.line_index(snapshot_id)
+
+        if offsets is None or self._is_compressed(snapshot_id):
+            content = self.content(snapshot_id)
+            if content is None:
+                return []
+            return content.split('\n')[first - 1:last]
+
+        if first > len(offsets) or last < first:
+            return []
+        last = min(last, len(offsets))
+
+        start = offsets[first - 1]
+        if last < len(offsets):
+            # Up to, not including, the newline ending the last line
+            length = offsets[last] - 1 - start
+            row = self.conn.execute("SELECT substr(content, ?, ?) FROM capture_snapshots WHERE id = ?",
+                                    (start + 1, length, snapshot_id)).fetchone()
+        else:
+            row = self.conn.execute("SELECT substr(content, ?) FROM capture_snapshots WHERE id = ?",
+                                    (start + 1, snapshot_id)).fetchone()
+        return row[0].split('\n') if row and row[0] is not None else []
+
+    def _is_compressed(self, snapshot_id: int) -> bool:
+        if not self.has_blob_storage():
+            return False
+        row = self.conn.execute("SELECT compressed FROM capture_snapshots WHERE id = ?",
+                                (snapshot_id,)).fetchone()
+        return bool(row and row[0])
+
+    def line_window(self, snapshot_id: int, line_number: int, context: int = 50) -> Dict:
+        """Lines around line_number for viewers that jump to a search hit"""
+        first = max(1, line_number - context)
+        lines = self.get_lines(snapshot_id, first, line_number + context)
+        return {
+            'first_line': first,
+            'lines': lines,
+            'total_lines': self.line_count(snapshot_id),
+        }
+
+
+if __name__ == '__main__':
+    from pathlib import Path
+
+    logging.basicConfig(level=logging.INFO)
+    data_dir = Path(sys.argv[1] if len(sys.argv) > 1 else '~/.velocitycmdb/data').expanduser()
+    conn = sqlite3.connect(str(data_dir / 'assets.db'))
+
+    if not CaptureStore.ensure_schema(conn):
+        CaptureStore.backfill_latest_pointers(conn)
+    conn.commit()
+    print(f"Line-indexed {CaptureStore(conn).backfill_line_index()} snapshots")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Change Detection
+Noise filtering, line diff and severity classification for tracked captures
+
+Noise lines are dropped with one precompiled alternation instead of ten
+re.match calls per line. Lines are interned to integers and diffed with
+patience anchoring (lines unique to both sides) and a bounded Myers O(ND)
+search between anchors, so a 100k-line config with a handful of changes
+costs a few linear passes rather than difflib's quadratic worst case.
+
+The unified diff text, added/removed counts, severity and uptime-only
+classification all come out of one walk over the diff.
+"""
+
+import logging
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Capture types that get change tracking (all get stored as snapshots)
+CHANGE_TRACKED_TYPES = {'configs', 'version', 'inventory'}
+
+# Timestamps and dynamic banners. Matched against the raw line; the leading
+# \s* stands in for the strip() each pattern used to be applied after.
+NOISE_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'Last login:'
+    r'|! Last configuration change at'
+    r'|Building configuration'
+    r'|Current configuration : \d+ bytes\s*$'
+    r'|! NVRAM config last updated'
+    r'|!\s*Time:'
+    r')'
+    r'|ntp clock-period'  # NTP drift compensation
+    r'|Your previous successful login'
+    r'|was on \d{4}-\d{2}-\d{2}'
+    r'|from \d+\.\d+\.\d+\.\d+'
+)
+
+# Three or more line breaks with only whitespace between them
+BLANK_RUN_PATTERN = re.compile(r'\n\s*\n\s*\n')
+
+# Changed lines that only reflect uptime/memory stats in 'show version'
+UPTIME_KEYWORDS = ('uptime:', 'uptime ', 'free memory:', 'total memory:',
+                   'last reboot', 'system time:', 'current time:', 'processor load')
+
+# Lines of context around each hunk (as diff -u)
+CONTEXT_LINES = 3
+
+# Edit distance at which Myers gives up on a region without unique lines and
+# reports it as replaced wholesale
+MAX_EDIT_DISTANCE = 256
+
+# (a_start, b_start, length) of a run of equal lines
+Block = Tuple[int, int, int]
+
+
+@dataclass
+class ChangeSummary:
+    """Result of comparing two captures"""
+    diff: str
+    lines_added: int
+    lines_removed: int
+    severity: str
+    uptime_only: bool
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.diff)
+
+
+class ChangeDetector:
+    """Compares two captures of one device/capture type"""
+
+    def __init__(self, tracked_types: Sequence[str] = None, context: int = CONTEXT_LINES,
+                 max_edit_distance: int = MAX_EDIT_DISTANCE):
+        self.tracked_types = set(tracked_types or CHANGE_TRACKED_TYPES)
+        self.context = context
+        self.max_edit_distance = max_edit_distance
+
+    # =========================================================================
+    # Public API
+    # =========================================================================
+
+    def normalize(self, content: str, capture_type: str) -> str:
+        """Remove noise/dynamic content before generating diffs"""
+        if capture_type not in self.tracked_types:
+            return content
+
+        search = NOISE_PATTERN.search
+        result = '\n'.join([line for line in content.splitlines() if not search(line)])
+        return BLANK_RUN_PATTERN.sub('\n\n', result).strip()
+
+    def compare(self, old_content: str, new_content: str, capture_type: str = 'configs') -> ChangeSummary:
+        """
+        Diff two captures after noise filtering and classify the change.
+
+        Returns:
+            ChangeSummary whose diff is empty when nothing meaningful changed
+        """
+        old_lines = self.normalize(old_content, capture_type).splitlines()
+        new_lines = self.normalize(new_content, capture_type).splitlines()
+
+        output = []
+        added = removed = 0
+        uptime_only = True
+
+        for tag, line in self._unified(old_lines, new_lines):
+            output.append(tag + line)
+            if tag == ' ' or not tag:
+                continue
+            if tag == '+':
+                added += 1
+            else:
+                removed += 1
+            if uptime_only:
+                lower_line = line.lower()
+                uptime_only = any(keyword in lower_line for keyword in UPTIME_KEYWORDS)
+
+        diff = '\n'.join(output) + '\n' if output else ''
+        return ChangeSummary(
+            diff=diff,
+            lines_added=added,
+            lines_removed=removed,
+            severity=self.severity(capture_type, added, removed, uptime_only),
+            uptime_only=uptime_only and bool(output),
+        )
+
+    @staticmethod
+    def severity(capture_type: str, lines_added: int, lines_removed: int, uptime_only: bool) -> str:
+        """Classify change severity based on capture type and diff size"""
+        total_changes = lines_added + lines_removed
+
+        # Critical: large config changes
+        if capture_type == 'configs' and total_changes > 50:
+            return 'critical'
+
+        # Version changes: uptime/memory stats are minor, firmware changes critical
+        if capture_type == 'version':
+            return 'minor' if uptime_only else 'critical'
+
+        # Moderate: any config change
+        if capture_type == 'configs' and total_changes > 0:
+            return 'moderate'
+
+        # Moderate: inventory changes (hardware swap)
+        if capture_type == 'inventory' and total_changes > 5:
+            return 'moderate'
+
+        return 'minor'
+
+    # =========================================================================
+    # Diff
+    # =========================================================================
+
+    def matching_blocks(self, a: Sequence[int], b: Sequence[int]) -> List[Block]:
+        """
+        Runs of equal items as (i, j, n), ascending and merged, ending with
+        the (len(a), len(b), 0) sentinel like SequenceMatcher.
+        """
+        blocks: List[Block] = []
+        regions = [(0, len(a), 0, len(b))]
+
+        while regions:
+            alo, ahi, blo, bhi = regions.pop()
+
+            # Common prefix and suffix
+            i, j = alo, blo
+            while i < ahi and j < bhi and a[i] == b[j]:
+                i += 1
+                j += 1
+            if i > alo:
+                blocks.append((alo, blo, i - alo))
+            alo, blo = i, j
+
+            i, j = ahi, bhi
+            while i > alo and j > blo and a[i - 1] == b[j - 1]:
+                i -= 1
+                j -= 1
+            if i < ahi:
+                blocks.append((i, j, ahi - i))
+            ahi, bhi = i, j
+
+            if alo == ahi or blo == bhi:
+                continue
+
+            anchors, shared = self._unique_anchors(a, alo, ahi, b, blo, bhi)
+            if anchors:
+                for i, j in anchors:
+                    regions.append((alo, i, blo, j))
+                    blocks.append((i, j, 1))
+                    alo, blo = i + 1, j + 1
+                regions.append((alo, ahi, blo, bhi))
+            elif (ahi - alo) + (bhi - blo) - 2 * shared <= self.max_edit_distance:
+                # Only worth searching if enough lines are shared to stay under the cap
+                blocks.extend(self._myers(a, alo, ahi, b, blo, bhi))
+
+        blocks.sort()
+        merged: List[Block] = []
+        for i, j, n in blocks:
+            if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+                pi, pj, pn = merged[-1]
+                merged[-1] = (pi, pj, pn + n)
+            else:
+                merged.append((i, j, n))
+        merged.append((len(a), len(b), 0))
+        return merged
+
+    @staticmethod
+    def _unique_anchors(a: Sequence[int], alo: int, ahi: int,
+                        b: Sequence[int], blo: int, bhi: int) -> Tuple[List[Tuple[int, int]], int]:
+        """
+        Longest increasing run of lines that occur exactly once on both
+        sides, plus how many lines the two sides share counting repeats (an
+        upper bound on the lines any diff of the region can keep).
+        """
+        a_index: Dict[int, int] = {}
+        a_count: Dict[int, int] = {}
+        for i in range(alo, ahi):
+            line = a[i]
+            a_index[line] = -1 if line in a_index else i
+            a_count[line] = a_count.get(line, 0) + 1
+        b_index: Dict[int, int] = {}
+        shared = 0
+        for j in range(blo, bhi):
+            line = b[j]
+            if line in a_index:
+                b_index[line] = -1 if line in b_index else j
+                if a_count[line]:
+                    a_count[line] -= 1
+                    shared += 1
+
+        pairs = [(a_index[line], j) for line, j in b_index.items() if j >= 0 and a_index[line] >= 0]
+        if not pairs:
+            return [], shared
+        pairs.sort()
+
+        # Patience sorting: longest increasing subsequence of b positions
+        tails: List[int] = []
+        tail_index: List[int] = []
+        previous = [-1] * len(pairs)
+        for n, (_, j) in enumerate(pairs):
+            k = bisect_left(tails, j)
+            if k == len(tails):
+                tails.append(j)
+                tail_index.append(n)
+            else:
+                tails[k] = j
+                tail_index[k] = n
+            previous[n] = tail_index[k - 1] if k else -1
+
+        anchors = []
+        n = tail_index[-1]
+        while n != -1:
+            anchors.append(pairs[n])
+            n = previous[n]
+        anchors.reverse()
+        return anchors, shared
+
+    def _myers(self, a: Sequence[int], alo: int, ahi: int,
+               b: Sequence[int], blo: int, bhi: int) -> List[Block]:
+        """Shortest edit script for a region, as matching blocks (none past the distance cap)"""
+        n, m = ahi - alo, bhi - blo
+        v = {1: 0}
+        trace = []
+
+        for d in range(min(n + m, self.max_edit_distance) + 1):
+            current = {}
+            for k in range(-d, d + 1, 2):
+                if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                    x = v[k + 1]
+                else:
+                    x = v[k - 1] + 1
+                y = x - k
+                while x < n and y < m and a[alo + x] == b[blo + y]:
+                    x += 1
+                    y += 1
+                current[k] = x
+                if x >= n and y >= m:
+                    trace.append(current)
+                    return self._myers_blocks(trace, n, m, alo, blo)
+            trace.append(current)
+            v = current
+
+        logger.debug(f"Diff region {n}x{m} exceeds edit distance {self.max_edit_distance}; "
+                     f"reporting it as replaced")
+        return []
+
+    @staticmethod
+    def _myers_blocks(trace: List[Dict[int, int]], n: int, m: int, alo: int, blo: int) -> List[Block]:
+        blocks = []
+        x, y = n, m
+        for d in range(len(trace) - 1, -1, -1):
+            k = x - y
+            if d == 0:
+                prev_x = prev_y = 0
+            else:
+                v = trace[d - 1]
+                prev_k = k + 1 if k == -d or (k != d and v[k - 1] < v[k + 1]) else k - 1
+                prev_x = v[prev_k]
+                prev_y = prev_x - prev_k
+            # Diagonal (matching) run after the edit that reached this step
+            start_x = prev_x if d == 0 else (prev_x if prev_k == k + 1 else prev_x + 1)
+            start_y = start_x - k
+            if x > start_x:
+                blocks.append((alo + start_x, blo + start_y, x - start_x))
+            x, y = prev_x, prev_y
+        return blocks
+
+    def _unified(self, old_lines: List[str], new_lines: List[str]) -> Iterator[Tuple[str, str]]:
+        """(tag, text) for every line of a unified diff; file and hunk headers have no tag"""
+        ids: Dict[str, int] = {}
+        a = [ids.setdefault(line, len(ids)) for line in old_lines]
+        b = [ids.setdefault(line, len(ids)) for line in new_lines]
+
+        groups = self._grouped_opcodes(self.matching_blocks(a, b))
+        first = True
+        for group in groups:
+            if first:
+                yield '', '--- previous'
+                yield '', '+++ current'
+                first = False
+            i1, i2, j1, j2 = group[0][1], group[-1][2], group[0][3], group[-1][4]
+            yield '', f"@@ -{_format_range(i1, i2)} +{_format_range(j1, j2)} @@"
+            for tag, a1, a2, b1, b2 in group:
+                if tag == 'equal':
+                    for line in old_lines[a1:a2]:
+                        yield ' ', line
+                    continue
+                for line in old_lines[a1:a2]:
+                    yield '-', line
+                for line in new_lines[b1:b2]:
+                    yield '+', line
+
+    def _grouped_opcodes(self, blocks: List[Block]) -> Iterator[List[Tuple[str, int, int, int, int]]]:
+        """Hunks of opcodes with context lines, as SequenceMatcher.get_grouped_opcodes"""
+        codes = []
+        i = j = 0
+        for ai, bj, size in blocks:
+            if i < ai or j < bj:
+                codes.append(('replace' if i < ai and j < bj else 'delete' if i < ai else 'insert',
+                              i, ai, j, bj))
+            if size:
+                codes.append(('equal', ai, ai + size, bj, bj + size))
+            i, j = ai + size, bj + size
+
+        if not any(code[0] != 'equal' for code in codes):
+            return
+
+        n = self.context
+        # Trim leading and trailing context
+        if codes[0][0] == 'equal':
+            tag, i1, i2, j1, j2 = codes[0]
+            codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+        if codes[-1][0] == 'equal':
+            tag, i1, i2, j1, j2 = codes[-1]
+            codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+        group = []
+        for tag, i1, i2, j1, j2 in codes:
+            # Split a long equal run into end-of-hunk and start-of-next context
+            if tag == 'equal' and i2 - i1 > n * 2:
+                group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+                yield group
+                group = []
+                i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+            group.append((tag, i1, i2, j1, j2))
+        if group and not (len(group) == 1 and group[0][0] == 'equal'):
+            yield group
+
+
+def _format_range(start: int, stop: int) -> str:
+    """Unified diff range: 'start,length' (1-based), bare 'start' for one line"""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return str(beginning)
+    if not length:
+        beginning -= 1
+    return f'{beginning},{length}'
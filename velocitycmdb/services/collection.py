@@ -33,6 +33,12 @@ except ImportError:
         get_job_file_path
     )
 
+try:
+    from .script_env import script_env
+except ImportError:
+    # Fallback for when running as script
+    from script_env import script_env
+
 
 class CollectionOrchestrator:
     """
@@ -87,7 +93,11 @@ class CollectionOrchestrator:
             capture_types: List of capture types ['configs', 'arp', 'mac']
             credentials: {'username': 'admin', 'password': 'yourpass'}
             device_filters: {'vendor': 'Cisco', 'site': '', 'name': ''}
-            options: {'max_workers': 12, 'auto_load_db': True}
+            options: {'max_workers': 12, 'auto_load_db': True,
+                      'device_sessions': False,   # True: one in-process SSH session per device
+                      'site_concurrency': None,   # per-site session cap (device_sessions only)
+                      'adaptive_timeouts': True,  # order/timeouts from latency history in assets.db
+                      'device_retries': 1}        # end-of-run retries for transient failures
             progress_callback: Function(dict) for real-time updates
 
         Returns:
@@ -127,22 +137,38 @@ class CollectionOrchestrator:
 
             logger.info(f"Generated sessions file: {sessions_file}")
 
-            # Step 1: Create job list with password auth
-            job_list_file = self._create_job_list(
-                capture_types=capture_types,
-                device_filters=device_filters,
-                sessions_file=sessions_file,
-                credentials=credentials
-            )
+            if options.get('device_sessions'):
+                # Steps 1-2: every capture type per device over one SSH session
+                plans = self._create_session_plans(
+                    capture_types=capture_types,
+                    device_filters=device_filters
+                )
 
-            logger.info(f"Created job list: {job_list_file}")
+                result = self._execute_device_sessions(
+                    sessions_file=sessions_file,
+                    plans=plans,
+                    credentials=credentials,
+                    options=options,
+                    progress_callback=progress_callback
+                )
+            else:
+                # Step 1: Create job list with password auth
+                job_list_file = self._create_job_list(
+                    capture_types=capture_types,
+                    device_filters=device_filters,
+                    sessions_file=sessions_file,
+                    credentials=credentials
+                )
 
-            # Step 2: Execute via run_jobs_batch.py
-            result = self._execute_job_batch(
-                job_list_file=job_list_file,
-                credentials=credentials,
-                progress_callback=progress_callback
-            )
+                logger.info(f"Created job list: {job_list_file}")
+
+                # Step 2: Execute via run_jobs_batch.py
+                result = self._execute_job_batch(
+                    job_list_file=job_list_file,
+                    credentials=credentials,
+                    progress_callback=progress_callback,
+                    options=options
+                )
 
             # Step 3: Load to database if requested
             # Always attempt db_load if enabled - _load_to_database handles missing dirs gracefully
@@ -308,20 +334,7 @@ class CollectionOrchestrator:
         job_files = []
 
         # Determine which vendors to include based on filter
-        if vendor_filter:
-            # Map common vendor names to job file vendor names
-            vendor_map = {
-                'cisco': ['cisco-ios', 'cisco-nxos'],
-                'arista': ['arista'],
-                'juniper': ['juniper'],
-                'cisco-ios': ['cisco-ios'],
-                'cisco-nxos': ['cisco-nxos']
-            }
-            vendors_to_process = vendor_map.get(vendor_filter.lower(), [vendor_filter.lower()])
-            logger.info(f"Vendor filter '{vendor_filter}' mapped to: {vendors_to_process}")
-        else:
-            vendors_to_process = ['arista', 'cisco-ios', 'cisco-nxos', 'juniper']
-            logger.info(f"No vendor filter - processing all vendors: {vendors_to_process}")
+        vendors_to_process = self._vendors_for_filter(vendor_filter)
 
         # Process each capture type
         for capture_type in capture_types:
@@ -377,6 +390,24 @@ class CollectionOrchestrator:
         logger.info(f"✓ Created job list with {len(job_files)} jobs: {job_list_path}")
         return job_list_path
 
+    def _vendors_for_filter(self, vendor_filter: str) -> List[str]:
+        """Job file vendor names for a device vendor filter"""
+        if vendor_filter:
+            # Map common vendor names to job file vendor names
+            vendor_map = {
+                'cisco': ['cisco-ios', 'cisco-nxos'],
+                'arista': ['arista'],
+                'juniper': ['juniper'],
+                'cisco-ios': ['cisco-ios'],
+                'cisco-nxos': ['cisco-nxos']
+            }
+            vendors_to_process = vendor_map.get(vendor_filter.lower(), [vendor_filter.lower()])
+            logger.info(f"Vendor filter '{vendor_filter}' mapped to: {vendors_to_process}")
+        else:
+            vendors_to_process = ['arista', 'cisco-ios', 'cisco-nxos', 'juniper']
+            logger.info(f"No vendor filter - processing all vendors: {vendors_to_process}")
+        return vendors_to_process
+
     def _update_job_for_password_auth(self,
                                       job_file: Path,
                                       sessions_file: Path,
@@ -458,13 +489,8 @@ class CollectionOrchestrator:
         logger.debug(f"Updated {job_file.name}: PASSWORD AUTH, prompt_count={correct_prompt_count}, output_dir={job_data.get('commands', {}).get('output_directory', 'NOT SET')}")
         return temp_job_file
 
-    def _execute_job_batch(self,
-                          job_list_file: Path,
-                          credentials: Dict,
-                          progress_callback: Optional[Callable] = None) -> Dict:
-        """Execute run_jobs_batch.py with password credentials"""
-
-        # Set credentials as environment variables
+    def _credential_env(self, credentials: Dict) -> Dict[str, str]:
+        """Environment for the collection runners: CRED_<id>_USER/PASS and PYSSH_KEY"""
         env = os.environ.copy()
         env['CRED_1_USER'] = credentials['username']
         env['CRED_1_PASS'] = credentials['password']
@@ -480,18 +506,234 @@ class CollectionOrchestrator:
             logger.info(f"Set PYSSH_KEY={credentials['ssh_key_path']}")
         else:
             logger.info("DEBUG: No ssh_key_path in credentials")
+        return env
+
+    def _execute_job_batch(self,
+                          job_list_file: Path,
+                          credentials: Dict,
+                          progress_callback: Optional[Callable] = None,
+                          options: Dict = None) -> Dict:
+        """Execute run_jobs_batch.py with password credentials"""
+        options = options or {}
+
+        # Set credentials as environment variables
+        env = self._credential_env(credentials)
+
         # Build command
         cmd = [
             sys.executable,
             str(self.run_jobs_batch_script),
             str(job_list_file),
             '--json-progress',
-            '--jobs-folder', str(self.jobs_source_dir)
+            '--jobs-folder', str(self.jobs_source_dir),
+            '--device-retries', str(options.get('device_retries', 1))
         ]
 
+        history_db = self._latency_history_db(options)
+        if history_db:
+            cmd.extend(['--history-db', str(history_db)])
+
         logger.info(f"Executing: {' '.join(cmd)}")
         logger.info(f"Authentication: PASSWORD (user={credentials['username']})")
 
+        return self._run_progress_process(cmd, env, progress_callback)
+
+    def _latency_history_db(self, options: Dict) -> Optional[Path]:
+        """assets.db for collection latency history, when adaptive timeouts are on"""
+        db_path = self.data_dir / 'assets.db'
+        if options.get('adaptive_timeouts', True) and db_path.exists():
+            return db_path
+        return None
+
+    def _create_session_plans(self, capture_types: List[str], device_filters: Dict[str, str]) -> Dict:
+        """
+        Per-platform session plans (vendor -> SessionPlan) for CollectionEngine
+
+        Commands come from the same job files as _create_job_list; their
+        leading setup commands (enable, paging off) are collected to run once
+        per session.
+        """
+        from velocitycmdb.pcng.device_session import SessionPlan
+
+        plans = {}
+
+        for vendor in self._vendors_for_filter(device_filters.get('vendor', '')):
+            plan = SessionPlan(vendor)
+            for capture_type in capture_types:
+                mapping = CAPTURE_TYPE_MAPPINGS.get(capture_type)
+                if not mapping or vendor not in mapping['vendors']:
+                    continue
+
+                job_file = get_job_file_path(capture_type, vendor, self.jobs_source_dir)
+                if not job_file.exists():
+                    logger.warning(f"Job file not found: {job_file}")
+                    continue
+
+                with open(job_file) as f:
+                    commands = json.load(f).get('commands', {})
+                output_dir = Path(commands.get('output_directory') or mapping['output_dir']).name
+                plan.add_capture(capture_type, output_dir, commands.get('command_text', ''))
+
+            if plan.captures:
+                plans[vendor] = plan
+                logger.info(f"Session plan for {vendor}: setup={plan.setup}, "
+                            f"captures={[capture.capture_type for capture in plan.captures]}")
+
+        if not plans:
+            raise ValueError(f"No job files found for capture types: {capture_types}")
+
+        return plans
+
+    def _execute_device_sessions(self,
+                                 sessions_file: Path,
+                                 plans: Dict,
+                                 credentials: Dict,
+                                 options: Dict,
+                                 progress_callback: Optional[Callable] = None) -> Dict:
+        """
+        Collect every device in-process: one SSH session per device for all
+        capture types, driven by CollectionEngine instead of a runner subprocess
+        """
+        from velocitycmdb.pcng.collection_engine import CollectionEngine, load_session_devices
+        from velocitycmdb.pcng.collection_scheduler import CollectionScheduler, LatencyHistory
+
+        devices = load_session_devices(str(sessions_file))
+        history_db = self._latency_history_db(options)
+        key_file = str(credentials['ssh_key_path']) if credentials.get('ssh_key_path') else None
+        session_creds = {
+            'username': credentials['username'],
+            'password': credentials.get('password') or None,
+            'key_file': key_file,
+        }
+
+        engine = CollectionEngine(
+            plans,
+            self.capture_dir,
+            max_connections=options.get('max_workers', 12),
+            site_limit=options.get('site_concurrency'),
+            site_limits=options.get('site_limits'),
+            credentials=lambda device: session_creds,
+            log_dir=self.jobs_dir / 'logs',
+            scheduler=CollectionScheduler(
+                LatencyHistory(history_db) if history_db else None,
+                'session',
+                default_expect_prompt_timeout=60000,
+                max_retries=options.get('device_retries', 1)
+            )
+        )
+
+        logger.info(f"Collecting {len(devices)} devices in-process "
+                    f"(user={credentials['username']}, max_connections={engine.max_connections}, "
+                    f"site_limit={engine.site_limit or 'none'})")
+
+        tracker = self._progress_tracker()
+        try:
+            engine.run(devices, on_event=lambda event: self._handle_progress_event(
+                event, tracker, progress_callback))
+        except Exception as e:
+            logger.exception("Device session collection failed")
+            return {
+                'success': False,
+                'error': str(e),
+                'devices_succeeded': 0,
+                'devices_failed': 0,
+                'failed_devices': []
+            }
+
+        return {
+            'success': tracker['failed_jobs'] == 0,
+            'total_jobs': tracker['total_jobs'],
+            'devices_succeeded': tracker['successful_jobs'],
+            'devices_failed': tracker['failed_jobs'],
+            'failed_devices': tracker['failed_devices'],
+            'critical_path': tracker['critical_path'],
+            'captures_created': {}
+        }
+
+    @staticmethod
+    def _progress_tracker() -> Dict:
+        return {'total_jobs': 0, 'successful_jobs': 0, 'failed_jobs': 0, 'failed_devices': [],
+                'critical_path': None}
+
+    def _handle_progress_event(self,
+                               data: Dict,
+                               tracker: Dict,
+                               progress_callback: Optional[Callable] = None):
+        """Apply one runner progress event (JSON line or engine event) to the tracker"""
+        msg_type = data.get('type')
+
+        if msg_type == 'device_start':
+            # Device started processing
+            if progress_callback:
+                progress_callback({
+                    'stage': 'collecting',
+                    'message': f"▶ Starting {data.get('device_name')}...",
+                    'device_name': data.get('device_name'),
+                    'device_started': data.get('device_name'),
+                    'ip_address': data.get('ip_address')
+                })
+
+        elif msg_type == 'device_complete':
+            # Device completed (success or failure)
+            device_name = data.get('device_name')
+            success = data.get('success', False)
+            message = data.get('message', '')
+
+            if not success:
+                tracker['failed_devices'].append({
+                    'name': device_name,
+                    'error': message
+                })
+            else:
+                # A later retry that succeeded clears the earlier failure
+                tracker['failed_devices'] = [failed for failed in tracker['failed_devices']
+                                             if failed['name'] != device_name]
+
+            if progress_callback:
+                status = '✓' if success else '✗'
+                progress_callback({
+                    'stage': 'collecting',
+                    'message': f"{status} {device_name}",
+                    'device_name': device_name,
+                    'device_completed': device_name,
+                    'device_success': success,
+                    'device_message': message
+                })
+
+        elif msg_type == 'job_start':
+            if progress_callback:
+                progress_callback({
+                    'stage': 'collecting',
+                    'message': f"Starting {data.get('job_name')}...",
+                    'progress': data.get('percent', 0)
+                })
+
+        elif msg_type == 'job_complete':
+            success = data.get('success', False)
+            if success:
+                tracker['successful_jobs'] += 1
+            else:
+                tracker['failed_jobs'] += 1
+
+            if progress_callback:
+                status = '✓' if success else '✗'
+                progress_callback({
+                    'stage': 'collecting',
+                    'message': f"{status} {data.get('job_name')}",
+                    'progress': data.get('percent', 0)
+                })
+
+        elif msg_type == 'summary':
+            tracker['total_jobs'] = data.get('total_jobs', 0)
+            tracker['successful_jobs'] = data.get('successful_jobs', 0)
+            tracker['failed_jobs'] = data.get('failed_jobs', 0)
+            tracker['critical_path'] = data.get('critical_path')
+
+    def _run_progress_process(self,
+                              cmd: List[str],
+                              env: Dict[str, str],
+                              progress_callback: Optional[Callable] = None) -> Dict:
+        """Run a collection runner and relay its JSON progress lines"""
         try:
             process = subprocess.Popen(
                 cmd,
@@ -504,11 +746,7 @@ class CollectionOrchestrator:
                 cwd=str(self.pcng_dir)
             )
 
-            # Track results
-            total_jobs = 0
-            successful_jobs = 0
-            failed_jobs = 0
-            failed_devices = []
+            tracker = self._progress_tracker()
 
             # Parse JSON progress output
             for line in iter(process.stdout.readline, ''):
@@ -517,71 +755,7 @@ class CollectionOrchestrator:
                     logger.info(f"BATCH: {line}")
 
                     try:
-                        data = json.loads(line)
-                        msg_type = data.get('type')
-
-                        if msg_type == 'device_start':
-                            # Device started processing
-                            if progress_callback:
-                                progress_callback({
-                                    'stage': 'collecting',
-                                    'message': f"▶ Starting {data.get('device_name')}...",
-                                    'device_name': data.get('device_name'),
-                                    'device_started': data.get('device_name'),
-                                    'ip_address': data.get('ip_address')
-                                })
-
-                        elif msg_type == 'device_complete':
-                            # Device completed (success or failure)
-                            device_name = data.get('device_name')
-                            success = data.get('success', False)
-                            message = data.get('message', '')
-
-                            if not success:
-                                failed_devices.append({
-                                    'name': device_name,
-                                    'error': message
-                                })
-
-                            if progress_callback:
-                                status = '✓' if success else '✗'
-                                progress_callback({
-                                    'stage': 'collecting',
-                                    'message': f"{status} {device_name}",
-                                    'device_name': device_name,
-                                    'device_completed': device_name,
-                                    'device_success': success,
-                                    'device_message': message
-                                })
-
-                        elif msg_type == 'job_start':
-                            if progress_callback:
-                                progress_callback({
-                                    'stage': 'collecting',
-                                    'message': f"Starting {data.get('job_name')}...",
-                                    'progress': data.get('percent', 0)
-                                })
-
-                        elif msg_type == 'job_complete':
-                            success = data.get('success', False)
-                            if success:
-                                successful_jobs += 1
-                            else:
-                                failed_jobs += 1
-
-                            if progress_callback:
-                                status = '✓' if success else '✗'
-                                progress_callback({
-                                    'stage': 'collecting',
-                                    'message': f"{status} {data.get('job_name')}",
-                                    'progress': data.get('percent', 0)
-                                })
-
-                        elif msg_type == 'summary':
-                            total_jobs = data.get('total_jobs', 0)
-                            successful_jobs = data.get('successful_jobs', 0)
-                            failed_jobs = data.get('failed_jobs', 0)
-
+                        self._handle_progress_event(json.loads(line), tracker, progress_callback)
                     except json.JSONDecodeError:
                         # Regular log line - look for device results
                         if '[SUCCESS]' in line:
@@ -598,16 +772,17 @@ class CollectionOrchestrator:
                             match = re.search(r'\[(FAILED|ERROR)\] ([^\s]+)', line)
                             if match:
                                 device_name = match.group(2)
-                                failed_devices.append({'name': device_name, 'error': 'Failed'})
+                                tracker['failed_devices'].append({'name': device_name, 'error': 'Failed'})
 
             return_code = process.wait(timeout=30)
 
             return {
                 'success': return_code == 0,
-                'total_jobs': total_jobs,
-                'devices_succeeded': successful_jobs,
-                'devices_failed': failed_jobs,
-                'failed_devices': failed_devices,
+                'total_jobs': tracker['total_jobs'],
+                'devices_succeeded': tracker['successful_jobs'],
+                'devices_failed': tracker['failed_jobs'],
+                'failed_devices': tracker['failed_devices'],
+                'critical_path': tracker['critical_path'],
                 'captures_created': {}
             }
 
@@ -685,7 +860,8 @@ class CollectionOrchestrator:
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=600
+                timeout=600,
+                env=script_env()
             )
 
             if result.returncode == 0:
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Coverage Matrix
+In-memory device x capture type coverage, one bitset per device
+
+The matrix comes from device_captures_current (one row per device per
+capture type) joined to device_status_summary in a single query, instead of
+a COUNT against capture_snapshots for every device and capture type. Bit i
+of a device's mask is set when it has a current capture of capture_types[i];
+per-type totals are popcounts taken once at build time.
+
+The matrix is built once per assets.db and shared process-wide; it rebuilds
+itself when the database's data version has moved, or captures have been
+loaded or devices changed, since it was built.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from velocitycmdb.db.data_version import get_data_token
+
+logger = logging.getLogger(__name__)
+
+
+class CoverageMatrix:
+    """Capture coverage for every device that has at least one current capture"""
+
+    _instances: Dict[str, 'CoverageMatrix'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self):
+        self.capture_types: List[str] = []
+        # Devices in name order: id, name, normalized_name, site_code, site_name, vendor_name, model
+        self.devices: List[Dict] = []
+        # device_id -> bitset over capture_types
+        self.masks: Dict[int, int] = {}
+        # capture_type -> number of devices with a current capture of it
+        self.type_counts: Dict[str, int] = {}
+        self.built_at = None
+        self.build_seconds = 0.0
+        self.token = None
+
+    # =========================================================================
+    # Process-wide instances
+    # =========================================================================
+
+    @classmethod
+    def for_database(cls, assets_db_path: str) -> 'CoverageMatrix':
+        """
+        Shared matrix for an assets.db, rebuilt when its captures have changed.
+
+        Args:
+            assets_db_path: Path to assets.db
+
+        Returns:
+            Up-to-date CoverageMatrix
+        """
+        token = cls._current_token(assets_db_path)
+
+        with cls._instances_lock:
+            matrix = cls._instances.get(assets_db_path)
+            if matrix is not None and matrix.token == token:
+                return matrix
+
+            matrix = cls()
+            matrix.token = token
+            matrix._build(assets_db_path)
+            cls._instances[assets_db_path] = matrix
+            return matrix
+
+    @classmethod
+    def invalidate(cls, assets_db_path: str = None):
+        """Drop the cached matrix for one database, or for all of them"""
+        with cls._instances_lock:
+            if assets_db_path is None:
+                cls._instances.clear()
+            else:
+                cls._instances.pop(assets_db_path, None)
+
+    @staticmethod
+    def _current_token(assets_db_path: str) -> Tuple:
+        """
+        Cheap change marker for the coverage data.
+
+        The database's data token moves with every loader run and every
+        data-editing web request, including site, vendor, role and device
+        type renames that rewrite summary rows in place. The aggregates
+        still catch writers that do not bump it: a capture load inserts or
+        updates device_captures_current rows, moving their count, highest
+        id or newest capture_timestamp; device adds, deletes and fingerprint
+        loads move the summary's count, highest id or newest last_updated.
+        Each aggregate is an index lookup.
+        """
+        conn = sqlite3.connect(assets_db_path)
+        try:
+            data_token = get_data_token(conn)
+            captures = conn.execute("""
+                SELECT COUNT(*), MAX(id), MAX(capture_timestamp), MAX(latest_snapshot_id)
+                FROM device_captures_current
+            """).fetchone()
+            devices = conn.execute("""
+                SELECT COUNT(*), MAX(id), MAX(COALESCE(last_updated, ''))
+                FROM device_status_summary
+            """).fetchone()
+            return tuple(data_token) + tuple(captures) + tuple(devices)
+        finally:
+            conn.close()
+
+    def _build(self, assets_db_path: str):
+        started = time.perf_counter()
+        pairs = []
+
+        conn = sqlite3.connect(assets_db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute("""
+                SELECT d.id, d.name, d.normalized_name, d.site_code, d.site_name,
+                       d.vendor_name, d.model, dcc.capture_type
+                FROM device_captures_current dcc
+                JOIN device_status_summary d ON d.id = dcc.device_id
+                ORDER BY d.name, d.id
+            """)
+            seen = set()
+            for row in cursor:
+                device_id = row['id']
+                if device_id not in seen:
+                    seen.add(device_id)
+                    self.devices.append({
+                        'id': device_id,
+                        'name': row['name'],
+                        'normalized_name': row['normalized_name'],
+                        'site_code': row['site_code'],
+                        'site_name': row['site_name'],
+                        'vendor_name': row['vendor_name'],
+                        'model': row['model'],
+                    })
+                pairs.append((device_id, row['capture_type']))
+        finally:
+            conn.close()
+
+        self.capture_types = sorted({capture_type for _, capture_type in pairs})
+        bit = {capture_type: 1 << i for i, capture_type in enumerate(self.capture_types)}
+        for device_id, capture_type in pairs:
+            self.masks[device_id] = self.masks.get(device_id, 0) | bit[capture_type]
+
+        for i, capture_type in enumerate(self.capture_types):
+            self.type_counts[capture_type] = sum(1 for mask in self.masks.values() if mask >> i & 1)
+
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        logger.info(f"Built coverage matrix: {len(self.devices)} devices x "
+                    f"{len(self.capture_types)} capture types in {self.build_seconds:.3f}s")
+
+    # =========================================================================
+    # Lookups
+    # =========================================================================
+
+    def captures(self, device_id: int) -> Dict[str, bool]:
+        """capture_type -> has a current capture, for one device"""
+        mask = self.masks.get(device_id, 0)
+        return {capture_type: bool(mask >> i & 1) for i, capture_type in enumerate(self.capture_types)}
+
+    def capture_count(self, device_id: int) -> int:
+        return self.masks.get(device_id, 0).bit_count()
+
+    def stats(self) -> Dict:
+        return {
+            'devices': len(self.devices),
+            'capture_types': len(self.capture_types),
+            'build_seconds': round(self.build_seconds, 3),
+            'built_at': self.built_at,
+        }
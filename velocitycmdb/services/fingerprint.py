@@ -3,8 +3,12 @@ Fingerprinting orchestration service
 Wraps existing device_fingerprint.py and db_load_fingerprints.py
 """
 
+import logging
 import os
+import queue
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Callable, Optional, List
 import yaml
@@ -15,6 +19,8 @@ import time
 # Add pcng to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent / 'pcng'))
 
+logger = logging.getLogger(__name__)
+
 
 class FingerprintOrchestrator:
     """
@@ -22,9 +28,14 @@ class FingerprintOrchestrator:
 
     Pipeline:
     1. Parse sessions.yaml
-    2. Fingerprint each device (SSH + show version + TextFSM)
+    2. Fingerprint devices concurrently (SSH + show version + TextFSM)
     3. Save fingerprint JSON files
-    4. Load JSONs into assets.db
+    4. Load each JSON into assets.db as its device finishes
+
+    Devices run on a bounded worker pool. A supervisor (the calling thread)
+    owns per-device deadlines, cancellation, progress callbacks and the
+    database writes, so callbacks arrive one at a time with non-decreasing
+    progress and SQLite sees a single writer.
     """
 
     def __init__(self, data_dir: Path):
@@ -41,6 +52,12 @@ class FingerprintOrchestrator:
         # TextFSM template database path
         self.textfsm_db = self._find_textfsm_db()
 
+        # Live fingerprint sessions by device index, closed on timeout/cancel
+        self._sessions = {}
+        self._aborted = set()
+        self._sessions_lock = threading.Lock()
+        self._cancel = threading.Event()
+
     def _find_textfsm_db(self) -> Optional[Path]:
         """Find TextFSM template database"""
         possible_paths = [
@@ -60,7 +77,9 @@ class FingerprintOrchestrator:
                               username: str,
                               password: str,
                               ssh_key_path: Optional[str] = None,
-                              progress_callback: Optional[Callable] = None) -> Dict:
+                              progress_callback: Optional[Callable] = None,
+                              max_workers: int = 16,
+                              device_timeout: float = 300) -> Dict:
         """
         Fingerprint all devices in inventory and load into database
 
@@ -69,13 +88,18 @@ class FingerprintOrchestrator:
             username: SSH username
             password: SSH password
             ssh_key_path: Optional SSH key path
-            progress_callback: Function(dict) for progress updates
+            progress_callback: Function(dict) for progress updates, always
+                called from this thread
+            max_workers: Devices fingerprinted at the same time
+            device_timeout: Seconds one device may take once started; its
+                SSH session is closed and the device counted as failed
 
         Returns:
             {
                 'success': True,
                 'fingerprinted': 12,
                 'failed': 0,
+                'cancelled': False,
                 'loaded_to_db': 12,
                 'fingerprints_dir': Path(...),
                 'db_path': Path(...)
@@ -100,82 +124,129 @@ class FingerprintOrchestrator:
                 'message': f'Found {total_devices} devices to fingerprint'
             })
 
-        # Fingerprint each device
-        fingerprinted = 0
-        failed = 0
+        with self._sessions_lock:
+            self._sessions.clear()
+            self._aborted.clear()
+        counts = {'fingerprinted': 0, 'failed': 0, 'loaded': 0, 'load_failed': 0, 'completed': 0}
         failed_devices = []
+        loader = None
+        events = queue.Queue()
+        deadlines = {}
+        finished = set()
+
+        def progress():
+            return int(5 + (counts['completed'] / max(total_devices, 1) * 90))
+
+        def record(index: int, result: Dict):
+            """Account for one finished device (supervisor thread only)"""
+            nonlocal loader
+            finished.add(index)
+            deadlines.pop(index, None)
+            counts['completed'] += 1
+            device = devices[index]
+
+            if result['success']:
+                counts['fingerprinted'] += 1
+                # Load as results arrive instead of one pass at the end
+                try:
+                    if loader is None:
+                        loader = self._fingerprint_loader()
+                    if loader.load_fingerprint_file(result['fingerprint_file']):
+                        counts['loaded'] += 1
+                    else:
+                        counts['load_failed'] += 1
+                except Exception as e:
+                    logger.error(f"Loading fingerprint for {device['name']} failed: {e}")
+                    counts['load_failed'] += 1
+                message = f"Fingerprinted {device['name']} ({device['ip']})"
+            else:
+                counts['failed'] += 1
+                error = result.get('error', 'Unknown error')
+                failed_devices.append({'name': device['name'], 'ip': device['ip'], 'error': error})
+                message = f"Failed to fingerprint {device['name']}: {error}"
 
-        for i, device in enumerate(devices):
-            device_name = device['name']
-            device_ip = device['ip']
-
-            try:
-                if progress_callback:
-                    progress_callback({
-                        'stage': 'fingerprinting',
-                        'progress': int(5 + (i / total_devices * 70)),
-                        'message': f'Fingerprinting {device_name} ({device_ip})...',
-                        'current_device': device_name,
-                        'devices_completed': i,
-                        'devices_total': total_devices
-                    })
-
-                # Fingerprint device
-                result = self._fingerprint_single_device(
-                    device_ip=device_ip,
-                    device_name=device_name,
-                    username=username,
-                    password=password,
-                    ssh_key_path=ssh_key_path
-                )
-
-                if result['success']:
-                    fingerprinted += 1
-                else:
-                    failed += 1
-                    failed_devices.append({
-                        'name': device_name,
-                        'ip': device_ip,
-                        'error': result.get('error', 'Unknown error')
-                    })
-
-            except Exception as e:
-                failed += 1
-                failed_devices.append({
-                    'name': device_name,
-                    'ip': device_ip,
-                    'error': str(e)
-                })
+            if progress_callback:
+                update = {
+                    'stage': 'fingerprinting',
+                    'progress': progress(),
+                    'message': message,
+                    'current_device': device['name'],
+                    'devices_completed': counts['completed'],
+                    'devices_total': total_devices
+                }
+                if not result['success']:
+                    update['error'] = result.get('error', 'Unknown error')
+                progress_callback(update)
+
+        workers = max(1, min(int(max_workers), total_devices or 1))
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fingerprint')
+        futures = {
+            index: pool.submit(self._fingerprint_worker, index, device, username,
+                               password, ssh_key_path, events)
+            for index, device in enumerate(devices)
+        }
 
-                if progress_callback:
-                    progress_callback({
-                        'stage': 'fingerprinting',
-                        'progress': int(5 + (i / total_devices * 70)),
-                        'message': f'Failed to fingerprint {device_name}: {str(e)}',
-                        'error': str(e)
-                    })
+        try:
+            while counts['completed'] < total_devices:
+                # Wake for the nearest deadline, and at least once a second for cancel()
+                wait = 1.0
+                if deadlines:
+                    wait = max(0.0, min(wait, min(deadlines.values()) - time.monotonic()))
+                try:
+                    kind, index, result = events.get(timeout=wait)
+                except queue.Empty:
+                    kind = None
+
+                if kind == 'start' and index not in finished:
+                    deadlines[index] = time.monotonic() + device_timeout
+                    if progress_callback:
+                        device = devices[index]
+                        progress_callback({
+                            'stage': 'fingerprinting',
+                            'progress': progress(),
+                            'message': f"Fingerprinting {device['name']} ({device['ip']})...",
+                            'current_device': device['name'],
+                            'devices_completed': counts['completed'],
+                            'devices_total': total_devices
+                        })
+                elif kind == 'done' and index not in finished:
+                    record(index, result)
+
+                now = time.monotonic()
+                for index, deadline in list(deadlines.items()):
+                    if now >= deadline:
+                        self._abort_session(index)
+                        record(index, {'success': False,
+                                       'error': f'Timed out after {device_timeout:.0f}s'})
+
+                if self._cancel.is_set():
+                    for index, future in futures.items():
+                        if index not in finished:
+                            future.cancel()
+                            self._abort_session(index)
+                            record(index, {'success': False, 'error': 'Cancelled'})
+        finally:
+            # Timed-out or cancelled sessions are already closed; don't wait on them
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        fingerprinted = counts['fingerprinted']
+        failed = counts['failed']
+        db_result = {'success': counts['loaded'], 'failed': counts['load_failed']}
 
-        # Load fingerprints into database
-        if fingerprinted > 0:
-            if progress_callback:
+        if progress_callback:
+            if self._cancel.is_set():
                 progress_callback({
-                    'stage': 'loading',
-                    'progress': 80,
-                    'message': f'Loading {fingerprinted} fingerprints into database...'
+                    'stage': 'error',
+                    'progress': 100,
+                    'message': f'Fingerprinting cancelled after {fingerprinted} devices'
                 })
-
-            db_result = self._load_fingerprints_to_db(progress_callback)
-
-            if progress_callback:
+            elif fingerprinted > 0:
                 progress_callback({
                     'stage': 'complete',
                     'progress': 100,
                     'message': f'✓ Fingerprinted {fingerprinted} devices, loaded {db_result["success"]} to database'
                 })
-        else:
-            db_result = {'success': 0, 'failed': 0, 'total': 0}
-
-            if progress_callback:
+            else:
                 progress_callback({
                     'stage': 'error',
                     'progress': 100,
@@ -186,6 +257,7 @@ class FingerprintOrchestrator:
             'success': fingerprinted > 0,
             'fingerprinted': fingerprinted,
             'failed': failed,
+            'cancelled': self._cancel.is_set(),
             'failed_devices': failed_devices,
             'loaded_to_db': db_result['success'],
             'db_load_failed': db_result['failed'],
@@ -193,6 +265,45 @@ class FingerprintOrchestrator:
             'db_path': self.db_path
         }
 
+    def cancel(self):
+        """
+        Stop this orchestrator's fingerprint_inventory: queued devices are
+        skipped, live sessions closed. The flag is never cleared, so a cancel
+        that arrives before the run starts still stops it; use a new
+        orchestrator for each job.
+        """
+        self._cancel.set()
+
+    def _fingerprint_worker(self, index: int, device: Dict, username: str, password: str,
+                            ssh_key_path: Optional[str], events: queue.Queue):
+        """Pool task: fingerprint one device and report start/done to the supervisor"""
+        if self._cancel.is_set():
+            return
+        events.put(('start', index, None))
+        try:
+            result = self._fingerprint_single_device(
+                device_ip=device['ip'],
+                device_name=device['name'],
+                username=username,
+                password=password,
+                ssh_key_path=ssh_key_path,
+                session_key=index
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        events.put(('done', index, result))
+
+    def _abort_session(self, session_key: int):
+        """Close a device's SSH session from the supervisor; its worker then unwinds"""
+        with self._sessions_lock:
+            self._aborted.add(session_key)
+            fingerprinter = self._sessions.get(session_key)
+        if fingerprinter is not None:
+            try:
+                fingerprinter.abort()
+            except Exception as e:
+                logger.debug(f"Closing fingerprint session {session_key}: {e}")
+
     def _parse_sessions_yaml(self, sessions_file: Path) -> List[Dict]:
         """Parse sessions.yaml into list of devices"""
         with open(sessions_file, 'r') as f:
@@ -217,9 +328,13 @@ class FingerprintOrchestrator:
                                    device_name: str,
                                    username: str,
                                    password: str,
-                                   ssh_key_path: Optional[str] = None) -> Dict:
+                                   ssh_key_path: Optional[str] = None,
+                                   session_key: Optional[int] = None) -> Dict:
         """
         Fingerprint a single device using device_fingerprint.py
+
+        session_key registers the live session so the supervisor can close
+        it on timeout or cancel.
         """
         from device_fingerprint import DeviceFingerprint
 
@@ -243,9 +358,23 @@ class FingerprintOrchestrator:
             # This ensures we preserve the user-provided name
             fingerprinter._device_info.additional_info['yaml_display_name'] = device_name
 
+            if session_key is not None:
+                with self._sessions_lock:
+                    if session_key in self._aborted:
+                        raise TimeoutError('Fingerprint aborted before connecting')
+                    self._sessions[session_key] = fingerprinter
+
             # Run fingerprinting
-            device_info = fingerprinter.fingerprint()
-            print(f"DEBUG: fingerprint() returned, building result dict")  # ADD THIS
+            try:
+                device_info = fingerprinter.fingerprint()
+            finally:
+                if session_key is not None:
+                    with self._sessions_lock:
+                        self._sessions.pop(session_key, None)
+
+            # A session closed under it returns partial data; don't save it as a success
+            if session_key is not None and session_key in self._aborted:
+                raise TimeoutError('Fingerprint aborted (timeout or cancel)')
 
             # Convert to JSON
             result = {
@@ -273,10 +402,9 @@ class FingerprintOrchestrator:
             }
 
             # Save to JSON file
-            print(f"DEBUG: Saving JSON to {output_file}")
             with open(output_file, 'w') as f:
                 json.dump(result, f, indent=2)
-                print(f"DEBUG: Saved successfully -> {output_file}")
+            logger.debug(f"Saved fingerprint for {device_name} -> {output_file}")
             return {
                 'success': True,
                 'fingerprint_file': output_file,
@@ -304,29 +432,10 @@ class FingerprintOrchestrator:
                 'error': str(e)
             }
 
-    def _load_fingerprints_to_db(self, progress_callback: Optional[Callable] = None) -> Dict:
-        """
-        Load all fingerprint JSONs into database using db_load_fingerprints.py
-        """
+    def _fingerprint_loader(self):
+        """FingerprintLoader from db_load_fingerprints.py for this data dir's assets.db"""
         # Import from root level (not pcng)
         sys.path.insert(0, str(Path(__file__).parent.parent))
         from db_load_fingerprints import FingerprintLoader
 
-        try:
-            loader = FingerprintLoader(str(self.db_path))
-
-            results = loader.load_fingerprints_directory(self.fingerprints_dir)
-
-            return {
-                'success': results['success'],
-                'failed': results['failed'],
-                'total': results['total']
-            }
-
-        except Exception as e:
-            return {
-                'success': 0,
-                'failed': 0,
-                'total': 0,
-                'error': str(e)
-            }
\ No newline at end of file
+        return FingerprintLoader(str(self.db_path))
@@ -4,15 +4,82 @@ IP Locator Service
 Find where an IP lives: ARP entry, access port, and routing information
 """
 
+import csv
+import io
+import json
 import sqlite3
 import re
+from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any
 from dataclasses import dataclass, asdict
 import logging
 
+from velocitycmdb.db.mac_key import mac_to_key
+from velocitycmdb.services.capture_store import CaptureStore
+
 logger = logging.getLogger(__name__)
 
+# Capture types parsed into structured tables when a snapshot is stored
+STRUCTURED_CAPTURE_TYPES = {
+    'arp': 'arp_table_entries',
+    'mac': 'mac_table_entries',
+    'routes': 'route_entries',
+}
+
+# Structured ARP/MAC/route rows for the latest snapshot of each device.
+# IPs and MACs are stored as integers so lookups are index seeks.
+STRUCTURED_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS arp_table_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        device_id INTEGER NOT NULL,
+        snapshot_id INTEGER NOT NULL,
+        ip_address TEXT NOT NULL,
+        ip_int INTEGER NOT NULL,
+        mac_address TEXT NOT NULL,
+        mac_key INTEGER NOT NULL,
+        interface TEXT,
+        FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS mac_table_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        device_id INTEGER NOT NULL,
+        snapshot_id INTEGER NOT NULL,
+        mac_address TEXT NOT NULL,
+        mac_key INTEGER NOT NULL,
+        vlan TEXT,
+        port TEXT,
+        mac_type TEXT,
+        FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS route_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        device_id INTEGER NOT NULL,
+        snapshot_id INTEGER NOT NULL,
+        prefix TEXT NOT NULL,
+        network_int INTEGER NOT NULL,
+        prefix_len INTEGER NOT NULL,
+        next_hop TEXT,
+        protocol TEXT,
+        interface TEXT,
+        metric TEXT,
+        ad TEXT,
+        FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_arp_table_ip ON arp_table_entries(ip_int)",
+    "CREATE INDEX IF NOT EXISTS idx_arp_table_device ON arp_table_entries(device_id, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS idx_mac_table_mac ON mac_table_entries(mac_key)",
+    "CREATE INDEX IF NOT EXISTS idx_mac_table_device ON mac_table_entries(device_id, snapshot_id)",
+    "CREATE INDEX IF NOT EXISTS idx_route_entries_network ON route_entries(network_int, prefix_len)",
+    "CREATE INDEX IF NOT EXISTS idx_route_entries_device ON route_entries(device_id, snapshot_id)",
+]
+
 
 @dataclass
 class ARPEntry:
@@ -76,6 +143,11 @@ class IPLocatorService:
         if not self.arp_db_path:
             self.arp_db_path = str(self.data_dir / 'arp_cat.db')
 
+        # capture_type -> bool, whether its structured table has rows
+        self._structured_ready = {}
+        # Shared RouteIndex, checked for changes once per service instance
+        self._route_index = None
+
     def get_assets_connection(self) -> sqlite3.Connection:
         """Get connection to assets database"""
         conn = sqlite3.connect(self.assets_db_path)
@@ -99,6 +171,208 @@ class IPLocatorService:
             return ':'.join(clean[i:i + 2] for i in range(0, 12, 2))
         return mac.lower()
 
+    # =========================================================================
+    # Structured tables (parsed once at load time)
+    # =========================================================================
+
+    @staticmethod
+    def ensure_structured_schema(conn: sqlite3.Connection):
+        """Create the structured ARP/MAC/route tables if they do not exist"""
+        cursor = conn.cursor()
+        for statement in STRUCTURED_SCHEMA:
+            cursor.execute(statement)
+
+    def index_snapshot(self, conn: sqlite3.Connection, device_id: int, snapshot_id: int,
+                       capture_type: str, content: str, device_name: str = '',
+                       rows: List[tuple] = None) -> int:
+        """
+        Replace a device's structured rows with those parsed from a snapshot.
+
+        Called by CaptureLoader inside its transaction whenever a new arp, mac
+        or routes snapshot is stored; the caller commits.
+
+        Args:
+            conn: Open connection to assets.db
+            device_id: Device the snapshot belongs to
+            snapshot_id: capture_snapshots.id of the snapshot
+            capture_type: 'arp', 'mac' or 'routes' (others are ignored)
+            content: Raw snapshot text
+            device_name: Device name, used only in parsed entries
+            rows: Rows already produced by parse_snapshot_rows() (content is
+                then not parsed again)
+
+        Returns:
+            Number of rows stored
+        """
+        table = STRUCTURED_CAPTURE_TYPES.get(capture_type)
+        if not table:
+            return 0
+
+        self.ensure_structured_schema(conn)
+        if rows is None:
+            rows = self.parse_snapshot_rows(capture_type, content, device_name, device_id)
+
+        cursor = conn.cursor()
+        cursor.execute(f"DELETE FROM {table} WHERE device_id = ?", (device_id,))
+
+        if capture_type == 'arp':
+            cursor.executemany("""
+                INSERT INTO arp_table_entries
+                (device_id, snapshot_id, ip_address, ip_int, mac_address, mac_key, interface)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(device_id, snapshot_id) + row for row in rows])
+        elif capture_type == 'mac':
+            cursor.executemany("""
+                INSERT INTO mac_table_entries
+                (device_id, snapshot_id, mac_address, mac_key, vlan, port, mac_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(device_id, snapshot_id) + row for row in rows])
+        else:
+            cursor.executemany("""
+                INSERT INTO route_entries
+                (device_id, snapshot_id, prefix, network_int, prefix_len,
+                 next_hop, protocol, interface, metric, ad)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(device_id, snapshot_id) + row for row in rows])
+
+        self._structured_ready.pop(capture_type, None)
+        return len(rows)
+
+    def is_snapshot_indexed(self, conn: sqlite3.Connection, device_id: int,
+                            snapshot_id: int, capture_type: str) -> bool:
+        """True if the structured table already holds rows from this snapshot"""
+        table = STRUCTURED_CAPTURE_TYPES.get(capture_type)
+        if not table:
+            return True
+        try:
+            row = conn.execute(
+                f"SELECT 1 FROM {table} WHERE device_id = ? AND snapshot_id = ? LIMIT 1",
+                (device_id, snapshot_id)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return False
+        return row is not None
+
+    def rebuild_structured_tables(self) -> Dict[str, int]:
+        """
+        Re-parse the latest arp, mac and routes snapshot of every device.
+
+        Only needed once for databases loaded before the structured tables
+        existed; afterwards CaptureLoader keeps them in sync.
+
+        Returns:
+            Rows stored per capture type
+        """
+        counts = {capture_type: 0 for capture_type in STRUCTURED_CAPTURE_TYPES}
+
+        with self.get_assets_connection() as conn:
+            self.ensure_structured_schema(conn)
+            for capture_type in STRUCTURED_CAPTURE_TYPES:
+                snapshots = CaptureStore(conn).latest_snapshots(capture_type)
+
+                for row in snapshots:
+                    counts[capture_type] += self.index_snapshot(
+                        conn, row['device_id'], row['id'], capture_type,
+                        row['content'], row['device_name']
+                    )
+                conn.commit()
+                logger.info(f"Indexed {counts[capture_type]} {capture_type} rows "
+                            f"from {len(snapshots)} snapshots")
+
+        return counts
+
+    def parse_snapshot_rows(self, capture_type: str, content: str,
+                            device_name: str, device_id: int) -> List[tuple]:
+        """
+        Parse snapshot content into row tuples for the structured tables.
+
+        Needs no database, so loaders can parse in worker processes and pass
+        the rows to index_snapshot().
+        """
+        rows = []
+
+        if capture_type == 'arp':
+            seen = set()
+            for line in content.splitlines():
+                parsed = self._parse_arp_line(line, device_name, device_id)
+                if not parsed:
+                    continue
+                ip_int = self._safe_ip_to_int(parsed.ip_address)
+                mac_key = mac_to_key(parsed.mac_address)
+                if ip_int is None or mac_key is None or (ip_int, mac_key) in seen:
+                    continue
+                seen.add((ip_int, mac_key))
+                rows.append((parsed.ip_address, ip_int, parsed.mac_address, mac_key,
+                             parsed.interface))
+
+        elif capture_type == 'mac':
+            for line in content.splitlines():
+                parsed = self._parse_mac_line(line, device_name, device_id)
+                if not parsed:
+                    continue
+                mac_key = mac_to_key(parsed.mac_address)
+                if mac_key is None:
+                    continue
+                rows.append((parsed.mac_address, mac_key, parsed.vlan, parsed.port,
+                             parsed.mac_type))
+
+        elif capture_type == 'routes':
+            for route in self._parse_routes(content, device_name, device_id):
+                network = self._prefix_to_network(route.prefix)
+                if network is None:
+                    continue
+                network_int, prefix_len = network
+                rows.append((route.prefix, network_int, prefix_len, route.next_hop,
+                             route.protocol, route.interface, route.metric, route.ad))
+
+        return rows
+
+    def _safe_ip_to_int(self, ip: str) -> Optional[int]:
+        """IPv4 string to integer, or None if it is not a valid dotted quad"""
+        try:
+            parts = [int(p) for p in ip.split('.')]
+        except (ValueError, AttributeError):
+            return None
+        if len(parts) != 4 or any(p < 0 or p > 255 for p in parts):
+            return None
+        return (parts[0] << 24) + (parts[1] << 16) + (parts[2] << 8) + parts[3]
+
+    def _prefix_to_network(self, prefix: str) -> Optional[tuple]:
+        """'10.1.0.0/16' -> (masked network int, 16); bare addresses are /32"""
+        network, _, length = prefix.partition('/')
+        network_int = self._safe_ip_to_int(network)
+        if network_int is None:
+            return None
+        try:
+            prefix_len = int(length) if length else 32
+        except ValueError:
+            return None
+        if not 0 <= prefix_len <= 32:
+            return None
+        mask = (0xFFFFFFFF << (32 - prefix_len)) & 0xFFFFFFFF
+        return network_int & mask, prefix_len
+
+    def _use_structured(self, capture_type: str) -> bool:
+        """
+        Whether lookups for a capture type can use its structured table.
+
+        Falls back to scanning snapshot text until the table exists and has
+        been populated (by the loader or rebuild_structured_tables).
+        """
+        if capture_type not in self._structured_ready:
+            table = STRUCTURED_CAPTURE_TYPES[capture_type]
+            try:
+                with self.get_assets_connection() as conn:
+                    ready = conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is not None
+            except sqlite3.OperationalError:
+                ready = False
+            self._structured_ready[capture_type] = ready
+        return self._structured_ready[capture_type]
+
+    # =========================================================================
+    # Lookups
+    # =========================================================================
+
     def find_arp_entries(self, ip_address: str) -> List[ARPEntry]:
         """Search ARP tables for an IP address"""
         entries = []
@@ -114,39 +388,34 @@ class IPLocatorService:
 
                     if 'arp_entries' in tables:
                         cursor.execute("""
-                            SELECT ip_address, mac_address, interface, device_name, vlan
-                            FROM arp_entries 
-                            WHERE ip_address = ?
+                            SELECT ae.ip_address, ae.mac_address, ae.interface_name,
+                                   d.hostname as device_name
+                            FROM arp_entries ae
+                            JOIN devices d ON ae.device_id = d.id
+                            WHERE ae.ip_address = ? AND ae.is_current = 1
                         """, (ip_address,))
 
                         for row in cursor.fetchall():
                             entries.append(ARPEntry(
                                 ip_address=row['ip_address'],
                                 mac_address=self.normalize_mac(row['mac_address']),
-                                interface=row['interface'] or '',
-                                device_name=row['device_name'],
-                                vlan=row['vlan'] if 'vlan' in row.keys() else None
+                                interface=row['interface_name'] or '',
+                                device_name=row['device_name']
                             ))
             except Exception as e:
                 logger.warning(f"Error searching arp_cat.db: {e}")
 
+        if self._use_structured('arp'):
+            for parsed in self._query_arp_table(ip_address):
+                if not any(e.device_name == parsed.device_name and
+                           e.mac_address == parsed.mac_address for e in entries):
+                    entries.append(parsed)
+            return entries
+
         # Also search capture snapshots for ARP data
         try:
             with self.get_assets_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT cs.content, cs.device_id, d.name as device_name
-                    FROM capture_snapshots cs
-                    JOIN devices d ON cs.device_id = d.id
-                    WHERE cs.capture_type = 'arp'
-                    AND cs.id IN (
-                        SELECT MAX(id) FROM capture_snapshots 
-                        WHERE capture_type = 'arp' 
-                        GROUP BY device_id
-                    )
-                """)
-
-                for row in cursor.fetchall():
+                for row in CaptureStore(conn).latest_snapshots('arp'):
                     # Parse ARP output for the IP
                     content = row['content']
                     for line in content.splitlines():
@@ -162,6 +431,33 @@ class IPLocatorService:
 
         return entries
 
+    def _query_arp_table(self, ip_address: str) -> List[ARPEntry]:
+        """ARP entries for an IP from arp_table_entries"""
+        ip_int = self._safe_ip_to_int(ip_address)
+        if ip_int is None:
+            return []
+
+        try:
+            with self.get_assets_connection() as conn:
+                rows = conn.execute("""
+                    SELECT a.ip_address, a.mac_address, a.interface, a.device_id,
+                           d.name as device_name
+                    FROM arp_table_entries a
+                    JOIN devices d ON a.device_id = d.id
+                    WHERE a.ip_int = ?
+                """, (ip_int,)).fetchall()
+        except Exception as e:
+            logger.warning(f"Error querying arp_table_entries: {e}")
+            return []
+
+        return [ARPEntry(
+            ip_address=row['ip_address'],
+            mac_address=row['mac_address'],
+            interface=row['interface'] or '',
+            device_name=row['device_name'],
+            device_id=row['device_id']
+        ) for row in rows]
+
     def _parse_arp_line(self, line: str, device_name: str, device_id: int) -> Optional[ARPEntry]:
         """Parse a single ARP table line"""
         # Cisco IOS format: Internet  10.1.1.1    5   0011.2233.4455  ARPA   Vlan100
@@ -197,6 +493,12 @@ class IPLocatorService:
         """Search MAC tables for a MAC address"""
         entries = []
         normalized_mac = self.normalize_mac(mac_address)
+        target_key = mac_to_key(mac_address)
+        if target_key is None:
+            return entries
+
+        if self._use_structured('mac'):
+            return self.find_mac_entries_by_keys([target_key])
 
         # Also create dot notation for Cisco matching
         clean = re.sub(r'[.:\-]', '', mac_address.lower())
@@ -204,20 +506,7 @@ class IPLocatorService:
 
         try:
             with self.get_assets_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT cs.content, cs.device_id, d.name as device_name
-                    FROM capture_snapshots cs
-                    JOIN devices d ON cs.device_id = d.id
-                    WHERE cs.capture_type = 'mac'
-                    AND cs.id IN (
-                        SELECT MAX(id) FROM capture_snapshots 
-                        WHERE capture_type = 'mac' 
-                        GROUP BY device_id
-                    )
-                """)
-
-                for row in cursor.fetchall():
+                for row in CaptureStore(conn).latest_snapshots('mac'):
                     content = row['content']
                     for line in content.splitlines():
                         # Check for MAC in various formats
@@ -225,13 +514,43 @@ class IPLocatorService:
                         if normalized_mac in self.normalize_mac(line) or \
                                 (cisco_mac and cisco_mac in line_lower):
                             parsed = self._parse_mac_line(line, row['device_name'], row['device_id'])
-                            if parsed:
+                            # Confirm on the canonical key, not a substring hit
+                            if parsed and mac_to_key(parsed.mac_address) == target_key:
                                 entries.append(parsed)
         except Exception as e:
             logger.warning(f"Error searching MAC captures: {e}")
 
         return entries
 
+    def find_mac_entries_by_keys(self, mac_keys: List[int]) -> List[MACEntry]:
+        """MAC table entries for any of the given MAC keys, in one indexed query"""
+        mac_keys = list(dict.fromkeys(k for k in mac_keys if k is not None))
+        if not mac_keys:
+            return []
+
+        placeholders = ','.join('?' * len(mac_keys))
+        try:
+            with self.get_assets_connection() as conn:
+                rows = conn.execute(f"""
+                    SELECT m.mac_address, m.vlan, m.port, m.mac_type, m.device_id,
+                           d.name as device_name
+                    FROM mac_table_entries m
+                    JOIN devices d ON m.device_id = d.id
+                    WHERE m.mac_key IN ({placeholders})
+                """, mac_keys).fetchall()
+        except Exception as e:
+            logger.warning(f"Error querying mac_table_entries: {e}")
+            return []
+
+        return [MACEntry(
+            mac_address=row['mac_address'],
+            vlan=row['vlan'],
+            port=row['port'],
+            device_name=row['device_name'],
+            device_id=row['device_id'],
+            mac_type=row['mac_type'] or 'dynamic'
+        ) for row in rows]
+
     def _parse_mac_line(self, line: str, device_name: str, device_id: int) -> Optional[MACEntry]:
         """Parse a single MAC table line"""
         # Cisco format: 100    0011.2233.4455    DYNAMIC     Gi1/0/24
@@ -258,39 +577,37 @@ class IPLocatorService:
         return None
 
     def find_route_entries(self, ip_address: str) -> List[RouteEntry]:
-        """Search routing tables for routes covering an IP"""
-        entries = []
+        """
+        Search routing tables for routes covering an IP.
 
+        Answered from the shared RouteIndex (longest-prefix match across all
+        devices), skipping defaults and prefixes of /16 and wider.
+        """
         try:
-            with self.get_assets_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT cs.content, cs.device_id, d.name as device_name
-                    FROM capture_snapshots cs
-                    JOIN devices d ON cs.device_id = d.id
-                    WHERE cs.capture_type = 'routes'
-                    AND cs.id IN (
-                        SELECT MAX(id) FROM capture_snapshots 
-                        WHERE capture_type = 'routes' 
-                        GROUP BY device_id
-                    )
-                """)
-
-                for row in cursor.fetchall():
-                    content = row['content']
-                    device_routes = self._parse_routes(content, row['device_name'], row['device_id'])
-
-                    # Find matching routes for this IP
-                    matching = self._find_matching_routes(ip_address, device_routes)
-                    entries.extend(matching)
+            return self.route_index().covering(ip_address, min_prefix_len=17)
+        except Exception as e:
+            logger.warning(f"Error searching route index: {e}")
+            return []
 
+    def find_route_entries_bulk(self, ip_addresses: List[str]) -> Dict[str, List[RouteEntry]]:
+        """Covering routes for many IPs against one index: ip -> routes, most specific first"""
+        try:
+            return self.route_index().covering_many(ip_addresses, min_prefix_len=17)
         except Exception as e:
-            logger.warning(f"Error searching route captures: {e}")
+            logger.warning(f"Error searching route index: {e}")
+            return {ip: [] for ip in ip_addresses}
 
-        # Sort by prefix length (most specific first)
-        entries.sort(key=lambda r: self._prefix_length(r.prefix), reverse=True)
+    def route_index(self):
+        """
+        Process-wide RouteIndex for this assets.db, rebuilt after routes change.
 
-        return entries
+        Fetched (and checked for changes) once per service instance, i.e. once
+        per web request or CLI batch, not once per lookup.
+        """
+        if self._route_index is None:
+            from velocitycmdb.services.route_index import RouteIndex
+            self._route_index = RouteIndex.for_database(self.assets_db_path, locator=self)
+        return self._route_index
 
     def _parse_routes(self, content: str, device_name: str, device_id: int) -> List[RouteEntry]:
         """Parse routing table output - handles Cisco IOS, Arista EOS, and Juniper formats"""
@@ -526,54 +843,6 @@ class IPLocatorService:
                     ))
 
         return routes
-    def _prefix_length(self, prefix: str) -> int:
-        """Extract prefix length from CIDR notation"""
-        if '/' in prefix:
-            try:
-                return int(prefix.split('/')[1])
-            except ValueError:
-                return 0
-        return 32  # Host route assumed
-
-    def _ip_to_int(self, ip: str) -> int:
-        """Convert IP address to integer"""
-        parts = ip.split('.')
-        return (int(parts[0]) << 24) + (int(parts[1]) << 16) + (int(parts[2]) << 8) + int(parts[3])
-
-    def _ip_in_prefix(self, ip: str, prefix: str) -> bool:
-        """Check if IP is within a prefix"""
-        try:
-            if '/' in prefix:
-                network, length = prefix.split('/')
-                length = int(length)
-            else:
-                network = prefix
-                length = 32
-
-            ip_int = self._ip_to_int(ip)
-            net_int = self._ip_to_int(network)
-            mask = (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
-
-            return (ip_int & mask) == (net_int & mask)
-        except (ValueError, IndexError):
-            return False
-
-    def _find_matching_routes(self, ip: str, routes: List[RouteEntry]) -> List[RouteEntry]:
-        """Find all routes that match an IP, excluding defaults and overly broad prefixes"""
-        matching = []
-        for route in routes:
-            # Skip default routes
-            if route.prefix.startswith('0.0.0.0'):
-                continue
-
-            # Skip overly broad prefixes (/16 and larger)
-            prefix_len = self._prefix_length(route.prefix)
-            if prefix_len <= 16:
-                continue
-
-            if self._ip_in_prefix(ip, route.prefix):
-                matching.append(route)
-        return matching
 
     def locate_ip(self, ip_address: str) -> IPLocation:
         """Main entry point - find everything about an IP"""
@@ -592,10 +861,22 @@ class IPLocatorService:
 
         # Find MAC entries for any MACs found in ARP
         mac_entries = []
-        for arp in arp_entries:
-            if arp.mac_address:
-                mac_entries.extend(self.find_mac_entries(arp.mac_address))
+        if self._use_structured('mac'):
+            mac_entries = self.find_mac_entries_by_keys(
+                [mac_to_key(arp.mac_address) for arp in arp_entries])
+        else:
+            for arp in arp_entries:
+                if arp.mac_address:
+                    mac_entries.extend(self.find_mac_entries(arp.mac_address))
 
+        # Find route entries
+        route_entries = self.find_route_entries(ip_address)
+
+        return self._build_location(ip_address, arp_entries, mac_entries, route_entries)
+
+    def _build_location(self, ip_address: str, arp_entries: List[ARPEntry],
+                        mac_entries: List[MACEntry], route_entries: List[RouteEntry]) -> IPLocation:
+        """Deduplicate entries, pick the access port and write the summary"""
         # Deduplicate MAC entries
         seen_macs = set()
         unique_macs = []
@@ -606,8 +887,6 @@ class IPLocatorService:
                 unique_macs.append(mac)
         mac_entries = unique_macs
 
-        # Find route entries
-        route_entries = self.find_route_entries(ip_address)
         seen_routes = set()
         unique_routes = []
         for route in route_entries:
@@ -666,18 +945,299 @@ class IPLocatorService:
             summary=" | ".join(summary_parts)
         )
 
+    # =========================================================================
+    # Bulk location
+    # =========================================================================
+
+    def locate_many(self, ip_addresses: List[str]) -> Iterator[IPLocation]:
+        """
+        Locate many IPs at once, yielding one IPLocation per input in order.
+
+        ARP, MAC and route data are each read once for the whole batch: the
+        valid IPs are sorted and merge-walked against ARP rows read in ip_int
+        order over the batch's range, MAC-table rows are fetched for all ARP
+        MACs together, and routes come from the shared RouteIndex.
+        """
+        valid = {}
+        for ip in ip_addresses:
+            ip_int = self._safe_ip_to_int(ip) if re.match(r'^\d+\.\d+\.\d+\.\d+$', ip) else None
+            if ip_int is not None:
+                valid[ip] = ip_int
+
+        arp_by_ip = self._bulk_arp_entries(valid)
+
+        mac_keys = {mac_to_key(e.mac_address) for entries in arp_by_ip.values() for e in entries}
+        mac_by_key = defaultdict(list)
+        for entry in self._bulk_mac_entries(mac_keys):
+            mac_by_key[mac_to_key(entry.mac_address)].append(entry)
+
+        routes_by_ip = self.find_route_entries_bulk(list(valid))
+
+        for ip in ip_addresses:
+            if ip not in valid:
+                yield IPLocation(
+                    ip_address=ip,
+                    arp_entries=[],
+                    mac_entries=[],
+                    route_entries=[],
+                    summary="Invalid IP address format"
+                )
+                continue
+
+            arp_entries = arp_by_ip.get(ip, [])
+            mac_entries = []
+            for key in dict.fromkeys(mac_to_key(e.mac_address) for e in arp_entries):
+                mac_entries.extend(mac_by_key.get(key, []))
+
+            yield self._build_location(ip, arp_entries, mac_entries, routes_by_ip.get(ip, []))
+
+    def stream_bulk(self, ip_addresses: List[str], fmt: str = 'ndjson',
+                    progress=None) -> Iterator[str]:
+        """
+        Bulk-locate IPs and yield the output text line by line.
+
+        Args:
+            ip_addresses: IPs to locate
+            fmt: 'ndjson' (one JSON object per IP, with seq/total counters)
+                 or 'csv' (header plus CSV_FIELDS rows)
+            progress: Optional callable(done, total), called every 1000 IPs
+                 and at the end
+
+        Yields:
+            Output lines, each ending in a newline
+        """
+        total = len(ip_addresses)
+        buffer = io.StringIO()
+        writer = None
+
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            yield buffer.getvalue()
+
+        for seq, location in enumerate(self.locate_many(ip_addresses), 1):
+            if writer:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerow(location_to_csv_row(location))
+                yield buffer.getvalue()
+            else:
+                record = asdict(location)
+                record['seq'] = seq
+                record['total'] = total
+                yield json.dumps(record) + '\n'
+
+            if progress and (seq % 1000 == 0 or seq == total):
+                progress(seq, total)
+
+    # Larger batches switch from IN (...) lookups to one ordered range scan
+    BULK_SCAN_THRESHOLD = 500
+
+    def _bulk_arp_entries(self, valid: Dict[str, int]) -> Dict[str, List[ARPEntry]]:
+        """ARP entries for a batch of IPs (ip -> entries), arp_cat.db first"""
+        results = defaultdict(list)
+        if not valid:
+            return results
 
-# CLI for testing
+        if Path(self.arp_db_path).exists():
+            query = """
+                SELECT ae.ip_address, ae.mac_address, ae.interface_name,
+                       d.hostname as device_name
+                FROM arp_entries ae
+                JOIN devices d ON ae.device_id = d.id
+                WHERE ae.is_current = 1
+            """
+            params = []
+            if len(valid) <= self.BULK_SCAN_THRESHOLD:
+                params = list(valid)
+                query += f" AND ae.ip_address IN ({','.join('?' * len(params))})"
+            try:
+                with self.get_arp_connection() as conn:
+                    rows = conn.execute(query, params)
+                    for row in rows:
+                        if row['ip_address'] in valid:
+                            results[row['ip_address']].append(ARPEntry(
+                                ip_address=row['ip_address'],
+                                mac_address=self.normalize_mac(row['mac_address']),
+                                interface=row['interface_name'] or '',
+                                device_name=row['device_name']
+                            ))
+            except Exception as e:
+                logger.warning(f"Error searching arp_cat.db: {e}")
+
+        # Sort the batch and merge-walk it against ARP rows in ip_int order
+        wanted = sorted((ip_int, ip) for ip, ip_int in valid.items())
+        pos = 0
+        for ip_int, ip_address, mac_address, interface, device_name, device_id in \
+                self._arp_rows_for(wanted):
+            while pos < len(wanted) and wanted[pos][0] < ip_int:
+                pos += 1
+            if pos == len(wanted):
+                break
+
+            match = pos
+            while match < len(wanted) and wanted[match][0] == ip_int:
+                entries = results[wanted[match][1]]
+                if not any(e.device_name == device_name and
+                           e.mac_address == mac_address for e in entries):
+                    entries.append(ARPEntry(
+                        ip_address=ip_address,
+                        mac_address=mac_address,
+                        interface=interface or '',
+                        device_name=device_name,
+                        device_id=device_id
+                    ))
+                match += 1
+
+        return results
+
+    def _arp_rows_for(self, wanted: List[tuple]) -> Iterator[tuple]:
+        """
+        ARP rows (ip_int, ip, mac, interface, device_name, device_id) in ip_int
+        order covering the sorted (ip_int, ip) batch.
+        """
+        if not self._use_structured('arp'):
+            # Not indexed yet: parse the latest ARP snapshots once for the batch
+            low, high = wanted[0][0], wanted[-1][0]
+            rows = []
+            for snapshot in self._latest_snapshots('arp'):
+                for ip, ip_int, mac, mac_key, interface in self.parse_snapshot_rows(
+                        'arp', snapshot['content'], snapshot['device_name'], snapshot['device_id']):
+                    if low <= ip_int <= high:
+                        rows.append((ip_int, ip, mac, interface,
+                                     snapshot['device_name'], snapshot['device_id']))
+            rows.sort(key=lambda r: r[0])
+            yield from rows
+            return
+
+        query = """
+            SELECT a.ip_int, a.ip_address, a.mac_address, a.interface,
+                   d.name as device_name, a.device_id
+            FROM arp_table_entries a
+            JOIN devices d ON a.device_id = d.id
+            WHERE {where}
+            ORDER BY a.ip_int
+        """
+        with self.get_assets_connection() as conn:
+            if len(wanted) > self.BULK_SCAN_THRESHOLD:
+                rows = conn.execute(query.format(where="a.ip_int BETWEEN ? AND ?"),
+                                    (wanted[0][0], wanted[-1][0]))
+                yield from (tuple(row) for row in rows)
+            else:
+                ip_ints = [ip_int for ip_int, _ in wanted]
+                placeholders = ','.join('?' * len(ip_ints))
+                rows = conn.execute(query.format(where=f"a.ip_int IN ({placeholders})"), ip_ints)
+                yield from (tuple(row) for row in rows)
+
+    def _bulk_mac_entries(self, mac_keys: set) -> List[MACEntry]:
+        """MAC table entries for a set of MAC keys"""
+        mac_keys = [k for k in mac_keys if k is not None]
+        if not mac_keys:
+            return []
+
+        if not self._use_structured('mac'):
+            wanted = set(mac_keys)
+            entries = []
+            for snapshot in self._latest_snapshots('mac'):
+                for mac, mac_key, vlan, port, mac_type in self.parse_snapshot_rows(
+                        'mac', snapshot['content'], snapshot['device_name'], snapshot['device_id']):
+                    if mac_key in wanted:
+                        entries.append(MACEntry(
+                            mac_address=mac,
+                            vlan=vlan,
+                            port=port,
+                            device_name=snapshot['device_name'],
+                            device_id=snapshot['device_id'],
+                            mac_type=mac_type
+                        ))
+            return entries
+
+        entries = []
+        for i in range(0, len(mac_keys), self.BULK_SCAN_THRESHOLD):
+            entries.extend(self.find_mac_entries_by_keys(mac_keys[i:i + self.BULK_SCAN_THRESHOLD]))
+        return entries
+
+    def _latest_snapshots(self, capture_type: str) -> List[sqlite3.Row]:
+        """Latest snapshot content of one capture type for every device"""
+        try:
+            with self.get_assets_connection() as conn:
+                return CaptureStore(conn).latest_snapshots(capture_type)
+        except Exception as e:
+            logger.warning(f"Error reading {capture_type} captures: {e}")
+            return []
+
+# Columns for CSV output of bulk results
+CSV_FIELDS = [
+    'ip_address', 'found', 'summary',
+    'access_device', 'access_port', 'access_vlan', 'mac_address',
+    'arp_device', 'arp_interface',
+    'best_route', 'best_route_next_hop', 'best_route_protocol', 'best_route_device',
+]
+
+
+def location_to_csv_row(location: IPLocation) -> Dict[str, Any]:
+    """Flatten an IPLocation into one CSV_FIELDS row"""
+    access = location.access_port or {}
+    arp = location.arp_entries[0] if location.arp_entries else None
+    route = location.route_entries[0] if location.route_entries else None
+    return {
+        'ip_address': location.ip_address,
+        'found': bool(location.arp_entries or location.mac_entries),
+        'summary': location.summary,
+        'access_device': access.get('device', ''),
+        'access_port': access.get('port', ''),
+        'access_vlan': access.get('vlan', ''),
+        'mac_address': access.get('mac') or (arp.mac_address if arp else ''),
+        'arp_device': arp.device_name if arp else '',
+        'arp_interface': arp.interface if arp else '',
+        'best_route': route.prefix if route else '',
+        'best_route_next_hop': route.next_hop if route else '',
+        'best_route_protocol': route.protocol if route else '',
+        'best_route_device': route.device_name if route else '',
+    }
+
+
+def read_ip_list(text: str) -> List[str]:
+    """
+    Parse a bulk IP list: a JSON array, or one IP per line (first field of a
+    CSV line). Blank lines and # comments are skipped.
+    """
+    text = text.strip()
+    if text.startswith('['):
+        return [str(ip).strip() for ip in json.loads(text) if str(ip).strip()]
+
+    ips = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        ips.append(re.split(r'[,\s]+', line, maxsplit=1)[0])
+    return ips
+
+
+# CLI for testing (from the checkout root: python -m velocitycmdb.services.ip_locator ...)
 if __name__ == '__main__':
     import sys
-    import json
 
-    if len(sys.argv) < 2:
-        print("Usage: python ip_locator.py <ip_address> [data_dir]")
+    args = [a for a in sys.argv[1:] if a != '--csv']
+    output_format = 'csv' if '--csv' in sys.argv else 'ndjson'
+
+    if not args:
+        print("Usage: python -m velocitycmdb.services.ip_locator <ip_address> [data_dir]")
+        print("       python -m velocitycmdb.services.ip_locator --rebuild [data_dir]")
+        print("       python -m velocitycmdb.services.ip_locator --bulk <file|-> [data_dir] [--csv]")
         sys.exit(1)
 
-    ip = sys.argv[1]
-    data_dir = Path(sys.argv[2]) if len(sys.argv) > 2 else Path('~/.velocitycmdb/data').expanduser()
+    ip = args[0]
+    bulk_source = None
+    if ip == '--bulk':
+        if len(args) < 2:
+            print("--bulk needs a file of IPs ('-' for stdin)")
+            sys.exit(1)
+        bulk_source = args[1]
+        args = args[1:]
+
+    data_dir = Path(args[1]) if len(args) > 1 else Path('~/.velocitycmdb/data').expanduser()
 
     service = IPLocatorService(
         assets_db_path=str(data_dir / 'assets.db'),
@@ -685,6 +1245,26 @@ if __name__ == '__main__':
         data_dir=data_dir
     )
 
+    if ip == '--rebuild':
+        logging.basicConfig(level=logging.INFO)
+        counts = service.rebuild_structured_tables()
+        print(json.dumps(counts, indent=2))
+        sys.exit(0)
+
+    if bulk_source:
+        text = sys.stdin.read() if bulk_source == '-' else Path(bulk_source).read_text()
+        ips = read_ip_list(text)
+
+        def report(done, total):
+            sys.stderr.write(f"\rLocated {done}/{total}")
+            if done == total:
+                sys.stderr.write("\n")
+            sys.stderr.flush()
+
+        for line in service.stream_bulk(ips, output_format, progress=report):
+            sys.stdout.write(line)
+        sys.exit(0)
+
     result = service.locate_ip(ip)
 
     print(f"\n{'=' * 60}")
@@ -26,6 +26,8 @@ except ImportError:
         # Fallback: empty dict means no translation (pass-through)
         CAPTURE_TYPE_MAPPINGS = {}
 
+from .script_env import script_env
+
 # Consistent default paths
 DEFAULT_DATA_DIR = '~/.velocitycmdb/data'
 
@@ -311,7 +313,8 @@ class MaintenanceOrchestrator:
                 cmd,
                 capture_output=True,
                 text=True,
-                cwd=str(self.project_root)
+                cwd=str(self.project_root),
+                env=script_env()
             )
 
             # Log all output for debugging
@@ -575,7 +578,8 @@ class MaintenanceOrchestrator:
                 cmd,
                 capture_output=True,
                 text=True,
-                cwd=str(self.project_root)
+                cwd=str(self.project_root),
+                env=script_env()
             )
 
             # Log output
@@ -807,7 +811,8 @@ class MaintenanceOrchestrator:
                 cmd,
                 capture_output=True,
                 text=True,
-                cwd=str(self.project_root)
+                cwd=str(self.project_root),
+                env=script_env()
             )
 
             # Log output
@@ -994,7 +999,8 @@ class MaintenanceOrchestrator:
                 cmd1,
                 capture_output=True,
                 text=True,
-                cwd=str(self.project_root)
+                cwd=str(self.project_root),
+                env=script_env()
             )
 
             # Log output
@@ -1470,10 +1476,12 @@ class MaintenanceOrchestrator:
         Failed: 0
         Snapshots created/updated: 5
         Changes detected: 2
+        Unchanged (skipped): 25
         """
         stats = {
             'files_processed': 0,
             'files_failed': 0,
+            'files_skipped': 0,
             'snapshots_created': 0,
             'changes_detected': 0
         }
@@ -1507,6 +1515,12 @@ class MaintenanceOrchestrator:
                     if numbers:
                         stats['changes_detected'] = int(numbers[0])
 
+                # "Unchanged (skipped): 25"
+                elif 'unchanged (skipped):' in line.lower():
+                    numbers = re.findall(r'\d+', line)
+                    if numbers:
+                        stats['files_skipped'] = int(numbers[0])
+
         except Exception as e:
             logger.warning(f"Error parsing capture loader output: {e}")
 
@@ -1737,7 +1751,8 @@ class MaintenanceOrchestrator:
                 cmd,
                 capture_output=True,
                 text=True,
-                cwd=str(self.project_root)
+                cwd=str(self.project_root),
+                env=script_env()
             )
 
             # Log return code
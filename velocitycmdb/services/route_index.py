@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Route Index
+In-memory longest-prefix-match index over every device's latest routing table
+
+Routes are bucketed by prefix length, each bucket being a dict of masked
+network -> routes. Finding the routes that cover an address is one dict
+probe per prefix length present in the table (at most 33), independent of
+how many devices or routes are indexed. The most specific hit per device is
+its best route.
+
+IPv4 only, like the rest of the IP locator: the route parsers read dotted-quad
+prefixes and route_entries stores 32-bit networks. IPv6 prefixes passed to
+add() and IPv6 lookups are ignored.
+
+The index is built once per assets.db and shared process-wide; it rebuilds
+itself when routes have been indexed or removed since it was built. Callers
+fetch it once per request or batch (IPLocatorService.route_index) rather
+than once per lookup, since checking for changes opens a connection.
+"""
+
+import ipaddress
+import logging
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .capture_store import CaptureStore
+from .ip_locator import RouteEntry
+
+logger = logging.getLogger(__name__)
+
+# (device_id, device_name, prefix, next_hop, protocol, interface, metric, ad)
+RouteRow = Tuple[int, str, str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+_FULL_MASK = 0xFFFFFFFF
+
+
+class RouteIndex:
+    """Longest-prefix-match index for IPv4 routes across devices"""
+
+    _instances: Dict[str, 'RouteIndex'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self):
+        # prefix_len -> masked network int -> [RouteRow, ...]
+        self._table: Dict[int, Dict[int, List[RouteRow]]] = defaultdict(dict)
+        # Prefix lengths present, longest first
+        self._lengths: List[int] = []
+        self.route_count = 0
+        self.device_count = 0
+        self.built_at = None
+        self.build_seconds = 0.0
+        self.token = None
+
+    # =========================================================================
+    # Process-wide instances
+    # =========================================================================
+
+    @classmethod
+    def for_database(cls, assets_db_path: str, locator=None) -> 'RouteIndex':
+        """
+        Shared index for an assets.db, rebuilt when its routes have changed.
+
+        Args:
+            assets_db_path: Path to assets.db
+            locator: IPLocatorService used to parse snapshots when the
+                route_entries table has not been populated yet
+
+        Returns:
+            Up-to-date RouteIndex
+        """
+        token = cls._current_token(assets_db_path)
+
+        with cls._instances_lock:
+            index = cls._instances.get(assets_db_path)
+            if index is not None and index.token == token:
+                return index
+
+            index = cls()
+            index.token = token
+            index._build(assets_db_path, locator)
+            cls._instances[assets_db_path] = index
+            return index
+
+    @classmethod
+    def invalidate(cls, assets_db_path: str = None):
+        """Drop the cached index for one database, or for all of them"""
+        with cls._instances_lock:
+            if assets_db_path is None:
+                cls._instances.clear()
+            else:
+                cls._instances.pop(assets_db_path, None)
+
+    @staticmethod
+    def _current_token(assets_db_path: str) -> Tuple:
+        """
+        Cheap change marker for the routing data.
+
+        route_entries rows are replaced (never updated) whenever a routes
+        snapshot is indexed, so its highest rowid moves on every reload; the
+        row count also catches deletes (a device removed, its routes cascaded)
+        that leave the highest rowid in place. Until that table is populated
+        the snapshot count and newest snapshot id are used instead.
+        """
+        conn = sqlite3.connect(assets_db_path)
+        try:
+            try:
+                route_count, route_max = conn.execute(
+                    "SELECT COUNT(*), MAX(id) FROM route_entries").fetchone()
+            except sqlite3.OperationalError:
+                route_count, route_max = 0, None
+            if route_max is not None:
+                return 'route_entries', route_count, route_max
+            snapshot_count, snapshot_max = conn.execute(
+                "SELECT COUNT(*), MAX(id) FROM capture_snapshots").fetchone()
+            return 'capture_snapshots', snapshot_count, snapshot_max
+        finally:
+            conn.close()
+
+    def _build(self, assets_db_path: str, locator=None):
+        started = time.perf_counter()
+        devices = set()
+
+        conn = sqlite3.connect(assets_db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            if self.token[0] == 'route_entries':
+                cursor = conn.execute("""
+                    SELECT r.device_id, d.name as device_name, r.prefix, r.network_int,
+                           r.prefix_len, r.next_hop, r.protocol, r.interface, r.metric, r.ad
+                    FROM route_entries r
+                    JOIN devices d ON r.device_id = d.id
+                """)
+                names = {}
+                for row in cursor:
+                    # Share one name string per device
+                    device_name = names.setdefault(row['device_id'], row['device_name'])
+                    # route_entries holds IPv4 networks already masked to integers
+                    self._insert(row['prefix_len'], row['network_int'],
+                                 (row['device_id'], device_name, row['prefix'], row['next_hop'],
+                                  row['protocol'], row['interface'], row['metric'], row['ad']))
+                    devices.add(row['device_id'])
+            elif locator is not None:
+                for row in CaptureStore(conn).latest_snapshots('routes'):
+                    for route in locator._parse_routes(row['content'], row['device_name'], row['device_id']):
+                        if self.add(route.prefix, (route.device_id, route.device_name, route.prefix,
+                                                   route.next_hop, route.protocol, route.interface,
+                                                   route.metric, route.ad)):
+                            devices.add(route.device_id)
+        finally:
+            conn.close()
+
+        self._lengths = sorted(self._table.keys(), reverse=True)
+
+        self.device_count = len(devices)
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - started
+        logger.info(f"Built route index: {self.route_count} routes from {self.device_count} devices "
+                    f"in {self.build_seconds:.2f}s")
+
+    # =========================================================================
+    # Building and lookups
+    # =========================================================================
+
+    def add(self, prefix: str, route: RouteRow) -> bool:
+        """
+        Add one route. Bare addresses are host routes.
+
+        Returns:
+            False if the prefix is not a valid IPv4 prefix
+        """
+        try:
+            network = ipaddress.IPv4Network(prefix, strict=False)
+        except ValueError:
+            return False
+
+        self._insert(network.prefixlen, int(network.network_address), route)
+        return True
+
+    def _insert(self, prefix_len: int, network_int: int, route: RouteRow):
+        self._table[prefix_len].setdefault(network_int, []).append(route)
+        self.route_count += 1
+
+    def _matches(self, ip: str, min_prefix_len: int = 0) -> Iterable[Tuple[int, RouteRow]]:
+        """Yield (prefix_len, route) for every route covering ip, longest first"""
+        try:
+            value = int(ipaddress.IPv4Address(ip.strip()))
+        except (ValueError, AttributeError):
+            return
+
+        for prefix_len in self._lengths:
+            if prefix_len < min_prefix_len:
+                break
+            mask = (_FULL_MASK << (32 - prefix_len)) & _FULL_MASK
+            routes = self._table[prefix_len].get(value & mask)
+            if routes:
+                for route in routes:
+                    yield prefix_len, route
+
+    def covering(self, ip: str, min_prefix_len: int = 0) -> List[RouteEntry]:
+        """
+        Every device's routes that cover ip, most specific first.
+
+        Args:
+            ip: IPv4 address (anything else matches nothing)
+            min_prefix_len: Ignore routes shorter than this (e.g. 17 skips /16 and wider)
+        """
+        return [self._to_entry(route) for _, route in self._matches(ip, min_prefix_len)]
+
+    def best(self, ip: str, min_prefix_len: int = 0) -> Dict[int, RouteEntry]:
+        """
+        Longest-prefix match per device.
+
+        Returns:
+            device_id -> best RouteEntry (ECMP next hops beyond the first are dropped)
+        """
+        best = {}
+        for _, route in self._matches(ip, min_prefix_len):
+            if route[0] not in best:
+                best[route[0]] = self._to_entry(route)
+        return best
+
+    def covering_many(self, ips: Iterable[str], min_prefix_len: int = 0) -> Dict[str, List[RouteEntry]]:
+        """Bulk form of covering(): ip -> covering routes, one pass over the list"""
+        results = {}
+        for ip in ips:
+            if ip not in results:
+                results[ip] = self.covering(ip, min_prefix_len)
+        return results
+
+    @staticmethod
+    def _to_entry(route: RouteRow) -> RouteEntry:
+        device_id, device_name, prefix, next_hop, protocol, interface, metric, ad = route
+        return RouteEntry(
+            prefix=prefix,
+            next_hop=next_hop,
+            protocol=protocol,
+            interface=interface,
+            device_name=device_name,
+            device_id=device_id,
+            metric=metric,
+            ad=ad
+        )
+
+    def stats(self) -> Dict:
+        return {
+            'routes': self.route_count,
+            'devices': self.device_count,
+            'prefix_lengths': len(self._lengths),
+            'build_seconds': round(self.build_seconds, 3),
+            'built_at': self.built_at,
+        }
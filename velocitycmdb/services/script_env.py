@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script Environment
+Environment for the loader and maintenance scripts the app runs as subprocesses
+
+The scripts import from the velocitycmdb package. Launched by file path from
+a source checkout that was never pip-installed, the child interpreter only
+sees the script's own directory and cannot find the package, so the
+directory holding it is put on PYTHONPATH. An installed package is found
+either way.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+# Directory containing the velocitycmdb package (the checkout root or site-packages)
+PACKAGE_PARENT = str(Path(__file__).resolve().parents[2])
+
+
+def script_env(env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Copy of env (os.environ by default) in which velocitycmdb is importable
+
+    Args:
+        env: Base environment, e.g. one already carrying credentials
+
+    Returns:
+        New dict; env itself is not modified
+    """
+    env = dict(os.environ if env is None else env)
+    paths = [path for path in env.get('PYTHONPATH', '').split(os.pathsep) if path]
+    if PACKAGE_PARENT not in paths:
+        env['PYTHONPATH'] = os.pathsep.join([PACKAGE_PARENT] + paths)
+    return env
@@ -25,11 +25,11 @@ import os
 import json
 import subprocess
 import platform
-import concurrent.futures
 from typing import Dict, List, Any, Tuple, Optional, Union
 
 # Import functions from svg_parser
 from svg_parser import parse_svg_network_map, NAMESPACES
+from reachability_probe import ReachabilityProber, raise_fd_limit
 
 # Default configuration
 DEFAULT_CONFIG = {
@@ -55,7 +55,10 @@ DEFAULT_CONFIG = {
     "monitoring": {
         "timeout": 2.0,
         "parallel_checks": True,
-        "ping_fallback": True  # NEW: Try ping if TCP fails
+        "ping_fallback": True,  # NEW: Try ping if TCP fails
+        "max_concurrency": 4096,  # Sockets in flight across all devices
+        "rate_limit": 0,  # Connection attempts per second (0 = unlimited)
+        "icmp_method": "auto"  # auto (unprivileged ICMP socket, else ping), socket, command
     }
 }
 
@@ -238,44 +241,10 @@ def test_multiple_ports(ip: str, ports: List[int], timeout: float = 2.0,
         # Default to SSH port if no ports specified
         ports = [22]
 
-    open_ports = []
-
-    if parallel and len(ports) > 1:
-        # Use ThreadPoolExecutor for parallel port testing
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(ports)) as executor:
-            # Create a future for each port test
-            future_to_port = {
-                executor.submit(test_port_connectivity, ip, port, timeout): port
-                for port in ports
-            }
-
-            # Process results as they complete
-            for future in concurrent.futures.as_completed(future_to_port):
-                port = future_to_port[future]
-                try:
-                    is_open = future.result()
-                    if is_open:
-                        open_ports.append(port)
-                except Exception:
-                    # Handle any exceptions during port testing
-                    pass
-    else:
-        # Sequential port testing
-        for port in ports:
-            if test_port_connectivity(ip, port, timeout):
-                open_ports.append(port)
-
-    # Device is considered up if at least one port is open
-    if len(open_ports) > 0:
-        return True, open_ports
-
-    # TCP failed - try ping fallback if enabled
-    if ping_fallback:
-        if ping_host(ip, timeout):
-            return True, ['icmp']
-
-    # Everything failed
-    return False, []
+    # One-off engine; monitoring cycles share a ReachabilityProber instead
+    with ReachabilityProber(ports, timeout, ping_fallback,
+                            max_concurrency=len(ports) if parallel else 1) as prober:
+        return prober.probe(ip)
 
 
 def modify_svg_with_status(
@@ -286,12 +255,16 @@ def modify_svg_with_status(
         test_connectivity: bool = True,
         timeout: float = 2.0,
         simulate_failures: List[str] = None,
-        test_mode: bool = False
+        test_mode: bool = False,
+        prober: Optional[ReachabilityProber] = None
 ) -> Dict[str, int]:
     """
     Modify an SVG file to highlight devices based on connectivity status.
     Enhanced version with IP resolution, multi-port checking, improved readability,
     and interactive clickable nodes.
+
+    All devices on the map are probed in one concurrent batch. Pass a shared
+    prober to reuse its per-cycle results across maps.
     """
     # Import the interactive functionality
     try:
@@ -322,8 +295,6 @@ def modify_svg_with_status(
 
     # Get monitoring settings
     monitor_ports = config.get("monitor_ports", [22, 80])
-    connection_timeout = config.get("monitoring", {}).get("timeout", timeout)
-    parallel_checks = config.get("monitoring", {}).get("parallel_checks", True)
     ping_fallback = config.get("monitoring", {}).get("ping_fallback", True)
 
     # Create a mapping from position to device data
@@ -377,7 +348,8 @@ def modify_svg_with_status(
     up_devices = []
     down_devices = []
 
-    # Process each image element
+    # Match image elements to devices and resolve IPs before probing
+    nodes = []
     for img_elem in image_elements:
         # Get position and size
         x = float(img_elem.get('x', '0'))
@@ -431,6 +403,22 @@ def modify_svg_with_status(
             status_counts["unknown"] += 1
             continue
 
+        nodes.append((img_elem, device, device_ip, device_name, x, y, width, height))
+
+    # Probe every device on the map concurrently
+    probe_results = {}
+    if test_connectivity and not test_mode:
+        probe_ips = [node[2] for node in nodes
+                     if not (simulate_failures and node[2] in simulate_failures)]
+        print(f"Testing {len(set(probe_ips))} devices on ports {monitor_ports}...")
+        if prober is not None:
+            probe_results = prober.probe_many(probe_ips)
+        else:
+            with ReachabilityProber.from_config(config, timeout) as map_prober:
+                probe_results = map_prober.probe_many(probe_ips)
+
+    # Draw each device's status
+    for img_elem, device, device_ip, device_name, x, y, width, height in nodes:
         # Determine connectivity status
         if test_mode:
             # In test mode, mark all devices with IPs as down
@@ -443,18 +431,14 @@ def modify_svg_with_status(
             open_ports = []
             print(f"  {device_ip} ({device_name}): DOWN (simulated)")
         elif test_connectivity:
-            # Actually test connectivity to multiple ports (with ping fallback)
-            print(f"  Testing {device_ip} ({device_name}) on ports {monitor_ports}...", end="", flush=True)
-            is_up, open_ports = test_multiple_ports(
-                device_ip, monitor_ports, connection_timeout, parallel_checks, ping_fallback
-            )
+            is_up, open_ports = probe_results.get(device_ip, (False, []))
             status = "up" if is_up else "down"
 
             # Format the result message
             if open_ports == ['icmp']:
-                print(f" {status.upper()} (ICMP ping only)")
+                print(f"  {device_ip} ({device_name}): {status.upper()} (ICMP ping only)")
             else:
-                print(f" {status.upper()} (Open ports: {open_ports})")
+                print(f"  {device_ip} ({device_name}): {status.upper()} (Open ports: {open_ports})")
 
             # Track connectivity results for summary
             if status == "up":
@@ -662,12 +646,14 @@ def create_status_overlay(
         timeout: float = 2.0,
         simulate_failures: List[str] = None,
         test_mode: bool = False,
-        save_json: bool = True
+        save_json: bool = True,
+        prober: Optional[ReachabilityProber] = None
 ) -> Dict[str, int]:
     """
     Create a network status overlay SVG.
 
     Enhanced version with IP resolution and multi-port checking.
+    A shared prober lets several maps reuse one cycle's probe results.
     """
     print(f"Creating network status overlay...")
     print(f"Input SVG: {svg_path}")
@@ -701,6 +687,7 @@ def create_status_overlay(
         timeout,
         simulate_failures,
         test_mode,
+        prober,
     )
 
     # Print summary
@@ -739,6 +726,9 @@ def main():
         # Load configuration
         config = load_config(args.config)
 
+        # Room for the probe sockets (the open-file limit is process-wide, so set it once here)
+        raise_fd_limit(ReachabilityProber.concurrency_from_config(config))
+
         # Override ports if specified in command line
         if args.ports:
             try:
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+TextFSM Parse Pool
+
+Process-based worker pool for the CPU-bound TextFSM work in the capture
+loaders (ARP, inventory). TextFSM is pure Python, so threads do not help;
+each worker process holds its own TextFSMAutoEngine, pre-warmed with the
+loader's filters at start-up.
+
+Jobs are (content, filters) pairs. Results stream back in submission order
+through a bounded window, so the parent process stays the single DB writer
+and memory stays flat regardless of how many captures are queued.
+
+Usage:
+    with ParsePool(textfsm_db_path, workers=8, warm_filters=filters) as pool:
+        for tag, filter_results in pool.imap((tag, ParseJob(...)) for ...):
+            ...
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (filter_string, template_name, parsed_data, score)
+FilterResult = Tuple[str, Optional[str], Optional[List[Dict]], float]
+
+# Per-process engine, created by _init_worker
+_worker_engine = None
+
+
+@dataclass
+class ParseJob:
+    """One capture's worth of TextFSM work"""
+    content: str
+    filters: List[str]
+    platform: Optional[str] = None
+    stop_score: Optional[float] = None
+
+
+def iter_filter_results(engine, content: str, filters: List[str],
+                        platform: Optional[str] = None) -> Iterator[FilterResult]:
+    """
+    Run find_best_template for each filter in order, lazily.
+
+    Filters that raise are skipped, matching how the loaders already treat
+    per-filter failures. Callers that break out early avoid the remaining
+    parses.
+    """
+    for filter_string in filters:
+        try:
+            result = engine.find_best_template(content, filter_string, platform=platform)
+        except Exception as e:
+            logger.debug(f"Filter '{filter_string}' failed: {e}")
+            continue
+
+        if len(result) < 3:
+            logger.debug(f"Unexpected result format from '{filter_string}': {len(result)} items")
+            continue
+
+        template, parsed_data, score = result[0], result[1], result[2]
+        yield filter_string, template, parsed_data, score
+
+
+def _init_worker(textfsm_db_path: str, warm_filters: List[str]):
+    """Build this process's engine and compile the templates it will need"""
+    global _worker_engine
+    from tfsm_fire import TextFSMAutoEngine
+
+    _worker_engine = TextFSMAutoEngine(textfsm_db_path, verbose=False)
+    for filter_string in warm_filters:
+        try:
+            _worker_engine.registry.warm(filter_string)
+        except Exception as e:
+            logger.debug(f"Could not pre-warm filter '{filter_string}': {e}")
+
+
+def _run_job(job: ParseJob) -> List[FilterResult]:
+    results = []
+    for result in iter_filter_results(_worker_engine, job.content, job.filters, job.platform):
+        results.append(result)
+        score, parsed_data = result[3], result[2]
+        if job.stop_score is not None and score is not None and score > job.stop_score and parsed_data:
+            break
+    return results
+
+
+class ParsePool:
+    """Ordered, bounded process pool for TextFSM parse jobs"""
+
+    def __init__(self, textfsm_db_path: str, workers: Optional[int] = None,
+                 warm_filters: Optional[Iterable[str]] = None, prefetch: int = 4):
+        """
+        Args:
+            textfsm_db_path: Path to tfsm_templates.db (opened by each worker)
+            workers: Worker processes (default: CPU count)
+            warm_filters: Filters whose templates are compiled at worker start
+            prefetch: In-flight jobs per worker before the producer blocks
+        """
+        self.textfsm_db_path = os.path.abspath(textfsm_db_path)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.warm_filters = list(dict.fromkeys(warm_filters or []))
+        self.window = self.workers * max(1, prefetch)
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.textfsm_db_path, self.warm_filters)
+        )
+        logger.info(f"Started TextFSM parse pool with {self.workers} workers")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def imap(self, items: Iterable[Tuple[Any, Optional[ParseJob]]]) -> Iterator[
+            Tuple[Any, Optional[List[FilterResult]]]]:
+        """
+        Parse jobs in parallel and yield (tag, filter_results) in input order.
+
+        A None job is passed straight through as (tag, None) so callers can
+        keep unreadable files in sequence. A job that fails in the worker also
+        yields (tag, None).
+        """
+        if self._executor is None:
+            raise RuntimeError("ParsePool must be used as a context manager")
+
+        pending = deque()
+        for tag, job in items:
+            future = self._executor.submit(_run_job, job) if job is not None else None
+            pending.append((tag, future))
+            while len(pending) >= self.window:
+                yield self._resolve(*pending.popleft())
+
+        while pending:
+            yield self._resolve(*pending.popleft())
+
+    @staticmethod
+    def _resolve(tag: Any, future) -> Tuple[Any, Optional[List[FilterResult]]]:
+        if future is None:
+            return tag, None
+        try:
+            return tag, future.result()
+        except Exception as e:
+            logger.error(f"Parse worker failed: {e}")
+            return tag, None